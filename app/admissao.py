@@ -0,0 +1,308 @@
+"""
+ADMISSÃO POR MEMÓRIA (Xplors) - uma planilha gigante não derruba a instância
+
+Uma pasta de trabalho enorme no pd.read_excel (o openpyxl guarda um objeto
+Python por célula até o DataFrame ficar pronto: ~300 MB para 160 mil linhas x
+16 colunas, de um .xlsx de 9 MB) passa do limite de memória do Cloud Run: o
+kernel mata o worker e, junto, todas as requisições em andamento nele.
+
+Antes de ler a planilha, o /upload pede admissão ao ControleAdmissao:
+- estimativa do pico da leitura: células (dimensões sem ler as células, ver
+  app/ingestao.dimensoes_planilha) x bytes por célula do leitor; sem
+  dimensões, tamanho do arquivo x fator do formato (bench_admissao calibra)
+- memória em uso: RSS do processo (/proc/self/statm), ou o RSS ocioso + as
+  reservas das leituras admitidas que ainda não terminaram, o que for maior
+- cabe agora -> lê normalmente (a reserva vale até o fim da requisição)
+- cabe com o processo ocioso -> espera na fila (FIFO) até ADMISSAO_ESPERA_S;
+  estourou a espera -> leitura amostrada com o que couber agora
+- não cabe nem ocioso -> leitura amostrada em streaming: amostra aleatória
+  das linhas, do tamanho que cabe, sem materializar o arquivo inteiro (o
+  relatório diz que é amostra)
+- nem ADMISSAO_AMOSTRA_MIN_LINHAS cabem -> MemoriaInsuficiente: 503 com
+  Retry-After (passa quando outras leituras terminarem) ou 413 (não cabe nem
+  com o processo ocioso)
+
+MEMORIA_TETO_MB é o teto por worker do gunicorn; padrão = limite do contêiner
+(cgroup) x ADMISSAO_FRACAO / WEB_CONCURRENCY. Sem teto (configurado ou do
+cgroup), a admissão fica desligada. Os processos do pool de computação têm
+memória própria, limitada pela fila de app/computacao.py.
+"""
+
+import os
+import resource
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from app.ingestao import dimensoes_planilha
+from app.snapshot_planilha import caminho_snapshot, snapshot_existe
+
+ADMISSAO = os.getenv("ADMISSAO", "1").strip().lower() not in ("0", "false", "nao", "não")
+ADMISSAO_FRACAO = float(os.getenv("ADMISSAO_FRACAO", "0.85"))
+ADMISSAO_ESPERA_S = float(os.getenv("ADMISSAO_ESPERA_S", "20"))
+ADMISSAO_AMOSTRA_MIN_LINHAS = int(os.getenv("ADMISSAO_AMOSTRA_MIN_LINHAS", "5000"))
+
+# pico da leitura por célula (bench_admissao: ~112 B no .xlsx, ~30 B no CSV, com
+# folga): openpyxl/xlrd guardam objetos Python por célula até montar o
+# DataFrame; CSV sai em colunas (pyarrow / engine C). .xls: não medido, mais folga
+BYTES_CELULA = {"xlsx": 128, "xls": 160, "csv": 32}
+# sem dimensões: MB de pico por MB de arquivo (.xlsx é zip: ~4x menor que o CSV)
+FATOR_ARQUIVO = {"xlsx": 40, "xls": 15, "csv": 6}
+# snapshot Arrow -> pandas: o arquivo mapeado + o DataFrame convertido
+FATOR_SNAPSHOT = 2
+# bibliotecas, buffers de leitura e a cópia do preparar_planilha
+FIXO_MB = 32
+
+_MB = 1024 * 1024
+
+
+def _limite_cgroup_mb() -> float | None:
+    for caminho in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(caminho) as f:
+                valor = f.read().strip()
+        except OSError:
+            continue
+        if valor.isdigit() and int(valor) < 1 << 60:  # cgroup v1 sem limite: ~2^63
+            return int(valor) / _MB
+        return None
+    return None
+
+
+def _teto_padrao() -> float:
+    limite = _limite_cgroup_mb()
+    if limite is None:
+        return 0.0
+    return limite * ADMISSAO_FRACAO / max(1, int(os.getenv("WEB_CONCURRENCY", "2")))
+
+
+MEMORIA_TETO_MB = float(os.getenv("MEMORIA_TETO_MB", "0")) or _teto_padrao()
+
+
+def rss_mb() -> float:
+    """RSS atual do processo (o pico do getrusage se não houver /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / _MB
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoriaInsuficiente(Exception):
+    """A leitura não cabe na memória (`definitivo`: nem com o processo ocioso)."""
+
+    def __init__(self, mensagem: str, definitivo: bool = False):
+        super().__init__(mensagem)
+        self.definitivo = definitivo
+
+
+@dataclass
+class Estimativa:
+    formato: str
+    bytes_arquivo: int
+    linhas: int | None = None
+    colunas: int | None = None
+    mb: float = 0.0
+
+    @property
+    def mb_por_linha(self) -> float | None:
+        if not self.linhas or not self.colunas or self.formato not in BYTES_CELULA:
+            return None
+        return self.colunas * BYTES_CELULA[self.formato] / _MB
+
+    def linhas_que_cabem(self, mb: float) -> int:
+        """Linhas de uma leitura amostrada que cabem em `mb` (0 sem dimensões)."""
+        por_linha = self.mb_por_linha
+        if por_linha is None:
+            return 0
+        return max(0, min(self.linhas, int((mb - FIXO_MB) / por_linha)))
+
+    def mb_para(self, linhas: int) -> float:
+        return FIXO_MB + linhas * (self.mb_por_linha or 0.0)
+
+
+def estimar(bytes_arquivo: int, formato: str = "csv", linhas: int | None = None,
+            colunas: int | None = None) -> Estimativa:
+    """Pico de memória (MB) de ler a planilha inteira."""
+    est = Estimativa(formato, bytes_arquivo, linhas, colunas)
+    if est.mb_por_linha is not None:
+        est.mb = est.mb_para(linhas)
+    else:
+        est.mb = FIXO_MB + bytes_arquivo / _MB * FATOR_ARQUIVO.get(formato, max(FATOR_ARQUIVO.values()))
+    return est
+
+
+def estimar_arquivo(fonte, nome_arquivo: str | None = None, arquivo_hash: str | None = None) -> Estimativa:
+    """Estimativa pelo arquivo recebido (dimensões sem ler as células); snapshot Arrow, se houver."""
+    formato, tamanho, linhas, colunas = dimensoes_planilha(fonte, nome_arquivo)
+    est = estimar(tamanho, formato, linhas, colunas)
+    if arquivo_hash and snapshot_existe(arquivo_hash):
+        # processar_planilha vai ler o snapshot (sem openpyxl); a amostra, se precisar, sai do original
+        est.mb = FIXO_MB + os.path.getsize(caminho_snapshot(arquivo_hash)) / _MB * FATOR_SNAPSHOT
+    return est
+
+
+class Admissao:
+    """Reserva de memória de uma requisição; `modo` "completo" ou "amostra" (até `linhas_max`)."""
+
+    def __init__(self, controle: "ControleAdmissao | None", reservado_mb: float, modo: str = "completo",
+                 linhas_max: int | None = None, estimativa: Estimativa | None = None):
+        self._controle = controle
+        self.reservado_mb = reservado_mb
+        self.modo = modo
+        self.linhas_max = linhas_max
+        self.estimativa = estimativa
+
+    @property
+    def amostra(self) -> bool:
+        return self.modo == "amostra"
+
+    def liberar(self):
+        controle, self._controle = self._controle, None
+        if controle is not None:
+            controle._liberar(self)
+
+
+class ControleAdmissao:
+    def __init__(self, teto_mb: float = MEMORIA_TETO_MB if ADMISSAO else 0.0, espera_s: float = ADMISSAO_ESPERA_S,
+                 amostra_min_linhas: int = ADMISSAO_AMOSTRA_MIN_LINHAS, medir_rss=rss_mb):
+        self.teto_mb = teto_mb
+        self.espera_s = espera_s
+        self.amostra_min_linhas = amostra_min_linhas
+        self._medir_rss = medir_rss
+        self._cond = threading.Condition()
+        self._fila: deque = deque()
+        self._reservas: set[Admissao] = set()
+        self._rss_ocioso: float | None = None
+        self.admitidas = 0
+        self.no_recebimento = 0  # tentar(): CSV lido durante o upload
+        self.amostradas = 0
+        self.enfileiradas = 0
+        self.rejeitadas = 0
+        self.espera_total_s = 0.0
+        self.pico_rss_mb = 0.0
+
+    @property
+    def ativo(self) -> bool:
+        return self.teto_mb > 0
+
+    # --- sob self._cond ---
+    def _em_uso_mb(self) -> float:
+        rss = self._medir_rss()
+        self.pico_rss_mb = max(self.pico_rss_mb, rss)
+        if not self._reservas or self._rss_ocioso is None:
+            self._rss_ocioso = rss
+        # reserva ainda não alocada conta; a já alocada aparece no RSS (sem contar duas vezes)
+        return max(rss, self._rss_ocioso + sum(a.reservado_mb for a in self._reservas))
+
+    def _livre_mb(self) -> float:
+        return self.teto_mb - self._em_uso_mb()
+
+    def _reservar(self, mb: float, modo: str, est: Estimativa, linhas_max: int | None = None) -> Admissao:
+        admissao = Admissao(self, mb, modo, linhas_max, est)
+        self._reservas.add(admissao)
+        self.amostradas += modo == "amostra"
+        return admissao
+
+    def _amostra(self, est: Estimativa, livre_mb: float) -> Admissao | None:
+        linhas = est.linhas_que_cabem(livre_mb)
+        if not linhas or linhas < min(self.amostra_min_linhas, est.linhas or 0):
+            return None
+        print(f"🎲 Planilha de ~{est.mb:.0f} MB não cabe ({livre_mb:.0f} MB livres de {self.teto_mb:.0f} MB): "
+              f"amostra de {linhas} de ~{est.linhas} linhas")
+        return self._reservar(est.mb_para(linhas), "amostra", est, linhas)
+
+    def _liberar(self, admissao: Admissao):
+        with self._cond:
+            self._reservas.discard(admissao)
+            self._cond.notify_all()
+
+    # --- API ---
+    def tentar(self, est: Estimativa) -> Admissao | None:
+        """Admite a leitura completa só se ela cabe agora e ninguém espera na fila (sem fila nem amostra)."""
+        if not self.ativo:
+            return Admissao(None, 0.0, estimativa=est)
+        with self._cond:
+            if not self._fila and est.mb <= self._livre_mb():
+                self.no_recebimento += 1
+                return self._reservar(est.mb, "completo", est)
+        return None
+
+    def admitir(self, est: Estimativa) -> Admissao:
+        """Reserva memória para a leitura: completa (talvez após a fila), amostrada ou MemoriaInsuficiente."""
+        if not self.ativo:
+            return Admissao(None, 0.0, estimativa=est)
+
+        t0 = time.perf_counter()
+        with self._cond:
+            self._em_uso_mb()  # atualiza o RSS ocioso
+            capacidade = self.teto_mb - self._rss_ocioso
+            completa = est.mb <= capacidade
+            if completa:
+                alvo = est.mb
+            else:
+                linhas = est.linhas_que_cabem(capacidade)
+                if not linhas or linhas < min(self.amostra_min_linhas, est.linhas or 0):
+                    self.rejeitadas += 1
+                    raise MemoriaInsuficiente(
+                        f"Planilha grande demais: ~{est.mb:.0f} MB para ler, {capacidade:.0f} MB disponíveis",
+                        definitivo=True)
+                alvo = est.mb_para(linhas)
+
+            ticket = object()
+            self._fila.append(ticket)
+            try:
+                limite = time.monotonic() + self.espera_s
+                esperou = False
+                while True:
+                    livre = self._livre_mb()
+                    if self._fila[0] is ticket and alvo <= livre:
+                        admissao = self._reservar(est.mb, "completo", est) if completa else self._amostra(est, livre)
+                        if admissao is not None:
+                            self.admitidas += 1
+                            return admissao
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        break
+                    if not esperou:
+                        esperou = True
+                        self.enfileiradas += 1
+                        print(f"⏳ Leitura de ~{alvo:.0f} MB na fila ({livre:.0f} MB livres de {self.teto_mb:.0f} MB)")
+                    # o RSS cai sem aviso (GC, sessões expulsas): reavalia periodicamente
+                    self._cond.wait(min(restante, 0.25))
+
+                # espera estourou: amostra do que couber agora
+                admissao = self._amostra(est, self._livre_mb())
+                if admissao is not None:
+                    self.admitidas += 1
+                    return admissao
+                self.rejeitadas += 1
+                raise MemoriaInsuficiente(f"Memória ocupada há mais de {self.espera_s:g}s")
+            finally:
+                self._fila.remove(ticket)
+                self.espera_total_s += time.perf_counter() - t0
+                self._cond.notify_all()
+
+    def estatisticas(self) -> dict:
+        with self._cond:
+            em_uso = self._em_uso_mb() if self.ativo else self._medir_rss()
+            return {
+                "ativo": self.ativo,
+                "teto_mb": round(self.teto_mb, 1),
+                "em_uso_mb": round(em_uso, 1),
+                "rss_ocioso_mb": round(self._rss_ocioso or 0.0, 1),
+                "pico_rss_mb": round(self.pico_rss_mb, 1),
+                "reservado_mb": round(sum(a.reservado_mb for a in self._reservas), 1),
+                "em_andamento": len(self._reservas),
+                "na_fila": len(self._fila),
+                "admitidas": self.admitidas,
+                "no_recebimento": self.no_recebimento,
+                "amostradas": self.amostradas,
+                "enfileiradas": self.enfileiradas,
+                "rejeitadas": self.rejeitadas,
+                "espera_total_s": round(self.espera_total_s, 3),
+            }
+
+
+controle_admissao = ControleAdmissao()
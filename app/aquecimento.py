@@ -0,0 +1,173 @@
+"""
+AQUECIMENTO DOS WORKERS (Xplors) - primeira requisição sem inicialização preguiçosa
+
+Com `gunicorn -w 2 --threads 8`, o primeiro usuário de cada worker pagava a
+inicialização preguiçosa de tudo: cache de fontes do matplotlib, leitor do
+openpyxl, fontes/estilos do ReportLab, TLS com a OpenAI e com o Supabase.
+
+aquecer() roda no hook post_worker_init do gunicorn.conf.py, antes do worker
+aceitar conexões (o master já importou o app com preload_app):
+- bibliotecas: pandas, pyarrow, openpyxl, matplotlib (Agg), reportlab
+- planilha: um .xlsx de 20 linhas pelo processar_planilha
+- gráfico: um PNG descartável (constrói o cache de fontes)
+- pdf: um PDF completo descartável (gráficos + tabelas + texto)
+- computacao: sobe os processos do pool de etapas CPU (app/computacao.py) e
+  apaga tabelas compartilhadas órfãs de workers mortos
+- openai / supabase: uma ida e volta barata para abrir o pool de conexões
+
+Cada etapa é medida e falhas não impedem o worker de subir (só ficam
+registradas). instrumentar(app) mede a primeira requisição de usuário de cada
+processo; o estado aparece em /health.
+"""
+
+import io
+import os
+import tempfile
+import threading
+import time
+
+AQUECIMENTO = os.getenv("AQUECIMENTO", "1").strip().lower() not in ("0", "false", "nao", "não")
+AQUECIMENTO_TIMEOUT_S = float(os.getenv("AQUECIMENTO_TIMEOUT_S", "5"))
+
+_estado = {"aquecido": False, "pid": None, "etapas_s": {}, "erros": {}, "total_s": None,
+           "primeira_requisicao_s": None}
+_lock = threading.Lock()
+
+
+def _planilha_aquecimento():
+    import pandas as pd
+    return pd.DataFrame({
+        "Loja": [f"LOJA {i % 5:03d}" for i in range(20)],
+        "Região": ["Centro", "Norte", "Sul", "Leste"] * 5,
+        "Preço": [9.9 + i for i in range(20)],
+        "Produto na gôndola": ["SIM", "NÃO"] * 10,
+    })
+
+
+def _bibliotecas():
+    import numpy  # noqa: F401
+    import openpyxl  # noqa: F401
+    import pandas  # noqa: F401
+    import pyarrow  # noqa: F401
+    import reportlab.platypus  # noqa: F401
+    import app.chart_cache  # noqa: F401  (matplotlib com backend Agg)
+
+
+def _planilha():
+    from app.excel_processor import processar_planilha
+    buffer = io.BytesIO()
+    _planilha_aquecimento().to_excel(buffer, index=False)
+    buffer.seek(0)
+    processar_planilha(buffer, nome_arquivo="aquecimento.xlsx", usar_snapshot=False)
+
+
+def _grafico():
+    from app.chart_cache import ChartSpec, renderizar_png
+    # direto no renderizador: o PNG de aquecimento não entra no cache de gráficos
+    renderizar_png(ChartSpec.criar("barh", labels=["A", "B", "C"], valores=[3, 2, 1],
+                                   titulo="Aquecimento", xlabel="Ocorrências"))
+
+
+def _pdf():
+    from app.pdf_generator_com_graficos import gerar_pdf_xplors
+    fd, caminho = tempfile.mkstemp(prefix="xplors_aquecimento_", suffix=".pdf")
+    os.close(fd)
+    try:
+        gerar_pdf_xplors(
+            arquivo_saida=caminho,
+            tipo_analise="geral",
+            dados_analise={
+                "texto": "RESUMO EXECUTIVO\nRelatório de aquecimento.",
+                "total_linhas": 20,
+                "kpis": [{"label": "Registros", "value": "20", "tone": "purple"}],
+                "fatos": [{"titulo": "Top 3 - Loja", "colunas": ["#", "Loja", "Ocorrências"],
+                           "linhas": [["1", "LOJA 000", "4"], ["2", "LOJA 001", "4"], ["3", "LOJA 002", "4"]]}],
+            },
+            dados_excel=_planilha_aquecimento(),
+        )
+    finally:
+        os.remove(caminho)
+
+
+def _computacao():
+    from app.computacao import computacao
+    from app.tabela_compartilhada import tabelas
+    tabelas.limpar_orfas()
+    computacao.aquecer()
+
+
+def _openai(cliente):
+    # GET /models: sem custo de tokens, abre TLS + pool do httpx
+    if cliente is None or not hasattr(cliente, "with_options"):
+        return
+    cliente.with_options(timeout=AQUECIMENTO_TIMEOUT_S, max_retries=0).models.list()
+
+
+def _supabase(supabase):
+    if supabase is None:
+        return
+    supabase.table("analises").select("id").limit(1).execute()
+
+
+def aquecer(cliente_openai=None, supabase=None) -> dict:
+    """Roda as etapas de aquecimento (idempotente por processo) e devolve o estado."""
+    with _lock:
+        if _estado["aquecido"] and _estado["pid"] == os.getpid():
+            return dict(_estado)
+        if not AQUECIMENTO:
+            return dict(_estado)
+
+        etapas = {
+            "bibliotecas": _bibliotecas,
+            "planilha": _planilha,
+            "grafico": _grafico,
+            "pdf": _pdf,
+            "computacao": _computacao,
+            "openai": lambda: _openai(cliente_openai),
+            "supabase": lambda: _supabase(supabase),
+        }
+        tempos, erros = {}, {}
+        inicio = time.perf_counter()
+        for nome, etapa in etapas.items():
+            t0 = time.perf_counter()
+            try:
+                etapa()
+            except Exception as e:
+                erros[nome] = f"{type(e).__name__}: {e}"
+                print(f"⚠️ Aquecimento '{nome}' falhou: {e}")
+            tempos[nome] = round(time.perf_counter() - t0, 3)
+
+        _estado.update(aquecido=True, pid=os.getpid(), etapas_s=tempos, erros=erros,
+                       total_s=round(time.perf_counter() - inicio, 3))
+        print(f"🔥 Worker {os.getpid()} aquecido em {_estado['total_s']:.2f}s "
+              + " | ".join(f"{k} {v:.2f}s" for k, v in tempos.items()))
+        return dict(_estado)
+
+
+def status() -> dict:
+    return dict(_estado, etapas_s=dict(_estado["etapas_s"]), erros=dict(_estado["erros"]))
+
+
+def instrumentar(app, ignorar: tuple = ("health", "home")):
+    """
+    Mede a latência da primeira requisição de usuário deste processo (com ou
+    sem aquecimento); `ignorar`: endpoints de sonda (health check do Cloud Run).
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _inicio_requisicao():
+        if _estado["primeira_requisicao_s"] is None and request.endpoint not in ignorar:
+            g.aquecimento_inicio = time.perf_counter()
+
+    @app.after_request
+    def _fim_requisicao(resposta):
+        inicio = g.pop("aquecimento_inicio", None)
+        if inicio is not None:
+            with _lock:
+                if _estado["primeira_requisicao_s"] is None:
+                    _estado["primeira_requisicao_s"] = round(time.perf_counter() - inicio, 3)
+                    print(f"⏱️ Primeira requisição do worker {os.getpid()}: "
+                          f"{_estado['primeira_requisicao_s'] * 1000:.0f}ms "
+                          f"({'aquecido' if _estado['aquecido'] else 'sem aquecimento'})")
+        return resposta
@@ -0,0 +1,384 @@
+"""
+ARMAZENAMENTO (Xplors) - Supabase ou local (SQLite + sistema de arquivos)
+
+main.py, cost_tracker.py e supabase_client.py falam com o cliente do
+Supabase pela interface encadeada (table().select().eq()...execute(),
+storage.from_().upload()). Sem um projeto no ar não dava para rodar o
+/upload inteiro em teste de carga. criar_cliente() devolve:
+
+- ARMAZENAMENTO=supabase (padrão com SUPABASE_URL/SUPABASE_KEY): o cliente
+  oficial, como antes
+- ARMAZENAMENTO=local: ArmazenamentoLocal, com as mesmas operações usadas
+  hoje - insert, select (projeção), eq/gt/gte/lt/lte/or_, order, limit,
+  delete; upload, remove, create_signed_url(s), get_public_url
+
+Local:
+- tabelas num arquivo SQLite (WAL; uma conexão por thread, então vale com
+  gunicorn threads/workers); colunas criadas conforme aparecem, `id` (uuid) e
+  `created_at` (UTC, ISO) preenchidos como os defaults de supabase-setup.sql;
+  dict/list gravados como JSON e devolvidos como dict/list
+- Storage em ARMAZENAMENTO_DIR/storage/<bucket>/<caminho>; upload de caminho
+  existente falha como no Supabase ("already exists", sem upsert)
+- URL "assinada" = file:// (ou ARMAZENAMENTO_URL_BASE/<bucket>/<caminho>, se
+  houver um servidor estático na pasta) com ?expires=
+
+Sem auth: verificar_token() devolve None no modo local.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+ARMAZENAMENTO_DIR = os.getenv("ARMAZENAMENTO_DIR", "/tmp/xplors_local")
+ARMAZENAMENTO_URL_BASE = os.getenv("ARMAZENAMENTO_URL_BASE", "").rstrip("/")
+
+_IDENTIFICADOR = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_OPERADORES_SQL = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# os mesmos índices de supabase-setup.sql (api_usage: consulta do gasto do mês)
+_INDICES = {
+    "analises": {
+        "idx_analises_user_created": ("user_id", "created_at DESC", "id DESC"),
+        "idx_analises_arquivo_hash": ("user_id", "arquivo_hash"),
+        "idx_analises_pdf_hash": ("pdf_hash",),
+    },
+    "api_usage": {
+        "idx_api_usage_user_created": ("user_id", "created_at"),
+    },
+}
+
+
+def criar_cliente(url: str | None = None, key: str | None = None):
+    """Cliente conforme ARMAZENAMENTO (lido na chamada, depois do load_dotenv); None se o Supabase não estiver configurado."""
+    if os.getenv("ARMAZENAMENTO", "").strip().lower() == "local":
+        return ArmazenamentoLocal(os.getenv("ARMAZENAMENTO_DIR", ARMAZENAMENTO_DIR))
+    url = url or os.getenv("SUPABASE_URL")
+    key = key or os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        return None
+    from supabase import create_client
+    return create_client(url, key)
+
+
+# =========================
+# TABELAS (SQLite)
+# =========================
+def _coluna(nome: str) -> str:
+    nome = nome.strip()
+    if not _IDENTIFICADOR.match(nome):
+        raise ValueError(f"Nome de coluna inválido: {nome!r}")
+    return nome
+
+
+def _dividir_no_topo(expr: str) -> list[str]:
+    """Separa por vírgula fora de parênteses e aspas."""
+    partes, atual, nivel, aspas, anterior = [], [], 0, False, ""
+    for ch in expr:
+        if ch == '"' and anterior != "\\":
+            aspas = not aspas
+        elif not aspas and ch == "(":
+            nivel += 1
+        elif not aspas and ch == ")":
+            nivel -= 1
+        if ch == "," and nivel == 0 and not aspas:
+            partes.append("".join(atual))
+            atual = []
+        else:
+            atual.append(ch)
+        anterior = ch
+    partes.append("".join(atual))
+    return partes
+
+
+def _filtro_sql(expr: str) -> tuple[str, list, list[str]]:
+    """Filtro lógico do PostgREST ("a.lt.1,and(b.eq.2,c.lt.3)") -> (sql, parâmetros, colunas)."""
+    expr = expr.strip()
+    for logico, juncao in (("and(", " AND "), ("or(", " OR ")):
+        if expr.startswith(logico) and expr.endswith(")"):
+            filhos = [_filtro_sql(p) for p in _dividir_no_topo(expr[len(logico):-1])]
+            sql = "(" + juncao.join(f[0] for f in filhos) + ")"
+            return sql, [p for f in filhos for p in f[1]], [c for f in filhos for c in f[2]]
+    coluna, op, valor = expr.split(".", 2)
+    if op not in _OPERADORES_SQL:
+        raise ValueError(f"Operador não suportado no modo local: {op}")
+    if valor.startswith('"') and valor.endswith('"'):
+        valor = valor[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    coluna = _coluna(coluna)
+    return f'"{coluna}" {_OPERADORES_SQL[op]} ?', [valor], [coluna]
+
+
+def _valor_sql(valor):
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+class _ConsultaLocal:
+    def __init__(self, banco: "_BancoLocal", tabela: str):
+        self._banco = banco
+        self._tabela = _coluna(tabela)
+        self._colunas: list[str] | None = None
+        self._filtros: list[str] = []
+        self._parametros: list = []
+        self._referenciadas: list[str] = []
+        self._ordem: list[str] = []
+        self._limite: int | None = None
+        self._insert: list[dict] | None = None
+        self._delete = False
+
+    def select(self, colunas: str = "*", count: str | None = None):
+        nomes = [c.strip() for c in colunas.split(",") if c.strip()]
+        self._colunas = None if "*" in nomes else [_coluna(c) for c in nomes]
+        return self
+
+    def insert(self, registros):
+        self._insert = [dict(r) for r in (registros if isinstance(registros, list) else [registros])]
+        return self
+
+    def delete(self):
+        self._delete = True
+        return self
+
+    def _comparar(self, op: str, coluna: str, valor):
+        coluna = _coluna(coluna)
+        self._filtros.append(f'"{coluna}" {_OPERADORES_SQL[op]} ?')
+        self._parametros.append(_valor_sql(valor))
+        self._referenciadas.append(coluna)
+        return self
+
+    def eq(self, coluna: str, valor):
+        return self._comparar("eq", coluna, valor)
+
+    def neq(self, coluna: str, valor):
+        return self._comparar("neq", coluna, valor)
+
+    def gt(self, coluna: str, valor):
+        return self._comparar("gt", coluna, valor)
+
+    def gte(self, coluna: str, valor):
+        return self._comparar("gte", coluna, valor)
+
+    def lt(self, coluna: str, valor):
+        return self._comparar("lt", coluna, valor)
+
+    def lte(self, coluna: str, valor):
+        return self._comparar("lte", coluna, valor)
+
+    def or_(self, filtros: str):
+        sql, parametros, colunas = _filtro_sql(f"or({filtros})")
+        self._filtros.append(sql)
+        self._parametros.extend(parametros)
+        self._referenciadas.extend(colunas)
+        return self
+
+    def order(self, coluna: str, desc: bool = False):
+        coluna = _coluna(coluna)
+        self._ordem.append(f'"{coluna}" {"DESC" if desc else "ASC"}')
+        self._referenciadas.append(coluna)
+        return self
+
+    def limit(self, n: int):
+        self._limite = int(n)
+        return self
+
+    def execute(self):
+        if self._insert is not None:
+            return SimpleNamespace(data=self._banco.inserir(self._tabela, self._insert), count=None)
+
+        self._banco.garantir_colunas(self._tabela, [*self._referenciadas, *(self._colunas or [])])
+        onde = f" WHERE {' AND '.join(self._filtros)}" if self._filtros else ""
+        if self._delete:
+            sql = f'DELETE FROM "{self._tabela}"{onde} RETURNING *'
+        else:
+            colunas = ", ".join(f'"{c}"' for c in self._colunas) if self._colunas else "*"
+            sql = f'SELECT {colunas} FROM "{self._tabela}"{onde}'
+            if self._ordem:
+                sql += f" ORDER BY {', '.join(self._ordem)}"
+            if self._limite is not None:
+                sql += f" LIMIT {self._limite}"
+        dados = self._banco.consultar(self._tabela, sql, self._parametros, escrita=self._delete)
+        return SimpleNamespace(data=dados, count=len(dados))
+
+
+class _BancoLocal:
+    """Arquivo SQLite compartilhado; conexões por thread."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._colunas: dict[str, set[str]] = {}
+        self._json: dict[str, set[str]] = {}
+        conn = self._conexao()
+        conn.execute('CREATE TABLE IF NOT EXISTS "_colunas_json" (tabela TEXT, coluna TEXT, PRIMARY KEY (tabela, coluna))')
+
+    def _conexao(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        # gunicorn com preload_app: a conexão aberta no master não serve ao worker (fork)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _carregar(self, tabela: str):
+        conn = self._conexao()
+        conn.execute(f'CREATE TABLE IF NOT EXISTS "{tabela}" (id TEXT PRIMARY KEY, created_at TEXT)')
+        self._colunas[tabela] = {r["name"] for r in conn.execute(f'PRAGMA table_info("{tabela}")')}
+        self._json[tabela] = {
+            r["coluna"] for r in conn.execute('SELECT coluna FROM "_colunas_json" WHERE tabela = ?', (tabela,))
+        }
+        for nome, colunas in _INDICES.get(tabela, {}).items():
+            for coluna in colunas:
+                self._adicionar_coluna(conn, tabela, coluna.split()[0])
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "{nome}" ON "{tabela}" ({", ".join(colunas)})')
+
+    def _adicionar_coluna(self, conn: sqlite3.Connection, tabela: str, coluna: str):
+        if coluna in self._colunas[tabela]:
+            return
+        try:
+            conn.execute(f'ALTER TABLE "{tabela}" ADD COLUMN "{coluna}"')
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):
+                raise
+        self._colunas[tabela].add(coluna)
+
+    def garantir_colunas(self, tabela: str, colunas, json_cols=()):
+        with self._lock:
+            if tabela not in self._colunas:
+                self._carregar(tabela)
+            conn = self._conexao()
+            for coluna in dict.fromkeys(colunas):
+                self._adicionar_coluna(conn, tabela, coluna)
+            for coluna in json_cols:
+                if coluna not in self._json[tabela]:
+                    conn.execute('INSERT OR IGNORE INTO "_colunas_json" VALUES (?, ?)', (tabela, coluna))
+                    self._json[tabela].add(coluna)
+
+    def _linha(self, tabela: str, linha: sqlite3.Row) -> dict:
+        registro = dict(linha)
+        for coluna in self._json.get(tabela, ()):
+            if isinstance(registro.get(coluna), str):
+                registro[coluna] = json.loads(registro[coluna])
+        return registro
+
+    def inserir(self, tabela: str, registros: list[dict]) -> list[dict]:
+        agora = datetime.now(timezone.utc).isoformat()
+        registros = [{"id": str(uuid.uuid4()), "created_at": agora, **r} for r in registros]
+        colunas = list(dict.fromkeys(c for r in registros for c in map(_coluna, r)))
+        json_cols = {c for r in registros for c, v in r.items() if isinstance(v, (dict, list))}
+        self.garantir_colunas(tabela, colunas, json_cols)
+
+        sql = (f'INSERT INTO "{tabela}" ({", ".join(f"{chr(34)}{c}{chr(34)}" for c in colunas)}) '
+               f'VALUES ({", ".join("?" * len(colunas))}) RETURNING *')
+        conn = self._conexao()
+        inseridos = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for r in registros:
+                inseridos.extend(conn.execute(sql, [_valor_sql(r.get(c)) for c in colunas]).fetchall())
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [self._linha(tabela, linha) for linha in inseridos]
+
+    def consultar(self, tabela: str, sql: str, parametros: list, escrita: bool = False) -> list[dict]:
+        conn = self._conexao()
+        if escrita:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                linhas = conn.execute(sql, parametros).fetchall()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        else:
+            linhas = conn.execute(sql, parametros).fetchall()
+        return [self._linha(tabela, linha) for linha in linhas]
+
+
+# =========================
+# STORAGE (sistema de arquivos)
+# =========================
+class _BucketLocal:
+    def __init__(self, pasta: Path, nome: str):
+        self.nome = nome
+        self.pasta = pasta / nome
+
+    def _arquivo(self, caminho: str) -> Path:
+        partes = [p for p in caminho.split("/") if p]
+        if not partes or any(p in (".", "..") for p in partes):
+            raise ValueError(f"Caminho inválido no Storage: {caminho!r}")
+        return self.pasta.joinpath(*partes)
+
+    def upload(self, path: str, file, file_options: dict | None = None):
+        destino = self._arquivo(path)
+        dados = file.read() if hasattr(file, "read") else bytes(file)
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(destino, "wb" if upsert else "xb") as f:
+                f.write(dados)
+        except FileExistsError:
+            raise Exception(f"The resource already exists (409 Duplicate): {path}") from None
+        return SimpleNamespace(path=path, full_path=f"{self.nome}/{path}")
+
+    def remove(self, paths: list[str]) -> list[dict]:
+        removidos = []
+        for path in paths:
+            try:
+                self._arquivo(path).unlink()
+                removidos.append({"name": path})
+            except FileNotFoundError:
+                pass
+        return removidos
+
+    def exists(self, path: str) -> bool:
+        return self._arquivo(path).is_file()
+
+    def get_public_url(self, path: str) -> str:
+        if ARMAZENAMENTO_URL_BASE:
+            return f"{ARMAZENAMENTO_URL_BASE}/{self.nome}/{path}"
+        return self._arquivo(path).resolve().as_uri()
+
+    def create_signed_url(self, path: str, expires_in: int, options: dict | None = None) -> dict:
+        url = f"{self.get_public_url(path)}?expires={int(time.time()) + int(expires_in)}"
+        return {"signedURL": url, "signedUrl": url}
+
+    def create_signed_urls(self, paths: list[str], expires_in: int, options: dict | None = None) -> list[dict]:
+        return [{"error": None, "path": p, **self.create_signed_url(p, expires_in)} for p in paths]
+
+
+class _StorageLocal:
+    def __init__(self, pasta: Path):
+        self.pasta = pasta
+
+    def from_(self, bucket: str) -> _BucketLocal:
+        return _BucketLocal(self.pasta, bucket)
+
+
+class ArmazenamentoLocal:
+    """Substituto do `supabase.Client` em disco: table() e storage.from_() com a mesma interface."""
+
+    def __init__(self, pasta: str = ARMAZENAMENTO_DIR):
+        self.pasta = Path(pasta)
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._banco = _BancoLocal(str(self.pasta / "banco.sqlite3"))
+        self.storage = _StorageLocal(self.pasta / "storage")
+        print(f"🗄️ Armazenamento local em {self.pasta}")
+
+    def table(self, nome: str) -> _ConsultaLocal:
+        return _ConsultaLocal(self._banco, nome)
@@ -0,0 +1,331 @@
+"""
+CACHE DE GRÁFICOS (Xplors) - PNG por especificação
+
+- ChartSpec: descrição hashable de um gráfico (tipo, séries, rótulos, estilo)
+- renderizar_png: desenha a spec com matplotlib (API orientada a objetos,
+  sem pyplot -> seguro entre threads do gunicorn)
+- CacheGraficos: LRU limitado (itens + bytes) de PNGs já renderizados,
+  opcionalmente persistido em disco (CHART_CACHE_DIR)
+
+Gráficos idênticos (mesmos dados/rótulos/estilo) renderizam uma única vez,
+entre usuários e reexecuções.
+"""
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from io import BytesIO
+
+import matplotlib
+matplotlib.use("Agg")  # headless
+from matplotlib.figure import Figure
+
+DPI_PADRAO = 160
+FIGSIZE_PADRAO = (6.4, 4.8)
+
+TIPOS_SUPORTADOS = ("barh", "bar", "hist", "radar", "pie", "line")
+
+# "png": matplotlib -> PNG (este módulo) | "vetorial": ReportLab graphics (app/chart_vetorial.py)
+BACKENDS = ("png", "vetorial")
+
+
+def backend_graficos() -> str:
+    backend = (os.getenv("CHART_BACKEND") or "png").strip().lower()
+    return backend if backend in BACKENDS else "png"
+
+
+def _congelar(v):
+    if isinstance(v, dict):
+        return tuple(sorted((str(k), _congelar(x)) for k, x in v.items()))
+    if isinstance(v, (list, tuple)):
+        return tuple(_congelar(x) for x in v)
+    if hasattr(v, "item") and not isinstance(v, (str, bytes)):
+        return v.item()  # escalares numpy
+    return v
+
+
+def _num(x) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return float("nan")
+
+
+# =========================
+# ESPECIFICAÇÃO
+# =========================
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    tipo:
+      - barh / bar / pie: `labels` + uma série de valores
+      - line: `labels` (eixo x) + uma ou mais séries nomeadas
+      - radar: `labels` (eixos) + uma série (0 a `ylim`)
+      - hist: `series[0]` = contagens por faixa e `bordas` = limites das faixas
+    """
+    tipo: str
+    labels: tuple = ()
+    series: tuple = ()          # ((nome, (v1, v2, ...)), ...)
+    titulo: str = ""
+    xlabel: str = ""
+    ylabel: str = ""
+    bordas: tuple = ()          # só para hist
+    estilo: tuple = ()          # ((chave, valor), ...) ex.: figsize, dpi, cores, ylim
+
+    _chave: str = field(default="", init=False, repr=False, compare=False)
+
+    @classmethod
+    def criar(cls, tipo: str, labels=(), valores=None, series=None, titulo: str = "",
+              xlabel: str = "", ylabel: str = "", bordas=(), **estilo) -> "ChartSpec":
+        if tipo not in TIPOS_SUPORTADOS:
+            raise ValueError(f"Tipo de gráfico não suportado: {tipo}")
+
+        if series is None:
+            series = [("", valores if valores is not None else [])]
+        elif isinstance(series, dict):
+            series = list(series.items())
+
+        return cls(
+            tipo=tipo,
+            labels=tuple(str(l) for l in labels),
+            series=tuple((str(nome), tuple(_num(v) for v in vals)) for nome, vals in series),
+            titulo=str(titulo or ""),
+            xlabel=str(xlabel or ""),
+            ylabel=str(ylabel or ""),
+            bordas=tuple(_num(b) for b in bordas),
+            estilo=_congelar(estilo),
+        )
+
+    @classmethod
+    def histograma(cls, valores, bins: int = 20, **kwargs) -> "ChartSpec":
+        """Pré-agrega o histograma: a spec guarda contagens, não os dados brutos."""
+        import numpy as np
+        arr = np.asarray(valores, dtype=float)
+        arr = arr[~np.isnan(arr)]
+        contagens, bordas = np.histogram(arr, bins=bins)
+        return cls.criar("hist", valores=contagens.tolist(), bordas=bordas.tolist(), **kwargs)
+
+    @property
+    def valores(self) -> tuple:
+        return self.series[0][1] if self.series else ()
+
+    def opcao(self, chave: str, padrao=None):
+        for k, v in self.estilo:
+            if k == chave:
+                return v
+        return padrao
+
+    @property
+    def chave(self) -> str:
+        """Hash estável (sha256) dos dados + estilo do gráfico."""
+        if not self._chave:
+            bruto = json.dumps(
+                [self.tipo, self.labels, self.series, self.titulo, self.xlabel,
+                 self.ylabel, self.bordas, self.estilo],
+                ensure_ascii=False, separators=(",", ":"), default=str
+            )
+            object.__setattr__(self, "_chave", hashlib.sha256(bruto.encode("utf-8")).hexdigest())
+        return self._chave
+
+
+# =========================
+# RENDERIZAÇÃO (matplotlib)
+# =========================
+def _desenhar(spec: ChartSpec, fig: Figure):
+    cores = spec.opcao("cores")
+    cores = list(cores) if cores else None
+
+    if spec.tipo == "radar":
+        ax = fig.add_subplot(111, polar=True)
+        n = len(spec.labels)
+        angles = [i / float(n) * 2 * math.pi for i in range(n)]
+        valores = list(spec.valores)
+        ax.set_theta_offset(math.pi / 2)
+        ax.set_theta_direction(-1)
+        ax.set_rlabel_position(0)
+        ax.set_xticks(angles)
+        ax.set_xticklabels(spec.labels)
+        ylim = spec.opcao("ylim")
+        if ylim:
+            ax.set_ylim(*ylim)
+        ax.plot(angles + angles[:1], valores + valores[:1])
+        ax.fill(angles + angles[:1], valores + valores[:1], alpha=0.25)
+    else:
+        ax = fig.add_subplot(111)
+
+    if spec.tipo == "barh":
+        pos = range(len(spec.labels))
+        ax.barh(pos, spec.valores, color=cores[:len(spec.labels)] if cores else None)
+        ax.set_yticks(list(pos))
+        ax.set_yticklabels(spec.labels)
+
+    elif spec.tipo == "bar":
+        pos = range(len(spec.labels))
+        ax.bar(pos, spec.valores, color=cores[:len(spec.labels)] if cores else None)
+        ax.set_xticks(list(pos))
+        ax.set_xticklabels(spec.labels)
+
+    elif spec.tipo == "hist":
+        bordas = list(spec.bordas)
+        if len(bordas) >= 2:
+            ax.hist(bordas[:-1], bins=bordas, weights=list(spec.valores))
+
+    elif spec.tipo == "pie":
+        ax.pie(spec.valores, labels=spec.labels, autopct=spec.opcao("autopct", "%1.1f%%"),
+               colors=cores[:len(spec.labels)] if cores else None, startangle=spec.opcao("startangle", 90))
+
+    elif spec.tipo == "line":
+        x = list(range(len(spec.labels))) if spec.labels else None
+        for nome, vals in spec.series:
+            xs = x[:len(vals)] if x else list(range(len(vals)))
+            ax.plot(xs, vals, marker="o", label=nome or None, linewidth=2)
+        if spec.labels and len(spec.labels) <= 25:
+            ax.set_xticks(x)
+            ax.set_xticklabels(spec.labels)
+        if any(nome for nome, _ in spec.series):
+            ax.legend()
+
+    titulo_kw = {}
+    if spec.opcao("titulo_destaque"):
+        titulo_kw = {"fontsize": 14, "fontweight": "bold", "color": "#1e1b4b"}
+    if spec.titulo:
+        ax.set_title(spec.titulo, **titulo_kw)
+    if spec.xlabel:
+        ax.set_xlabel(spec.xlabel)
+    if spec.ylabel:
+        ax.set_ylabel(spec.ylabel)
+
+    grade = spec.opcao("grade")
+    if grade:
+        ax.grid(True, alpha=0.3, axis=grade if grade in ("x", "y") else "both")
+
+
+def renderizar_png(spec: ChartSpec) -> bytes:
+    fig = Figure(figsize=spec.opcao("figsize", FIGSIZE_PADRAO))
+    _desenhar(spec, fig)
+    fig.tight_layout()
+
+    buffer = BytesIO()
+    savefig_kw = {"format": "png", "dpi": spec.opcao("dpi", DPI_PADRAO)}
+    if spec.opcao("bbox_tight"):
+        savefig_kw["bbox_inches"] = "tight"
+    fig.savefig(buffer, **savefig_kw)
+    return buffer.getvalue()
+
+
+# =========================
+# CACHE LRU (+ disco opcional)
+# =========================
+class CacheGraficos:
+    def __init__(self, max_itens: int = 256, max_bytes: int = 64 * 1024 * 1024, pasta_disco: str | None = None):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.pasta_disco = pasta_disco or None
+        self._itens: OrderedDict[str, bytes] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+
+        if self.pasta_disco:
+            os.makedirs(self.pasta_disco, exist_ok=True)
+
+    def _caminho_disco(self, chave: str) -> str:
+        return os.path.join(self.pasta_disco, chave[:2], f"{chave}.png")
+
+    def _ler_disco(self, chave: str) -> bytes | None:
+        if not self.pasta_disco:
+            return None
+        try:
+            with open(self._caminho_disco(chave), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _gravar_disco(self, chave: str, png: bytes):
+        if not self.pasta_disco:
+            return
+        destino = self._caminho_disco(chave)
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(png)
+            os.replace(tmp, destino)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar gráfico em cache no disco: {e}")
+
+    def _guardar(self, chave: str, png: bytes):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return
+            self._itens[chave] = png
+            self._bytes += len(png)
+            while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                _, antigo = self._itens.popitem(last=False)
+                self._bytes -= len(antigo)
+
+    def obter(self, spec: ChartSpec) -> bytes:
+        chave = spec.chave
+        with self._lock:
+            png = self._itens.get(chave)
+            if png is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return png
+
+        png = self._ler_disco(chave)
+        if png is None:
+            png = renderizar_png(spec)
+            self._gravar_disco(chave, png)
+            with self._lock:
+                self.faltas += 1
+        else:
+            with self._lock:
+                self.acertos += 1
+
+        self._guardar(chave, png)
+        return png
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+            self.acertos = 0
+            self.faltas = 0
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "disco": self.pasta_disco,
+            }
+
+
+cache_graficos = CacheGraficos(
+    max_itens=int(os.getenv("CHART_CACHE_MAX_ITENS", "256")),
+    max_bytes=int(os.getenv("CHART_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    pasta_disco=os.getenv("CHART_CACHE_DIR") or None,
+)
+
+
+def obter_png(spec: ChartSpec) -> bytes:
+    return cache_graficos.obter(spec)
+
+
+def salvar_grafico(spec: ChartSpec, path: str) -> str:
+    """Grava o PNG (do cache quando possível) em `path` e retorna o path."""
+    png = obter_png(spec)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(png)
+    return path
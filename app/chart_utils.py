@@ -1,9 +1,7 @@
 # backend/app/chart_utils.py
 import os
-import math
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+
+from app.chart_cache import ChartSpec, salvar_grafico
 
 
 def _safe_num(x, default=0.0):
@@ -39,41 +37,19 @@ def gerar_graficos_imagem(payload: dict, out_dir: str) -> list[str]:
         ]
         values = [_safe_num(sub.get(k), 0.0) for k in keys]
 
-        angles = [n / float(len(labels)) * 2 * math.pi for n in range(len(labels))]
-        values_cycle = values + values[:1]
-        angles_cycle = angles + angles[:1]
-
-        plt.figure()
-        ax = plt.subplot(111, polar=True)
-        ax.set_theta_offset(math.pi / 2)
-        ax.set_theta_direction(-1)
-        ax.set_rlabel_position(0)
-        plt.xticks(angles, labels)
-        ax.set_ylim(0, 10)
-
-        ax.plot(angles_cycle, values_cycle)
-        ax.fill(angles_cycle, values_cycle, alpha=0.25)
-
-        plt.title("Score de Execução (0 a 10)")
+        spec = ChartSpec.criar("radar", labels=labels, valores=values,
+                               titulo="Score de Execução (0 a 10)", ylim=(0, 10))
         path = os.path.join(out_dir, "imagem_radar_scores.png")
-        plt.tight_layout()
-        plt.savefig(path, dpi=160)
-        plt.close()
-        charts.append(path)
+        charts.append(salvar_grafico(spec, path))
 
     upl_min = _safe_num((payload or {}).get("uplist_percent_min"), 0.0)
     upl_max = _safe_num((payload or {}).get("uplist_percent_max"), 0.0)
 
     if upl_min > 0 or upl_max > 0:
-        plt.figure()
-        plt.bar(["Uplift mín", "Uplift máx"], [upl_min, upl_max])
-        plt.title("Impacto estimado em vendas (faixa)")
-        plt.ylabel("%")
+        spec = ChartSpec.criar("bar", labels=["Uplift mín", "Uplift máx"], valores=[upl_min, upl_max],
+                               titulo="Impacto estimado em vendas (faixa)", ylabel="%")
         path = os.path.join(out_dir, "imagem_uplift_min_max.png")
-        plt.tight_layout()
-        plt.savefig(path, dpi=160)
-        plt.close()
-        charts.append(path)
+        charts.append(salvar_grafico(spec, path))
 
     return charts
 
@@ -0,0 +1,265 @@
+"""
+GRÁFICOS VETORIAIS (Xplors) - ChartSpec -> ReportLab Drawing
+
+Desenha as mesmas ChartSpecs do cache de PNG (app/chart_cache.py) direto como
+gráficos nativos do ReportLab (barh, bar, hist, radar, pie, line).
+O Drawing é um Flowable: entra na story sem rasterizar, sem PNG e sem perda
+de nitidez ao escalar.
+
+Backend escolhido por CHART_BACKEND:
+- "png" (padrão): matplotlib -> PNG (em cache) -> RLImage
+- "vetorial": ReportLab graphics
+"""
+
+import math
+
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.charts.spider import SpiderChart
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.units import cm
+
+from app.chart_cache import ChartSpec, BACKENDS, backend_graficos  # noqa: F401 (reexport)
+from app.pdf_estilos import COR_ROXO, COR_ROXO_ESCURO, FONTE_NORMAL, FONTE_NEGRITO
+
+PALETA = ['#8b5cf6', '#14b8a6', '#6366f1', '#0ea5e9', '#f59e0b', '#10b981']
+
+_FONTE_TITULO = 11
+_FONTE_EIXO = 7.5
+
+
+def _cor(c, padrao=COR_ROXO):
+    if not c:
+        return padrao
+    try:
+        return colors.HexColor(c) if isinstance(c, str) else c
+    except Exception:
+        return padrao
+
+
+def _valores(spec: ChartSpec, serie: int = 0) -> list[float]:
+    vals = spec.series[serie][1] if len(spec.series) > serie else ()
+    return [0.0 if (v is None or math.isnan(v)) else float(v) for v in vals]
+
+
+def _rotulo(texto: str, max_chars: int = 32) -> str:
+    texto = str(texto)
+    return texto if len(texto) <= max_chars else texto[: max_chars - 1] + "…"
+
+
+def _largura_texto(textos, fonte: float) -> float:
+    return max((stringWidth(str(t), FONTE_NORMAL, fonte) for t in textos), default=0.0)
+
+
+def _titulo(d: Drawing, spec: ChartSpec):
+    if spec.titulo:
+        cor = COR_ROXO_ESCURO if spec.opcao("titulo_destaque") else colors.black
+        d.add(String(d.width / 2, d.height - _FONTE_TITULO - 2, _rotulo(spec.titulo, 90),
+                     fontName=FONTE_NEGRITO, fontSize=_FONTE_TITULO, fillColor=cor, textAnchor="middle"))
+
+
+def _eixos(d: Drawing, spec: ChartSpec, x0: float, y0: float, largura: float, altura: float):
+    if spec.xlabel:
+        d.add(String(x0 + largura / 2, 4, _rotulo(spec.xlabel, 60),
+                     fontName=FONTE_NORMAL, fontSize=_FONTE_EIXO + 0.5, textAnchor="middle"))
+    if spec.ylabel:
+        s = String(0, 0, _rotulo(spec.ylabel, 40), fontName=FONTE_NORMAL,
+                   fontSize=_FONTE_EIXO + 0.5, textAnchor="middle")
+        g = Group(s)
+        g.translate(9, y0 + altura / 2)
+        g.rotate(90)
+        d.add(g)
+
+
+def _estilo_eixo_valor(eixo, valores: list[float], grade: bool, extensao: float):
+    eixo.valueMin = min(0.0, min(valores, default=0.0))
+    eixo.valueMax = max(0.0, max(valores, default=0.0)) * 1.05 or 1.0
+    eixo.labels.fontName = FONTE_NORMAL
+    eixo.labels.fontSize = _FONTE_EIXO
+    eixo.strokeColor = colors.HexColor("#9ca3af")
+    if grade:
+        eixo.visibleGrid = 1
+        eixo.gridStrokeColor = colors.HexColor("#e5e7eb")
+        eixo.gridStrokeWidth = 0.5
+        eixo.gridStart = 0
+        eixo.gridEnd = extensao
+
+
+def _barras(spec: ChartSpec, d: Drawing, horizontal: bool):
+    valores = _valores(spec)
+    labels = [_rotulo(l) for l in spec.labels] or [""] * len(valores)
+    cores = spec.opcao("cores")
+    grade = bool(spec.opcao("grade"))
+
+    topo = d.height - (_FONTE_TITULO + 10 if spec.titulo else 6)
+    base = 22 if spec.xlabel else 14
+
+    if horizontal:
+        esquerda = min(d.width * 0.45, _largura_texto(labels, _FONTE_EIXO) + 8) + (18 if spec.ylabel else 4)
+        bc = HorizontalBarChart()
+        bc.categoryAxis.labels.boxAnchor = "e"
+        bc.categoryAxis.labels.dx = -3
+    else:
+        esquerda = 34 + (14 if spec.ylabel else 0)
+        bc = VerticalBarChart()
+        bc.categoryAxis.labels.boxAnchor = "n"
+        if len(labels) > 8:
+            bc.categoryAxis.labels.angle = 30
+            bc.categoryAxis.labels.boxAnchor = "ne"
+            base += 16
+
+    bc.x = esquerda
+    bc.y = base + 10
+    bc.width = d.width - esquerda - 12
+    bc.height = topo - bc.y
+    bc.data = [valores]
+    bc.categoryAxis.categoryNames = labels
+    bc.categoryAxis.labels.fontName = FONTE_NORMAL
+    bc.categoryAxis.labels.fontSize = _FONTE_EIXO
+    bc.categoryAxis.strokeColor = colors.HexColor("#9ca3af")
+    bc.bars.strokeColor = None
+    bc.bars[0].fillColor = COR_ROXO
+    bc.barSpacing = 0
+    bc.groupSpacing = 0 if spec.tipo == "hist" else 4
+
+    if cores:
+        for i in range(len(valores)):
+            bc.bars[(0, i)].fillColor = _cor(cores[i % len(cores)])
+
+    _estilo_eixo_valor(bc.valueAxis, valores, grade, bc.height if horizontal else bc.width)
+    d.add(bc)
+    _eixos(d, spec, bc.x, bc.y, bc.width, bc.height)
+
+
+def _histograma(spec: ChartSpec, d: Drawing):
+    bordas = list(spec.bordas)
+    n = len(_valores(spec))
+    passo = max(1, n // 8)
+    labels = []
+    for i in range(n):
+        labels.append(f"{bordas[i]:.2f}".rstrip("0").rstrip(".") if (i % passo == 0 and i < len(bordas)) else "")
+    h = ChartSpec(tipo="hist", labels=tuple(labels), series=spec.series, titulo=spec.titulo,
+                  xlabel=spec.xlabel, ylabel=spec.ylabel, estilo=spec.estilo)
+    _barras(h, d, horizontal=False)
+
+
+def _pizza(spec: ChartSpec, d: Drawing):
+    valores = _valores(spec)
+    total = sum(valores) or 1.0
+    cores = spec.opcao("cores") or PALETA
+
+    topo = d.height - (_FONTE_TITULO + 10 if spec.titulo else 6)
+    lado = min(d.width * 0.6, topo - 16)
+
+    pie = Pie()
+    pie.x = (d.width - lado) / 2
+    pie.y = (topo - lado) / 2 + 4
+    pie.width = pie.height = lado
+    pie.data = valores or [1]
+    pie.labels = [f"{_rotulo(l, 24)} ({v / total * 100:.1f}%)" for l, v in zip(spec.labels, valores)]
+    pie.startAngle = spec.opcao("startangle", 90)
+    pie.direction = "anticlockwise"
+    pie.sideLabels = 1
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 0.5
+    pie.slices.fontName = FONTE_NORMAL
+    pie.slices.fontSize = _FONTE_EIXO
+    for i in range(len(valores)):
+        pie.slices[i].fillColor = _cor(cores[i % len(cores)])
+    d.add(pie)
+
+
+def _radar(spec: ChartSpec, d: Drawing):
+    valores = _valores(spec)
+    topo = d.height - (_FONTE_TITULO + 14 if spec.titulo else 8)
+    lado = min(d.width * 0.7, topo - 24)
+
+    sp = SpiderChart()
+    sp.x = (d.width - lado) / 2
+    sp.y = (topo - lado) / 2 + 6
+    sp.width = sp.height = lado
+    ylim = spec.opcao("ylim")
+    data = [valores]
+    if ylim:
+        # strand invisível no máximo da escala: fixa o raio em ylim[1]
+        data.append([float(ylim[1])] * len(valores))
+    sp.data = data
+    sp.labels = list(spec.labels)
+    sp.spokeLabels.fontName = FONTE_NORMAL
+    sp.spokeLabels.fontSize = _FONTE_EIXO
+    sp.spokes.strokeColor = colors.HexColor("#d1d5db")
+    sp.strands[0].strokeColor = COR_ROXO
+    sp.strands[0].strokeWidth = 1.5
+    sp.strands[0].fillColor = colors.Color(COR_ROXO.red, COR_ROXO.green, COR_ROXO.blue, alpha=0.25)
+    if ylim:
+        sp.strands[1].strokeColor = colors.HexColor("#e5e7eb")
+        sp.strands[1].strokeWidth = 0.5
+        sp.strands[1].fillColor = None
+    d.add(sp)
+
+
+def _linhas(spec: ChartSpec, d: Drawing):
+    cores = spec.opcao("cores") or PALETA
+    topo = d.height - (_FONTE_TITULO + 10 if spec.titulo else 6)
+    nomes = [nome for nome, _ in spec.series]
+    tem_legenda = any(nomes)
+
+    lp = LinePlot()
+    lp.x = 40 + (14 if spec.ylabel else 0)
+    lp.y = 34 if spec.xlabel else 24
+    lp.width = d.width - lp.x - (110 if tem_legenda else 12)
+    lp.height = topo - lp.y
+    lp.data = [
+        [(i, (0.0 if (v is None or math.isnan(v)) else v)) for i, v in enumerate(vals)] or [(0, 0)]
+        for _, vals in spec.series
+    ] or [[(0, 0)]]
+    lp.joinedLines = 1
+    for i in range(len(lp.data)):
+        cor = _cor(cores[i % len(cores)])
+        lp.lines[i].strokeColor = cor
+        lp.lines[i].strokeWidth = 1.5
+        lp.lines[i].symbol = makeMarker("FilledCircle", size=2.5, fillColor=cor, strokeColor=cor)
+    for eixo in (lp.xValueAxis, lp.yValueAxis):
+        eixo.labels.fontName = FONTE_NORMAL
+        eixo.labels.fontSize = _FONTE_EIXO
+        eixo.strokeColor = colors.HexColor("#9ca3af")
+    if spec.opcao("grade"):
+        lp.yValueAxis.visibleGrid = 1
+        lp.yValueAxis.gridStrokeColor = colors.HexColor("#e5e7eb")
+        lp.yValueAxis.gridStrokeWidth = 0.5
+    d.add(lp)
+
+    if tem_legenda:
+        lg = Legend()
+        lg.x = lp.x + lp.width + 12
+        lg.y = topo - 4
+        lg.fontName = FONTE_NORMAL
+        lg.fontSize = _FONTE_EIXO
+        lg.alignment = "right"
+        lg.colorNamePairs = [(_cor(cores[i % len(cores)]), _rotulo(n, 20)) for i, n in enumerate(nomes)]
+        d.add(lg)
+    _eixos(d, spec, lp.x, lp.y, lp.width, lp.height)
+
+
+def desenhar(spec: ChartSpec, largura: float = 16.5 * cm, altura: float = 8.0 * cm) -> Drawing:
+    """Desenha a spec como Drawing do ReportLab (Flowable vetorial)."""
+    d = Drawing(largura, altura)
+
+    if spec.tipo in ("barh", "bar"):
+        _barras(spec, d, horizontal=(spec.tipo == "barh"))
+    elif spec.tipo == "hist":
+        _histograma(spec, d)
+    elif spec.tipo == "pie":
+        _pizza(spec, d)
+    elif spec.tipo == "radar":
+        _radar(spec, d)
+    elif spec.tipo == "line":
+        _linhas(spec, d)
+
+    _titulo(d, spec)
+    return d
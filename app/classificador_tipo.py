@@ -0,0 +1,307 @@
+"""
+CLASSIFICADOR DE TIPO (Xplors) - assinatura do schema, sem olhar o volume
+
+O tipo (concorrência / merchandising / preço) era adivinhado pela quantidade
+de linhas e errava sempre que o volume do cliente mudava. Aqui ele sai da
+"assinatura" da planilha:
+- nomes das colunas (normalizados em tokens, sem acento)
+- dimensões detectadas (loja, região, concorrente, ação...)
+- perfil dos valores numa amostra: colunas SIM/NÃO, colunas de preço,
+  texto longo (comentários), datas
+
+Uploads confirmados (tipo informado pelo usuário) alimentam um índice local
+por cliente (JSON compacto em INDICE_TIPOS_PATH, compartilhado pelos workers
+com trava de arquivo). Planilhas do mesmo cliente com a mesma assinatura, ou
+parecida (Jaccard dos tokens), reaproveitam o tipo confirmado; o histórico de
+um cliente nunca decide o tipo de outro. Sem histórico, regras sobre o perfil
+decidem. Tudo roda antes de qualquer
+chamada ao modelo e devolve uma confiança de 0 a 1.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import tempfile
+import unicodedata
+from dataclasses import dataclass
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from app.conformidade import MatrizConformidade
+
+TIPOS = ("concorrencia", "merchandising", "preco")
+TIPO_PADRAO = "merchandising"
+
+INDICE_TIPOS_PATH = os.getenv("INDICE_TIPOS_PATH", os.path.join(tempfile.gettempdir(), "xplors_tipos.json"))
+
+AMOSTRA_LINHAS = 500
+MAX_ASSINATURAS_POR_CLIENTE = 50
+# similaridade mínima (Jaccard) para um upload confirmado decidir o tipo
+LIMIAR_VIZINHO = 0.6
+# texto "longo" = comentário livre, típico de concorrência
+MIN_CARACTERES_TEXTO_LONGO = 25
+
+_PALAVRAS_PRECO = ("preco", "valor", "price", "r$")
+
+
+@dataclass(frozen=True)
+class ClassificacaoTipo:
+    """
+    tipo: concorrencia | merchandising | preco
+    confianca: 0..1
+    origem: coluna_tipo | indice | regras | padrao
+    assinatura: hash dos tokens do schema (chave do índice)
+    pontuacoes: pontuação das regras por tipo (diagnóstico)
+    """
+    tipo: str
+    confianca: float
+    origem: str
+    assinatura: str
+    pontuacoes: dict
+
+
+# =========================
+# ASSINATURA
+# =========================
+def _normalizar_nome(nome: str) -> str:
+    return unicodedata.normalize("NFKD", str(nome)).encode("ascii", "ignore").decode().lower()
+
+
+def _tokens_nome(nome: str) -> list[str]:
+    return [t for t in re.split(r"[^a-z0-9$]+", _normalizar_nome(nome)) if len(t) >= 3 and not t.isdigit()]
+
+
+def _faixa(n: int) -> str:
+    return "0" if n == 0 else ("1-2" if n <= 2 else "3+")
+
+
+def perfil_schema(df: pd.DataFrame, dims: dict) -> dict:
+    """Contagens usadas pelas regras, medidas numa amostra de AMOSTRA_LINHAS."""
+    amostra = df.head(AMOSTRA_LINHAS)
+
+    preco = 0
+    texto_longo = 0
+    datas = 0
+    for col in amostra.columns:
+        s = amostra[col]
+        nome = " ".join(_tokens_nome(col))
+        # nome cru: "r$" tem menos de 3 caracteres e não vira token
+        if any(p in _normalizar_nome(col) for p in _PALAVRAS_PRECO) and pd.to_numeric(s, errors="coerce").notna().mean() > 0.5:
+            preco += 1
+        elif pd.api.types.is_datetime64_any_dtype(s.dtype) or "data" in nome.split():
+            datas += 1
+        elif pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype):
+            tamanhos = s.dropna().astype(str).str.len()
+            if len(tamanhos) and tamanhos.median() >= MIN_CARACTERES_TEXTO_LONGO:
+                texto_longo += 1
+
+    return {
+        "sim_nao": len(MatrizConformidade.codificar(amostra).colunas),
+        "preco": preco,
+        "texto_longo": texto_longo,
+        "datas": datas,
+        "dims": sorted(k for k, v in dims.items() if v),
+    }
+
+
+def tokens_schema(df: pd.DataFrame, dims: dict, perfil: dict | None = None) -> frozenset[str]:
+    """Conjunto de tokens que identifica o "formato" da planilha (não o volume)."""
+    perfil = perfil or perfil_schema(df, dims)
+    tokens = {f"col:{t}" for col in df.columns for t in _tokens_nome(col)}
+    tokens.update(f"dim:{d}" for d in perfil["dims"])
+    tokens.update(f"perfil:{k}:{_faixa(perfil[k])}" for k in ("sim_nao", "preco", "texto_longo", "datas"))
+    return frozenset(tokens)
+
+
+def assinatura(tokens: frozenset[str]) -> str:
+    return hashlib.sha1("\n".join(sorted(tokens)).encode("utf-8")).hexdigest()[:16]
+
+
+# =========================
+# REGRAS (sem histórico)
+# =========================
+def pontuar_regras(perfil: dict) -> dict:
+    dims = set(perfil["dims"])
+    return {
+        "merchandising": 0.75 * min(1.0, perfil["sim_nao"] / 3) + 0.25 * bool(dims & {"loja", "promotor"}),
+        "preco": 0.8 * min(1.0, perfil["preco"] / 2) + 0.2 * ("produto" in dims),
+        "concorrencia": 0.45 * ("concorrente" in dims) + 0.3 * ("acao" in dims)
+                        + 0.25 * min(1.0, perfil["texto_longo"]),
+    }
+
+
+def _confianca(pontuacoes: dict) -> tuple[str, float]:
+    ordenado = sorted(pontuacoes.items(), key=lambda kv: kv[1], reverse=True)
+    (tipo, melhor), (_, segundo) = ordenado[0], ordenado[1]
+    # metade pela força do sinal, metade pela distância até o segundo colocado
+    return tipo, round(float(np.clip(0.5 * melhor + 0.5 * (melhor - segundo), 0.0, 1.0)), 3)
+
+
+# =========================
+# ÍNDICE LOCAL (uploads confirmados)
+# =========================
+class IndiceTipos:
+    """
+    {cliente: {assinatura: {"tipo", "tokens"}}}, gravado em JSON.
+    Cada cliente guarda no máximo MAX_ASSINATURAS_POR_CLIENTE (as mais recentes).
+    Sem cliente, o índice não é usado (só as regras).
+
+    Vários workers gravam no mesmo arquivo: registrar() relê o JSON sob flock
+    (arquivo .lock ao lado) antes de juntar a confirmação e gravar; a leitura
+    recarrega quando o arquivo mudou (mtime/tamanho).
+    """
+
+    def __init__(self, caminho: str | None = None):
+        self.caminho = caminho or INDICE_TIPOS_PATH
+        self._lock = Lock()
+        self._dados: dict = {}
+        self._versao: tuple | None = None
+
+    def _versao_arquivo(self) -> tuple | None:
+        try:
+            st = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _carregar(self, forcar: bool = False) -> dict:
+        versao = self._versao_arquivo()
+        if forcar or versao != self._versao:
+            try:
+                with open(self.caminho, encoding="utf-8") as f:
+                    self._dados = json.load(f)
+            except FileNotFoundError:
+                self._dados = {}
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Índice de tipos inválido ({self.caminho}): {e}")
+                self._dados = {}
+            self._versao = versao
+        return self._dados
+
+    def _gravar(self):
+        pasta = os.path.dirname(os.path.abspath(self.caminho))
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._dados, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.caminho)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._versao = self._versao_arquivo()
+
+    def registrar(self, cliente: str | None, tokens: frozenset[str], tipo: str):
+        if not cliente:
+            return
+        chave = assinatura(tokens)
+        entrada = {"tipo": tipo, "tokens": sorted(tokens)}
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.caminho)), exist_ok=True)
+                with open(self.caminho + ".lock", "a") as trava:
+                    fcntl.flock(trava, fcntl.LOCK_EX)
+                    # relê sob a trava: confirmações gravadas por outros workers entram no merge
+                    entradas = self._carregar(forcar=True).setdefault(str(cliente), {})
+                    anterior = entradas.get(chave)
+                    if anterior and anterior["tipo"] == tipo and (
+                            len(entradas) < MAX_ASSINATURAS_POR_CLIENTE or list(entradas)[-1] == chave):
+                        return  # nada mudou (e a ordem não decide nenhum descarte): não regrava
+                    entradas.pop(chave, None)
+                    entradas[chave] = entrada
+                    # dict mantém a ordem de inserção: os primeiros são os mais antigos
+                    for antiga in list(entradas)[:-MAX_ASSINATURAS_POR_CLIENTE]:
+                        del entradas[antiga]
+                    self._gravar()
+            except OSError as e:
+                print(f"⚠️ Não foi possível gravar o índice de tipos: {e}")
+
+    def vizinho(self, cliente: str | None, tokens: frozenset[str]) -> tuple[str, float] | None:
+        """(tipo, similaridade) da assinatura confirmada mais parecida do próprio cliente."""
+        if not cliente:
+            return None
+        chave = assinatura(tokens)
+        with self._lock:
+            entradas = self._carregar().get(str(cliente)) or {}
+            if chave in entradas:
+                return entradas[chave]["tipo"], 1.0
+
+            melhor = None
+            for entrada in entradas.values():
+                outros = set(entrada["tokens"])
+                sim = len(tokens & outros) / len(tokens | outros) if tokens or outros else 0.0
+                if melhor is None or sim > melhor[1]:
+                    melhor = (entrada["tipo"], sim)
+            if melhor and melhor[1] >= LIMIAR_VIZINHO:
+                return melhor
+        return None
+
+
+_indice: IndiceTipos | None = None
+_indice_lock = Lock()
+
+
+def indice_padrao() -> IndiceTipos:
+    global _indice
+    with _indice_lock:
+        if _indice is None or _indice.caminho != INDICE_TIPOS_PATH:
+            _indice = IndiceTipos(INDICE_TIPOS_PATH)
+        return _indice
+
+
+# =========================
+# API
+# =========================
+def _tipo_da_coluna(df: pd.DataFrame) -> str | None:
+    if "Tipo" not in df.columns or len(df) == 0:
+        return None
+    valor = " ".join(_tokens_nome(df["Tipo"].iloc[0]))
+    if "concorrencia" in valor:
+        return "concorrencia"
+    if "merchandising" in valor:
+        return "merchandising"
+    if "preco" in valor:
+        return "preco"
+    return None
+
+
+def classificar_tipo(df: pd.DataFrame, dims: dict, cliente: str | None = None,
+                     indice: IndiceTipos | None = None) -> ClassificacaoTipo:
+    """
+    Ordem: coluna "Tipo" explícita -> índice de uploads confirmados
+    (mesma assinatura ou vizinha) -> regras sobre o perfil.
+    """
+    perfil = perfil_schema(df, dims)
+    tokens = tokens_schema(df, dims, perfil)
+    chave = assinatura(tokens)
+    pontuacoes = {t: round(float(p), 3) for t, p in pontuar_regras(perfil).items()}
+
+    explicito = _tipo_da_coluna(df)
+    if explicito:
+        return ClassificacaoTipo(explicito, 1.0, "coluna_tipo", chave, pontuacoes)
+
+    vizinho = (indice or indice_padrao()).vizinho(cliente, tokens)
+    if vizinho:
+        tipo, similaridade = vizinho
+        # a regra concordando com o histórico reforça a confiança
+        bonus = 0.1 if max(pontuacoes, key=pontuacoes.get) == tipo else 0.0
+        return ClassificacaoTipo(tipo, round(min(1.0, similaridade * 0.9 + bonus), 3), "indice", chave, pontuacoes)
+
+    tipo, confianca = _confianca(pontuacoes)
+    if pontuacoes[tipo] <= 0:
+        return ClassificacaoTipo(TIPO_PADRAO, 0.0, "padrao", chave, pontuacoes)
+    return ClassificacaoTipo(tipo, confianca, "regras", chave, pontuacoes)
+
+
+def confirmar_tipo(df: pd.DataFrame, dims: dict, tipo: str, cliente: str | None = None,
+                   indice: IndiceTipos | None = None) -> str:
+    """Registra o tipo confirmado de um upload no índice. Retorna a assinatura."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo inválido: {tipo!r} (esperado: {', '.join(TIPOS)})")
+    tokens = tokens_schema(df, dims)
+    (indice or indice_padrao()).registrar(cliente, tokens, tipo)
+    return assinatura(tokens)
@@ -0,0 +1,194 @@
+"""
+POOL DE COMPUTAÇÃO (Xplors) - etapas CPU fora das threads do gunicorn
+
+Com `gunicorn -w 2 --threads 8`, os KPIs/rankings (gerar_insumos_pdf_excel,
+pandas), os gráficos (matplotlib) e o doc.build do PDF (ReportLab) seguram o
+GIL: enquanto um upload de planilha calcula, as outras 7 threads do worker -
+inclusive as de /upload-imagem, que só esperam a OpenAI - ficam paradas.
+
+PoolComputacao roda essas etapas num ProcessPoolExecutor por worker:
+- o DataFrame vai como tabela Arrow em memória compartilhada
+  (app/tabela_compartilhada.py): pelo pipe passa só a referência; a sessão
+  da planilha grava a tabela uma vez e todas as etapas leem a mesma. Volta
+  só o resultado (insumos: dicts pequenos; PDF: o caminho do arquivo gravado)
+- fila limitada: no máximo `processos + fila` etapas por worker; quem chega
+  depois espera até COMPUTACAO_ESPERA_S e então recebe FilaCheia (503 com
+  Retry-After no /upload) em vez de acumular memória
+- processos via forkserver com pandas/matplotlib/reportlab pré-importados
+  (como o pool de abas de app/ingestao.py); pool quebrado -> roda na thread
+
+COMPUTACAO_PROCESSOS=0 desliga (tudo na thread da requisição, como antes).
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from app.tabela_compartilhada import Referencia, TabelaCompartilhada, ler
+
+COMPUTACAO_PROCESSOS = int(os.getenv("COMPUTACAO_PROCESSOS", str(min(2, os.cpu_count() or 1))))
+# etapas aguardando processo livre (além das que estão rodando), por worker do gunicorn
+COMPUTACAO_FILA = int(os.getenv("COMPUTACAO_FILA", "4"))
+COMPUTACAO_ESPERA_S = float(os.getenv("COMPUTACAO_ESPERA_S", "30"))
+
+_PRE_IMPORTS = ["pandas", "pyarrow", "matplotlib", "reportlab.platypus",
+                "app.excel_processor", "app.pdf_generator_com_graficos"]
+
+
+class FilaCheia(Exception):
+    """Pool de computação ocupado além do limite da fila."""
+
+
+# =========================
+# NO PROCESSO DO POOL
+# =========================
+def _no_processo(funcao, ref: Referencia | None, args: tuple, kwargs: dict):
+    """Executado no processo do pool: abre a tabela compartilhada e chama a etapa."""
+    df = ler(ref) if ref is not None else None
+    return funcao(df, *args, **kwargs)
+
+
+# =========================
+# ETAPAS
+# =========================
+def _insumos(df: pd.DataFrame, tipo: str, **kwargs) -> dict:
+    from app.excel_processor import gerar_insumos_pdf_excel
+    return gerar_insumos_pdf_excel(df, tipo, **kwargs)
+
+
+def _pdf(df: pd.DataFrame | None, arquivo_saida: str, dados_analise: dict, tipo_analise: str = "geral") -> str:
+    from app.pdf_generator_com_graficos import gerar_pdf_xplors
+    return gerar_pdf_xplors(arquivo_saida=arquivo_saida, tipo_analise=tipo_analise,
+                            dados_analise=dados_analise, dados_excel=df)
+
+
+def _nada(df: pd.DataFrame | None) -> int:
+    return os.getpid()
+
+
+# =========================
+# POOL
+# =========================
+class PoolComputacao:
+    def __init__(self, processos: int = COMPUTACAO_PROCESSOS, fila: int = COMPUTACAO_FILA,
+                 espera_s: float = COMPUTACAO_ESPERA_S):
+        self.processos = processos
+        self.espera_s = espera_s
+        self._vagas = threading.BoundedSemaphore(max(1, processos + fila))
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.executadas = 0
+        self.na_thread = 0
+        self.rejeitadas = 0
+        self.espera_total_s = 0.0
+        self.tabelas_temporarias = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.processos > 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                metodos = multiprocessing.get_all_start_methods()
+                if "forkserver" in metodos:
+                    ctx = multiprocessing.get_context("forkserver")
+                    ctx.set_forkserver_preload(_PRE_IMPORTS)
+                else:
+                    ctx = multiprocessing.get_context("spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.processos, mp_context=ctx)
+            return self._pool
+
+    def executar(self, funcao, dados: pd.DataFrame | TabelaCompartilhada | None, *args, **kwargs):
+        """
+        funcao(df, *args, **kwargs) num processo do pool (funcao de módulo,
+        importável pelo processo). `dados`: DataFrame (vira uma tabela
+        compartilhada só desta chamada) ou tabela já compartilhada (sessão).
+        Sem pool: na própria thread.
+        """
+        if not self.ativo:
+            with self._lock:
+                self.na_thread += 1
+            if not isinstance(dados, TabelaCompartilhada):
+                return funcao(dados, *args, **kwargs)
+            ref = dados.adquirir()
+            try:
+                return funcao(ler(ref), *args, **kwargs)
+            finally:
+                dados.soltar()
+
+        t0 = time.perf_counter()
+        if not self._vagas.acquire(timeout=self.espera_s):
+            with self._lock:
+                self.rejeitadas += 1
+            raise FilaCheia(f"Pool de computação ocupado há mais de {self.espera_s:g}s")
+        temporaria = None
+        ref = None
+        try:
+            if isinstance(dados, pd.DataFrame):
+                temporaria = dados = TabelaCompartilhada.criar(dados, dono=f"etapa:{funcao.__name__}")
+            # a sessão pode expulsar a tabela enquanto o processo lê: o arquivo fica até soltar()
+            ref = dados.adquirir() if dados is not None else None
+            with self._lock:
+                self.espera_total_s += time.perf_counter() - t0
+                self.tabelas_temporarias += temporaria is not None
+            try:
+                resultado = self._executor().submit(_no_processo, funcao, ref, args, kwargs).result()
+            except BrokenProcessPool as e:
+                with self._lock:
+                    self._pool = None
+                    self.na_thread += 1
+                print(f"⚠️ Pool de computação indisponível ({e}); rodando na thread")
+                return funcao(ler(ref) if ref is not None else None, *args, **kwargs)
+            with self._lock:
+                self.executadas += 1
+            return resultado
+        finally:
+            if ref is not None:
+                dados.soltar()
+            if temporaria is not None:
+                temporaria.liberar()
+            self._vagas.release()
+
+    def aquecer(self):
+        """Sobe os processos (forkserver + imports) antes da primeira requisição."""
+        if self.ativo:
+            pool = self._executor()
+            list(pool.map(_no_processo, [_nada] * self.processos, [None] * self.processos,
+                          [()] * self.processos, [{}] * self.processos))
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "processos": self.processos,
+                "executadas": self.executadas,
+                "na_thread": self.na_thread,
+                "rejeitadas": self.rejeitadas,
+                "espera_total_s": round(self.espera_total_s, 3),
+                "tabelas_temporarias": self.tabelas_temporarias,
+            }
+
+    def encerrar(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+computacao = PoolComputacao()
+
+
+def gerar_insumos(df: pd.DataFrame | TabelaCompartilhada, tipo: str, **kwargs) -> dict:
+    """gerar_insumos_pdf_excel no pool de computação."""
+    return computacao.executar(_insumos, df, tipo, **kwargs)
+
+
+def gerar_pdf(arquivo_saida: str, dados_analise: dict,
+              dados_excel: pd.DataFrame | TabelaCompartilhada | None = None, tipo_analise: str = "geral") -> str:
+    """gerar_pdf_xplors no pool de computação; o PDF é gravado em `arquivo_saida`."""
+    return computacao.executar(_pdf, dados_excel, arquivo_saida, dados_analise, tipo_analise)
@@ -0,0 +1,131 @@
+"""
+MOTOR DE CONFORMIDADE (Xplors) - checklist SIM/NÃO vetorizado
+
+- Detecta as colunas SIM/NÃO/OK e codifica TODAS de uma vez numa matriz
+  int8 (linhas x itens): 1 = OK (sim/yes/ok), 0 = qualquer outra resposta
+- Cada coluna é fatorada (pd.factorize): a normalização (lower/strip) roda
+  só sobre os valores distintos, nunca linha a linha
+- Scores por linha, por item e por dimensão (loja/região/promotor) saem de
+  operações na matriz + np.bincount sobre os códigos da dimensão, sem
+  copiar o DataFrame
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+VALORES_SIM_NAO = frozenset({"sim", "não", "nao", "yes", "no", "ok", "nok"})
+VALORES_OK = frozenset({"sim", "yes", "ok"})
+
+# fração mínima de respostas SIM/NÃO para a coluna contar como item de checklist
+LIMIAR_COLUNA_SIM_NAO = 0.6
+
+
+def _pode_ser_sim_nao(s: pd.Series) -> bool:
+    # números/datas/bool viram "1.0"/"True"/... em texto: nunca são SIM/NÃO
+    dtype = s.dtype
+    return (
+        pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+        or isinstance(dtype, pd.CategoricalDtype)
+    )
+
+
+def _codificar_coluna(s: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Retorna (ok, reconhecido) por linha, como arrays int8/bool.
+    A normalização roda só sobre os valores distintos.
+    """
+    codigos, distintos = pd.factorize(s, use_na_sentinel=True)
+    normalizados = [str(v).strip().lower() for v in distintos]
+
+    # posição extra no fim: código -1 (vazio/NaN) -> não reconhecido, não OK
+    tabela_ok = np.zeros(len(normalizados) + 1, dtype=np.int8)
+    tabela_sn = np.zeros(len(normalizados) + 1, dtype=bool)
+    for i, v in enumerate(normalizados):
+        tabela_ok[i] = v in VALORES_OK
+        tabela_sn[i] = v in VALORES_SIM_NAO
+
+    return tabela_ok[codigos], tabela_sn[codigos]
+
+
+@dataclass(frozen=True)
+class MatrizConformidade:
+    """
+    colunas: itens do checklist (na ordem do DataFrame)
+    ok: matriz (linhas x itens) int8, 1 = OK
+    """
+    colunas: tuple[str, ...]
+    ok: np.ndarray
+
+    @classmethod
+    def codificar(cls, df: pd.DataFrame, colunas: list[str] | None = None,
+                  limiar: float = LIMIAR_COLUNA_SIM_NAO) -> "MatrizConformidade":
+        """
+        colunas=None: detecta as colunas SIM/NÃO (> `limiar` das linhas) e
+        codifica na mesma passada. Com `colunas`, codifica só essas.
+        """
+        n = len(df)
+        candidatas = list(df.columns) if colunas is None else list(colunas)
+
+        escolhidas: list[str] = []
+        blocos: list[np.ndarray] = []
+        for c in candidatas:
+            s = df[c]
+            if colunas is None and (n == 0 or not _pode_ser_sim_nao(s)):
+                continue
+            ok, reconhecido = _codificar_coluna(s)
+            if colunas is None and reconhecido.mean() <= limiar:
+                continue
+            escolhidas.append(c)
+            blocos.append(ok)
+
+        # Fortran: cada item é um bloco contíguo (escrita coluna a coluna)
+        matriz = np.empty((n, len(blocos)), dtype=np.int8, order="F")
+        for j, bloco in enumerate(blocos):
+            matriz[:, j] = bloco
+        return cls(colunas=tuple(escolhidas), ok=matriz)
+
+    @property
+    def vazia(self) -> bool:
+        return not self.colunas
+
+    def ok_por_linha(self, itens: int | None = None) -> np.ndarray:
+        m = self.ok if itens is None else self.ok[:, :itens]
+        return m.sum(axis=1, dtype=np.int32)
+
+    def score_linhas(self) -> np.ndarray:
+        """% de itens OK por linha (float64; NaN se não há itens)."""
+        if self.vazia:
+            return np.full(self.ok.shape[0], np.nan)
+        return self.ok_por_linha() * (100.0 / len(self.colunas))
+
+    def score_itens(self, limite: int | None = None) -> list[tuple[str, float]]:
+        """[(item, % OK), ...] na ordem das colunas (até `limite` itens)."""
+        n = self.ok.shape[0]
+        colunas = self.colunas[:limite] if limite else self.colunas
+        if not colunas or n == 0:
+            return [(c, float("nan")) for c in colunas]
+        totais = self.ok[:, :len(colunas)].sum(axis=0, dtype=np.int64)
+        return [(c, float(t) * 100.0 / n) for c, t in zip(colunas, totais)]
+
+    def score_por_dimensao(self, chaves: pd.Series) -> pd.Series:
+        """
+        Média do score por linha agrupada pelos valores de `chaves`
+        (equivale a groupby(chaves, dropna=True)[score].mean(), com chaves ordenadas).
+        """
+        if self.vazia:
+            return pd.Series(dtype=float, name=chaves.name)
+
+        codigos, grupos = pd.factorize(chaves, sort=True, use_na_sentinel=True)
+        validos = codigos >= 0
+        cod = codigos[validos]
+        soma_ok = np.bincount(cod, weights=self.ok_por_linha()[validos], minlength=len(grupos))
+        linhas = np.bincount(cod, minlength=len(grupos))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            media = soma_ok * (100.0 / len(self.colunas)) / linhas
+
+        indice = grupos if isinstance(grupos, pd.Index) else pd.Index(grupos)
+        return pd.Series(media, index=indice.rename(chaves.name)).dropna()
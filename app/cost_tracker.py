@@ -8,6 +8,7 @@ from supabase import Client
 
 # Preços GPT-4o (por 1M tokens)
 PRECO_INPUT_GPT4O = 2.50  # $2.50 por 1M tokens
+PRECO_INPUT_CACHE_GPT4O = 1.25  # $1.25 por 1M tokens (prefixo em cache no provedor)
 PRECO_OUTPUT_GPT4O = 10.00  # $10.00 por 1M tokens
 PRECO_IMAGEM_GPT4O = 2.50  # ~$2.50 por 1M tokens de imagem (aproximado)
 
@@ -15,19 +16,28 @@ class CostTracker:
     def __init__(self, supabase: Client):
         self.supabase = supabase
     
-    def calcular_custo(self, tokens_input: int, tokens_output: int, tokens_imagem: int = 0) -> float:
-        """Calcula custo total em dólares"""
-        custo_input = (tokens_input / 1_000_000) * PRECO_INPUT_GPT4O
+    def calcular_custo(self, tokens_input: int, tokens_output: int, tokens_imagem: int = 0,
+                       tokens_cache: int = 0) -> float:
+        """
+        Calcula custo total em dólares.
+        tokens_cache: parte de tokens_input servida do cache de prompt (preço reduzido)
+        """
+        tokens_cache = min(max(tokens_cache, 0), tokens_input)
+        custo_input = ((tokens_input - tokens_cache) / 1_000_000) * PRECO_INPUT_GPT4O
+        custo_input += (tokens_cache / 1_000_000) * PRECO_INPUT_CACHE_GPT4O
         custo_output = (tokens_output / 1_000_000) * PRECO_OUTPUT_GPT4O
         custo_imagem = (tokens_imagem / 1_000_000) * PRECO_IMAGEM_GPT4O
         
         return custo_input + custo_output + custo_imagem
     
     def registrar_uso(self, user_id: str, tipo: str, tokens_input: int, 
-                     tokens_output: int, tokens_imagem: int = 0, metadata: dict = None):
-        """Registra uso da API no banco"""
+                     tokens_output: int, tokens_imagem: int = 0, metadata: dict = None,
+                     tokens_cache: int = 0):
+        """Registra uso da API no banco (tokens_cache vai em metadata)"""
         try:
-            custo = self.calcular_custo(tokens_input, tokens_output, tokens_imagem)
+            custo = self.calcular_custo(tokens_input, tokens_output, tokens_imagem, tokens_cache)
+            if tokens_cache:
+                metadata = {**(metadata or {}), 'tokens_cache': tokens_cache}
             
             registro = {
                 'user_id': user_id,
@@ -42,7 +52,8 @@ class CostTracker:
             
             self.supabase.table('api_usage').insert(registro).execute()
             
-            print(f"💰 Custo registrado: ${custo:.4f} ({tokens_input + tokens_output + tokens_imagem} tokens)")
+            em_cache = f", {tokens_cache} em cache" if tokens_cache else ""
+            print(f"💰 Custo registrado: ${custo:.4f} ({tokens_input + tokens_output + tokens_imagem} tokens{em_cache})")
             
             return custo
             
@@ -50,20 +61,24 @@ class CostTracker:
             print(f"❌ Erro ao registrar uso: {e}")
             return 0
     
+    def gasto_no_mes(self, user_id: str) -> float:
+        """Soma de custo_usd do mês atual em api_usage (erros sobem para quem chamou)"""
+        # Pegar mês atual
+        inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        
+        # Buscar uso do mês
+        response = self.supabase.table('api_usage')\
+            .select('custo_usd')\
+            .eq('user_id', user_id)\
+            .gte('created_at', inicio_mes.isoformat())\
+            .execute()
+        
+        return sum(item['custo_usd'] for item in response.data)
+    
     def verificar_limite(self, user_id: str, limite_mensal: float = 100.0) -> dict:
         """Verifica se usuário atingiu limite mensal"""
         try:
-            # Pegar mês atual
-            inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Buscar uso do mês
-            response = self.supabase.table('api_usage')\
-                .select('custo_usd')\
-                .eq('user_id', user_id)\
-                .gte('created_at', inicio_mes.isoformat())\
-                .execute()
-            
-            total_gasto = sum(item['custo_usd'] for item in response.data)
+            total_gasto = self.gasto_no_mes(user_id)
             percentual = (total_gasto / limite_mensal) * 100
             
             return {
@@ -155,6 +170,14 @@ class CostTracker:
             return []
 
 
+def tokens_em_cache(usage) -> int:
+    """Tokens de entrada servidos do cache de prompt (usage.prompt_tokens_details.cached_tokens)."""
+    detalhes = getattr(usage, 'prompt_tokens_details', None)
+    if isinstance(detalhes, dict):
+        return int(detalhes.get('cached_tokens') or 0)
+    return int(getattr(detalhes, 'cached_tokens', 0) or 0)
+
+
 def estimar_tokens_texto(texto: str) -> int:
     """Estimativa simples de tokens (1 token ≈ 4 caracteres)"""
     return len(texto) // 4
@@ -0,0 +1,217 @@
+"""
+COTA LOCAL (Xplors) - limite mensal sem ler o banco a cada request
+
+/upload e /upload-imagem chamavam verificar_limite antes de qualquer
+trabalho: uma consulta ao Supabase (soma de api_usage no mês) no caminho
+crítico de toda requisição. Aqui cada instância mantém um livro-caixa em
+memória por usuário:
+
+- gasto_banco: soma do mês lida de api_usage (fonte da verdade)
+- confirmados: custos confirmados nesta instância desde a última leitura
+- reservado: custo estimado das chamadas em andamento (pré-cobrança)
+
+Admissão = uma conta em memória. A reserva (estimativa por tipo de chamada,
+média móvel dos custos reais) é feita antes do modelo e trocada pelo custo
+real depois (confirmar) ou devolvida se a requisição falhar (cancelar).
+
+Entre instâncias: o livro é relido de api_usage a cada COTA_SYNC_S segundos
+(em segundo plano, sem segurar a requisição). Perto do limite
+(COTA_FRACAO_SINCRONA), toda admissão relê o banco antes de decidir - o
+atraso entre instâncias só existe longe do limite, onde não muda a decisão.
+Se a leitura síncrona falhar sem o usuário nunca ter sido lido nesta
+instância, reservar() levanta CotaIndisponivel (o gasto é desconhecido; não
+vira zero).
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+
+from app.cost_tracker import CostTracker
+
+COTA_SYNC_S = float(os.getenv("COTA_SYNC_S", "30"))
+COTA_FRACAO_SINCRONA = float(os.getenv("COTA_FRACAO_SINCRONA", "0.9"))
+
+# tokens (entrada, saída, imagem) estimados por tipo de chamada, antes de haver custos reais
+_TOKENS_ESTIMADOS = {
+    "analise": (4000, 1600, 0),
+    "imagem": (1500, 1000, 765),
+}
+# peso do custo mais recente na média móvel da estimativa
+PESO_ESTIMATIVA = 0.2
+PERCENTUAL_ALERTA = 80
+
+
+class CotaIndisponivel(Exception):
+    """Gasto do mês desconhecido: api_usage não pôde ser lido na 1ª admissão do usuário."""
+
+
+@dataclass(frozen=True)
+class Reserva:
+    user_id: str
+    tipo: str
+    valor: float
+    mes: str
+
+
+@dataclass
+class _Conta:
+    mes: str
+    gasto_banco: float = 0.0
+    # (time.monotonic(), custo) de cada confirmação ainda não vista no banco
+    confirmados: list = field(default_factory=list)
+    reservado: float = 0.0
+    # time.monotonic() do início da leitura de api_usage aplicada; 0 = nunca leu
+    sincronizado_em: float = 0.0
+    sincronizando: bool = False
+
+    @property
+    def gasto_local(self) -> float:
+        return sum(custo for _, custo in self.confirmados)
+
+
+def _mes_atual() -> str:
+    # mesmo relógio de CostTracker.gasto_no_mes (início do mês local)
+    return datetime.now().strftime("%Y-%m")
+
+
+class CotaLocal:
+    def __init__(self, cost_tracker: CostTracker, limite_padrao: float = 100.0,
+                 intervalo_sync: float | None = None):
+        self.cost_tracker = cost_tracker
+        self.limite_padrao = limite_padrao
+        self.intervalo_sync = COTA_SYNC_S if intervalo_sync is None else intervalo_sync
+        self._contas: dict[str, _Conta] = {}
+        self._estimativas = {
+            tipo: cost_tracker.calcular_custo(*tokens) for tipo, tokens in _TOKENS_ESTIMADOS.items()
+        }
+        self._lock = Lock()
+
+    # =========================
+    # SINCRONIZAÇÃO (api_usage)
+    # =========================
+    def _conta(self, user_id: str) -> _Conta:
+        """Conta do usuário no mês atual (virada de mês começa do zero). Chamar com o lock."""
+        mes = _mes_atual()
+        conta = self._contas.get(user_id)
+        if conta is None or conta.mes != mes:
+            conta = self._contas[user_id] = _Conta(mes)
+        return conta
+
+    def sincronizar(self, user_id: str) -> bool:
+        """Relê o gasto do mês em api_usage e descarta as confirmações que ele já inclui. False = leitura falhou."""
+        with self._lock:
+            conta = self._conta(user_id)
+            conta.sincronizando = True
+            # confirmar() roda depois do insert em api_usage: o que foi
+            # confirmado antes do início da leitura já está na soma do banco
+            inicio = time.monotonic()
+
+        try:
+            total = self.cost_tracker.gasto_no_mes(user_id)
+        except Exception as e:
+            print(f"⚠️ Não foi possível sincronizar a cota de {user_id}: {e}")
+            total = None
+
+        with self._lock:
+            conta.sincronizando = False
+            if total is None:
+                # sincronizado_em não avança: a conta continua "nunca lida" (ou vencida)
+                return False
+            # leitura mais antiga que a já aplicada (sincronizações concorrentes) é descartada
+            if conta is not self._contas.get(user_id) or inicio <= conta.sincronizado_em:
+                return True
+            conta.sincronizado_em = inicio
+            conta.gasto_banco = float(total)
+            conta.confirmados = [(t, custo) for t, custo in conta.confirmados if t >= inicio]
+            return True
+
+    def _sincronizar_em_segundo_plano(self, user_id: str):
+        threading.Thread(target=self.sincronizar, args=(user_id,), name="cota-sync", daemon=True).start()
+
+    # =========================
+    # ADMISSÃO
+    # =========================
+    def estimar(self, tipo: str) -> float:
+        with self._lock:
+            return self._estimativas.get(tipo, max(self._estimativas.values()))
+
+    def _status(self, conta: _Conta, limite: float) -> dict:
+        total_gasto = conta.gasto_banco + conta.gasto_local
+        percentual = (total_gasto / limite) * 100 if limite else 100.0
+        return {
+            'total_gasto': total_gasto,
+            'limite': limite,
+            'percentual': percentual,
+            'pode_usar': total_gasto + conta.reservado < limite,
+            'alerta': percentual >= PERCENTUAL_ALERTA,
+            'reservado': conta.reservado,
+        }
+
+    def reservar(self, user_id: str, tipo: str, limite: float | None = None,
+                 custo_estimado: float | None = None) -> tuple[Reserva | None, dict]:
+        """
+        Pré-cobra o custo estimado da chamada. Retorna (reserva, status); reserva
+        None = limite atingido (status no formato de verificar_limite).
+        CotaIndisponivel: o gasto do usuário nunca foi lido e a leitura falhou.
+        """
+        limite = self.limite_padrao if limite is None else limite
+        valor = self.estimar(tipo) if custo_estimado is None else custo_estimado
+
+        with self._lock:
+            conta = self._conta(user_id)
+            comprometido = conta.gasto_banco + conta.gasto_local + conta.reservado + valor
+            # 1ª requisição do usuário nesta instância, ou decisão que pode mudar com o banco
+            sincrona = conta.sincronizado_em == 0 or comprometido >= COTA_FRACAO_SINCRONA * limite
+            em_segundo_plano = (not sincrona and not conta.sincronizando
+                                and time.monotonic() - conta.sincronizado_em >= self.intervalo_sync)
+            if em_segundo_plano:
+                conta.sincronizando = True
+
+        if sincrona:
+            if not self.sincronizar(user_id):
+                with self._lock:
+                    nunca_lida = self._conta(user_id).sincronizado_em == 0
+                if nunca_lida:
+                    raise CotaIndisponivel(f"Gasto do mês de {user_id} indisponível (api_usage não respondeu)")
+        elif em_segundo_plano:
+            self._sincronizar_em_segundo_plano(user_id)
+
+        with self._lock:
+            conta = self._conta(user_id)
+            status = self._status(conta, limite)
+            if not status['pode_usar']:
+                return None, status
+            conta.reservado += valor
+            status['reservado'] = conta.reservado
+            return Reserva(user_id, tipo, valor, conta.mes), status
+
+    def confirmar(self, reserva: Reserva, custo_real: float):
+        """Troca a pré-cobrança pelo custo real (chamar depois de registrar_uso)."""
+        with self._lock:
+            anterior = self._estimativas.get(reserva.tipo)
+            if custo_real > 0:
+                self._estimativas[reserva.tipo] = (
+                    custo_real if anterior is None
+                    else (1 - PESO_ESTIMATIVA) * anterior + PESO_ESTIMATIVA * custo_real
+                )
+            conta = self._conta(reserva.user_id)
+            if conta.mes != reserva.mes:
+                return
+            conta.reservado = max(0.0, conta.reservado - reserva.valor)
+            conta.confirmados.append((time.monotonic(), custo_real))
+
+    def cancelar(self, reserva: Reserva):
+        """Devolve a pré-cobrança (a chamada não aconteceu ou falhou)."""
+        with self._lock:
+            conta = self._conta(reserva.user_id)
+            if conta.mes == reserva.mes:
+                conta.reservado = max(0.0, conta.reservado - reserva.valor)
+
+    def status(self, user_id: str, limite: float | None = None) -> dict:
+        """Status do limite pelo livro local (sem consultar o banco)."""
+        with self._lock:
+            return self._status(self._conta(user_id), self.limite_padrao if limite is None else limite)
@@ -1,40 +1,76 @@
 """
 PROCESSADOR DE PLANILHAS EXCEL (Xplors) - versão turbinada (KPIs + Gráficos inteligentes)
 
-- Lê Excel
-- Identifica tipo (concorrência / merchandising / preço)
+- Lê Excel/CSV (app/ingestao.py; várias abas viram um DataFrame com a coluna "Aba")
+- Colunas de dimensão viram Categorical com rótulos normalizados e a leitura
+  fica num snapshot Arrow por hash do arquivo (app/snapshot_planilha.py)
+- Identifica tipo (concorrência / merchandising / preço) pela assinatura do
+  schema + uploads confirmados do cliente (app/classificador_tipo.py)
 - Extrai KPIs úteis
 - Gera gráficos (PNG) contextualizados para o PDF:
-  - Merchandising: conformidade por item/loja/região/promotor
+  - Merchandising: conformidade por item/loja/região/promotor (matriz SIM/NÃO
+    codificada uma vez - app/conformidade.py)
   - Preço: distribuição, top outliers, média por categoria, dif % vs concorrência (se existir)
   - Concorrência: top ações/concorrentes e recortes por região (se existir)
+- Cada gráfico é uma ChartSpec renderizada via cache (app/chart_cache.py)
 """
 
 import os
 import re
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
-import matplotlib
-matplotlib.use("Agg")  # headless
-import matplotlib.pyplot as plt
+from app.chart_cache import ChartSpec, salvar_grafico, backend_graficos
+from app.classificador_tipo import ClassificacaoTipo, classificar_tipo, confirmar_tipo
+from app.conformidade import MatrizConformidade
+from app.ingestao import ler_planilha
+from app.snapshot_planilha import carregar_snapshot, hash_arquivo, salvar_snapshot
 
 
 # =========================
 # LEITURA / TIPO
 # =========================
-def processar_planilha(filepath: str) -> pd.DataFrame:
-    try:
-        print(f"📖 Lendo planilha: {filepath}")
+def preparar_planilha(df: pd.DataFrame) -> pd.DataFrame:
+    """Limpeza comum a todo upload: linhas vazias, nomes de coluna, dimensões categóricas."""
+    df = df.dropna(how="all")
+    df.columns = df.columns.astype(str).str.strip()
+    return codificar_dimensoes(df)
 
-        if filepath.endswith(".xlsx"):
-            df = pd.read_excel(filepath, engine="openpyxl")
-        else:
-            df = pd.read_excel(filepath, engine="xlrd")
+
+def processar_planilha(filepath, nome_arquivo: str | None = None, usar_snapshot: bool = True,
+                       arquivo_hash: str | None = None, df_lido: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    `filepath`: caminho ou arquivo aberto (ex.: upload do Flask; informe `nome_arquivo`),
+    em .xlsx, .xls ou CSV.
+    Com `usar_snapshot`, reaproveita o snapshot Arrow da mesma planilha (mesmo
+    sha256) em vez de reabrir o Excel. O hash fica em df.attrs["arquivo_hash"].
+    `arquivo_hash` / `df_lido`: hash e leitura já feitos durante o recebimento
+    (app/upload_streaming.py); evitam reler o arquivo.
+    """
+    try:
+        nome = str(nome_arquivo or filepath)
+        print(f"📖 Lendo planilha: {nome}")
+
+        if not usar_snapshot:
+            arquivo_hash = None
+        elif not arquivo_hash:
+            arquivo_hash = hash_arquivo(filepath)
+        if arquivo_hash:
+            df = carregar_snapshot(arquivo_hash)
+            if df is not None:
+                print(f"⚡ Snapshot reaproveitado: {len(df)} linhas, {len(df.columns)} colunas")
+                df.attrs["arquivo_hash"] = arquivo_hash
+                return df
+
+        df = df_lido if df_lido is not None else ler_planilha(filepath, nome_arquivo)
 
         print(f"✅ Planilha lida: {len(df)} linhas, {len(df.columns)} colunas")
-        df = df.dropna(how="all")
-        df.columns = df.columns.astype(str).str.strip()
+        df = preparar_planilha(df)
+
+        if arquivo_hash:
+            salvar_snapshot(df, arquivo_hash)
+            df.attrs["arquivo_hash"] = arquivo_hash
         return df
 
     except Exception as e:
@@ -42,29 +78,28 @@ def processar_planilha(filepath: str) -> pd.DataFrame:
         raise Exception(f"Erro ao processar planilha: {str(e)}")
 
 
-def identificar_tipo(df: pd.DataFrame) -> str:
-    total_respostas = len(df)
-    print(f"🔍 Total de respostas: {total_respostas}")
+def identificar_tipo_com_confianca(df: pd.DataFrame, cliente: str | None = None,
+                                   dims: dict | None = None) -> ClassificacaoTipo:
+    """
+    Tipo pela assinatura do schema (colunas, dimensões, perfil dos valores) e
+    pelos uploads já confirmados do cliente - nunca pelo número de linhas.
+    `dims`: dimensões já detectadas (sessão da planilha, app/sessao_analise.py).
+    """
+    resultado = classificar_tipo(df, dims if dims is not None else _detectar_dimensoes(df), cliente)
+    print(f"🔍 Tipo: {resultado.tipo} (confiança {resultado.confianca:.0%}, via {resultado.origem})")
+    if resultado.origem == "padrao":
+        print(f"⚠️ Não foi possível identificar tipo exato. Usando '{resultado.tipo}' como padrão.")
+    return resultado
+
 
-    if "Tipo" in df.columns and len(df) > 0:
-        tipo_coluna = str(df["Tipo"].iloc[0]).lower()
-        if "concorrência" in tipo_coluna or "concorrencia" in tipo_coluna:
-            return "concorrencia"
-        elif "merchandising" in tipo_coluna:
-            return "merchandising"
-        elif "preço" in tipo_coluna or "preco" in tipo_coluna:
-            return "preco"
+def identificar_tipo(df: pd.DataFrame, cliente: str | None = None) -> str:
+    return identificar_tipo_com_confianca(df, cliente).tipo
 
-    # fallback por volume (seu padrão)
-    if 50 <= total_respostas <= 80:
-        return "concorrencia"
-    elif 1100 <= total_respostas <= 1600:
-        return "merchandising"
-    elif 1800 <= total_respostas <= 2500:
-        return "preco"
 
-    print("⚠️ Não foi possível identificar tipo exato. Usando 'merchandising' como padrão.")
-    return "merchandising"
+def confirmar_tipo_planilha(df: pd.DataFrame, tipo: str, cliente: str | None = None,
+                            dims: dict | None = None) -> str:
+    """Ensina o classificador com o tipo confirmado pelo usuário. Retorna a assinatura."""
+    return confirmar_tipo(df, dims if dims is not None else _detectar_dimensoes(df), tipo, cliente)
 
 
 def extrair_metricas_basicas(df: pd.DataFrame) -> dict:
@@ -139,11 +174,36 @@ def _pick_best_numeric(df: pd.DataFrame, keywords: list[str]) -> str | None:
     return None
 
 
-def _save_fig(path: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    plt.tight_layout()
-    plt.savefig(path, dpi=160)
-    plt.close()
+def _barh_spec(serie: pd.Series, titulo: str, xlabel: str) -> ChartSpec:
+    """
+    Spec de barras horizontais a partir de uma Series (índice = rótulos),
+    no mesmo formato do antigo `serie.plot(kind="barh")`.
+    """
+    return ChartSpec.criar(
+        "barh",
+        labels=serie.index.tolist(),
+        valores=serie.tolist(),
+        titulo=titulo,
+        xlabel=xlabel,
+        ylabel=serie.index.name or "",
+    )
+
+
+def _save_chart(spec: ChartSpec, path: str) -> str:
+    """Renderiza (ou reaproveita do cache) e grava o PNG."""
+    return salvar_grafico(spec, path)
+
+
+def _fato(titulo: str, serie: pd.Series, coluna_valor: str, fmt: str = "{:.0f}", rotulo: str | None = None) -> dict:
+    """
+    Lista ranqueada para a seção de fatos do PDF (e do prompt), já na ordem
+    de leitura e com os valores formatados - o modelo não precisa repeti-la.
+    """
+    return {
+        "titulo": titulo,
+        "colunas": ["#", rotulo or str(serie.index.name or "Item"), coluna_valor],
+        "linhas": [[str(i), str(k), fmt.format(v)] for i, (k, v) in enumerate(serie.items(), start=1)],
+    }
 
 
 def _safe_filename(s: str) -> str:
@@ -180,17 +240,87 @@ def _detectar_dimensoes(df: pd.DataFrame) -> dict:
     return dim
 
 
+# =========================
+# CODIFICAÇÃO DAS DIMENSÕES (Categorical)
+# =========================
+# só vira Categorical se os valores distintos forem poucos em relação às linhas
+MAX_FRACAO_DISTINTOS = 0.5
+MIN_DISTINTOS_PERMITIDOS = 50
+
+
+def _eh_texto(s: pd.Series) -> bool:
+    return pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype)
+
+
+def _categorizar(s: pd.Series) -> pd.Series | None:
+    """
+    Converte uma coluna de texto em Categorical com rótulos normalizados:
+    espaços aparados/colapsados e variantes de maiúsculas unificadas
+    ("LOJA 1 ", "Loja 1" -> uma categoria). O rótulo exibido é a grafia
+    mais frequente da variante. Vazios viram NaN.
+    Retorna None se a coluna tiver valores distintos demais.
+    """
+    codigos, distintos = pd.factorize(s, use_na_sentinel=True)
+    if len(distintos) == 0 or len(distintos) > max(MIN_DISTINTOS_PERMITIDOS, len(s) * MAX_FRACAO_DISTINTOS):
+        return None
+
+    frequencia = np.bincount(codigos[codigos >= 0], minlength=len(distintos))
+
+    # normalização roda só sobre os valores distintos
+    melhor: dict[str, tuple[int, str]] = {}   # chave -> (frequência, rótulo)
+    chaves: list[str | None] = []
+    for i, v in enumerate(distintos):
+        rotulo = re.sub(r"\s+", " ", str(v).strip())
+        chave = rotulo.casefold() if rotulo else None
+        chaves.append(chave)
+        if chave is not None and (chave not in melhor or frequencia[i] > melhor[chave][0]):
+            melhor[chave] = (int(frequencia[i]), rotulo)
+
+    categorias = sorted(rotulo for _, rotulo in melhor.values())
+    posicao = {rotulo: i for i, rotulo in enumerate(categorias)}
+    # posição extra no fim: código -1 (NaN) continua -1
+    mapa = np.array([posicao[melhor[c][1]] if c is not None else -1 for c in chaves] + [-1], dtype=np.int32)
+
+    return pd.Series(pd.Categorical.from_codes(mapa[codigos], categories=categorias), index=s.index, name=s.name)
+
+
+def codificar_dimensoes(df: pd.DataFrame, dims: dict | None = None) -> pd.DataFrame:
+    """
+    Converte as colunas de dimensão (loja, região, promotor, categoria, marca,
+    concorrente...) em Categorical com rótulos normalizados. Top-N e groupby
+    passam a rodar sobre os códigos inteiros em vez de re-hashear strings.
+    Colunas já categóricas, não textuais ou com cardinalidade alta ficam como estão.
+    """
+    dims = dims if dims is not None else _detectar_dimensoes(df)
+
+    novas = {}
+    for col in dict.fromkeys(c for c in dims.values() if c):
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype) or not _eh_texto(s):
+            continue
+        cat = _categorizar(s)
+        if cat is not None:
+            novas[col] = cat
+
+    if not novas:
+        return df
+    print(f"🏷️ Dimensões codificadas (Categorical): {', '.join(novas)}")
+    return df.assign(**novas)
+
+
+def _top_contagens(s: pd.Series, n: int = 10) -> pd.Series:
+    """Top-N de ocorrências; em Categorical conta direto pelos códigos."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        vc = s.value_counts()
+        return vc[vc > 0].head(n)
+    return s.astype(str).value_counts().head(n)
+
+
 # =========================
 # CONFORMIDADE (SIM/NÃO/OK)
 # =========================
 def _detectar_colunas_yn(df: pd.DataFrame) -> list[str]:
-    yn_cols = []
-    for c in df.columns:
-        s = df[c].astype(str).str.lower().str.strip()
-        ratio = s.isin(["sim", "não", "nao", "yes", "no", "ok", "nok"]).mean()
-        if ratio > 0.6:
-            yn_cols.append(c)
-    return yn_cols
+    return list(MatrizConformidade.codificar(df).colunas)
 
 
 def _row_conformidade(df: pd.DataFrame, yn_cols: list[str]) -> pd.Series:
@@ -200,75 +330,96 @@ def _row_conformidade(df: pd.DataFrame, yn_cols: list[str]) -> pd.Series:
     if not yn_cols:
         return pd.Series([None] * len(df), index=df.index)
 
-    ok_vals = {"sim", "yes", "ok"}
-    mat = []
-    for c in yn_cols:
-        s = df[c].astype(str).str.lower().str.strip()
-        mat.append(s.isin(ok_vals).astype(float))
-    m = pd.concat(mat, axis=1)
-    return m.mean(axis=1) * 100.0
+    matriz = MatrizConformidade.codificar(df, yn_cols)
+    return pd.Series(matriz.score_linhas(), index=df.index)
 
 
 # =========================
 # PRINCIPAL: KPIs + GRÁFICOS
 # =========================
-def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_charts") -> dict:
+def insumos_base(df: pd.DataFrame, dims: dict) -> dict:
+    """
+    Parte dos insumos que não depende do tipo: Top 10 da melhor dimensão
+    (spec do gráfico, fato e KPIs). Reaproveitada entre tipos pela sessão da
+    planilha (app/sessao_analise.py).
+    """
+    total = len(df)
+    base = {"kpis": [{"label": "Registros", "value": str(total), "tone": "purple"}],
+            "col_top": None, "spec": None, "fato": None}
+
+    prefer_order = [dims.get("loja"), dims.get("regiao"), dims.get("categoria"), dims.get("marca"), dims.get("produto")]
+    col_top = next((c for c in prefer_order if c), None) or _pick_best_categorical(df)
+
+    if col_top:
+        vc = _top_contagens(df[col_top])
+        base["col_top"] = col_top
+        base["spec"] = _barh_spec(vc.sort_values(), f"Top 10 - {col_top}", "Ocorrências")
+        base["fato"] = _fato(f"Top 10 - {col_top}", vc, "Ocorrências", rotulo=col_top)
+        base["kpis"].append({"label": f"Variedade ({col_top})", "value": str(df[col_top].nunique(dropna=True)), "tone": "purple"})
+    return base
+
+
+def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_charts", backend: str | None = None,
+                            dims: dict | None = None, base: dict | None = None) -> dict:
     """
     Retorna dict p/ PDF:
       {
         "total_linhas": int,
         "kpis": [{"label","value","tone"}, ...],
-        "charts": ["path1.png", ...]
+        "charts": ["path1.png", ...],      # vazio no backend "vetorial"
+        "chart_specs": [ChartSpec, ...],
+        "fatos": [{"titulo","colunas","linhas"}, ...]   # rankings já calculados
       }
+    Os fatos vão para o PDF como tabelas e para o prompt como contexto: o
+    modelo só interpreta e recomenda, sem reescrever os números.
+    `dims` / `base`: dimensões e insumos_base já calculados para a planilha.
     """
     tipo = (tipo or "merchandising").lower()
+    backend = backend or backend_graficos()
     out_dir = str(out_dir)
     os.makedirs(out_dir, exist_ok=True)
 
     total = len(df)
-    dims = _detectar_dimensoes(df)
+    dims = dims if dims is not None else _detectar_dimensoes(df)
+    df = codificar_dimensoes(df, dims)  # no-op se a ingestão já codificou
+    base = base if base is not None else insumos_base(df, dims)
 
-    kpis = [{"label": "Registros", "value": str(total), "tone": "purple"}]
+    kpis = list(base["kpis"])
     charts: list[str] = []
+    chart_specs: list[ChartSpec] = []
+    fatos: list[dict] = []
+
+    def _add_chart(spec: ChartSpec, path: str):
+        chart_specs.append(spec)
+        if backend == "png":
+            charts.append(_save_chart(spec, path))
 
     # =========================
     # GRÁFICO BASE: Top 10 de uma dimensão “boa”
     # =========================
-    prefer_order = [dims.get("loja"), dims.get("regiao"), dims.get("categoria"), dims.get("marca"), dims.get("produto")]
-    col_top = next((c for c in prefer_order if c), None) or _pick_best_categorical(df)
-
+    col_top = base["col_top"]
     if col_top:
-        vc = df[col_top].astype(str).value_counts().head(10)
-        plt.figure()
-        vc.sort_values().plot(kind="barh")
-        plt.title(f"Top 10 - {col_top}")
-        plt.xlabel("Ocorrências")
         path = os.path.join(out_dir, f"{tipo}_top10_{_safe_filename(col_top)}.png")
-        _save_fig(path)
-        charts.append(path)
-
-        kpis.append({"label": f"Variedade ({col_top})", "value": str(df[col_top].nunique(dropna=True)), "tone": "purple"})
+        _add_chart(base["spec"], path)
+        fatos.append(base["fato"])
 
     # =========================
     # MERCHANDISING: conformidade inteligente
     # =========================
     if tipo == "merchandising":
-        yn_cols = _detectar_colunas_yn(df)
+        # detecta + codifica as colunas SIM/NÃO uma única vez (matriz int8)
+        matriz = MatrizConformidade.codificar(df)
 
-        if yn_cols:
+        if not matriz.vazia:
             # conformidade por item (pior -> melhor)
-            scores = []
-            for c in yn_cols[:30]:
-                s = df[c].astype(str).str.lower().str.strip()
-                ok = s.isin(["sim", "yes", "ok"]).mean() * 100.0
-                scores.append((c, ok))
+            scores = matriz.score_itens(limite=30)
 
             avg_ok = sum(v for _, v in scores) / max(len(scores), 1)
             kpis.append({"label": "Conformidade média", "value": f"{avg_ok:.0f}%", "tone": _tone_pct(avg_ok)})
 
             # % lojas críticas (se houver loja)
-            row_score = _row_conformidade(df, yn_cols)
-            crit = (row_score < 60).mean() * 100.0
+            row_score = matriz.score_linhas()
+            crit = (row_score < 60).mean() * 100.0 if len(row_score) else float("nan")
             if pd.notna(crit):
                 kpis.append({"label": "Execução crítica", "value": f"{crit:.0f}%", "tone": "bad" if crit >= 25 else "warn"})
 
@@ -277,30 +428,26 @@ def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_cha
             labels = [a for a, _ in scores[:12]]
             vals = [b for _, b in scores[:12]]
 
-            plt.figure()
-            plt.barh(labels, vals)
-            plt.title("Itens com pior conformidade (SIM/OK)")
-            plt.xlabel("% OK")
+            spec = ChartSpec.criar("barh", labels=labels, valores=vals,
+                                   titulo="Itens com pior conformidade (SIM/OK)", xlabel="% OK")
             path = os.path.join(out_dir, f"{tipo}_pior_conformidade_itens.png")
-            _save_fig(path)
-            charts.append(path)
+            _add_chart(spec, path)
+
+            por_item = pd.Series(dict(scores), dtype=float)
+            fatos.append(_fato("Itens com pior conformidade", por_item.head(10), "% OK", "{:.0f}%", rotulo="Item"))
+            fatos.append(_fato("Itens com melhor conformidade", por_item.iloc[::-1].head(5), "% OK", "{:.0f}%", rotulo="Item"))
 
             # por loja / região / promotor (se existir)
             for dim_name in ["loja", "regiao", "promotor"]:
                 col = dims.get(dim_name)
                 if col:
-                    tmp = df.copy()
-                    tmp["_score"] = row_score
-                    g = tmp.groupby(col, dropna=True)["_score"].mean().dropna()
+                    g = matriz.score_por_dimensao(df[col])
                     if len(g) >= 3:
                         g = g.sort_values().head(12)  # mostra os piores (mais útil)
-                        plt.figure()
-                        g.sort_values().plot(kind="barh")
-                        plt.title(f"Conformidade média (pior) - por {col}")
-                        plt.xlabel("% OK")
+                        spec = _barh_spec(g.sort_values(), f"Conformidade média (pior) - por {col}", "% OK")
                         path = os.path.join(out_dir, f"{tipo}_conformidade_por_{_safe_filename(col)}.png")
-                        _save_fig(path)
-                        charts.append(path)
+                        _add_chart(spec, path)
+                        fatos.append(_fato(f"Pior conformidade por {col}", g.head(10), "% OK", "{:.0f}%", rotulo=col))
 
         else:
             kpis.append({"label": "Conformidade", "value": "Não detectada", "tone": "warn"})
@@ -318,40 +465,33 @@ def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_cha
                 kpis.append({"label": "Preço max", "value": f"{s.max():.2f}", "tone": "purple"})
 
                 # histograma
-                plt.figure()
-                plt.hist(s, bins=20)
-                plt.title(f"Distribuição de preços ({col_preco})")
-                plt.xlabel("Preço")
-                plt.ylabel("Frequência")
+                spec = ChartSpec.histograma(s.to_numpy(), bins=20, titulo=f"Distribuição de preços ({col_preco})",
+                                            xlabel="Preço", ylabel="Frequência")
                 path = os.path.join(out_dir, f"{tipo}_hist_{_safe_filename(col_preco)}.png")
-                _save_fig(path)
-                charts.append(path)
+                _add_chart(spec, path)
 
                 # top 10 maiores preços (outliers)
                 top = s.sort_values(ascending=False).head(10)
-                plt.figure()
-                top.sort_values().plot(kind="barh")
-                plt.title(f"Top 10 maiores preços ({col_preco})")
-                plt.xlabel("Preço")
+                spec = _barh_spec(top.sort_values(), f"Top 10 maiores preços ({col_preco})", "Preço")
                 path = os.path.join(out_dir, f"{tipo}_top10_maiores_precos.png")
-                _save_fig(path)
-                charts.append(path)
+                _add_chart(spec, path)
+
+                col_prod = dims.get("produto")
+                rotulos = df.loc[top.index, col_prod].astype(str).to_numpy() if col_prod else [f"Linha {i}" for i in top.index]
+                fatos.append(_fato(f"Top 10 maiores preços ({col_preco})", pd.Series(top.to_numpy(), index=rotulos),
+                                   "Preço", "{:.2f}", rotulo=col_prod or "Registro"))
 
                 # média por categoria (se existir)
                 col_cat = dims.get("categoria") or dims.get("marca") or None
                 if col_cat:
-                    tmp = df.copy()
-                    tmp["_preco"] = pd.to_numeric(tmp[col_preco], errors="coerce")
-                    g = tmp.groupby(col_cat)["_preco"].mean().dropna()
+                    preco = pd.to_numeric(df[col_preco], errors="coerce")
+                    g = preco.groupby(df[col_cat], observed=True).mean().dropna()
                     if len(g) >= 3:
                         g = g.sort_values(ascending=False).head(12)
-                        plt.figure()
-                        g.sort_values().plot(kind="barh")
-                        plt.title(f"Preço médio por {col_cat} (Top 12)")
-                        plt.xlabel("Preço médio")
+                        spec = _barh_spec(g.sort_values(), f"Preço médio por {col_cat} (Top 12)", "Preço médio")
                         path = os.path.join(out_dir, f"{tipo}_preco_medio_por_{_safe_filename(col_cat)}.png")
-                        _save_fig(path)
-                        charts.append(path)
+                        _add_chart(spec, path)
+                        fatos.append(_fato(f"Preço médio por {col_cat}", g, "Preço médio", "{:.2f}", rotulo=col_cat))
 
         # se existir coluna “concorrente” de preço (muito comum)
         # heurística: procura duas colunas numéricas com "preco" no nome
@@ -384,13 +524,14 @@ def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_cha
 
                     # gráfico: top 10 maiores diferenças %
                     topdif = dif.sort_values(ascending=False).head(10)
-                    plt.figure()
-                    topdif.sort_values().plot(kind="barh")
-                    plt.title(f"Top 10: % acima do concorrente ({nosso} vs {conc})")
-                    plt.xlabel("Diferença %")
+                    spec = _barh_spec(topdif.sort_values(), f"Top 10: % acima do concorrente ({nosso} vs {conc})", "Diferença %")
                     path = os.path.join(out_dir, f"{tipo}_top10_dif_vs_conc.png")
-                    _save_fig(path)
-                    charts.append(path)
+                    _add_chart(spec, path)
+
+                    col_prod = dims.get("produto")
+                    rotulos = df.loc[topdif.index, col_prod].astype(str).to_numpy() if col_prod else [f"Linha {i}" for i in topdif.index]
+                    fatos.append(_fato(f"Maiores diferenças vs {conc}", pd.Series(topdif.to_numpy(), index=rotulos),
+                                       "Diferença %", "{:+.1f}%", rotulo=col_prod or "Registro"))
 
     # =========================
     # CONCORRÊNCIA: top ações / top concorrentes / por região
@@ -400,45 +541,37 @@ def gerar_insumos_pdf_excel(df: pd.DataFrame, tipo: str, out_dir: str = "tmp_cha
         col_conc = dims.get("concorrente")
 
         if col_acao:
-            vc = df[col_acao].astype(str).value_counts().head(10)
-            plt.figure()
-            vc.sort_values().plot(kind="barh")
-            plt.title(f"Top 10 ações ({col_acao})")
-            plt.xlabel("Ocorrências")
+            vc = _top_contagens(df[col_acao])
+            spec = _barh_spec(vc.sort_values(), f"Top 10 ações ({col_acao})", "Ocorrências")
             path = os.path.join(out_dir, f"{tipo}_top10_acoes.png")
-            _save_fig(path)
-            charts.append(path)
+            _add_chart(spec, path)
+            fatos.append(_fato(f"Top 10 ações ({col_acao})", vc, "Ocorrências", rotulo=col_acao))
             kpis.append({"label": "Ações únicas", "value": str(df[col_acao].nunique(dropna=True)), "tone": "purple"})
 
         if col_conc:
-            vc = df[col_conc].astype(str).value_counts().head(10)
-            plt.figure()
-            vc.sort_values().plot(kind="barh")
-            plt.title(f"Top 10 concorrentes ({col_conc})")
-            plt.xlabel("Ocorrências")
+            vc = _top_contagens(df[col_conc])
+            spec = _barh_spec(vc.sort_values(), f"Top 10 concorrentes ({col_conc})", "Ocorrências")
             path = os.path.join(out_dir, f"{tipo}_top10_concorrentes.png")
-            _save_fig(path)
-            charts.append(path)
+            _add_chart(spec, path)
+            fatos.append(_fato(f"Top 10 concorrentes ({col_conc})", vc, "Ocorrências", rotulo=col_conc))
             kpis.append({"label": "Concorrentes", "value": str(df[col_conc].nunique(dropna=True)), "tone": "purple"})
 
         # por região
         col_reg = dims.get("regiao")
         if col_reg and col_acao:
-            tmp = df.copy()
-            tmp["_one"] = 1
-            g = tmp.groupby(col_reg)["_one"].sum().sort_values(ascending=False).head(12)
+            g = df[col_reg].value_counts().head(12)
+            g = g[g > 0]
             if len(g) >= 3:
-                plt.figure()
-                g.sort_values().plot(kind="barh")
-                plt.title(f"Volume de ações por {col_reg} (Top 12)")
-                plt.xlabel("Ocorrências")
+                spec = _barh_spec(g.sort_values(), f"Volume de ações por {col_reg} (Top 12)", "Ocorrências")
                 path = os.path.join(out_dir, f"{tipo}_acoes_por_{_safe_filename(col_reg)}.png")
-                _save_fig(path)
-                charts.append(path)
+                _add_chart(spec, path)
+                fatos.append(_fato(f"Volume de ações por {col_reg}", g, "Ocorrências", rotulo=col_reg))
 
     # limita para não estourar PDF
     return {
         "total_linhas": total,
         "kpis": kpis[:6],
-        "charts": charts[:8]
+        "charts": charts[:8],
+        "chart_specs": chart_specs[:8],
+        "fatos": fatos[:8]
     }
@@ -0,0 +1,152 @@
+"""
+GRAFO DE ETAPAS (Xplors) - efeitos da pós-análise em paralelo, com caminho crítico
+
+Depois que o modelo responde, o /upload fazia tudo em fila: registrar o
+custo, gravar o estado incremental, gerar o PDF, subir o PDF, inserir a
+análise no banco e reler o status do limite. Várias dessas etapas não
+dependem umas das outras (o custo e o estado incremental não esperam o PDF).
+
+GrafoEtapas recebe cada etapa com as etapas de que depende e roda:
+- toda etapa cujas dependências terminaram, já, num pool de threads
+  compartilhado (ETAPAS_THREADS por worker; as etapas esperam rede, banco ou
+  o pool de computação, não a CPU desta thread)
+- a etapa recebe o resultado de cada dependência como argumento nomeado
+- falhou uma etapa: nada novo começa, as que estão rodando terminam e o
+  primeiro erro sobe para quem chamou executar()
+
+relatorio() traz início/duração de cada etapa, o tempo total, a soma das
+durações (o que seria em fila) e o caminho crítico: a cadeia de etapas que
+determinou o tempo total (a última a terminar e, para trás, a dependência
+que terminou por último antes de cada uma).
+
+ETAPAS_THREADS=0 roda em sequência na própria thread (ordem de inclusão).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+ETAPAS_THREADS = int(os.getenv("ETAPAS_THREADS", "8"))
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=ETAPAS_THREADS, thread_name_prefix="etapa")
+        return _pool
+
+
+@dataclass
+class _Etapa:
+    nome: str
+    funcao: Callable[..., Any]
+    depende: tuple[str, ...] = ()
+    inicio_s: float | None = None
+    fim_s: float | None = None
+    resultado: Any = field(default=None, repr=False)
+
+    @property
+    def duracao_s(self) -> float:
+        return (self.fim_s or 0.0) - (self.inicio_s or 0.0)
+
+
+class GrafoEtapas:
+    def __init__(self, nome: str = "", threads: int = ETAPAS_THREADS):
+        self.nome = nome
+        self.threads = threads
+        self._etapas: dict[str, _Etapa] = {}
+        self._t0: float | None = None
+        self._em_fila = False
+        self.total_s: float | None = None
+
+    def etapa(self, nome: str, funcao: Callable[..., Any], depende: tuple[str, ...] = ()) -> "GrafoEtapas":
+        """Inclui `funcao(**{dep: resultado})`; as dependências precisam ter sido incluídas antes."""
+        if nome in self._etapas:
+            raise ValueError(f"Etapa repetida: {nome}")
+        faltando = [d for d in depende if d not in self._etapas]
+        if faltando:
+            raise ValueError(f"Etapa '{nome}' depende de etapas não incluídas: {', '.join(faltando)}")
+        self._etapas[nome] = _Etapa(nome, funcao, tuple(depende))
+        return self
+
+    def _rodar(self, etapa: _Etapa) -> Any:
+        etapa.inicio_s = time.perf_counter() - self._t0
+        try:
+            return etapa.funcao(**{d: self._etapas[d].resultado for d in etapa.depende})
+        finally:
+            etapa.fim_s = time.perf_counter() - self._t0
+
+    def executar(self) -> dict[str, Any]:
+        """Roda o grafo; devolve {etapa: resultado}."""
+        self._t0 = time.perf_counter()
+        try:
+            self._em_fila = self.threads <= 0 or len(self._etapas) <= 1
+            if self._em_fila:
+                for etapa in self._etapas.values():
+                    etapa.resultado = self._rodar(etapa)
+            else:
+                self._executar_em_paralelo()
+        finally:
+            self.total_s = time.perf_counter() - self._t0
+        return {nome: etapa.resultado for nome, etapa in self._etapas.items()}
+
+    def _executar_em_paralelo(self):
+        pool = _executor()
+        pendentes = dict(self._etapas)
+        concluidas: set[str] = set()
+        rodando = {}
+        erro: BaseException | None = None
+        while pendentes or rodando:
+            if erro is None:
+                for nome, etapa in list(pendentes.items()):
+                    if all(d in concluidas for d in etapa.depende):
+                        del pendentes[nome]
+                        rodando[pool.submit(self._rodar, etapa)] = etapa
+            if not rodando:
+                break
+            feitos, _ = wait(rodando, return_when=FIRST_COMPLETED)
+            for futuro in feitos:
+                etapa = rodando.pop(futuro)
+                try:
+                    etapa.resultado = futuro.result()
+                    concluidas.add(etapa.nome)
+                except BaseException as e:
+                    erro = erro or e
+        if erro is not None:
+            raise erro
+
+    def caminho_critico(self) -> list[str]:
+        rodadas = [e for e in self._etapas.values() if e.fim_s is not None]
+        if not rodadas:
+            return []
+        if self._em_fila:  # em sequência cada etapa esperou a anterior: o caminho é a fila inteira
+            return [e.nome for e in rodadas]
+        etapa = max(rodadas, key=lambda e: e.fim_s)
+        caminho = [etapa.nome]
+        while etapa.depende:
+            etapa = max((self._etapas[d] for d in etapa.depende), key=lambda e: e.fim_s or 0.0)
+            caminho.append(etapa.nome)
+        return caminho[::-1]
+
+    def relatorio(self) -> dict:
+        rodadas = {n: e for n, e in self._etapas.items() if e.fim_s is not None}
+        return {
+            "total_s": round(self.total_s or 0.0, 3),
+            "sequencial_s": round(sum(e.duracao_s for e in rodadas.values()), 3),
+            "caminho_critico": self.caminho_critico(),
+            "etapas": {n: {"inicio_s": round(e.inicio_s, 3), "duracao_s": round(e.duracao_s, 3)}
+                       for n, e in rodadas.items()},
+        }
+
+    def resumo(self) -> str:
+        r = self.relatorio()
+        caminho = " → ".join(f"{n} {r['etapas'][n]['duracao_s']:.2f}s" for n in r["caminho_critico"])
+        return (f"{self.nome or 'Etapas'} em {r['total_s']:.2f}s (em fila: {r['sequencial_s']:.2f}s) | "
+                f"caminho crítico: {caminho}")
@@ -0,0 +1,105 @@
+"""
+HISTÓRICO DE ANÁLISES (Xplors) - paginação por cursor (keyset)
+
+listar_analises fazia select('*') com limite fixo de 20 e sem cursor:
+usuários com milhares de análises não passavam da 1ª página, e a lista
+trazia todas as colunas. Aqui:
+
+- ordem estável (created_at desc, id desc) e cursor opaco com o último
+  (created_at, id) da página: a próxima página é um "(created_at, id) <
+  cursor" que começa direto no ponto certo do índice idx_analises_user_created
+  (user_id, created_at desc, id desc) - custo constante em qualquer página,
+  ao contrário de OFFSET
+- projeção: só as colunas da lista (COLUNAS_LISTA) ou as pedidas, dentro
+  de CAMPOS_PERMITIDOS
+- limite+1 linhas para saber se há próxima página sem um COUNT
+"""
+
+import base64
+import json
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+CAMPOS_PERMITIDOS = (
+    "id", "user_id", "tipo_analise", "total_linhas", "nome_arquivo_original",
+    "pdf_filename", "pdf_path", "pdf_url", "custo_usd", "arquivo_hash",
+    "created_at", "updated_at",
+)
+# lista do histórico: sem colunas pesadas
+COLUNAS_LISTA = (
+    "id", "tipo_analise", "total_linhas", "nome_arquivo_original",
+    "pdf_filename", "pdf_path", "custo_usd", "created_at",
+)
+# sempre lidas: ordem/cursor
+_COLUNAS_CURSOR = ("created_at", "id")
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(registro: dict) -> str:
+    bruto = json.dumps([registro["created_at"], registro["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id_ = json.loads(bruto)
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f"cursor inválido: {cursor!r}") from e
+    if not isinstance(created_at, str) or not isinstance(id_, (str, int)):
+        raise CursorInvalido(f"cursor inválido: {cursor!r}")
+    return created_at, str(id_)
+
+
+def colunas_projecao(campos: str | None, extras: tuple = ()) -> list[str]:
+    """Colunas a ler: as pedidas (validadas) ou COLUNAS_LISTA, mais as do cursor e `extras`."""
+    if campos:
+        pedidas = [c.strip() for c in campos.split(",") if c.strip()]
+        invalidas = [c for c in pedidas if c not in CAMPOS_PERMITIDOS]
+        if invalidas:
+            raise ValueError(f"Campos inválidos: {', '.join(invalidas)}")
+    else:
+        pedidas = list(COLUNAS_LISTA)
+    return list(dict.fromkeys([*pedidas, *_COLUNAS_CURSOR, *extras]))
+
+
+def _valor_filtro(valor: str) -> str:
+    # aspas: timestamps têm ":" e "+", reservados na sintaxe de filtros do PostgREST
+    return '"' + str(valor).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def listar_pagina(supabase, user_id: str, limite: int = LIMITE_PADRAO, cursor: str | None = None,
+                  colunas: list[str] | None = None) -> dict:
+    """
+    Uma página do histórico do usuário, mais recentes primeiro.
+    Retorna {"itens": [...], "proximo_cursor": str | None}.
+    """
+    limite = max(1, min(int(limite), LIMITE_MAXIMO))
+    colunas = colunas or colunas_projecao(None)
+
+    consulta = supabase.table("analises")\
+        .select(", ".join(colunas))\
+        .eq("user_id", user_id)
+
+    if cursor:
+        created_at, id_ = decodificar_cursor(cursor)
+        # (created_at, id) < cursor, escrito como "created_at <= c AND (created_at < c OR id < i)":
+        # o <= vira limite do range no índice; o OR só filtra as linhas empatadas na borda
+        consulta = consulta\
+            .lte("created_at", created_at)\
+            .or_(f"created_at.lt.{_valor_filtro(created_at)},id.lt.{_valor_filtro(id_)}")
+
+    res = consulta\
+        .order("created_at", desc=True)\
+        .order("id", desc=True)\
+        .limit(limite + 1)\
+        .execute()
+
+    linhas = res.data or []
+    itens = linhas[:limite]
+    proximo = codificar_cursor(itens[-1]) if len(linhas) > limite and itens else None
+    return {"itens": itens, "proximo_cursor": proximo}
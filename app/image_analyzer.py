@@ -8,44 +8,17 @@ import base64
 from io import BytesIO
 from PIL import Image
 
-class ImageAnalyzer:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-    
-    def preparar_imagem(self, arquivo_imagem) -> tuple:
-        """Prepara imagem para análise (retorna base64 e dimensões)"""
-        try:
-            # Abrir imagem
-            img = Image.open(arquivo_imagem)
-            
-            # Redimensionar se muito grande (max 2048x2048)
-            max_size = 2048
-            if img.width > max_size or img.height > max_size:
-                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
-            
-            # Converter para base64
-            buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
-            
-            return img_base64, img.width, img.height
-            
-        except Exception as e:
-            print(f"❌ Erro ao preparar imagem: {e}")
-            raise
-    
-    def analisar_merchandising(self, imagem_base64: str, contexto: str = "") -> dict:
-        """
-        Análise PROFISSIONAL de Merchandising Visual
-        Para stands, displays, vitrines, exposições de produtos
-        """
-        try:
-            prompt = f"""
-Você é um especialista em VISUAL MERCHANDISING e TRADE MARKETING.
+from app.cost_tracker import tokens_em_cache
 
-Analise esta foto de stand/display/vitrine de produtos e forneça uma análise PROFISSIONAL e DETALHADA.
+# Prompts fixos vão na mensagem de sistema (prefixo idêntico em toda chamada ->
+# cache de prompt do provedor, tokens com desconto). Contexto e imagem, que
+# mudam por requisição, vão por último na mensagem do usuário.
+SISTEMA_MERCHANDISING = "Você é um especialista em Visual Merchandising, Trade Marketing e execução de PDV (Ponto de Venda). Sua missão é analisar displays e fornecer sugestões práticas e acionáveis para melhorar vendas."
 
-{f"CONTEXTO: {contexto}" if contexto else ""}
+PROMPT_MERCHANDISING = """
+Você é um especialista em VISUAL MERCHANDISING e TRADE MARKETING.
+
+Analise a foto de stand/display/vitrine de produtos (enviada na mensagem do usuário, com o contexto, se houver) e forneça uma análise PROFISSIONAL e DETALHADA.
 
 Forneça uma análise completa seguindo esta estrutura:
 
@@ -172,50 +145,8 @@ IMPORTANTE:
 - Pense como se fosse treinar um funcionário
 - Considere custos baixos e fácil implementação
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é um especialista em Visual Merchandising, Trade Marketing e execução de PDV (Ponto de Venda). Sua missão é analisar displays e fornecer sugestões práticas e acionáveis para melhorar vendas."
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{imagem_base64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=2500,
-                temperature=0.7
-            )
-            
-            analise = response.choices[0].message.content
-            tokens_input = response.usage.prompt_tokens
-            tokens_output = response.usage.completion_tokens
-            
-            return {
-                'analise': analise,
-                'tokens_input': tokens_input,
-                'tokens_output': tokens_output,
-                'tipo': 'merchandising'
-            }
-            
-        except Exception as e:
-            print(f"❌ Erro ao analisar merchandising: {e}")
-            raise
-    
-    def analisar_grafico(self, imagem_base64: str) -> dict:
-        """Analisa gráfico em imagem"""
-        try:
-            prompt = """
+
+PROMPT_GRAFICO = """
 Analise este gráfico/chart em detalhes.
 
 Extraia e forneça:
@@ -239,45 +170,8 @@ Extraia e forneça:
 
 Seja preciso com os números e detalhado nas análises.
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{imagem_base64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1500
-            )
-            
-            analise = response.choices[0].message.content
-            tokens_input = response.usage.prompt_tokens
-            tokens_output = response.usage.completion_tokens
-            
-            return {
-                'analise': analise,
-                'tokens_input': tokens_input,
-                'tokens_output': tokens_output,
-                'tipo': 'grafico'
-            }
-            
-        except Exception as e:
-            print(f"❌ Erro ao analisar gráfico: {e}")
-            raise
-    
-    def analisar_tabela(self, imagem_base64: str) -> dict:
-        """Analisa tabela em imagem"""
-        try:
-            prompt = """
+
+PROMPT_TABELA = """
 Extraia TODOS os dados desta tabela.
 
 Forneça:
@@ -301,36 +195,88 @@ Forneça:
 
 Seja preciso e completo na extração dos dados.
 """
+
+
+class ImageAnalyzer:
+    def __init__(self, api_key: str):
+        self.client = OpenAI(api_key=api_key)
+    
+    def preparar_imagem(self, arquivo_imagem) -> tuple:
+        """Prepara imagem para análise (retorna base64 e dimensões)"""
+        try:
+            # Abrir imagem
+            img = Image.open(arquivo_imagem)
+            
+            # Redimensionar se muito grande (max 2048x2048)
+            max_size = 2048
+            if img.width > max_size or img.height > max_size:
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            
+            # Converter para base64
+            buffered = BytesIO()
+            img.save(buffered, format="PNG")
+            img_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+            
+            return img_base64, img.width, img.height
             
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{imagem_base64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=2000
+        except Exception as e:
+            print(f"❌ Erro ao preparar imagem: {e}")
+            raise
+    
+    def _analisar(self, sistema: str, imagem_base64: str, tipo: str, contexto: str = "", **opcoes) -> dict:
+        """Prefixo estático (sistema) primeiro; contexto + imagem por último."""
+        conteudo = []
+        if contexto:
+            conteudo.append({"type": "text", "text": f"CONTEXTO: {contexto}"})
+        conteudo.append({"type": "image_url", "image_url": {"url": f"data:image/png;base64,{imagem_base64}"}})
+
+        response = self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": sistema},
+                {"role": "user", "content": conteudo}
+            ],
+            **opcoes
+        )
+
+        return {
+            'analise': response.choices[0].message.content,
+            'tokens_input': response.usage.prompt_tokens,
+            'tokens_output': response.usage.completion_tokens,
+            'tokens_cache': tokens_em_cache(response.usage),
+            'tipo': tipo
+        }
+    
+    def analisar_merchandising(self, imagem_base64: str, contexto: str = "") -> dict:
+        """
+        Análise PROFISSIONAL de Merchandising Visual
+        Para stands, displays, vitrines, exposições de produtos
+        """
+        try:
+            return self._analisar(
+                f"{SISTEMA_MERCHANDISING}\n\n{PROMPT_MERCHANDISING.strip()}",
+                imagem_base64, 'merchandising', contexto,
+                max_tokens=2500,
+                temperature=0.7
             )
             
-            analise = response.choices[0].message.content
-            tokens_input = response.usage.prompt_tokens
-            tokens_output = response.usage.completion_tokens
+        except Exception as e:
+            print(f"❌ Erro ao analisar merchandising: {e}")
+            raise
+    
+    def analisar_grafico(self, imagem_base64: str) -> dict:
+        """Analisa gráfico em imagem"""
+        try:
+            return self._analisar(PROMPT_GRAFICO.strip(), imagem_base64, 'grafico', max_tokens=1500)
             
-            return {
-                'analise': analise,
-                'tokens_input': tokens_input,
-                'tokens_output': tokens_output,
-                'tipo': 'tabela'
-            }
+        except Exception as e:
+            print(f"❌ Erro ao analisar gráfico: {e}")
+            raise
+    
+    def analisar_tabela(self, imagem_base64: str) -> dict:
+        """Analisa tabela em imagem"""
+        try:
+            return self._analisar(PROMPT_TABELA.strip(), imagem_base64, 'tabela', max_tokens=2000)
             
         except Exception as e:
             print(f"❌ Erro ao analisar tabela: {e}")
@@ -0,0 +1,408 @@
+"""
+REANÁLISE INCREMENTAL (Xplors) - planilhas acumuladas semana a semana
+
+Clientes mandam toda semana a planilha acumulada: as linhas antigas vêm
+iguais e só as do fim são novas. Refazer o relatório inteiro custava a
+mesma chamada ao modelo de sempre para dizer quase a mesma coisa. Aqui:
+
+- cada linha vira um hash (pd.util.hash_pandas_object sobre todas as
+  colunas; Categorical e texto dão o mesmo hash)
+- depois de cada análise fica um EstadoIncremental por usuário e conjunto de
+  colunas: hashes ordenados, agregados somáveis (contagens por dimensão,
+  SIM/OK por item e por loja/região/promotor, soma/mín/máx das numéricas) e
+  as conclusões do relatório
+- no upload seguinte, se TODAS as linhas do estado anterior continuam na
+  planilha (multiconjunto de hashes) e as novas são no máximo
+  INCREMENTAL_MAX_FRACAO_NOVAS do total, os agregados de agora = anteriores +
+  agregados só das linhas novas (as antigas não são reprocessadas)
+- o relatório vira "o que mudou": KPIs e rankings de variação saem dos
+  agregados; o modelo recebe só o resumo das novas linhas, as variações e as
+  conclusões anteriores
+
+Linha antiga alterada ou removida -> relatório completo (os agregados
+anteriores já não valem).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.chart_cache import ChartSpec, backend_graficos
+from app.conformidade import MatrizConformidade
+from app.excel_processor import _barh_spec, _fato, _safe_filename, _save_chart, _tone_pct
+
+INCREMENTAL = os.getenv("INCREMENTAL", "1").strip().lower() not in ("0", "false", "nao", "não")
+ESTADO_INCREMENTAL_DIR = os.getenv("ESTADO_INCREMENTAL_DIR",
+                                   os.path.join(tempfile.gettempdir(), "xplors_incremental"))
+# acima dessa fração de linhas novas o relatório completo diz mais que o "o que mudou"
+INCREMENTAL_MAX_FRACAO_NOVAS = float(os.getenv("INCREMENTAL_MAX_FRACAO_NOVAS", "0.5"))
+
+MAX_CONCLUSOES = 1500
+MAX_ITENS_CONFORMIDADE = 30
+DIMENSOES_CONFORMIDADE = ("loja", "regiao", "promotor")
+ORDEM_DIMENSOES = ("loja", "regiao", "categoria", "marca", "produto", "promotor", "concorrente", "acao")
+
+
+# =========================
+# HASH DAS LINHAS
+# =========================
+def hashes_linhas(df: pd.DataFrame) -> np.ndarray:
+    """uint64 por linha (conteúdo de todas as colunas, sem o índice)."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def linhas_antigas(hashes: np.ndarray, anteriores_ordenados: np.ndarray) -> np.ndarray:
+    """
+    Máscara das linhas que já estavam no upload anterior, como multiconjunto:
+    uma linha repetida 3x antes e 5x agora tem 2 ocorrências novas.
+    """
+    n = len(hashes)
+    if n == 0 or len(anteriores_ordenados) == 0:
+        return np.zeros(n, dtype=bool)
+
+    ordem = np.argsort(hashes, kind="stable")
+    ordenados = hashes[ordem]
+    inicio = np.r_[True, ordenados[1:] != ordenados[:-1]]
+    primeiro = np.flatnonzero(inicio)
+    ocorrencia = np.arange(n) - primeiro[np.cumsum(inicio) - 1]
+
+    unicos, contagens = np.unique(anteriores_ordenados, return_counts=True)
+    pos = np.minimum(np.searchsorted(unicos, ordenados), len(unicos) - 1)
+    permitidas = np.where(unicos[pos] == ordenados, contagens[pos], 0)
+
+    antigas = np.empty(n, dtype=bool)
+    antigas[ordem] = ocorrencia < permitidas
+    return antigas
+
+
+# =========================
+# AGREGADOS SOMÁVEIS
+# =========================
+def _somar_dict(a: dict, b: dict) -> dict:
+    soma = dict(a)
+    for k, v in b.items():
+        if k not in soma:
+            soma[k] = v
+        elif isinstance(v, list):
+            soma[k] = [x + y for x, y in zip(soma[k], v)]
+        else:
+            soma[k] = soma[k] + v
+    return soma
+
+
+@dataclass
+class Agregados:
+    linhas: int = 0
+    contagens: dict = field(default_factory=dict)      # coluna -> {valor: linhas}
+    itens: list = field(default_factory=list)           # colunas SIM/NÃO
+    ok_itens: list = field(default_factory=list)        # linhas OK por item
+    ok_dimensao: dict = field(default_factory=dict)     # coluna -> {valor: [itens OK somados, linhas]}
+    numericas: dict = field(default_factory=dict)       # coluna -> [n, soma, mín, máx]
+
+    @classmethod
+    def calcular(cls, df: pd.DataFrame, dims: dict, itens: list | None = None) -> "Agregados":
+        """Uma passada sobre `df`. `itens`: colunas SIM/NÃO já conhecidas (padrão detecta)."""
+        colunas_dim = [c for c in dict.fromkeys(dims.get(d) for d in ORDEM_DIMENSOES) if c and c in df.columns]
+        contagens = {}
+        for col in colunas_dim:
+            vc = df[col].value_counts(dropna=True)
+            contagens[col] = {str(k): int(v) for k, v in vc.items() if v > 0}
+
+        matriz = MatrizConformidade.codificar(df, colunas=itens)
+        ok_dimensao = {}
+        if not matriz.vazia:
+            ok_linha = matriz.ok_por_linha()
+            for nome in DIMENSOES_CONFORMIDADE:
+                col = dims.get(nome)
+                if not col or col not in df.columns:
+                    continue
+                codigos, grupos = pd.factorize(df[col], use_na_sentinel=True)
+                validos = codigos >= 0
+                soma = np.bincount(codigos[validos], weights=ok_linha[validos], minlength=len(grupos))
+                linhas = np.bincount(codigos[validos], minlength=len(grupos))
+                ok_dimensao[col] = {str(g): [float(s), int(n)] for g, s, n in zip(grupos, soma, linhas) if n}
+
+        numericas = {}
+        for col in df.select_dtypes(include="number").columns:
+            s = df[col].dropna()
+            if len(s):
+                numericas[str(col)] = [int(len(s)), float(s.sum()), float(s.min()), float(s.max())]
+
+        return cls(
+            linhas=len(df),
+            contagens=contagens,
+            itens=list(matriz.colunas),
+            ok_itens=[int(x) for x in matriz.ok.sum(axis=0, dtype=np.int64)],
+            ok_dimensao=ok_dimensao,
+            numericas=numericas,
+        )
+
+    def somar(self, outro: "Agregados") -> "Agregados":
+        """Agregados da união (mesmos itens SIM/NÃO; `outro` calculado com itens=self.itens)."""
+        numericas = dict(self.numericas)
+        for col, (n, soma, minimo, maximo) in outro.numericas.items():
+            if col in numericas:
+                n0, s0, m0, x0 = numericas[col]
+                numericas[col] = [n0 + n, s0 + soma, min(m0, minimo), max(x0, maximo)]
+            else:
+                numericas[col] = [n, soma, minimo, maximo]
+        return Agregados(
+            linhas=self.linhas + outro.linhas,
+            contagens={c: _somar_dict(self.contagens.get(c, {}), outro.contagens.get(c, {}))
+                       for c in dict.fromkeys([*self.contagens, *outro.contagens])},
+            itens=list(self.itens),
+            ok_itens=[a + b for a, b in zip(self.ok_itens, outro.ok_itens)] if outro.itens else list(self.ok_itens),
+            ok_dimensao={c: _somar_dict(self.ok_dimensao.get(c, {}), outro.ok_dimensao.get(c, {}))
+                         for c in dict.fromkeys([*self.ok_dimensao, *outro.ok_dimensao])},
+            numericas=numericas,
+        )
+
+    def score_itens(self) -> dict:
+        if not self.linhas:
+            return {}
+        return {i: ok * 100.0 / self.linhas for i, ok in zip(self.itens, self.ok_itens)}
+
+    def conformidade_media(self) -> float | None:
+        scores = list(self.score_itens().values())[:MAX_ITENS_CONFORMIDADE]
+        return sum(scores) / len(scores) if scores else None
+
+    def score_dimensao(self, col: str) -> dict:
+        if not self.itens:
+            return {}
+        return {v: soma * 100.0 / (len(self.itens) * n) for v, (soma, n) in self.ok_dimensao.get(col, {}).items() if n}
+
+    def media(self, col: str) -> float | None:
+        n, soma, _, _ = self.numericas.get(col, (0, 0.0, 0.0, 0.0))
+        return soma / n if n else None
+
+
+# =========================
+# ESTADO POR USUÁRIO
+# =========================
+@dataclass
+class EstadoIncremental:
+    colunas: list
+    tipo: str
+    hashes: np.ndarray          # ordenados
+    agregados: Agregados
+    conclusoes: str = ""
+    arquivo_hash: str | None = None
+    gerado_em: str = ""
+
+
+@dataclass
+class Incremento:
+    anterior: EstadoIncremental
+    novas: pd.DataFrame
+    agregados: Agregados          # anterior + novas
+    agregados_novas: Agregados
+    hashes: np.ndarray
+
+    @property
+    def linhas_novas(self) -> int:
+        return len(self.novas)
+
+
+def conclusoes_do_texto(texto: str) -> str:
+    """Começo do relatório (resumo executivo / o que mudou), para o próximo incremento."""
+    texto = (texto or "").strip()
+    return texto if len(texto) <= MAX_CONCLUSOES else texto[:MAX_CONCLUSOES - 1] + "…"
+
+
+class EstadosIncrementais:
+    """Um arquivo .npz por (usuário, colunas da planilha), gravado de forma atômica."""
+
+    def __init__(self, pasta: str | None = None, ativo: bool = INCREMENTAL):
+        self.pasta = pasta or ESTADO_INCREMENTAL_DIR
+        self.ativo = ativo
+        self._lock = threading.Lock()
+
+    def _caminho(self, user_id: str, colunas: list) -> str:
+        usuario = hashlib.sha1(str(user_id).encode("utf-8")).hexdigest()[:16]
+        schema = hashlib.sha1("\x1f".join(map(str, colunas)).encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.pasta, usuario, f"{schema}.npz")
+
+    def carregar(self, user_id: str, colunas: list) -> EstadoIncremental | None:
+        try:
+            with np.load(self._caminho(user_id, colunas)) as dados:
+                meta = json.loads(dados["meta"].tobytes().decode("utf-8"))
+                hashes = dados["hashes"]
+        except (OSError, KeyError, ValueError):
+            return None
+        if meta.get("colunas") != [str(c) for c in colunas]:
+            return None
+        return EstadoIncremental(
+            colunas=meta["colunas"], tipo=meta["tipo"], hashes=hashes,
+            agregados=Agregados(**meta["agregados"]), conclusoes=meta.get("conclusoes", ""),
+            arquivo_hash=meta.get("arquivo_hash"), gerado_em=meta.get("gerado_em", ""),
+        )
+
+    def gravar(self, user_id: str, estado: EstadoIncremental):
+        destino = self._caminho(user_id, estado.colunas)
+        meta = {
+            "colunas": [str(c) for c in estado.colunas],
+            "tipo": estado.tipo,
+            "agregados": asdict(estado.agregados),
+            "conclusoes": estado.conclusoes,
+            "arquivo_hash": estado.arquivo_hash,
+            "gerado_em": estado.gerado_em,
+        }
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, hashes=np.sort(estado.hashes),
+                         meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8))
+            with self._lock:
+                os.replace(tmp, destino)
+        except OSError as e:
+            print(f"⚠️ Não foi possível gravar o estado incremental: {e}")
+
+    def detectar(self, user_id: str, df: pd.DataFrame, dims: dict, tipo: str,
+                 hashes: np.ndarray | None = None) -> Incremento | None:
+        """Incremento sobre o último upload do usuário com as mesmas colunas, ou None (relatório completo)."""
+        if not self.ativo or len(df) == 0:
+            return None
+        anterior = self.carregar(user_id, list(df.columns))
+        if anterior is None or anterior.tipo != tipo:
+            return None
+
+        hashes = hashes_linhas(df) if hashes is None else hashes
+        antigas = linhas_antigas(hashes, anterior.hashes)
+        n_antigas = int(antigas.sum())
+        n_novas = len(df) - n_antigas
+        if n_antigas < len(anterior.hashes):
+            print(f"🔁 Incremental descartado: {len(anterior.hashes) - n_antigas} linha(s) do upload anterior mudaram")
+            return None
+        if n_novas == 0 or n_novas > len(df) * INCREMENTAL_MAX_FRACAO_NOVAS:
+            return None
+
+        novas = df[~antigas]
+        agregados_novas = Agregados.calcular(novas, dims, itens=anterior.agregados.itens)
+        print(f"🔁 Planilha acumulada: {n_novas} linha(s) nova(s) sobre {n_antigas} do upload anterior")
+        return Incremento(
+            anterior=anterior,
+            novas=novas,
+            agregados=anterior.agregados.somar(agregados_novas),
+            agregados_novas=agregados_novas,
+            hashes=hashes,
+        )
+
+    def registrar(self, user_id: str, df: pd.DataFrame, dims: dict, tipo: str, texto: str,
+                  hashes: np.ndarray | None = None, agregados: Agregados | None = None,
+                  arquivo_hash: str | None = None):
+        """Estado para o próximo upload (agregados do incremento, ou uma passada sobre `df`)."""
+        if not self.ativo:
+            return
+        self.gravar(user_id, EstadoIncremental(
+            colunas=[str(c) for c in df.columns],
+            tipo=tipo,
+            hashes=hashes_linhas(df) if hashes is None else hashes,
+            agregados=agregados or Agregados.calcular(df, dims),
+            conclusoes=conclusoes_do_texto(texto),
+            arquivo_hash=arquivo_hash,
+            gerado_em=datetime.now().isoformat(timespec="seconds"),
+        ))
+
+
+estados_incrementais = EstadosIncrementais()
+
+
+# =========================
+# INSUMOS "O QUE MUDOU"
+# =========================
+def _variacao_pp(antes: float | None, agora: float | None) -> str:
+    if antes is None:
+        return f"{agora:.0f}% (novo)"
+    return f"{antes:.0f}% → {agora:.0f}% ({agora - antes:+.1f} p.p.)"
+
+
+def _fato_variacao(titulo: str, rotulo: str, antes: dict, agora: dict, limite: int = 10) -> dict | None:
+    """Maiores variações em p.p. (valores que surgiram agora vêm depois)."""
+    mudancas = [(k, antes.get(k), v) for k, v in agora.items()]
+    mudancas = [m for m in mudancas if m[1] is None or abs(m[2] - m[1]) >= 0.05]
+    mudancas.sort(key=lambda m: -1.0 if m[1] is None else abs(m[2] - m[1]), reverse=True)
+    mudancas = mudancas[:limite]
+    if not mudancas:
+        return None
+    return {
+        "titulo": titulo,
+        "colunas": ["#", rotulo, "% OK (antes → agora)"],
+        "linhas": [[str(i), str(k), _variacao_pp(a, v)] for i, (k, a, v) in enumerate(mudancas, start=1)],
+    }
+
+
+def insumos_incrementais(inc: Incremento, tipo: str, out_dir: str = "tmp_charts", backend: str | None = None) -> dict:
+    """
+    Mesmo formato de gerar_insumos_pdf_excel, calculado só com os agregados
+    (as linhas antigas não são relidas): KPIs com a variação, onde entraram os
+    registros novos e quem mais mudou de conformidade.
+    """
+    backend = backend or backend_graficos()
+    os.makedirs(str(out_dir), exist_ok=True)
+    antes, agora, novas = inc.anterior.agregados, inc.agregados, inc.agregados_novas
+
+    kpis = [
+        {"label": "Registros", "value": str(agora.linhas), "tone": "purple"},
+        {"label": "Novos registros", "value": str(novas.linhas), "tone": "purple"},
+    ]
+    charts: list[str] = []
+    chart_specs: list[ChartSpec] = []
+    fatos: list[dict] = []
+
+    # onde entraram os registros novos (primeira dimensão com valores)
+    for col, contagem in novas.contagens.items():
+        if not contagem:
+            continue
+        serie = pd.Series(contagem, dtype=float).sort_values(ascending=False).head(10).rename_axis(col)
+        spec = _barh_spec(serie.sort_values(), f"Novos registros por {col}", "Novos")
+        chart_specs.append(spec)
+        if backend == "png":
+            charts.append(_save_chart(spec, os.path.join(str(out_dir), f"{tipo}_novos_{_safe_filename(col)}.png")))
+        fatos.append(_fato(f"Novos registros por {col}", serie, "Novos"))
+        break
+
+    media_antes, media_agora = antes.conformidade_media(), agora.conformidade_media()
+    if media_agora is not None:
+        kpis.append({"label": "Conformidade média", "value": _variacao_pp(media_antes, media_agora),
+                     "tone": _tone_pct(media_agora)})
+        fato = _fato_variacao("Itens com maior variação de conformidade", "Item",
+                              antes.score_itens(), agora.score_itens())
+        if fato:
+            fatos.append(fato)
+        for col in agora.ok_dimensao:
+            fato = _fato_variacao(f"Maior variação de conformidade por {col}", col,
+                                  antes.score_dimensao(col), agora.score_dimensao(col))
+            if fato:
+                fatos.append(fato)
+
+    variacoes = []
+    for col in agora.numericas:
+        m_antes, m_agora = antes.media(col), agora.media(col)
+        if m_antes and m_agora is not None:
+            variacoes.append((col, m_antes, m_agora, (m_agora - m_antes) * 100.0 / abs(m_antes)))
+    variacoes.sort(key=lambda x: abs(x[3]), reverse=True)
+    if variacoes:
+        col, m_antes, m_agora, pct = variacoes[0]
+        kpis.append({"label": f"Média {col}", "value": f"{m_agora:,.2f} ({pct:+.1f}%)", "tone": "purple"})
+        fatos.append({
+            "titulo": "Médias das colunas numéricas",
+            "colunas": ["#", "Coluna", "Média (antes → agora)"],
+            "linhas": [[str(i), c, f"{a:,.2f} → {b:,.2f} ({p:+.1f}%)"]
+                       for i, (c, a, b, p) in enumerate(variacoes[:8], start=1)],
+        })
+
+    return {
+        "total_linhas": agora.linhas,
+        "kpis": kpis[:6],
+        "charts": charts[:8],
+        "chart_specs": chart_specs[:8],
+        "fatos": fatos[:8],
+    }
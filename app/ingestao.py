@@ -0,0 +1,435 @@
+"""
+INGESTÃO DE PLANILHAS (Xplors) - detecção de formato + leitores rápidos
+
+- Formato pelo conteúdo (assinatura do arquivo), não só pela extensão:
+  .xlsx (zip), .xls (OLE2) ou CSV/texto
+- CSV: separador e encoding detectados numa amostra; caminho rápido via
+  pyarrow.csv (vírgula decimal -> engine C do pandas com dtypes inferidos
+  numa amostra, sem reinferir o arquivo inteiro)
+- Pastas de trabalho com várias abas (ex.: uma aba por região): cada aba é
+  lida em paralelo (processos) e tudo vira um único DataFrame com a coluna
+  "Aba" indicando a origem de cada linha
+- Planilhas maiores que a memória livre (app/admissao.py): dimensões sem ler
+  as células e leitura amostrada em streaming (amostra aleatória de linhas)
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import BinaryIO
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - pyarrow está no requirements
+    pa_csv = None
+
+FORMATOS = ("xlsx", "xls", "csv")
+
+COLUNA_ABA = "Aba"
+
+AMOSTRA_BYTES = 64 * 1024
+AMOSTRA_LINHAS_DTYPE = 1000
+AMOSTRA_LINHAS_DECIMAL = 200
+
+# 0/1 = abas lidas em sequência no próprio processo
+INGESTAO_PROCESSOS = int(os.getenv("INGESTAO_PROCESSOS", str(min(4, os.cpu_count() or 1))))
+
+_ASSINATURA_ZIP = b"PK\x03\x04"
+_ASSINATURA_OLE2 = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+
+
+# =========================
+# DETECÇÃO
+# =========================
+def _ler_bytes(fonte: str | BinaryIO) -> bytes:
+    if isinstance(fonte, (str, os.PathLike)):
+        with open(fonte, "rb") as f:
+            return f.read()
+    posicao = fonte.tell()
+    dados = fonte.read()
+    fonte.seek(posicao)
+    return dados
+
+
+def detectar_formato(inicio: bytes, nome_arquivo: str | None = None) -> str:
+    """"xlsx" | "xls" | "csv" pela assinatura; a extensão só desempata."""
+    if inicio.startswith(_ASSINATURA_ZIP):
+        return "xlsx"
+    if inicio.startswith(_ASSINATURA_OLE2):
+        return "xls"
+
+    ext = os.path.splitext(str(nome_arquivo or ""))[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if ext == ".xls":
+        return "xls"
+    return "csv"
+
+
+def _detectar_encoding(amostra: bytes) -> str:
+    if amostra.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    try:
+        amostra.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # amostra cortada no meio de um caractere multibyte ainda é utf-8
+        if e.start >= len(amostra) - 3:
+            return "utf-8"
+        return "cp1252"  # exportações do Excel em PT-BR
+
+
+def _detectar_separador(texto: str) -> str:
+    linhas = "\n".join(texto.splitlines()[:50])
+    try:
+        return csv.Sniffer().sniff(linhas, delimiters=";,\t|").delimiter
+    except csv.Error:
+        primeira = linhas.split("\n", 1)[0]
+        return max(";,\t|", key=primeira.count)
+
+
+_NUMERO_VIRGULA = re.compile(r"^[-+]?(\d{1,3}(\.\d{3})+|\d+),\d+$")
+_NUMERO_PONTO = re.compile(r"^[-+]?(\d{1,3}(,\d{3})+|\d+)\.\d+$")
+
+
+def _detectar_decimal(texto: str, sep: str) -> str:
+    """
+    "," ou ".": conta os campos numéricos da amostra escritos com vírgula
+    decimal ("12,5", "1.234,56") e com ponto ("12.5", "1,234.56"). Empate
+    (ex.: só inteiros): padrão brasileiro, vírgula quando ";" separa colunas.
+    """
+    virgula = ponto = 0
+    linhas = texto.splitlines()[1:AMOSTRA_LINHAS_DECIMAL + 1]
+    for campos in csv.reader(linhas, delimiter=sep):
+        for campo in campos:
+            campo = campo.strip()
+            if _NUMERO_VIRGULA.match(campo):
+                virgula += 1
+            elif _NUMERO_PONTO.match(campo):
+                ponto += 1
+    if virgula != ponto:
+        return "," if virgula > ponto else "."
+    return "," if sep == ";" else "."
+
+
+# =========================
+# CSV
+# =========================
+def _dtypes_da_amostra(dados: bytes, sep: str, decimal: str, encoding: str) -> dict:
+    """
+    Infere tipos nas primeiras linhas. Números viram float64 (um vazio mais
+    adiante não quebra a leitura); o resto fica a cargo do pandas.
+    """
+    amostra = pd.read_csv(io.BytesIO(dados), sep=sep, decimal=decimal, encoding=encoding,
+                          nrows=AMOSTRA_LINHAS_DTYPE, engine="c")
+    return {
+        col: "float64"
+        for col, dtype in amostra.dtypes.items()
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    }
+
+
+def opcoes_csv(amostra: bytes) -> tuple[str, str, str]:
+    """(encoding, separador, decimal) detectados no início do arquivo."""
+    encoding = _detectar_encoding(amostra)
+    texto = amostra.decode(encoding, errors="replace")
+    sep = _detectar_separador(texto)
+    return encoding, sep, _detectar_decimal(texto, sep)
+
+
+def usa_pyarrow(decimal: str) -> bool:
+    """pyarrow.csv não entende vírgula decimal."""
+    return pa_csv is not None and decimal == "."
+
+
+def sem_bom(df: pd.DataFrame) -> pd.DataFrame:
+    if len(df.columns) and str(df.columns[0]).startswith("\ufeff"):
+        df.columns = [str(df.columns[0]).lstrip("\ufeff"), *df.columns[1:]]
+    return df
+
+
+def ler_csv(dados: bytes) -> pd.DataFrame:
+    encoding, sep, decimal = opcoes_csv(dados[:AMOSTRA_BYTES])
+
+    if usa_pyarrow(decimal):
+        try:
+            tabela = pa_csv.read_csv(
+                io.BytesIO(dados),
+                read_options=pa_csv.ReadOptions(encoding=encoding.replace("-sig", "")),
+                parse_options=pa_csv.ParseOptions(delimiter=sep),
+            )
+            return sem_bom(tabela.to_pandas())
+        except Exception as e:
+            print(f"⚠️ pyarrow não leu o CSV ({e}); usando engine C")
+
+    dtypes = _dtypes_da_amostra(dados, sep, decimal, encoding)
+    try:
+        return pd.read_csv(io.BytesIO(dados), sep=sep, decimal=decimal, encoding=encoding,
+                           dtype=dtypes, engine="c")
+    except (ValueError, TypeError):
+        # coluna numérica na amostra com texto mais adiante
+        return pd.read_csv(io.BytesIO(dados), sep=sep, decimal=decimal, encoding=encoding, engine="c")
+
+
+# =========================
+# EXCEL (uma ou várias abas)
+# =========================
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = Lock()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            metodos = multiprocessing.get_all_start_methods()
+            if "forkserver" in metodos:
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload(["pandas", "openpyxl"])
+            else:
+                ctx = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(max_workers=INGESTAO_PROCESSOS, mp_context=ctx)
+        return _pool
+
+
+def _ler_aba(dados: bytes, aba: str, engine: str) -> pd.DataFrame:
+    return pd.read_excel(io.BytesIO(dados), sheet_name=aba, engine=engine)
+
+
+def _nomes_abas(dados: bytes, engine: str) -> list[str]:
+    if engine == "openpyxl":
+        from openpyxl import load_workbook
+        wb = load_workbook(io.BytesIO(dados), read_only=True)
+        try:
+            return list(wb.sheetnames)
+        finally:
+            wb.close()
+    with pd.ExcelFile(io.BytesIO(dados), engine=engine) as xls:
+        return list(xls.sheet_names)
+
+
+def _ler_abas(dados: bytes, abas: list[str], engine: str) -> list[pd.DataFrame]:
+    global _pool
+    if len(abas) <= 1 or INGESTAO_PROCESSOS <= 1:
+        return [_ler_aba(dados, aba, engine) for aba in abas]
+
+    try:
+        executor = _executor()
+        futuros = [executor.submit(_ler_aba, dados, aba, engine) for aba in abas]
+        return [f.result() for f in futuros]
+    except BrokenProcessPool as e:
+        with _pool_lock:
+            _pool = None
+        print(f"⚠️ Pool de ingestão indisponível ({e}); lendo abas em sequência")
+        return [_ler_aba(dados, aba, engine) for aba in abas]
+
+
+def ler_excel(dados: bytes, formato: str = "xlsx") -> pd.DataFrame:
+    engine = "openpyxl" if formato == "xlsx" else "xlrd"
+    abas = _nomes_abas(dados, engine)
+    frames = _ler_abas(dados, abas, engine)
+
+    com_dados = [(aba, df) for aba, df in zip(abas, frames) if not df.dropna(how="all").empty]
+    if len(com_dados) <= 1:
+        return com_dados[0][1] if com_dados else (frames[0] if frames else pd.DataFrame())
+
+    print(f"📑 {len(com_dados)} abas com dados: {', '.join(aba for aba, _ in com_dados)}")
+    codigos = np.repeat(np.arange(len(com_dados)), [len(df) for _, df in com_dados])
+    rotulos = pd.Categorical.from_codes(codigos, categories=[aba for aba, _ in com_dados])
+    df = pd.concat([df for _, df in com_dados], ignore_index=True, sort=False)
+    coluna = COLUNA_ABA if COLUNA_ABA not in df.columns else f"_{COLUNA_ABA}"
+    df.insert(0, coluna, rotulos)
+    return df
+
+
+# =========================
+# ENTRADA ÚNICA
+# =========================
+def ler_planilha(fonte: str | BinaryIO, nome_arquivo: str | None = None) -> pd.DataFrame:
+    """Lê .xlsx / .xls / CSV (caminho ou arquivo aberto) num único DataFrame."""
+    dados = _ler_bytes(fonte)
+    formato = detectar_formato(dados[:8], nome_arquivo or (fonte if isinstance(fonte, str) else None))
+    print(f"🔎 Formato detectado: {formato}")
+
+    if formato == "csv":
+        return ler_csv(dados)
+    return ler_excel(dados, formato)
+
+
+# =========================
+# DIMENSÕES SEM LER AS CÉLULAS
+# =========================
+_RE_DIMENSAO = re.compile(rb'<(?:\w+:)?dimension ref="\$?([A-Z]+)\$?(\d+)(?::\$?([A-Z]+)\$?(\d+))?"')
+_RE_ABA = re.compile(r"xl/worksheets/[^/]+\.xml")
+# <dimension> vem logo no início do XML da aba
+_CABECALHO_ABA_BYTES = 4096
+LINHAS_LOTE_AMOSTRA = 50_000
+
+
+def _indice_coluna(letras: bytes) -> int:
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (letra - 64)
+    return indice
+
+
+def _dimensoes_xlsx(fonte: BinaryIO) -> tuple[int | None, int | None]:
+    linhas, colunas = 0, 0
+    with zipfile.ZipFile(fonte) as zf:
+        abas = [n for n in zf.namelist() if _RE_ABA.fullmatch(n)]
+        for aba in abas:
+            with zf.open(aba) as f:
+                m = _RE_DIMENSAO.search(f.read(_CABECALHO_ABA_BYTES))
+            if m is None:
+                return None, None  # sem <dimension>: só lendo a aba
+            col_fim, lin_fim = (m.group(3), m.group(4)) if m.group(3) else (m.group(1), m.group(2))
+            linhas += max(0, int(lin_fim) - int(m.group(2)))  # sem a linha de cabeçalho
+            colunas = max(colunas, _indice_coluna(col_fim) - _indice_coluna(m.group(1)) + 1)
+    return (linhas, colunas) if abas else (None, None)
+
+
+def _dimensoes_csv(inicio: bytes, tamanho: int) -> tuple[int, int]:
+    encoding, sep, _ = opcoes_csv(inicio)
+    texto = inicio.decode(encoding, errors="replace")
+    cabecalho = next(csv.reader(io.StringIO(texto.split("\n", 1)[0]), delimiter=sep), [])
+    if tamanho <= len(inicio):
+        return max(0, len(texto.splitlines()) - 1), len(cabecalho)
+    # só linhas completas da amostra, extrapoladas pelo tamanho do arquivo
+    completas = inicio[:inicio.rfind(b"\n") + 1] or inicio
+    por_linha = len(completas) / max(1, completas.count(b"\n"))
+    return int(tamanho / por_linha) - 1, len(cabecalho)
+
+
+def dimensoes_planilha(fonte: BinaryIO, nome_arquivo: str | None = None) -> tuple[str, int, int | None, int | None]:
+    """
+    (formato, bytes, linhas, colunas) sem ler as células: <dimension> de cada
+    aba do .xlsx, extrapolação pela amostra inicial no CSV. .xls (ou .xlsx sem
+    <dimension>): linhas/colunas None. `fonte` volta para a posição original.
+    """
+    posicao = fonte.tell()
+    try:
+        tamanho = fonte.seek(0, io.SEEK_END) - posicao
+        fonte.seek(posicao)
+        inicio = fonte.read(AMOSTRA_BYTES)
+        formato = detectar_formato(inicio[:8], nome_arquivo)
+        linhas = colunas = None
+        if formato == "csv":
+            linhas, colunas = _dimensoes_csv(inicio, tamanho)
+        elif formato == "xlsx":
+            fonte.seek(posicao)
+            try:
+                linhas, colunas = _dimensoes_xlsx(fonte)
+            except zipfile.BadZipFile:
+                pass
+        return formato, tamanho, linhas, colunas
+    finally:
+        fonte.seek(posicao)
+
+
+# =========================
+# LEITURA AMOSTRADA (STREAMING)
+# =========================
+def _amostrar(lotes, fracao: float, linhas_max: int, semente: int) -> list[pd.DataFrame]:
+    """Bernoulli(fracao) por linha, lote a lote; memória = um lote + a amostra."""
+    rng = np.random.default_rng(semente)
+    partes, total = [], 0
+    for lote in lotes:
+        parte = lote[rng.random(len(lote)) < fracao] if fracao < 1 else lote
+        partes.append(parte.iloc[:linhas_max - total])
+        total += len(partes[-1])
+        if total >= linhas_max:
+            break
+    return partes
+
+
+def _lotes_csv(dados: BinaryIO, amostra: bytes, tipar: bool = True):
+    encoding, sep, decimal = opcoes_csv(amostra)
+    dtypes = _dtypes_da_amostra(amostra, sep, decimal, encoding) if tipar else None
+    with pd.read_csv(dados, sep=sep, decimal=decimal, encoding=encoding, dtype=dtypes, engine="c",
+                     chunksize=LINHAS_LOTE_AMOSTRA) as partes:
+        yield from partes
+
+
+def _lotes_aba(ws, colunas: list[str]):
+    lote = []
+    for valores in ws.iter_rows(min_row=2, values_only=True):
+        lote.append(valores[:len(colunas)])
+        if len(lote) >= LINHAS_LOTE_AMOSTRA:
+            yield pd.DataFrame(lote, columns=colunas)
+            lote = []
+    if lote:
+        yield pd.DataFrame(lote, columns=colunas)
+
+
+def _colunas_aba(ws) -> list[str]:
+    cabecalho = next(ws.iter_rows(max_row=1, values_only=True), ())
+    return [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(cabecalho)]
+
+
+def _amostra_xlsx(fonte: BinaryIO, fracao: float, linhas_max: int, semente: int) -> pd.DataFrame:
+    from openpyxl import load_workbook
+    wb = load_workbook(fonte, read_only=True, data_only=True)
+    try:
+        com_dados = []
+        for aba in wb.worksheets:
+            colunas = _colunas_aba(aba)
+            if not colunas:
+                continue
+            restante = linhas_max - sum(len(df) for _, df in com_dados)
+            partes = _amostrar(_lotes_aba(aba, colunas), fracao, restante, semente + len(com_dados))
+            df = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=colunas)
+            if not df.dropna(how="all").empty:
+                com_dados.append((aba.title, df.infer_objects()))
+            if restante <= len(df):
+                break
+    finally:
+        wb.close()
+
+    if len(com_dados) <= 1:
+        return com_dados[0][1] if com_dados else pd.DataFrame()
+    codigos = np.repeat(np.arange(len(com_dados)), [len(df) for _, df in com_dados])
+    rotulos = pd.Categorical.from_codes(codigos, categories=[aba for aba, _ in com_dados])
+    df = pd.concat([df for _, df in com_dados], ignore_index=True, sort=False)
+    df.insert(0, COLUNA_ABA if COLUNA_ABA not in df.columns else f"_{COLUNA_ABA}", rotulos)
+    return df
+
+
+def ler_planilha_amostrada(fonte: BinaryIO, linhas_max: int, linhas_estimadas: int | None,
+                           nome_arquivo: str | None = None, semente: int = 0) -> pd.DataFrame:
+    """
+    Amostra aleatória de ~`linhas_max` linhas sem materializar a planilha
+    inteira: CSV em lotes (engine C) e .xlsx linha a linha (openpyxl
+    read_only), cada linha entra com probabilidade linhas_max / linhas_estimadas.
+    .xls (xlrd carrega o arquivo todo de qualquer forma): as primeiras linhas.
+    Mesma `semente` -> mesma amostra.
+    """
+    posicao = fonte.tell()
+    try:
+        inicio = fonte.read(AMOSTRA_BYTES)
+        fonte.seek(posicao)
+        formato = detectar_formato(inicio[:8], nome_arquivo)
+        fracao = min(1.0, linhas_max / max(1, linhas_estimadas or linhas_max))
+        print(f"🎲 Leitura amostrada ({formato}): ~{linhas_max} de ~{linhas_estimadas or '?'} linhas")
+
+        if formato == "csv":
+            try:
+                partes = _amostrar(_lotes_csv(fonte, inicio), fracao, linhas_max, semente)
+            except (ValueError, TypeError):
+                # coluna numérica na amostra com texto mais adiante (mesma semente -> mesma amostra)
+                fonte.seek(posicao)
+                partes = _amostrar(_lotes_csv(fonte, inicio, tipar=False), fracao, linhas_max, semente)
+            return sem_bom(pd.concat(partes, ignore_index=True)) if partes else pd.DataFrame()
+        if formato == "xlsx":
+            return _amostra_xlsx(fonte, fracao, linhas_max, semente)
+        return pd.read_excel(fonte, engine="xlrd", nrows=linhas_max)
+    finally:
+        fonte.seek(posicao)
@@ -12,6 +12,78 @@ import json
 import re
 from openai import OpenAI
 
+from app.cost_tracker import tokens_em_cache
+
+
+# Texto fixo do analista (mensagem de sistema): idêntico em toda chamada, para
+# o provedor reaproveitar o prefixo em cache. Contexto e foto vão depois.
+PROMPT_MERCHANDISING_IMAGEM = """
+Você é um(a) ESPECIALISTA SÊNIOR em VISUAL MERCHANDISING e TRADE MARKETING.
+
+REGRAS (obrigatórias):
+- Escreva 100% em PORTUGUÊS do Brasil (PT-BR). Não use inglês.
+- Você TEM acesso à imagem e DEVE analisá-la. Nunca diga “não consigo analisar”.
+- Seja claro, direto e didático (cliente final precisa entender).
+- Não invente detalhes que não aparecem; quando algo não estiver visível, diga “não é possível confirmar pela foto”.
+
+FORMATO DO RELATÓRIO (obrigatório e nesta ordem):
+
+1) RESUMO EXECUTIVO (3 a 6 linhas)
+- O que está bom + o que está travando vendas + maior oportunidade imediata.
+
+2) NOTAS (0 a 10)
+- Nota geral
+- Sub-notas: Visibilidade, Organização, Planograma, Zonas, Preço/Comunicação, Sortimento
+
+3) DIAGNÓSTICO COM EVIDÊNCIAS
+- Pontos fortes (com “por quê”)
+- Pontos críticos (com “por quê”)
+
+4) O QUE FAZER AGORA (0–7 dias) — 5 ações
+Para cada ação: (a) o que fazer, (b) como fazer em passos, (c) resultado esperado.
+
+5) O QUE FAZER EM 30 DIAS — melhorias estruturais
+- Materiais, comunicação, reposição, padronização.
+
+6) PLANOGRAMA TEXTUAL (onde cada tipo de produto deve ficar)
+- ZONAS:
+  • Centro/altura dos olhos (zona quente)
+  • Laterais (zona média)
+  • Base (zona fria)
+  • Topo (exposição/impacto)
+- Diga onde colocar: best sellers, lançamentos, premium, promoções, itens volumosos, itens de impulso.
+- Se houver linhas/categorias visíveis, proponha a árvore: Categoria → Subcategoria → Marca → Tamanho.
+
+7) CHECKLIST DE AUDITORIA (10 itens)
+- Escrito para promotor usar em campo.
+
+8) IMPACTO ESTIMADO EM VENDAS (faixa)
+- Estime uplift mínimo e máximo total (ex.: 5% a 10%)
+- Explique as hipóteses em 3 bullets.
+
+IMPORTANTE:
+- NÃO coloque JSON no meio do texto.
+- No FINAL, retorne APENAS um bloco <JSON>...</JSON> com este formato:
+
+<JSON>
+{
+  "nota_geral": 0,
+  "sub_notas": {
+    "visibilidade_impacto": 0,
+    "organizacao_limpeza": 0,
+    "planograma_blocagem": 0,
+    "zonas_atencao": 0,
+    "precos_comunicacao": 0,
+    "sortimento_ruido": 0
+  },
+  "uplist_percent_min": 0,
+  "uplist_percent_max": 0
+}
+</JSON>
+
+A foto e o contexto adicional (se houver) vêm na mensagem do usuário.
+"""
+
 
 def _extract_json(text: str) -> dict | None:
     if not text:
@@ -80,81 +152,15 @@ class ImageAnalyzer:
         }
         """
 
-        prompt = f"""
-Você é um(a) ESPECIALISTA SÊNIOR em VISUAL MERCHANDISING e TRADE MARKETING.
-
-REGRAS (obrigatórias):
-- Escreva 100% em PORTUGUÊS do Brasil (PT-BR). Não use inglês.
-- Você TEM acesso à imagem e DEVE analisá-la. Nunca diga “não consigo analisar”.
-- Seja claro, direto e didático (cliente final precisa entender).
-- Não invente detalhes que não aparecem; quando algo não estiver visível, diga “não é possível confirmar pela foto”.
-
-FORMATO DO RELATÓRIO (obrigatório e nesta ordem):
-
-1) RESUMO EXECUTIVO (3 a 6 linhas)
-- O que está bom + o que está travando vendas + maior oportunidade imediata.
-
-2) NOTAS (0 a 10)
-- Nota geral
-- Sub-notas: Visibilidade, Organização, Planograma, Zonas, Preço/Comunicação, Sortimento
-
-3) DIAGNÓSTICO COM EVIDÊNCIAS
-- Pontos fortes (com “por quê”)
-- Pontos críticos (com “por quê”)
-
-4) O QUE FAZER AGORA (0–7 dias) — 5 ações
-Para cada ação: (a) o que fazer, (b) como fazer em passos, (c) resultado esperado.
-
-5) O QUE FAZER EM 30 DIAS — melhorias estruturais
-- Materiais, comunicação, reposição, padronização.
-
-6) PLANOGRAMA TEXTUAL (onde cada tipo de produto deve ficar)
-- ZONAS:
-  • Centro/altura dos olhos (zona quente)
-  • Laterais (zona média)
-  • Base (zona fria)
-  • Topo (exposição/impacto)
-- Diga onde colocar: best sellers, lançamentos, premium, promoções, itens volumosos, itens de impulso.
-- Se houver linhas/categorias visíveis, proponha a árvore: Categoria → Subcategoria → Marca → Tamanho.
-
-7) CHECKLIST DE AUDITORIA (10 itens)
-- Escrito para promotor usar em campo.
-
-8) IMPACTO ESTIMADO EM VENDAS (faixa)
-- Estime uplift mínimo e máximo total (ex.: 5% a 10%)
-- Explique as hipóteses em 3 bullets.
-
-IMPORTANTE:
-- NÃO coloque JSON no meio do texto.
-- No FINAL, retorne APENAS um bloco <JSON>...</JSON> com este formato:
-
-<JSON>
-{{
-  "nota_geral": 0,
-  "sub_notas": {{
-    "visibilidade_impacto": 0,
-    "organizacao_limpeza": 0,
-    "planograma_blocagem": 0,
-    "zonas_atencao": 0,
-    "precos_comunicacao": 0,
-    "sortimento_ruido": 0
-  }},
-  "uplist_percent_min": 0,
-  "uplist_percent_max": 0
-}}
-</JSON>
-
-Contexto adicional (se houver):
-{contexto}
-"""
-
         response = self.client.chat.completions.create(
             model="gpt-4o",
             messages=[
+                # prefixo estático primeiro (cache de prompt no provedor); foto e contexto por último
+                {"role": "system", "content": PROMPT_MERCHANDISING_IMAGEM},
                 {
                     "role": "user",
                     "content": [
-                        {"type": "text", "text": prompt},
+                        {"type": "text", "text": f"Contexto adicional (se houver):\n{contexto}"},
                         {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{imagem_base64}"}}
                     ]
                 }
@@ -164,6 +170,7 @@ Contexto adicional (se houver):
         )
 
         raw_text = response.choices[0].message.content or ""
+        uso = getattr(response, "usage", None)
         payload = _extract_json(raw_text)
 
         texto_limpo = _remove_json_from_text(raw_text)
@@ -171,5 +178,8 @@ Contexto adicional (se houver):
         return {
             "total_linhas": 1,
             "analise": texto_limpo,      # ✅ SEM JSON, SEM inglês (pelo prompt)
-            "json_graficos": payload     # ✅ só pra gerar gráficos
+            "json_graficos": payload,    # ✅ só pra gerar gráficos
+            "tokens_input": getattr(uso, "prompt_tokens", 0) or 0,
+            "tokens_output": getattr(uso, "completion_tokens", 0) or 0,
+            "tokens_cache": tokens_em_cache(uso),
         }
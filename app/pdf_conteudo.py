@@ -0,0 +1,95 @@
+"""
+PDF POR CONTEÚDO (Xplors) - Storage endereçado pelo sha256 do relatório
+
+Cada execução subia um PDF novo (analises/{user_id}/analise_<uuid8>.pdf),
+mesmo com os bytes idênticos a um relatório anterior. Agora:
+
+- o PDF renderizado é determinístico (ModeloDocumento com invariant; data
+  impressa vem de dados_analise["gerado_em"]): mesmo conteúdo, mesmos bytes
+- a chave no Storage é o hash: conteudo/<h[:2]>/<h>.pdf
+- analises.pdf_hash é a contagem de referências: se alguma análise já
+  aponta para o hash e o objeto ainda está no Storage, o upload é pulado
+  (nenhum byte sai do servidor); se uma exclusão concorrente acabou de
+  remover o objeto, ele sobe de novo
+- liberar_pdf só remove o objeto quando nenhuma análise referencia mais
+  o hash
+
+O acesso continua por URL assinada emitida pelo backend depois de conferir
+o dono da análise (app/urls_assinadas.py), então o mesmo objeto pode ser
+compartilhado entre usuários sem expor nada.
+"""
+
+import hashlib
+import os
+
+PREFIXO_CONTEUDO = "conteudo"
+
+_BLOCO_HASH = 1024 * 1024
+
+
+def hash_pdf(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(_BLOCO_HASH), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_conteudo(pdf_hash: str) -> str:
+    return f"{PREFIXO_CONTEUDO}/{pdf_hash[:2]}/{pdf_hash}.pdf"
+
+
+def referencias(supabase, pdf_hash: str, limite: int | None = None) -> int:
+    """Análises que apontam para o PDF (`limite` = para de contar ao chegar nele)."""
+    consulta = supabase.table("analises").select("id").eq("pdf_hash", pdf_hash)
+    if limite:
+        consulta = consulta.limit(limite)
+    return len(consulta.execute().data or [])
+
+
+def _ja_existe(erro: Exception) -> bool:
+    texto = str(erro).lower()
+    return "duplicate" in texto or "already exists" in texto or "já existe" in texto or "409" in texto
+
+
+def armazenar_pdf(supabase, bucket: str, caminho_local: str) -> dict:
+    """
+    Sobe o PDF pelo hash do conteúdo, ou reaproveita o objeto já referenciado.
+    Retorna {"path", "pdf_hash", "reaproveitado", "bytes"}; grave path e
+    pdf_hash na análise (é o registro que conta como referência).
+    """
+    pdf_hash = hash_pdf(caminho_local)
+    storage_path = caminho_conteudo(pdf_hash)
+    tamanho = os.path.getsize(caminho_local)
+
+    armazenamento = supabase.storage.from_(bucket)
+    # a referência pode estar sendo apagada agora (liberar_pdf): só pula se o objeto ainda existe
+    if referencias(supabase, pdf_hash, limite=1) and armazenamento.exists(storage_path):
+        print(f"♻️ PDF idêntico já armazenado ({pdf_hash[:12]}); upload pulado")
+        return {"path": storage_path, "pdf_hash": pdf_hash, "reaproveitado": True, "bytes": tamanho}
+
+    with open(caminho_local, "rb") as f:
+        dados = f.read()
+    try:
+        armazenamento.upload(
+            storage_path,
+            dados,
+            file_options={"content-type": "application/pdf"},
+        )
+    except Exception as e:
+        # outro upload com o mesmo conteúdo chegou antes (ou o objeto ficou de
+        # uma análise cujo registro não foi gravado): o conteúdo é o mesmo
+        if not _ja_existe(e):
+            raise
+        return {"path": storage_path, "pdf_hash": pdf_hash, "reaproveitado": True, "bytes": tamanho}
+
+    return {"path": storage_path, "pdf_hash": pdf_hash, "reaproveitado": False, "bytes": tamanho}
+
+
+def liberar_pdf(supabase, bucket: str, pdf_hash: str | None) -> bool:
+    """Remove o objeto se nenhuma análise referencia mais o hash. Chamar depois de apagar a análise."""
+    if not pdf_hash or referencias(supabase, pdf_hash, limite=1):
+        return False
+    supabase.storage.from_(bucket).remove([caminho_conteudo(pdf_hash)])
+    print(f"🗑️ PDF sem referências removido ({pdf_hash[:12]})")
+    return True
@@ -0,0 +1,258 @@
+"""
+ESTILOS E MODELOS DE PDF (Xplors) - cache por processo
+
+- Estilos (ParagraphStyle) criados UMA vez por processo e expostos como
+  mapeamento somente-leitura (não altere os estilos retornados)
+- Protótipos das células de KPI (estilo por tom + TableStyle) pré-calculados
+- Tabela dos fatos (rankings determinísticos) com estilo compartilhado
+- Modelos de documento (margens/página) reutilizáveis, com saída
+  determinística (mesmo conteúdo -> mesmos bytes; ver app/pdf_conteudo.py)
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+
+# Cores Xplors
+COR_ROXO = colors.HexColor('#8b5cf6')
+COR_CIANO = colors.HexColor('#14b8a6')
+COR_ROXO_ESCURO = colors.HexColor('#1e1b4b')
+COR_CINZA_TEXTO = colors.HexColor('#111827')
+COR_CINZA_SUAVE = colors.HexColor('#374151')
+COR_BORDA = colors.HexColor('#e5e7eb')
+COR_VERDE = colors.HexColor('#10b981')
+COR_AMARELO = colors.HexColor('#f59e0b')
+COR_VERMELHO = colors.HexColor('#ef4444')
+
+# Fontes (Type1 embutidas no ReportLab: não precisam ser carregadas/registradas)
+FONTE_NORMAL = 'Helvetica'
+FONTE_NEGRITO = 'Helvetica-Bold'
+
+CORES_TOM = MappingProxyType({
+    "purple": COR_ROXO,
+    "good": COR_VERDE,
+    "warn": COR_AMARELO,
+    "bad": COR_VERMELHO,
+})
+
+
+def _congelar(sheet) -> Mapping[str, ParagraphStyle]:
+    return MappingProxyType(dict(sheet.byName))
+
+
+# =========================
+# ESTILOS
+# =========================
+@lru_cache(maxsize=None)
+def estilos_xplors() -> Mapping[str, ParagraphStyle]:
+    """Estilos do PDFXplors (relatório com KPIs)."""
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(
+        name='TituloXplors',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=COR_ROXO,
+        spaceAfter=14,
+        alignment=TA_CENTER,
+        fontName=FONTE_NEGRITO
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SecaoXplors',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=COR_ROXO_ESCURO,
+        spaceAfter=10,
+        spaceBefore=12,
+        fontName=FONTE_NEGRITO
+    ))
+
+    styles.add(ParagraphStyle(
+        name='TextoNormal',
+        parent=styles['Normal'],
+        fontSize=10.5,
+        textColor=COR_CINZA_TEXTO,
+        alignment=TA_JUSTIFY,
+        spaceAfter=8,
+        leading=14
+    ))
+
+    styles.add(ParagraphStyle(
+        name='TextoPequeno',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=COR_CINZA_SUAVE,
+        alignment=TA_LEFT,
+        spaceAfter=6,
+        leading=12
+    ))
+
+    styles.add(ParagraphStyle(
+        name='KPI',
+        parent=styles['Normal'],
+        fontSize=10.5,
+        textColor=colors.white,
+        alignment=TA_CENTER,
+        fontName=FONTE_NEGRITO
+    ))
+
+    return _congelar(styles)
+
+
+@lru_cache(maxsize=None)
+def estilos_graficos() -> Mapping[str, ParagraphStyle]:
+    """Estilos do PDFComGraficos (relatório com gráficos gerados do DataFrame)."""
+    styles = getSampleStyleSheet()
+
+    styles.add(ParagraphStyle(
+        name='TituloXplors',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=COR_ROXO,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        fontName=FONTE_NEGRITO
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SubtituloXplors',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=COR_ROXO_ESCURO,
+        spaceAfter=12,
+        spaceBefore=16,
+        fontName=FONTE_NEGRITO
+    ))
+
+    styles.add(ParagraphStyle(
+        name='TextoNormal',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=colors.black,
+        alignment=TA_JUSTIFY,
+        spaceAfter=10,
+        leading=14
+    ))
+
+    return _congelar(styles)
+
+
+# =========================
+# PROTÓTIPOS DE KPI
+# =========================
+@lru_cache(maxsize=None)
+def estilos_kpi_valor() -> Mapping[str, ParagraphStyle]:
+    """Um ParagraphStyle de valor de KPI por tom (purple/good/warn/bad)."""
+    base = estilos_xplors()['KPI']
+    return MappingProxyType({
+        tom: ParagraphStyle(name=f"KPIValue_{tom}", parent=base, backColor=cor)
+        for tom, cor in CORES_TOM.items()
+    })
+
+
+def estilo_kpi_valor(tone: str | None) -> ParagraphStyle:
+    estilos = estilos_kpi_valor()
+    return estilos.get((tone or "purple").lower(), estilos["purple"])
+
+
+ESTILO_CELULA_KPI = TableStyle([
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("BOX", (0, 0), (-1, -1), 0.5, COR_BORDA),
+    ("BACKGROUND", (0, 0), (-1, -1), colors.white),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+    ("TOPPADDING", (0, 0), (-1, -1), 6),
+])
+
+ESTILO_GRADE_KPI = TableStyle([
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("LEFTPADDING", (0, 0), (-1, -1), 0),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 0),
+])
+
+LARGURA_CELULA_KPI = 6.0 * cm
+LARGURAS_GRADE_KPI = (6.2 * cm, 6.2 * cm, 6.2 * cm)
+
+# tabelas da seção de fatos (rankings calculados, sem passar pelo modelo)
+ESTILO_TABELA_FATOS = TableStyle([
+    ("FONTNAME", (0, 0), (-1, 0), FONTE_NEGRITO),
+    ("FONTNAME", (0, 1), (-1, -1), FONTE_NORMAL),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("BACKGROUND", (0, 0), (-1, 0), COR_ROXO),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f3ff')]),
+    ("ALIGN", (0, 0), (0, -1), "CENTER"),
+    ("ALIGN", (-1, 0), (-1, -1), "RIGHT"),
+    ("LINEBELOW", (0, -1), (-1, -1), 0.5, COR_BORDA),
+    ("TOPPADDING", (0, 0), (-1, -1), 3),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+])
+
+LARGURAS_TABELA_FATOS = (1.2 * cm, 12.2 * cm, 4.4 * cm)
+# rótulos longos (ex.: descrição de produto) são cortados
+MAX_CARACTERES_ROTULO_FATO = 70
+
+
+def tabela_fato(fato: dict) -> Table:
+    """Tabela de um fato {"colunas", "linhas"} (cabeçalho repetido se quebrar a página)."""
+    linhas = [list(fato.get("colunas") or ["#", "Item", "Valor"])]
+    for posicao, rotulo, valor in fato.get("linhas") or []:
+        rotulo = str(rotulo)
+        if len(rotulo) > MAX_CARACTERES_ROTULO_FATO:
+            rotulo = rotulo[:MAX_CARACTERES_ROTULO_FATO - 1] + "…"
+        linhas.append([posicao, rotulo, valor])
+    t = Table(linhas, colWidths=list(LARGURAS_TABELA_FATOS), repeatRows=1)
+    t.setStyle(ESTILO_TABELA_FATOS)
+    return t
+
+
+# =========================
+# MODELOS DE DOCUMENTO
+# =========================
+@dataclass(frozen=True)
+class ModeloDocumento:
+    pagesize: tuple = A4
+    rightMargin: float = 2 * cm
+    leftMargin: float = 2 * cm
+    topMargin: float = 2 * cm
+    bottomMargin: float = 2 * cm
+
+    def criar(self, arquivo_saida, **kwargs) -> SimpleDocTemplate:
+        # invariant: sem data de criação/ID aleatório no PDF; bytes dependem só do conteúdo
+        kwargs.setdefault('invariant', True)
+        return SimpleDocTemplate(
+            arquivo_saida,
+            pagesize=self.pagesize,
+            rightMargin=self.rightMargin,
+            leftMargin=self.leftMargin,
+            topMargin=self.topMargin,
+            bottomMargin=self.bottomMargin,
+            **kwargs
+        )
+
+
+MODELO_XPLORS = ModeloDocumento(topMargin=2.2 * cm)
+MODELO_GRAFICOS = ModeloDocumento(topMargin=3 * cm)
+
+
+def data_relatorio(dados_analise: dict) -> datetime:
+    """Data impressa no relatório: dados_analise["gerado_em"] (datetime ou ISO) ou agora."""
+    gerado_em = (dados_analise or {}).get('gerado_em')
+    if isinstance(gerado_em, datetime):
+        return gerado_em
+    if isinstance(gerado_em, str):
+        try:
+            return datetime.fromisoformat(gerado_em)
+        except ValueError:
+            pass
+    return datetime.now()
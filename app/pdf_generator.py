@@ -1,18 +1,16 @@
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Image as RLImage, Table, KeepTogether
 from reportlab.lib.units import cm
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY, TA_LEFT
-from datetime import datetime
+from io import BytesIO
 import os
 
-COR_ROXO = colors.HexColor('#8b5cf6')
-COR_ROXO_ESCURO = colors.HexColor('#1e1b4b')
-COR_CINZA_TEXTO = colors.HexColor('#111827')
-COR_VERDE = colors.HexColor('#10b981')
-COR_AMARELO = colors.HexColor('#f59e0b')
-COR_VERMELHO = colors.HexColor('#ef4444')
+from app.chart_cache import obter_png, backend_graficos
+from app.chart_vetorial import desenhar
+
+from app.pdf_estilos import (
+    MODELO_XPLORS, estilos_xplors, estilo_kpi_valor,
+    ESTILO_CELULA_KPI, ESTILO_GRADE_KPI, LARGURA_CELULA_KPI, LARGURAS_GRADE_KPI,
+    tabela_fato, data_relatorio,
+)
 
 
 def _fmt_val(v):
@@ -30,68 +28,10 @@ class PDFXplors:
         self.dados_analise = dados_analise or {}
         self.dados_excel = dados_excel or {}
 
-        self.doc = SimpleDocTemplate(
-            arquivo_saida,
-            pagesize=A4,
-            rightMargin=2 * cm,
-            leftMargin=2 * cm,
-            topMargin=2.2 * cm,
-            bottomMargin=2 * cm
-        )
+        self.doc = MODELO_XPLORS.criar(arquivo_saida)
 
         self.story = []
-        self.styles = getSampleStyleSheet()
-        self._criar_estilos()
-
-    def _criar_estilos(self):
-        self.styles.add(ParagraphStyle(
-            name='TituloXplors',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=COR_ROXO,
-            spaceAfter=14,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='SecaoXplors',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=COR_ROXO_ESCURO,
-            spaceAfter=10,
-            spaceBefore=12,
-            fontName='Helvetica-Bold'
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='TextoNormal',
-            parent=self.styles['Normal'],
-            fontSize=10.5,
-            textColor=COR_CINZA_TEXTO,
-            alignment=TA_JUSTIFY,
-            spaceAfter=8,
-            leading=14
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='TextoPequeno',
-            parent=self.styles['Normal'],
-            fontSize=9,
-            textColor=colors.HexColor("#374151"),
-            alignment=TA_LEFT,
-            spaceAfter=6,
-            leading=12
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='KPI',
-            parent=self.styles['Normal'],
-            fontSize=10.5,
-            textColor=colors.white,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
+        self.styles = estilos_xplors()
 
     def _limpar_texto(self, texto: str) -> str:
         if not texto:
@@ -108,33 +48,13 @@ class PDFXplors:
         for k in kpis[:6]:
             label = _fmt_val(k.get("label"))
             value = _fmt_val(k.get("value"))
-            tone = (k.get("tone") or "purple").lower()
-
-            bg = COR_ROXO
-            if tone == "good":
-                bg = COR_VERDE
-            elif tone == "warn":
-                bg = COR_AMARELO
-            elif tone == "bad":
-                bg = COR_VERMELHO
 
             cell = Table(
                 [[Paragraph(label, self.styles['TextoPequeno'])],
-                 [Paragraph(value, ParagraphStyle(
-                     name="KPIValue",
-                     parent=self.styles["KPI"],
-                     backColor=bg
-                 ))]],
-                colWidths=[6.0 * cm]
+                 [Paragraph(value, estilo_kpi_valor(k.get("tone")))]],
+                colWidths=[LARGURA_CELULA_KPI]
             )
-            cell.setStyle(TableStyle([
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-                ("BOX", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
-                ("BACKGROUND", (0, 0), (-1, -1), colors.white),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-            ]))
+            cell.setStyle(ESTILO_CELULA_KPI)
             cells.append(cell)
 
         grid = []
@@ -144,15 +64,26 @@ class PDFXplors:
                 row += [""] * (3 - len(row))
             grid.append(row)
 
-        t = Table(grid, colWidths=[6.2*cm, 6.2*cm, 6.2*cm])
-        t.setStyle(TableStyle([
-            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ("LEFTPADDING", (0, 0), (-1, -1), 0),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 0),
-        ]))
+        t = Table(grid, colWidths=list(LARGURAS_GRADE_KPI))
+        t.setStyle(ESTILO_GRADE_KPI)
         self.story.append(t)
         self.story.append(Spacer(1, 0.35 * cm))
 
+    def _fatos(self, fatos: list[dict]):
+        """Rankings já calculados (determinísticos): o texto da IA só interpreta."""
+        fatos = [f for f in fatos or [] if f.get("linhas")]
+        if not fatos:
+            return
+
+        self.story.append(Paragraph("Números do Diagnóstico", self.styles["SecaoXplors"]))
+        for fato in fatos:
+            self.story.append(KeepTogether([
+                Paragraph(f"<b>{self._limpar_texto(fato.get('titulo', ''))}</b>", self.styles["TextoNormal"]),
+                Spacer(1, 0.1 * cm),
+                tabela_fato(fato),
+            ]))
+            self.story.append(Spacer(1, 0.35 * cm))
+
     def _explicacao_graficos(self) -> str:
         t = self.tipo_analise
 
@@ -177,30 +108,47 @@ class PDFXplors:
 • Em imagem, o radar (0–10) resume a qualidade por pilar e o gráfico de impacto mostra a faixa de ganho estimado.
 """
 
-    def _add_chart_images(self, chart_paths: list[str]):
-        valid = [p for p in (chart_paths or []) if p and os.path.exists(p)]
-        if not valid:
-            return
+    def _chart_flowables(self, chart_paths: list[str], chart_specs: list | None = None) -> list:
+        """
+        Backend "vetorial": desenha as ChartSpecs direto no PDF.
+        Backend "png": usa os PNGs gerados (ou renderiza as specs via cache).
+        """
+        specs = [s for s in (chart_specs or []) if s is not None]
+        if specs and backend_graficos() == "vetorial":
+            return [desenhar(s, largura=16.5 * cm, altura=8.0 * cm) for s in specs[:10]]
 
-        self.story.append(Paragraph("Gráficos do Diagnóstico", self.styles["SecaoXplors"]))
-        self.story.append(Paragraph(self._explicacao_graficos(), self.styles["TextoNormal"]))
-        self.story.append(Spacer(1, 0.2 * cm))
+        valid = [p for p in (chart_paths or []) if p and os.path.exists(p)]
+        fontes = valid or [BytesIO(obter_png(s)) for s in specs]
 
-        for p in valid[:10]:
+        flowables = []
+        for p in fontes[:10]:
             try:
                 img = RLImage(p)
                 img.drawHeight = 8.0 * cm
                 img.drawWidth = 16.5 * cm
-                self.story.append(img)
-                self.story.append(Spacer(1, 0.35 * cm))
+                flowables.append(img)
             except Exception:
                 continue
+        return flowables
+
+    def _add_chart_images(self, chart_paths: list[str], chart_specs: list | None = None):
+        flowables = self._chart_flowables(chart_paths, chart_specs)
+        if not flowables:
+            return
+
+        self.story.append(Paragraph("Gráficos do Diagnóstico", self.styles["SecaoXplors"]))
+        self.story.append(Paragraph(self._explicacao_graficos(), self.styles["TextoNormal"]))
+        self.story.append(Spacer(1, 0.2 * cm))
+
+        for f in flowables:
+            self.story.append(f)
+            self.story.append(Spacer(1, 0.35 * cm))
 
     def _cabecalho(self):
         self.story.append(Paragraph("Relatório de Análise", self.styles["TituloXplors"]))
         self.story.append(Spacer(1, 0.15 * cm))
 
-        data_formatada = datetime.now().strftime('%d/%m/%Y às %H:%M')
+        data_formatada = data_relatorio(self.dados_analise).strftime('%d/%m/%Y às %H:%M')
 
         total_registros = (
             self.dados_analise.get("total_linhas")
@@ -244,16 +192,18 @@ class PDFXplors:
         self.story.append(Spacer(1, 0.35 * cm))
         rodape = Paragraph(
             f'<b>Relatório gerado por Xplors</b><br/>'
-            f'Data: {datetime.now().strftime("%d/%m/%Y às %H:%M")}',
+            f'Data: {data_relatorio(self.dados_analise).strftime("%d/%m/%Y às %H:%M")}',
             self.styles['TextoPequeno']
         )
         self.story.append(rodape)
 
     def gerar(self):
         self._cabecalho()
+        self._fatos(self.dados_excel.get("fatos") or self.dados_analise.get("fatos") or [])
 
         charts = self.dados_excel.get("charts") or self.dados_analise.get("charts") or []
-        self._add_chart_images(charts)
+        specs = self.dados_excel.get("chart_specs") or self.dados_analise.get("chart_specs") or []
+        self._add_chart_images(charts, specs)
 
         self._conteudo_texto()
         self._rodape()
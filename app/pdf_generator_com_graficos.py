@@ -1,109 +1,52 @@
 """
 PDF Generator com Gráficos
-Gera PDFs profissionais com matplotlib charts
+Gera PDFs profissionais com matplotlib charts (PNGs em cache por ChartSpec)
 """
 
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RLImage, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Spacer, Image as RLImage, PageBreak, KeepTogether
 from reportlab.lib.units import cm
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-import matplotlib
-matplotlib.use('Agg')  # Backend sem display
-import matplotlib.pyplot as plt
 import pandas as pd
 from io import BytesIO
-from datetime import datetime
 import os
 
-# Cores Xplors
-COR_ROXO = colors.HexColor('#8b5cf6')
-COR_CIANO = colors.HexColor('#14b8a6')
-COR_ROXO_ESCURO = colors.HexColor('#1e1b4b')
+from app.chart_cache import ChartSpec, obter_png, backend_graficos
+from app.chart_vetorial import desenhar
+from app.pdf_estilos import MODELO_GRAFICOS, estilos_graficos, tabela_fato, data_relatorio
+
+# Estilo comum dos gráficos deste relatório (10x5 pol., 150 dpi, título em destaque)
+ESTILO_GRAFICO = {'figsize': (10, 5), 'dpi': 150, 'bbox_tight': True, 'titulo_destaque': True}
 
 
 class PDFComGraficos:
-    def __init__(self, arquivo_saida, dados_analise, dados_excel=None):
+    def __init__(self, arquivo_saida, dados_analise, dados_excel=None, tipo_analise='geral'):
         self.arquivo_saida = arquivo_saida
+        self.tipo_analise = (tipo_analise or 'geral').lower()
         self.dados_analise = dados_analise
         self.dados_excel = dados_excel
         
-        self.doc = SimpleDocTemplate(
-            arquivo_saida,
-            pagesize=A4,
-            rightMargin=2*cm,
-            leftMargin=2*cm,
-            topMargin=3*cm,
-            bottomMargin=2*cm
-        )
+        self.doc = MODELO_GRAFICOS.criar(arquivo_saida)
         
         self.story = []
-        self.styles = getSampleStyleSheet()
-        self._criar_estilos()
-    
-    def _criar_estilos(self):
-        """Estilos personalizados"""
-        
-        self.styles.add(ParagraphStyle(
-            name='TituloXplors',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=COR_ROXO,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SubtituloXplors',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=COR_ROXO_ESCURO,
-            spaceAfter=12,
-            spaceBefore=16,
-            fontName='Helvetica-Bold'
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='TextoNormal',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            textColor=colors.black,
-            alignment=TA_JUSTIFY,
-            spaceAfter=10,
-            leading=14
-        ))
+        self.styles = estilos_graficos()
     
-    def _gerar_grafico_linhas(self, df: pd.DataFrame, titulo: str) -> BytesIO:
-        """Gera gráfico de linhas"""
-        fig, ax = plt.subplots(figsize=(10, 5))
-        
+    def _spec_grafico_linhas(self, df: pd.DataFrame, titulo: str) -> ChartSpec:
+        """Spec do gráfico de linhas"""
         # Pegar colunas numéricas
         colunas_numericas = df.select_dtypes(include=['number']).columns[:3]
         
-        for col in colunas_numericas:
-            ax.plot(df.index[:50], df[col][:50], marker='o', label=col, linewidth=2)
-        
-        ax.set_title(titulo, fontsize=14, fontweight='bold', color='#1e1b4b')
-        ax.set_xlabel('Índice', fontsize=10)
-        ax.set_ylabel('Valores', fontsize=10)
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        
-        # Salvar em BytesIO
-        buffer = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buffer.seek(0)
-        
-        return buffer
+        return ChartSpec.criar(
+            "line",
+            labels=df.index[:50].tolist(),
+            series=[(col, df[col][:50].tolist()) for col in colunas_numericas],
+            titulo=titulo,
+            xlabel='Índice',
+            ylabel='Valores',
+            **ESTILO_GRAFICO,
+            grade=True
+        )
     
-    def _gerar_grafico_barras(self, df: pd.DataFrame, titulo: str) -> BytesIO:
-        """Gera gráfico de barras"""
-        fig, ax = plt.subplots(figsize=(10, 5))
-        
+    def _spec_grafico_barras(self, df: pd.DataFrame, titulo: str) -> ChartSpec:
+        """Spec do gráfico de barras"""
         # Pegar primeira coluna numérica
         col_numerica = df.select_dtypes(include=['number']).columns[0]
         
@@ -113,42 +56,51 @@ class PDFComGraficos:
         cores = ['#8b5cf6', '#14b8a6', '#6366f1', '#0ea5e9', '#8b5cf6',
                  '#14b8a6', '#6366f1', '#0ea5e9', '#8b5cf6', '#14b8a6']
         
-        ax.barh(range(len(dados_top)), dados_top[col_numerica], color=cores[:len(dados_top)])
-        ax.set_yticks(range(len(dados_top)))
-        ax.set_yticklabels(dados_top.index)
-        ax.set_xlabel(col_numerica, fontsize=10)
-        ax.set_title(titulo, fontsize=14, fontweight='bold', color='#1e1b4b')
-        ax.grid(True, alpha=0.3, axis='x')
-        
-        buffer = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buffer.seek(0)
-        
-        return buffer
+        return ChartSpec.criar(
+            "barh",
+            labels=dados_top.index.tolist(),
+            valores=dados_top[col_numerica].tolist(),
+            titulo=titulo,
+            xlabel=col_numerica,
+            **ESTILO_GRAFICO,
+            cores=cores,
+            grade='x'
+        )
     
-    def _gerar_grafico_pizza(self, df: pd.DataFrame, titulo: str) -> BytesIO:
-        """Gera gráfico de pizza"""
-        fig, ax = plt.subplots(figsize=(8, 8))
-        
+    def _spec_grafico_pizza(self, df: pd.DataFrame, titulo: str) -> ChartSpec:
+        """Spec do gráfico de pizza"""
         # Contar valores da primeira coluna
         col = df.columns[0]
         valores = df[col].value_counts().head(6)
         
         cores = ['#8b5cf6', '#14b8a6', '#6366f1', '#0ea5e9', '#f59e0b', '#10b981']
         
-        ax.pie(valores, labels=valores.index, autopct='%1.1f%%',
-               colors=cores[:len(valores)], startangle=90)
-        ax.set_title(titulo, fontsize=14, fontweight='bold', color='#1e1b4b')
-        
-        buffer = BytesIO()
-        plt.tight_layout()
-        plt.savefig(buffer, format='png', dpi=150, bbox_inches='tight')
-        plt.close()
-        buffer.seek(0)
-        
-        return buffer
+        return ChartSpec.criar(
+            "pie",
+            labels=valores.index.tolist(),
+            valores=valores.tolist(),
+            titulo=titulo,
+            **{**ESTILO_GRAFICO, 'figsize': (8, 8)},
+            cores=cores
+        )
+    
+    def _gerar_grafico_linhas(self, df: pd.DataFrame, titulo: str) -> BytesIO:
+        """Gera gráfico de linhas (PNG em cache)"""
+        return BytesIO(obter_png(self._spec_grafico_linhas(df, titulo)))
+    
+    def _gerar_grafico_barras(self, df: pd.DataFrame, titulo: str) -> BytesIO:
+        """Gera gráfico de barras (PNG em cache)"""
+        return BytesIO(obter_png(self._spec_grafico_barras(df, titulo)))
+    
+    def _gerar_grafico_pizza(self, df: pd.DataFrame, titulo: str) -> BytesIO:
+        """Gera gráfico de pizza (PNG em cache)"""
+        return BytesIO(obter_png(self._spec_grafico_pizza(df, titulo)))
+    
+    def _grafico_flowable(self, spec: ChartSpec, largura: float, altura: float):
+        """Gráfico vetorial (CHART_BACKEND=vetorial) ou PNG em cache"""
+        if backend_graficos() == "vetorial":
+            return desenhar(spec, largura=largura, altura=altura)
+        return RLImage(BytesIO(obter_png(spec)), width=largura, height=altura)
     
     def _adicionar_cabecalho(self):
         """Cabeçalho do PDF"""
@@ -158,18 +110,52 @@ class PDFComGraficos:
         self.story.append(Spacer(1, 0.3*cm))
         
         # Informações
-        data_formatada = datetime.now().strftime('%d/%m/%Y às %H:%M')
+        data_formatada = data_relatorio(self.dados_analise).strftime('%d/%m/%Y às %H:%M')
         total_linhas = self.dados_analise.get('total_linhas', 0)
         
-        info = f'<b>Data:</b> {data_formatada}<br/>'
+        info = ''
+        if self.tipo_analise != 'geral':
+            info += f'<b>Tipo:</b> {self.tipo_analise.capitalize()}<br/>'
+        info += f'<b>Data:</b> {data_formatada}<br/>'
         info += f'<b>Total de registros:</b> {total_linhas:,}<br/>'
-        
+        amostra = self.dados_analise.get('amostra')
+        if amostra:
+            info += (f'<b>Amostra aleatória:</b> {amostra["linhas"]:,} de cerca de '
+                     f'{amostra["linhas_estimadas"]:,} registros<br/>')
+
         if self.dados_excel is not None:
             info += f'<b>Colunas:</b> {len(self.dados_excel.columns)}'
         
         self.story.append(Paragraph(info, self.styles['TextoNormal']))
         self.story.append(Spacer(1, 1*cm))
     
+    def _adicionar_fatos(self):
+        """KPIs e rankings calculados no backend (o texto da IA só interpreta)"""
+        
+        fatos = list(self.dados_analise.get('fatos') or [])
+        kpis = self.dados_analise.get('kpis') or []
+        if kpis:
+            fatos.insert(0, {
+                'titulo': 'Indicadores',
+                'colunas': ['#', 'Indicador', 'Valor'],
+                'linhas': [[str(i), k.get('label', ''), str(k.get('value', ''))] for i, k in enumerate(kpis, start=1)],
+            })
+        fatos = [f for f in fatos if f.get('linhas')]
+        if not fatos:
+            return
+        
+        self.story.append(Paragraph('📋 Números do Diagnóstico', self.styles['SubtituloXplors']))
+        self.story.append(Spacer(1, 0.3*cm))
+        
+        for fato in fatos:
+            titulo = str(fato.get('titulo', '')).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            self.story.append(KeepTogether([
+                Paragraph(f'<b>{titulo}</b>', self.styles['TextoNormal']),
+                Spacer(1, 0.1*cm),
+                tabela_fato(fato),
+            ]))
+            self.story.append(Spacer(1, 0.4*cm))
+    
     def _adicionar_graficos(self):
         """Adiciona gráficos baseados nos dados"""
         
@@ -186,23 +172,20 @@ class PDFComGraficos:
             # GRÁFICO 1: Linhas (se houver colunas numéricas)
             colunas_numericas = df.select_dtypes(include=['number']).columns
             if len(colunas_numericas) > 0:
-                buffer_linhas = self._gerar_grafico_linhas(df, 'Tendência dos Dados')
-                img_linhas = RLImage(buffer_linhas, width=15*cm, height=7.5*cm)
-                self.story.append(img_linhas)
+                spec = self._spec_grafico_linhas(df, 'Tendência dos Dados')
+                self.story.append(self._grafico_flowable(spec, 15*cm, 7.5*cm))
                 self.story.append(Spacer(1, 0.5*cm))
             
             # GRÁFICO 2: Barras (top 10)
             if len(colunas_numericas) > 0:
-                buffer_barras = self._gerar_grafico_barras(df, 'Top 10 Valores')
-                img_barras = RLImage(buffer_barras, width=15*cm, height=7.5*cm)
-                self.story.append(img_barras)
+                spec = self._spec_grafico_barras(df, 'Top 10 Valores')
+                self.story.append(self._grafico_flowable(spec, 15*cm, 7.5*cm))
                 self.story.append(Spacer(1, 0.5*cm))
             
             # GRÁFICO 3: Pizza (distribuição)
             if len(df.columns) > 0:
-                buffer_pizza = self._gerar_grafico_pizza(df, 'Distribuição de Categorias')
-                img_pizza = RLImage(buffer_pizza, width=12*cm, height=12*cm)
-                self.story.append(img_pizza)
+                spec = self._spec_grafico_pizza(df, 'Distribuição de Categorias')
+                self.story.append(self._grafico_flowable(spec, 12*cm, 12*cm))
                 self.story.append(Spacer(1, 1*cm))
             
         except Exception as e:
@@ -246,8 +229,8 @@ class PDFComGraficos:
         self.story.append(Spacer(1, 1*cm))
         rodape = Paragraph(
             f'<b>Relatório gerado por Xplors</b><br/>'
-            f'Data: {datetime.now().strftime("%d/%m/%Y às %H:%M")}<br/>'
-            f'© {datetime.now().year} Xplors - Análise Inteligente',
+            f'Data: {data_relatorio(self.dados_analise).strftime("%d/%m/%Y às %H:%M")}<br/>'
+            f'© {data_relatorio(self.dados_analise).year} Xplors - Análise Inteligente',
             self.styles['TextoNormal']
         )
         self.story.append(rodape)
@@ -261,6 +244,9 @@ class PDFComGraficos:
             # Cabeçalho
             self._adicionar_cabecalho()
             
+            # Números calculados no backend
+            self._adicionar_fatos()
+            
             # Gráficos
             self._adicionar_graficos()
             
@@ -286,6 +272,6 @@ def gerar_pdf_xplors(arquivo_saida, tipo_analise, dados_analise, dados_excel=Non
     """
     Função principal - Gera PDF com gráficos
     """
-    pdf = PDFComGraficos(arquivo_saida, dados_analise, dados_excel)
+    pdf = PDFComGraficos(arquivo_saida, dados_analise, dados_excel, tipo_analise)
     pdf.gerar()
     return arquivo_saida
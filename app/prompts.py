@@ -8,13 +8,17 @@ Este módulo contém:
 2. Função para análise com OpenAI diretamente (SEM LangChain)
 3. Configuração do modelo de IA
 
-Cada prompt é otimizado para gerar insights específicos
+Os números do relatório (KPIs, rankings) são calculados antes e entram no
+prompt como FATOS: cada prompt pede só interpretação e recomendações
 """
 
 import os
+import time
 from dotenv import load_dotenv
 from openai import OpenAI
 import pandas as pd
+from app.cost_tracker import tokens_em_cache
+from app.excel_processor import gerar_insumos_pdf_excel
 from app.text_sanitize import limpar_para_pdf
 
 
@@ -57,6 +61,48 @@ def criar_cliente_openai():
         raise
 
 
+# ========================================
+# ORDEM DO PROMPT: PREFIXO ESTÁTICO -> DADOS
+# ========================================
+# O provedor reaproveita (cache) o prefixo idêntico de prompts recentes e
+# cobra esses tokens com desconto - só a partir de ~1024 tokens de prefixo.
+# Todo texto fixo (papel, estrutura, regras) vai na mensagem de sistema,
+# sempre igual por tipo, e tudo que muda por requisição vai por último, na
+# mensagem do usuário. Os prefixos de hoje (~310 tokens) ficam abaixo do
+# mínimo: a ordem não custa nada e passa a render se o texto fixo crescer.
+# Não vale encher o prefixo só para alcançar o cache: 1024 tokens em cache
+# (metade do preço) custam mais que ~310 sem cache.
+
+SISTEMA_ANALISTA = "Você é um analista especializado em trade marketing e inteligência competitiva. Gere relatórios executivos completos e acionáveis."
+
+BLOCO_DADOS = """DADOS RECEBIDOS:
+{dados}
+
+FATOS CALCULADOS (já estão no relatório):
+{fatos}
+
+TOTAL DE RESPOSTAS: {total}
+"""
+
+
+# ========================================
+# REGRAS COMUNS: SÓ INTERPRETAÇÃO
+# ========================================
+# Os números (KPIs, tops, conformidade, preços médios...) já são calculados em
+# gerar_insumos_pdf_excel e entram no PDF como tabelas ("Números do
+# Diagnóstico"). O modelo recebe esses fatos e escreve só interpretação e
+# recomendações - tokens de saída custam 4x os de entrada.
+
+REGRAS_INTERPRETACAO = """
+REGRAS:
+- Os FATOS CALCULADOS já aparecem no relatório em tabelas: NÃO os reescreva,
+  não liste rankings nem copie percentuais/preços em sequência
+- Cite um número apenas quando ele sustenta um argumento (no máximo 1 por parágrafo)
+- Foque em causas prováveis, riscos, prioridades e ações concretas
+- Linguagem executiva e direta, entre 500 e 800 palavras
+"""
+
+
 # ========================================
 # PROMPT 1: AÇÕES DE CONCORRÊNCIA (~65 respostas)
 # ========================================
@@ -64,46 +110,26 @@ def criar_cliente_openai():
 PROMPT_CONCORRENCIA = """
 Você é um Analista Sênior de Inteligência Competitiva e Trade Marketing.
 
-Analise os dados de AÇÕES DE CONCORRÊNCIA abaixo e gere um relatório executivo completo.
-
-DADOS RECEBIDOS:
-{dados}
-
-TOTAL DE RESPOSTAS: {total}
+Interprete os dados de AÇÕES DE CONCORRÊNCIA (enviados na mensagem do usuário) e escreva a parte analítica de um relatório executivo.
 
-ESTRUTURA DO RELATÓRIO:
+ESTRUTURA DO TEXTO:
 
 1. RESUMO EXECUTIVO
-- Visão geral das ações da concorrência
-- Principais ameaças identificadas
-- Nível de agressividade competitiva (Alto/Médio/Baixo)
+- Principais ameaças e nível de agressividade competitiva (Alto/Médio/Baixo)
 
-2. ANÁLISE DAS AÇÕES
-- Listar as 5 principais ações da concorrência por frequência
-- Para cada ação: impacto no mercado, gravidade, resposta recomendada
-- Identificar padrões: promoções, lançamentos, expansão territorial
+2. LEITURA DAS AÇÕES
+- O que as ações mais frequentes revelam sobre a estratégia dos concorrentes
+- Padrões: promoções, lançamentos, expansão territorial
 
 3. MATRIZ DE RISCO COMPETITIVO
-- Ações que exigem resposta imediata (0-7 dias)
-- Ações para monitorar (curto prazo)
-- Oportunidades identificadas nas ações dos concorrentes
+- Resposta imediata (0-7 dias), monitorar (curto prazo), oportunidades
 
 4. RECOMENDAÇÕES ESTRATÉGICAS
-- 3 ações de contra-ataque prioritárias
-- Como neutralizar ameaças principais
-- Oportunidades para ganhar mercado
+- 3 ações de contra-ataque prioritárias e como neutralizar as ameaças principais
 
 5. KPIs PARA MONITORAR
-- Métricas específicas para acompanhar concorrentes
-- Frequência de monitoramento recomendada
-
-REGRAS:
-- Seja ESPECÍFICO e QUANTITATIVO
-- Use exemplos reais dos dados
-- Classifique riscos como Alto/Médio/Baixo
-- Linguagem executiva e direta
-- Mínimo 1500 palavras
-"""
+- Métricas e frequência de acompanhamento
+""" + REGRAS_INTERPRETACAO
 
 
 # ========================================
@@ -113,56 +139,27 @@ REGRAS:
 PROMPT_MERCHANDISING = """
 Você é um Analista Sênior de Trade Marketing e Visual Merchandising.
 
-Analise os dados de EXECUÇÃO DE MERCHANDISING abaixo e gere um relatório executivo completo.
+Interprete os dados de EXECUÇÃO DE MERCHANDISING (enviados na mensagem do usuário) e escreva a parte analítica de um relatório executivo.
 
-DADOS RECEBIDOS:
-{dados}
+ESTRUTURA DO TEXTO:
 
-TOTAL DE RESPOSTAS: {total}
+1. RESUMO EXECUTIVO
+- Nível geral de execução (Excelente/Bom/Regular/Crítico) e o porquê
 
-ESTRUTURA DO RELATÓRIO:
+2. LEITURA DA CONFORMIDADE
+- O que explica os itens, lojas e regiões com pior execução
+- Onde a execução é boa e o que pode ser replicado
 
-1. RESUMO EXECUTIVO
-- Nível geral de execução (Excelente/Bom/Regular/Crítico)
-- Taxa de conformidade com padrões
-- Principais problemas de execução
-
-2. ANÁLISE DE CONFORMIDADE
-- % de lojas com execução correta
-- Top 5 itens com melhor execução
-- Top 5 itens com pior execução
-- Análise por região/ponto de venda (se houver dados)
-
-3. PROBLEMAS CRÍTICOS IDENTIFICADOS
-- Rupturas de estoque detectadas
-- Problemas de visibilidade dos produtos
-- Falhas de precificação
-- Questões de organização e limpeza
-- Cada problema com: frequência, impacto em vendas, custo estimado
-
-4. IMPACTO EM VENDAS
-- Estimativa de perda de vendas por má execução
-- Oportunidades de ganho com melhorias
-- ROI esperado das correções
-
-5. PLANO DE AÇÃO CORRETIVO
+3. PROBLEMAS CRÍTICOS
+- Rupturas, visibilidade, precificação, organização: gravidade e impacto em vendas
+
+4. PLANO DE AÇÃO CORRETIVO
 - Ações urgentes (0-7 dias) com responsável
-- Melhorias curto prazo (1-4 semanas)
-- Investimentos necessários
-- Treinamentos recomendados
+- Melhorias de curto prazo (1-4 semanas) e treinamentos
 
-6. KPIs DE MERCHANDISING
-- Métricas para acompanhamento semanal
-- Metas recomendadas para cada KPI
-
-REGRAS:
-- Seja MUITO ESPECÍFICO com números e %
-- Cite exemplos reais dos dados
-- Calcule impactos financeiros quando possível
-- Classifique tudo como Crítico/Alto/Médio/Baixo
-- Linguagem executiva e acionável
-- Mínimo 2000 palavras
-"""
+5. KPIs DE MERCHANDISING
+- Metas recomendadas para o acompanhamento semanal
+""" + REGRAS_INTERPRETACAO
 
 
 # ========================================
@@ -172,62 +169,68 @@ REGRAS:
 PROMPT_PRECO = """
 Você é um Analista Sênior de Pricing e Competitividade de Mercado.
 
-Analise os dados de PESQUISA DE PREÇOS abaixo e gere um relatório executivo completo.
-
-DADOS RECEBIDOS:
-{dados}
-
-TOTAL DE RESPOSTAS: {total}
+Interprete os dados de PESQUISA DE PREÇOS (enviados na mensagem do usuário) e escreva a parte analítica de um relatório executivo.
 
-ESTRUTURA DO RELATÓRIO:
+ESTRUTURA DO TEXTO:
 
 1. RESUMO EXECUTIVO
-- Posicionamento de preço vs concorrência (Acima/Igual/Abaixo)
-- Índice de competitividade de preços
-- Principais gaps identificados
+- Posicionamento de preço vs concorrência (Acima/Igual/Abaixo) e principais gaps
 
-2. ANÁLISE COMPARATIVA DE PREÇOS
-- Produtos mais caros vs concorrência (Top 10)
-- Produtos mais baratos vs concorrência (Top 10)
-- Diferença % média por categoria
-- Análise de spread de preços (mínimo, máximo, médio)
+2. LEITURA COMPARATIVA
+- O que as maiores diferenças e os preços médios por categoria indicam
 
 3. OPORTUNIDADES DE PRECIFICAÇÃO
-- Produtos onde podemos aumentar preço sem perder competitividade
-- Produtos onde devemos reduzir preço urgentemente
-- Estratégias de preço psicológico identificadas
-
-4. ANÁLISE DE ELASTICIDADE
-- Produtos sensíveis a preço (alta elasticidade)
-- Produtos com baixa sensibilidade a preço
-- Recomendações de ajuste por produto
-
-5. ESTRATÉGIA DE PRICING
-- Ajustes recomendados por produto/categoria
-- Impacto estimado em margem e volume
-- Análise de break-even dos ajustes
-- Calendário de implementação (urgente/curto/médio prazo)
-
-6. MONITORAMENTO COMPETITIVO
-- Produtos para monitorar semanalmente
-- Alertas de preço a configurar
-- KPIs de competitividade
-
-7. SIMULAÇÕES FINANCEIRAS
-- Cenário 1: Manter preços atuais
-- Cenário 2: Igualar principais concorrentes
-- Cenário 3: Estratégia híbrida (ajustes seletivos)
-- Recomendação final com justificativa
+- Onde aumentar preço sem perder competitividade e onde reduzir com urgência
 
-REGRAS:
-- Use MUITOS NÚMEROS, % e comparações
-- Calcule impactos financeiros reais
-- Cite produtos e preços específicos dos dados
-- Seja ACIONÁVEL - cada recomendação deve ter: produto, ajuste, impacto
-- Classifique urgência como Imediato/Curto/Médio prazo
-- Linguagem executiva e estratégica
-- Mínimo 2500 palavras
-"""
+4. ESTRATÉGIA DE PRICING
+- Ajustes por categoria/produto com impacto esperado em margem e volume
+- Calendário (Imediato/Curto/Médio prazo)
+
+5. MONITORAMENTO COMPETITIVO
+- Produtos e alertas de preço a acompanhar
+""" + REGRAS_INTERPRETACAO
+
+
+# ========================================
+# MONTAGEM DAS MENSAGENS
+# ========================================
+
+def montar_mensagens(prompt_template: str, dados_texto: str, fatos_texto: str, total: int) -> list[dict]:
+    """
+    [sistema: papel + template (estático, cacheável)] + [usuário: dados da requisição].
+    Templates antigos com {dados}/{fatos}/{total} no meio ainda funcionam,
+    mas sem prefixo estável (vão inteiros na mensagem do usuário).
+    """
+    if any(p in prompt_template for p in ("{dados}", "{fatos}", "{total}")):
+        prompt = (prompt_template.replace("{dados}", dados_texto)
+                  .replace("{total}", str(total))
+                  .replace("{fatos}", fatos_texto))
+        return [{"role": "system", "content": SISTEMA_ANALISTA}, {"role": "user", "content": prompt}]
+
+    return [
+        {"role": "system", "content": f"{SISTEMA_ANALISTA}\n{prompt_template.strip()}"},
+        {"role": "user", "content": BLOCO_DADOS.format(fatos=fatos_texto, dados=dados_texto, total=total)},
+    ]
+
+
+# ========================================
+# FATOS -> TEXTO DO PROMPT
+# ========================================
+
+def formatar_fatos(insumos: dict | None) -> str:
+    """
+    KPIs e rankings de gerar_insumos_pdf_excel em texto compacto, para o
+    modelo interpretar (uma linha por KPI, uma linha por ranking).
+    """
+    if not insumos:
+        return "(não disponíveis)"
+
+    linhas = [f"- {k.get('label')}: {k.get('value')}" for k in insumos.get("kpis") or []]
+    for fato in insumos.get("fatos") or []:
+        itens = "; ".join(f"{r[1]} = {r[2]}" for r in fato.get("linhas") or [])
+        if itens:
+            linhas.append(f"- {fato.get('titulo')}: {itens}")
+    return "\n".join(linhas) or "(não disponíveis)"
 
 
 # ========================================
@@ -254,14 +257,21 @@ def obter_prompt_por_tipo(tipo: str) -> str:
     return prompts.get(tipo, PROMPT_MERCHANDISING)
 
 
-def analisar_com_ia(df: pd.DataFrame, prompt_template: str, tipo: str) -> str:
+def perfil_colunas(df: pd.DataFrame) -> str:
+    """Estatísticas por coluna para o prompt (não depende do tipo da análise)."""
+    return df.describe(include='all').to_string()
+
+
+def analisar_com_ia(df: pd.DataFrame, prompt_template: str, tipo: str, cliente: OpenAI | None = None,
+                    insumos: dict | None = None, metricas: dict | None = None,
+                    perfil: str | None = None) -> str:
     """
     Analisa os dados usando IA com o prompt específico
     VERSÃO CORRIGIDA - Compatível com Python 3.13+
     
     Fluxo:
-    1. Prepara os dados em formato legível
-    2. Cria o prompt com os dados
+    1. Prepara os dados em formato legível + fatos já calculados
+    2. Cria o prompt com os dados (o modelo só interpreta os fatos)
     3. Chama o modelo OpenAI diretamente
     4. Retorna a análise completa
     
@@ -269,6 +279,14 @@ def analisar_com_ia(df: pd.DataFrame, prompt_template: str, tipo: str) -> str:
         df: DataFrame com os dados
         prompt_template: Template do prompt a usar
         tipo: Tipo de análise
+        cliente: Cliente OpenAI já criado (opcional; padrão cria um novo)
+        insumos: retorno de gerar_insumos_pdf_excel (opcional; padrão calcula
+            só os KPIs/fatos, sem gráficos)
+        metricas: dict preenchido com tokens_input, tokens_output,
+            tokens_cache (prefixo reaproveitado pelo provedor) e latencia_s
+            da chamada (para acompanhar custo por relatório)
+        perfil: df.describe(include='all') já formatado (sessão da planilha,
+            app/sessao_analise.py); padrão calcula aqui
         
     Returns:
         String com análise completa da IA
@@ -287,17 +305,21 @@ def analisar_com_ia(df: pd.DataFrame, prompt_template: str, tipo: str) -> str:
         
         dados_texto = f"""
 INFORMAÇÕES GERAIS:
-- Total de registros: {len(df)}
 - Colunas: {', '.join(df.columns.tolist())}
+- Total de registros: {len(df)}
 
 AMOSTRA DOS DADOS (primeiras linhas):
 {amostra.to_string(index=False)}
 
 ESTATÍSTICAS:
-{df.describe(include='all').to_string()}
+{perfil if perfil is not None else perfil_colunas(df)}
 """
         
-        print(f"📊 Dados preparados: {len(dados_texto)} caracteres")
+        if insumos is None:
+            insumos = gerar_insumos_pdf_excel(df, tipo, backend="vetorial")
+        fatos_texto = formatar_fatos(insumos)
+        
+        print(f"📊 Dados preparados: {len(dados_texto)} caracteres (+ {len(fatos_texto)} de fatos)")
         
         
         # ========================================
@@ -305,33 +327,36 @@ ESTATÍSTICAS:
         # ========================================
         
         # Criar cliente OpenAI (COM CORREÇÃO!)
-        cliente = criar_cliente_openai()
+        cliente = cliente or criar_cliente_openai()
         
-        # Substituir placeholders no prompt
-        prompt_final = prompt_template.replace("{dados}", dados_texto)
-        prompt_final = prompt_final.replace("{total}", str(len(df)))
+        # Prefixo estático (sistema + template) primeiro, dados da requisição por último
+        mensagens = montar_mensagens(prompt_template, dados_texto, fatos_texto, len(df))
         
         print("🔄 Chamando OpenAI GPT-4o...")
         
         # Executar análise com OpenAI diretamente
+        inicio = time.perf_counter()
         resposta = cliente.chat.completions.create(
             model=os.getenv("OPENAI_MODEL", "gpt-4o"),
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Você é um analista especializado em trade marketing e inteligência competitiva. Gere relatórios executivos completos e acionáveis."
-                },
-                {
-                    "role": "user",
-                    "content": prompt_final
-                }
-            ],
+            messages=mensagens,
             temperature=float(os.getenv("TEMPERATURE", "0.3")),
-            max_tokens=int(os.getenv("MAX_TOKENS", "4000"))
+            max_tokens=int(os.getenv("MAX_TOKENS", "1600"))
         )
+        latencia = time.perf_counter() - inicio
         
         resultado = resposta.choices[0].message.content 
-        print(f"✅ Análise concluída: {len(resultado)} caracteres")
+        uso = getattr(resposta, "usage", None)
+        tokens_output = getattr(uso, "completion_tokens", 0) or 0
+        tokens_cache = tokens_em_cache(uso)
+        if metricas is not None:
+            metricas.update({
+                "tokens_input": getattr(uso, "prompt_tokens", 0) or 0,
+                "tokens_output": tokens_output,
+                "tokens_cache": tokens_cache,
+                "latencia_s": round(latencia, 3),
+            })
+        print(f"✅ Análise concluída: {len(resultado)} caracteres ({tokens_output} tokens de saída, "
+              f"{tokens_cache} de entrada em cache, {latencia:.1f}s)")
         
         return resultado
         
@@ -0,0 +1,255 @@
+"""
+SESSÃO DA PLANILHA (Xplors) - reaproveitamento entre tipos de análise
+
+Analisar a mesma planilha como merchandising e depois como preço refazia
+tudo: leitura, _detectar_dimensoes, o Top 10 base, o describe() e a chamada
+ao modelo. Uma SessaoAnalise por upload (usuário + sha256 do arquivo) guarda:
+
+- o DataFrame já lido e codificado, as dimensões e a classificação
+- o que não depende do tipo: insumos_base (Top 10: spec, fato, KPIs) e o
+  perfil das colunas (describe), calculados uma vez, sob demanda
+- a tabela compartilhada (app/tabela_compartilhada.py) que as etapas do pool
+  de computação leem: gravada uma vez, apagada quando a sessão sai do armazém
+  e nenhuma requisição a segura mais (reter/soltar)
+- por tipo: os insumos (KPIs/gráficos/fatos) e o texto da IA, com a data do
+  relatório - repetir o mesmo tipo não chama o modelo e gera o mesmo PDF
+  (mesmo hash; o upload é pulado em app/pdf_conteudo.py)
+
+ArmazemSessoes é um LRU em memória limitado por itens e por MB (tamanho do
+DataFrame), com expulsão de sessões ociosas há mais de SESSAO_OCIOSA_S.
+Sessão expulsa = o próximo upload refaz tudo (a leitura ainda sai do snapshot
+Arrow).
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+from app.computacao import computacao, gerar_insumos
+from app.excel_processor import _detectar_dimensoes, insumos_base
+from app.prompts import perfil_colunas
+from app.tabela_compartilhada import TabelaCompartilhada
+
+SESSAO_MAX_ITENS = int(os.getenv("SESSAO_MAX_ITENS", "32"))
+SESSAO_MAX_MB = int(os.getenv("SESSAO_MAX_MB", "512"))
+SESSAO_OCIOSA_S = int(os.getenv("SESSAO_OCIOSA_S", "900"))
+
+
+@dataclass
+class ResultadoIA:
+    texto: str
+    tokens_input: int
+    tokens_output: int
+    tokens_cache: int
+    latencia_s: float
+    gerado_em: datetime
+    # relatório "o que mudou" (app/incremental.py): insumos e linhas novas para refazer o mesmo PDF
+    modo: str = "completo"
+    insumos: dict | None = None
+    novas: pd.DataFrame | None = None
+
+
+@dataclass
+class SessaoAnalise:
+    id: str
+    user_id: str
+    arquivo_hash: str | None
+    nome_arquivo: str
+    df: pd.DataFrame
+    dims: dict
+    classificacao: object | None = None
+    usado_em: float = field(default_factory=time.monotonic)
+    _base: dict | None = field(default=None, repr=False)
+    _perfil: str | None = field(default=None, repr=False)
+    _insumos: dict = field(default_factory=dict, repr=False)
+    _analises: dict = field(default_factory=dict, repr=False)
+    _tabela: TabelaCompartilhada | None = field(default=None, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    bytes_df: int = 0
+    efemera: bool = False  # não coube no armazém: libera no fim da requisição
+    # requisições usando a sessão; expulsa com uso = tabela apagada quando a última soltar
+    _usos: int = field(default=0, repr=False)
+    _liberar_pendente: bool = field(default=False, repr=False)
+
+    @classmethod
+    def abrir(cls, user_id: str, df: pd.DataFrame, nome_arquivo: str) -> "SessaoAnalise":
+        return cls(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            arquivo_hash=df.attrs.get("arquivo_hash"),
+            nome_arquivo=nome_arquivo,
+            df=df,
+            dims=_detectar_dimensoes(df),
+            bytes_df=int(df.memory_usage(index=True, deep=True).sum()),
+        )
+
+    def base(self) -> dict:
+        with self._lock:
+            if self._base is None:
+                self._base = insumos_base(self.df, self.dims)
+            return self._base
+
+    def perfil(self) -> str:
+        """df.describe(include='all') formatado (prompt de app/prompts.analisar_com_ia)."""
+        with self._lock:
+            if self._perfil is None:
+                self._perfil = perfil_colunas(self.df)
+            return self._perfil
+
+    def dados_computacao(self) -> pd.DataFrame | TabelaCompartilhada:
+        """O que as etapas do pool recebem: a tabela compartilhada da sessão (ou o df, sem pool)."""
+        if not computacao.ativo:
+            return self.df
+        with self._lock:
+            if self._tabela is None or self._tabela.liberada:
+                self._tabela = TabelaCompartilhada.criar(self.df, dono=f"sessao:{self.id}")
+            return self._tabela
+
+    def reter(self) -> "SessaoAnalise":
+        with self._lock:
+            self._usos += 1
+        return self
+
+    def soltar(self):
+        with self._lock:
+            self._usos -= 1
+            liberar = self._liberar_pendente and self._usos == 0
+        if liberar:
+            self.liberar()
+
+    def liberar(self):
+        with self._lock:
+            if self._usos > 0:
+                self._liberar_pendente = True
+                return
+            self._liberar_pendente = False
+            tabela, self._tabela = self._tabela, None
+        if tabela is not None:
+            tabela.liberar()
+
+    def insumos(self, tipo: str, out_dir: str, backend: str | None = None) -> dict:
+        """Insumos do PDF para o tipo; só a parte específica do tipo é calculada na 1ª vez."""
+        chave = (tipo, backend)
+        with self._lock:
+            pronto = self._insumos.get(chave)
+        if pronto is not None:
+            print(f"♻️ Insumos de '{tipo}' reaproveitados da sessão")
+            return pronto
+        # pandas pesado: no pool de computação (app/computacao.py), fora do GIL deste worker
+        insumos = gerar_insumos(self.dados_computacao(), tipo, out_dir=out_dir, backend=backend,
+                                dims=self.dims, base=self.base())
+        with self._lock:
+            return self._insumos.setdefault(chave, insumos)
+
+    def analise(self, tipo: str) -> ResultadoIA | None:
+        with self._lock:
+            return self._analises.get(tipo)
+
+    def guardar_analise(self, tipo: str, resultado: ResultadoIA) -> ResultadoIA:
+        with self._lock:
+            return self._analises.setdefault(tipo, resultado)
+
+
+class ArmazemSessoes:
+    """LRU de sessões por id, com índice (user_id, arquivo_hash) e expulsão por ociosidade."""
+
+    def __init__(self, max_itens: int = SESSAO_MAX_ITENS, max_bytes: int = SESSAO_MAX_MB * 1024 * 1024,
+                 ociosa_s: float = SESSAO_OCIOSA_S):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ociosa_s = ociosa_s
+        self._itens: OrderedDict[str, SessaoAnalise] = OrderedDict()
+        self._por_arquivo: dict[tuple[str, str], str] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.expulsas = 0
+
+    def _remover(self, sessao_id: str):
+        sessao = self._itens.pop(sessao_id, None)
+        if sessao is None:
+            return
+        sessao.liberar()
+        self._bytes -= sessao.bytes_df
+        chave = (sessao.user_id, sessao.arquivo_hash)
+        if self._por_arquivo.get(chave) == sessao_id:
+            del self._por_arquivo[chave]
+
+    def _varrer(self, agora: float):
+        # mais antigas primeiro: para na primeira ainda ativa
+        while self._itens:
+            sessao_id, sessao = next(iter(self._itens.items()))
+            if agora - sessao.usado_em <= self.ociosa_s:
+                break
+            self._remover(sessao_id)
+            self.expulsas += 1
+
+    def _usar(self, sessao: SessaoAnalise | None, agora: float, reter: bool) -> SessaoAnalise | None:
+        if sessao is None:
+            self.faltas += 1
+            return None
+        sessao.usado_em = agora
+        self._itens.move_to_end(sessao.id)
+        self.acertos += 1
+        return sessao.reter() if reter else sessao
+
+    def obter(self, sessao_id: str, user_id: str, reter: bool = False) -> SessaoAnalise | None:
+        """Sessão pelo id (só do próprio usuário). reter=True: quem chama solta no fim (sessao.soltar())."""
+        agora = time.monotonic()
+        with self._lock:
+            self._varrer(agora)
+            sessao = self._itens.get(sessao_id)
+            return self._usar(sessao if sessao and sessao.user_id == user_id else None, agora, reter)
+
+    def por_arquivo(self, user_id: str, arquivo_hash: str | None, reter: bool = False) -> SessaoAnalise | None:
+        """Sessão do mesmo arquivo (sha256) enviado de novo pelo usuário."""
+        if not arquivo_hash:
+            return None
+        agora = time.monotonic()
+        with self._lock:
+            self._varrer(agora)
+            sessao_id = self._por_arquivo.get((user_id, arquivo_hash))
+            return self._usar(self._itens.get(sessao_id) if sessao_id else None, agora, reter)
+
+    def guardar(self, sessao: SessaoAnalise, reter: bool = False) -> SessaoAnalise:
+        agora = time.monotonic()
+        if reter:
+            # antes de entrar no armazém: uma expulsão logo em seguida não apaga a tabela em uso
+            sessao.reter()
+        with self._lock:
+            self._varrer(agora)
+            if sessao.bytes_df > self.max_bytes:
+                sessao.efemera = True  # maior que o armazém: usa só nesta requisição
+                return sessao
+            anterior = self._por_arquivo.get((sessao.user_id, sessao.arquivo_hash)) if sessao.arquivo_hash else None
+            if anterior:
+                self._remover(anterior)
+            sessao.usado_em = agora
+            self._itens[sessao.id] = sessao
+            self._bytes += sessao.bytes_df
+            if sessao.arquivo_hash:
+                self._por_arquivo[(sessao.user_id, sessao.arquivo_hash)] = sessao.id
+            while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                self._remover(next(iter(self._itens)))
+                self.expulsas += 1
+        return sessao
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "expulsas": self.expulsas,
+            }
+
+
+sessoes = ArmazemSessoes()
@@ -0,0 +1,155 @@
+"""
+SNAPSHOT DE PLANILHAS (Xplors) - Arrow em disco, lido por memory-map
+
+O openpyxl é de longe o parser mais lento do pipeline. A primeira leitura de
+uma planilha grava um snapshot colunar (Arrow IPC, sem compressão) em
+SNAPSHOT_DIR, com o sha256 do arquivo original como chave. Reanálises,
+novos PDFs, troca de tipo e drill-downs leem o snapshot via memory-map
+(só as colunas pedidas), sem abrir o .xlsx de novo.
+
+- Chave = hash do conteúdo: arquivo alterado -> hash novo -> snapshot novo
+- Categoricals (dimensões codificadas) voltam como Categorical
+- SNAPSHOT_MAX_MB limita o diretório (remove os menos usados)
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO
+
+import pandas as pd
+import pyarrow as pa
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "xplors_snapshots"))
+SNAPSHOT_MAX_MB = int(os.getenv("SNAPSHOT_MAX_MB", "2048"))
+EXTENSAO = ".arrow"
+
+_BLOCO_HASH = 1024 * 1024
+
+
+# =========================
+# HASH DO ARQUIVO
+# =========================
+def hash_arquivo(fonte: str | BinaryIO) -> str:
+    """sha256 do conteúdo (caminho ou arquivo aberto; o arquivo volta para a posição original)."""
+    h = hashlib.sha256()
+    if isinstance(fonte, (str, os.PathLike)):
+        with open(fonte, "rb") as f:
+            for bloco in iter(lambda: f.read(_BLOCO_HASH), b""):
+                h.update(bloco)
+        return h.hexdigest()
+
+    posicao = fonte.tell()
+    for bloco in iter(lambda: fonte.read(_BLOCO_HASH), b""):
+        h.update(bloco)
+    fonte.seek(posicao)
+    return h.hexdigest()
+
+
+def caminho_snapshot(arquivo_hash: str, pasta: str | None = None) -> str:
+    pasta = pasta or SNAPSHOT_DIR
+    return os.path.join(pasta, arquivo_hash[:2], f"{arquivo_hash}{EXTENSAO}")
+
+
+# =========================
+# GRAVAÇÃO
+# =========================
+def _tabela_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    DataFrame -> Arrow. Colunas object com tipos misturados (comum no Excel:
+    números e texto na mesma coluna) são gravadas como texto.
+    """
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+
+    ajustadas = {}
+    for col in df.columns:
+        s = df[col]
+        if not pd.api.types.is_object_dtype(s.dtype):
+            continue
+        try:
+            pa.array(s, from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            ajustadas[col] = s.map(lambda v: v if pd.isna(v) else str(v))
+    return pa.Table.from_pandas(df.assign(**ajustadas), preserve_index=False)
+
+
+def _podar(pasta: str, max_bytes: int):
+    arquivos = []
+    for raiz, _, nomes in os.walk(pasta):
+        for nome in nomes:
+            if nome.endswith(EXTENSAO):
+                caminho = os.path.join(raiz, nome)
+                try:
+                    st = os.stat(caminho)
+                except OSError:
+                    continue
+                arquivos.append((st.st_mtime, st.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except OSError:
+            pass
+
+
+def salvar_snapshot(df: pd.DataFrame, arquivo_hash: str, pasta: str | None = None) -> str | None:
+    """Grava o snapshot (escrita atômica). Retorna o caminho, ou None se falhar."""
+    pasta = pasta or SNAPSHOT_DIR
+    destino = caminho_snapshot(arquivo_hash, pasta)
+    try:
+        tabela = _tabela_arrow(df)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, pa.ipc.new_file(f, tabela.schema) as writer:
+                writer.write_table(tabela)
+            os.replace(tmp, destino)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        _podar(pasta, SNAPSHOT_MAX_MB * 1024 * 1024)
+        return destino
+    except Exception as e:
+        print(f"⚠️ Não foi possível gravar snapshot da planilha: {e}")
+        return None
+
+
+# =========================
+# LEITURA (memory-map)
+# =========================
+def carregar_snapshot(arquivo_hash: str, colunas: list[str] | None = None, pasta: str | None = None) -> pd.DataFrame | None:
+    """
+    Lê o snapshot via memory-map. `colunas` limita a leitura (drill-downs).
+    Retorna None se não existir ou estiver corrompido.
+    """
+    caminho = caminho_snapshot(arquivo_hash, pasta)
+    if not os.path.exists(caminho):
+        return None
+
+    try:
+        with pa.memory_map(caminho, "r") as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+            if colunas is not None:
+                tabela = tabela.select([c for c in colunas if c in tabela.column_names])
+            df = tabela.to_pandas()
+        os.utime(caminho)  # LRU da poda
+        return df
+    except Exception as e:
+        print(f"⚠️ Snapshot inválido ({caminho}): {e}")
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+        return None
+
+
+def snapshot_existe(arquivo_hash: str, pasta: str | None = None) -> bool:
+    return os.path.exists(caminho_snapshot(arquivo_hash, pasta))
@@ -1,56 +1,51 @@
 """
 SUPABASE CLIENT - XPLORS (HARDENED)
 
-- Storage: upload de PDFs
-- Retorna SIGNED URL (bucket privado recomendado)
+- Storage: upload de PDFs (bucket privado recomendado)
+- URLs assinadas emitidas sob demanda, em lote e com cache (app/urls_assinadas.py),
+  nunca no upload
+- PDFs endereçados pelo conteúdo (app/pdf_conteudo.py): relatório idêntico não
+  sobe de novo; o objeto sai do Storage quando a última análise é apagada
 """
 
 import os
-import uuid
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from app.armazenamento import criar_cliente
+from app.historico import colunas_projecao, listar_pagina
+from app.pdf_conteudo import armazenar_pdf, liberar_pdf
+from app.urls_assinadas import CacheUrlsAssinadas, anexar_urls
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")  # ideal: service role só no backend
 BUCKET_NAME = os.getenv("SUPABASE_BUCKET", "pdfs")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
+# ARMAZENAMENTO=local dispensa as variáveis (SQLite + disco, ver app/armazenamento.py)
+supabase = criar_cliente(SUPABASE_URL, SUPABASE_KEY)
+
+if supabase is None:
     raise RuntimeError("SUPABASE_URL e SUPABASE_KEY são obrigatórios")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+urls_pdf = CacheUrlsAssinadas(lambda: supabase.storage.from_(BUCKET_NAME))
 
 
-def upload_pdf_to_storage(file_path: str, user_id: str, expires_in_seconds: int = 3600) -> dict:
+def upload_pdf_to_storage(file_path: str, user_id: str) -> dict:
     """
-    Upload do PDF no Storage e retorno de URL assinada (expira).
+    Upload do PDF no Storage, pelo hash do conteúdo (pula o upload se uma análise
+    já referencia os mesmos bytes). Não assina nada: grave `path` e `pdf_hash`
+    na análise e peça a URL com url_pdf() / listar_analises() quando alguém for abrir.
 
     Returns:
-        {"path": "...", "signed_url": "..."}
+        {"path": "...", "pdf_hash": "...", "reaproveitado": bool, "bytes": int}
     """
-    storage_path = f"{user_id}/{uuid.uuid4().hex}.pdf"
-
-    with open(file_path, "rb") as f:
-        data = f.read()
-
-    supabase.storage.from_(BUCKET_NAME).upload(
-        storage_path,
-        data,
-        file_options={"content-type": "application/pdf"},
-    )
-
-    signed = supabase.storage.from_(BUCKET_NAME).create_signed_url(storage_path, expires_in_seconds)
+    return armazenar_pdf(supabase, BUCKET_NAME, file_path)
 
-    signed_url = None
-    if isinstance(signed, dict):
-        signed_url = signed.get("signedURL") or signed.get("signedUrl") or signed.get("signed_url")
 
-    if not signed_url:
-        # fallback (não ideal): URL pública
-        signed_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
-
-    return {"path": storage_path, "signed_url": signed_url}
+def url_pdf(storage_path: str) -> str | None:
+    """URL assinada (do cache enquanto não estiver perto de expirar)."""
+    return urls_pdf.url(storage_path)
 
 
 def verificar_token(token: str):
@@ -68,14 +63,26 @@ def salvar_analise(user_id: str, dados: dict) -> dict:
     return resultado.data[0] if getattr(resultado, "data", None) else {}
 
 
-def listar_analises(user_id: str, limit: int = 20) -> list:
-    """Lista análises do usuário."""
-    res = (
-        supabase.table("analises")
-        .select("*")
-        .eq("user_id", user_id)
-        .order("created_at", desc=True)
-        .limit(limit)
+def excluir_analise(user_id: str, analise_id: str) -> bool:
+    """Apaga a análise do usuário e o PDF, se era a última referência a ele."""
+    res = supabase.table("analises")\
+        .delete()\
+        .eq("id", analise_id)\
+        .eq("user_id", user_id)\
         .execute()
-    )
-    return res.data or []
+    apagadas = res.data or []
+    for registro in apagadas:
+        if registro.get("pdf_path"):
+            urls_pdf.invalidar(registro["pdf_path"])
+        liberar_pdf(supabase, BUCKET_NAME, registro.get("pdf_hash"))
+    return bool(apagadas)
+
+
+def listar_analises(user_id: str, limit: int = 20, cursor: str | None = None, campos: str | None = None) -> list:
+    """
+    Lista análises do usuário (mais recentes primeiro), com pdf_url recém-assinada
+    (uma chamada para a página toda). Próxima página: listar_pagina(...)["proximo_cursor"].
+    """
+    colunas = colunas_projecao(campos, extras=("pdf_path",))
+    pagina = listar_pagina(supabase, user_id, limit, cursor, colunas)
+    return anexar_urls(pagina["itens"], urls_pdf, lambda r: r.get("pdf_path"))
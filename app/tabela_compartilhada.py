@@ -0,0 +1,238 @@
+"""
+TABELAS COMPARTILHADAS (Xplors) - DataFrame para os processos de computação sem pipe
+
+Mandar uma planilha de 200 mil linhas para o pool de computação
+(app/computacao.py) copiava os dados de novo a cada etapa: serializa no
+worker, atravessa o pipe, desserializa no processo. Aqui o DataFrame vira um
+arquivo Arrow IPC em memória compartilhada (/dev/shm é tmpfs: as páginas
+ficam na RAM, sem disco) uma única vez por planilha:
+
+- os processos recebem só a Referencia (caminho + tamanho) e abrem o arquivo
+  por memory-map: KPIs, gráficos e PDF leem as mesmas páginas, sem cópia
+  pelo pipe; colunas numéricas sem nulos viram views das páginas mapeadas
+  (texto e colunas com nulos ainda são convertidos dentro do processo)
+- a sessão da planilha (app/sessao_analise.py) é dona da tabela: troca de
+  tipo e PDF reaproveitam o mesmo arquivo; sessão expulsa -> arquivo apagado
+- cada etapa segura a tabela (adquirir/soltar) enquanto a Referencia está
+  com um processo: liberar() com etapas em andamento só marca, e o arquivo
+  é apagado quando a última solta
+
+Vazamentos:
+- cada tabela viva fica no RegistroTabelas com dono e último uso; varrer()
+  apaga as esquecidas há mais de COMPARTILHADA_OCIOSA_S e avisa no log
+- nomes levam o pid do worker: limpar_orfas() (no aquecimento) apaga as de
+  workers que morreram sem liberar (OOM, SIGKILL)
+- atexit libera tudo o que o processo ainda tem
+
+Sem /dev/shm (ou cheio: o Docker padrão tem 64 MB) usa COMPARTILHADA_DIR_RESERVA
+em disco, com o mesmo memory-map.
+"""
+
+import atexit
+import os
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import pandas as pd
+import pyarrow as pa
+
+from app.snapshot_planilha import _tabela_arrow
+
+_DIR_SHM = "/dev/shm"
+COMPARTILHADA_DIR = os.getenv("COMPARTILHADA_DIR") or (
+    os.path.join(_DIR_SHM, "xplors") if os.path.isdir(_DIR_SHM) else "")
+COMPARTILHADA_DIR_RESERVA = os.getenv("COMPARTILHADA_DIR_RESERVA",
+                                      os.path.join(tempfile.gettempdir(), "xplors_compartilhada"))
+COMPARTILHADA_OCIOSA_S = int(os.getenv("COMPARTILHADA_OCIOSA_S", os.getenv("SESSAO_OCIOSA_S", "900")))
+EXTENSAO = ".arrow"
+
+
+@dataclass(frozen=True)
+class Referencia:
+    """O que atravessa o pipe: onde está a tabela (os dados ficam no arquivo)."""
+    caminho: str
+    tamanho: int
+    linhas: int
+
+
+def ler(ref: Referencia) -> pd.DataFrame:
+    """
+    No processo de computação: DataFrame a partir da tabela compartilhada
+    (memory-map). split_blocks: uma coluna por bloco, sem consolidar (as
+    numéricas sem nulos apontam para o mapeamento); self_destruct: cada coluna
+    Arrow é solta assim que convertida.
+    """
+    with pa.memory_map(ref.caminho, "r") as fonte:
+        tabela = pa.ipc.open_file(fonte).read_all()
+        return tabela.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _gravar(tabela: pa.Table, pasta: str) -> str:
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, f"{os.getpid()}_{uuid.uuid4().hex}{EXTENSAO}")
+    tmp = destino + ".tmp"
+    try:
+        with pa.OSFile(tmp, "wb") as f, pa.ipc.new_file(f, tabela.schema) as writer:
+            writer.write_table(tabela)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return destino
+
+
+class TabelaCompartilhada:
+    def __init__(self, ref: Referencia, dono: str, registro: "RegistroTabelas"):
+        self.ref = ref
+        self.dono = dono
+        self.criada_em = time.monotonic()
+        self.usada_em = self.criada_em
+        self._registro = registro
+        self.liberada = False
+        self._usos = 0
+        self._liberar_pendente = False
+
+    @classmethod
+    def criar(cls, df: pd.DataFrame, dono: str = "", registro: "RegistroTabelas | None" = None) -> "TabelaCompartilhada":
+        registro = registro or tabelas
+        tabela = _tabela_arrow(df)
+        caminho = None
+        for pasta in (registro.pasta, registro.pasta_reserva):
+            if not pasta:
+                continue
+            try:
+                caminho = _gravar(tabela, pasta)
+                break
+            except OSError as e:
+                print(f"⚠️ Tabela compartilhada não coube em {pasta} ({e})")
+        if caminho is None:
+            raise OSError("Sem espaço para a tabela compartilhada")
+        ref = Referencia(caminho=caminho, tamanho=os.path.getsize(caminho), linhas=len(df))
+        return registro.adicionar(cls(ref, dono, registro))
+
+    def tocar(self) -> Referencia:
+        self.usada_em = time.monotonic()
+        return self.ref
+
+    def adquirir(self) -> Referencia:
+        """Etapa vai usar a tabela: o arquivo não é apagado até soltar()."""
+        with self._registro._lock:
+            if self.liberada:
+                raise FileNotFoundError(f"Tabela compartilhada já liberada: {self.ref.caminho}")
+            self._usos += 1
+        return self.tocar()
+
+    def soltar(self):
+        with self._registro._lock:
+            self._usos -= 1
+            apagar = self._liberar_pendente and self._usos == 0
+        if apagar:
+            self._registro.remover(self)
+
+    def liberar(self):
+        """Apaga a tabela; com etapas em andamento, quando a última soltar."""
+        with self._registro._lock:
+            if self._usos > 0:
+                self._liberar_pendente = True
+                return
+        self._registro.remover(self)
+
+
+class RegistroTabelas:
+    """Tabelas vivas deste processo (dono, tamanho, último uso) + detecção de vazamentos."""
+
+    def __init__(self, pasta: str = COMPARTILHADA_DIR, pasta_reserva: str = COMPARTILHADA_DIR_RESERVA,
+                 ociosa_s: float = COMPARTILHADA_OCIOSA_S):
+        self.pasta = pasta
+        self.pasta_reserva = pasta_reserva
+        self.ociosa_s = ociosa_s
+        self._vivas: dict[str, TabelaCompartilhada] = {}
+        self._lock = threading.Lock()
+        self.criadas = 0
+        self.liberadas = 0
+        self.expiradas = 0
+        self.orfas_removidas = 0
+
+    def adicionar(self, tabela: TabelaCompartilhada) -> TabelaCompartilhada:
+        self.varrer()
+        with self._lock:
+            self._vivas[tabela.ref.caminho] = tabela
+            self.criadas += 1
+        return tabela
+
+    def remover(self, tabela: TabelaCompartilhada, expirada: bool = False):
+        with self._lock:
+            if self._vivas.pop(tabela.ref.caminho, None) is None:
+                return
+            tabela.liberada = True
+            self.liberadas += 1
+            self.expiradas += expirada
+        try:
+            os.remove(tabela.ref.caminho)
+        except FileNotFoundError:
+            pass
+
+    def varrer(self) -> int:
+        """Apaga as tabelas sem uso há mais de `ociosa_s` (dono esqueceu de liberar)."""
+        agora = time.monotonic()
+        with self._lock:
+            esquecidas = [t for t in self._vivas.values()
+                          if agora - t.usada_em > self.ociosa_s and t._usos == 0]
+        for t in esquecidas:
+            print(f"⚠️ Tabela compartilhada esquecida ({t.dono or 'sem dono'}, "
+                  f"{t.ref.tamanho / 1024 / 1024:.1f} MB, {agora - t.criada_em:.0f}s): liberando")
+            self.remover(t, expirada=True)
+        return len(esquecidas)
+
+    def limpar_orfas(self) -> int:
+        """Apaga tabelas de processos que não existem mais (worker morto sem liberar)."""
+        removidas = 0
+        for pasta in (self.pasta, self.pasta_reserva):
+            if not pasta or not os.path.isdir(pasta):
+                continue
+            for nome in os.listdir(pasta):
+                pid = nome.split("_", 1)[0]
+                if not pid.isdigit() or int(pid) == os.getpid():
+                    continue
+                try:
+                    os.kill(int(pid), 0)
+                    continue  # processo vivo
+                except ProcessLookupError:
+                    pass
+                except PermissionError:
+                    continue
+                try:
+                    os.remove(os.path.join(pasta, nome))
+                    removidas += 1
+                except OSError:
+                    pass
+        if removidas:
+            print(f"🧹 {removidas} tabela(s) compartilhada(s) órfã(s) removida(s)")
+        with self._lock:
+            self.orfas_removidas += removidas
+        return removidas
+
+    def liberar_todas(self):
+        with self._lock:
+            vivas = list(self._vivas.values())
+        for t in vivas:
+            self.remover(t)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            return {
+                "vivas": len(self._vivas),
+                "bytes": sum(t.ref.tamanho for t in self._vivas.values()),
+                "criadas": self.criadas,
+                "liberadas": self.liberadas,
+                "expiradas": self.expiradas,
+                "orfas_removidas": self.orfas_removidas,
+            }
+
+
+tabelas = RegistroTabelas()
+atexit.register(tabelas.liberar_todas)
@@ -0,0 +1,292 @@
+"""
+UPLOAD EM STREAMING (Xplors) - planilha lida enquanto o corpo ainda chega
+
+O /upload esperava o corpo multipart inteiro (request.files), depois lia a
+planilha e só então seguia para classificação, KPIs e modelo. Aqui o corpo
+é consumido em blocos direto de request.stream:
+
+- campos do formulário (user_id, tipo) ficam disponíveis assim que chegam
+- o arquivo é gravado num SpooledTemporaryFile e o sha256 é calculado
+  bloco a bloco (sem segunda leitura para o snapshot)
+- CSV: um leitor em thread consome os blocos à medida que chegam
+  (pyarrow.csv.open_csv, ou engine C do pandas em lotes para vírgula
+  decimal); ao juntar UPLOAD_LINHAS_ESPECULACAO linhas, dispara
+  `ao_amostrar(df_parcial, campos)` - pré-análise especulativa (ex.: tipo
+  da planilha) rodando em paralelo com o restante da transferência
+- .xlsx/.xls: o diretório do zip fica no fim do arquivo, então não há leitura
+  parcial; só spool + hash (se o hash já tem snapshot, nada é relido)
+
+Se o leitor em streaming falhar (ex.: tipo de coluna muda no meio do
+arquivo), a leitura normal sobre o arquivo em spool assume no fim.
+"""
+
+import hashlib
+import io
+import os
+import queue
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Callable
+
+import pandas as pd
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+from app.classificador_tipo import AMOSTRA_LINHAS
+from app.ingestao import (
+    AMOSTRA_BYTES, _dtypes_da_amostra, detectar_formato, opcoes_csv, pa_csv, sem_bom, usa_pyarrow,
+)
+
+UPLOAD_STREAMING = os.getenv("UPLOAD_STREAMING", "1").strip().lower() not in ("0", "false", "nao", "não", "")
+# linhas lidas antes de disparar a pré-análise (o classificador olha as primeiras AMOSTRA_LINHAS)
+LINHAS_ESPECULACAO = int(os.getenv("UPLOAD_LINHAS_ESPECULACAO", str(AMOSTRA_LINHAS)))
+
+BLOCO_LEITURA = 64 * 1024
+# acima disso o spool sai da memória para o disco
+MAX_SPOOL_MEMORIA = 8 * 1024 * 1024
+# blocos aguardando o leitor CSV (contrapressão sobre a rede)
+MAX_BLOCOS_PENDENTES = 64
+# bloco do pyarrow: menor que o padrão (1 MB) para a 1ª amostra sair cedo
+BLOCO_PYARROW = 64 * 1024
+CAMPO_ARQUIVO = "file"
+
+
+@dataclass
+class UploadRecebido:
+    """
+    campos: campos de texto do formulário (user_id, tipo...)
+    arquivo: conteúdo do arquivo em spool (posição 0); None se não veio arquivo
+    df: planilha já lida durante o recebimento (só CSV); None = ler do spool
+    especulacao: retorno de `ao_amostrar` (None se não rodou ou falhou)
+    linhas_especulacao: linhas que a pré-análise viu
+    """
+    campos: dict = field(default_factory=dict)
+    nome_arquivo: str | None = None
+    arquivo: BinaryIO | None = None
+    arquivo_hash: str | None = None
+    formato: str | None = None
+    bytes_recebidos: int = 0
+    df: pd.DataFrame | None = None
+    especulacao: Any = None
+    linhas_especulacao: int = 0
+
+    def fechar(self):
+        if self.arquivo is not None:
+            self.arquivo.close()
+
+
+# =========================
+# CANAL (rede -> leitor CSV)
+# =========================
+class _CanalBytes(io.RawIOBase):
+    """Arquivo somente-leitura alimentado por outra thread; None na fila = fim."""
+
+    def __init__(self):
+        self._fila: queue.Queue = queue.Queue(maxsize=MAX_BLOCOS_PENDENTES)
+        self._resto = b""
+        self._fim = False
+        self.abandonado = threading.Event()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, destino) -> int:
+        while not self._resto and not self._fim:
+            try:
+                bloco = self._fila.get(timeout=0.1)
+            except queue.Empty:
+                if self.abandonado.is_set():
+                    raise OSError("upload interrompido")
+                continue
+            if bloco is None:
+                self._fim = True
+            else:
+                self._resto = bloco
+        n = min(len(destino), len(self._resto))
+        destino[:n] = self._resto[:n]
+        self._resto = self._resto[n:]
+        return n
+
+    def escrever(self, bloco: bytes | None):
+        # leitor desistiu: não bloquear a rede esperando quem não vai consumir
+        while not self.abandonado.is_set():
+            try:
+                self._fila.put(bloco, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+class _LeitorCSV:
+    """Lê o CSV do canal em lotes, numa thread, e dispara a especulação."""
+
+    def __init__(self, amostra: bytes, ao_amostrar: Callable[[pd.DataFrame, dict], Any] | None, campos: dict):
+        self.encoding, self.sep, self.decimal = opcoes_csv(amostra)
+        self._amostra = amostra
+        self._ao_amostrar = ao_amostrar
+        self._campos = campos
+        self.canal = _CanalBytes()
+        self.df: pd.DataFrame | None = None
+        self.erro: Exception | None = None
+        self.especulacao: Any = None
+        self.linhas_especulacao = 0
+        self._thread = threading.Thread(target=self._rodar, name="upload-csv", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+
+    def _lotes(self):
+        if usa_pyarrow(self.decimal):
+            leitor = pa_csv.open_csv(
+                io.BufferedReader(self.canal, buffer_size=BLOCO_LEITURA),
+                read_options=pa_csv.ReadOptions(encoding=self.encoding.replace("-sig", ""),
+                                                block_size=BLOCO_PYARROW),
+                parse_options=pa_csv.ParseOptions(delimiter=self.sep),
+            )
+            for lote in leitor:
+                yield lote.to_pandas()
+            return
+
+        dtypes = _dtypes_da_amostra(self._amostra, self.sep, self.decimal, self.encoding)
+        with pd.read_csv(io.BufferedReader(self.canal, buffer_size=BLOCO_LEITURA), sep=self.sep,
+                         decimal=self.decimal, encoding=self.encoding, dtype=dtypes, engine="c",
+                         chunksize=LINHAS_ESPECULACAO) as partes:
+            yield from partes
+
+    def _especular(self, lotes: list[pd.DataFrame]):
+        parcial = sem_bom(pd.concat(lotes, ignore_index=True))
+        self.linhas_especulacao = len(parcial)
+        try:
+            self.especulacao = self._ao_amostrar(parcial, dict(self._campos))
+        except Exception as e:
+            print(f"⚠️ Pré-análise especulativa falhou ({e}); segue sem ela")
+
+    def _rodar(self):
+        lotes: list[pd.DataFrame] = []
+        linhas = 0
+        try:
+            for lote in self._lotes():
+                lotes.append(lote)
+                linhas += len(lote)
+                if self._ao_amostrar and not self.linhas_especulacao and linhas >= LINHAS_ESPECULACAO:
+                    self._especular(lotes)
+            if self._ao_amostrar and not self.linhas_especulacao and lotes:
+                self._especular(lotes)  # arquivo menor que a amostra
+            self.df = sem_bom(pd.concat(lotes, ignore_index=True)) if lotes else pd.DataFrame()
+        except Exception as e:
+            self.erro = e
+            self.canal.abandonado.set()
+
+    def terminar(self) -> pd.DataFrame | None:
+        self.canal.escrever(None)
+        self._thread.join()
+        if self.erro is not None:
+            print(f"⚠️ Leitura em streaming do CSV falhou ({self.erro}); relendo do arquivo recebido")
+            return None
+        return self.df
+
+
+# =========================
+# MULTIPART
+# =========================
+def _charset(headers) -> str:
+    for parametro in str(headers.get("content-type", "")).split(";")[1:]:
+        chave, _, valor = parametro.strip().partition("=")
+        if chave.lower() == "charset" and valor:
+            return valor.strip('"')
+    return "utf-8"
+
+
+def receber_upload(stream: BinaryIO, boundary: str | bytes,
+                   ao_amostrar: Callable[[pd.DataFrame, dict], Any] | None = None,
+                   campo_arquivo: str = CAMPO_ARQUIVO,
+                   tamanho_bloco: int = BLOCO_LEITURA,
+                   ler_csv: bool = True) -> UploadRecebido:
+    """
+    Consome o corpo multipart de `stream` (ex.: request.stream) bloco a bloco.
+    `ao_amostrar(df_parcial, campos)` roda, no máximo uma vez, assim que as
+    primeiras LINHAS_ESPECULACAO linhas de um CSV forem lidas - antes do fim
+    do upload; `campos` são os campos de texto recebidos até ali.
+    `ler_csv=False`: só spool + hash, sem ler o CSV durante o recebimento
+    (a leitura ainda não foi admitida: app/admissao.py).
+    """
+    if isinstance(boundary, str):
+        boundary = boundary.encode("latin-1")
+
+    decoder = MultipartDecoder(boundary)
+    recebido = UploadRecebido()
+    h = hashlib.sha256()
+    leitor: _LeitorCSV | None = None
+    inicio = b""
+
+    parte: Field | File | None = None
+    # só a 1ª parte `file` vai para o spool (como request.files[campo_arquivo])
+    parte_arquivo: File | None = None
+    valor = bytearray()
+
+    def _abrir_leitor():
+        nonlocal leitor
+        recebido.formato = detectar_formato(inicio[:8], recebido.nome_arquivo)
+        if recebido.formato == "csv" and ler_csv:
+            leitor = _LeitorCSV(inicio, ao_amostrar, recebido.campos)
+            leitor.iniciar()
+            leitor.canal.escrever(inicio)
+
+    def _bloco_arquivo(dados: bytes):
+        nonlocal inicio
+        if not dados:
+            return
+        h.update(dados)
+        recebido.arquivo.write(dados)
+        recebido.bytes_recebidos += len(dados)
+        if recebido.formato is None:
+            # formato e opções do CSV saem da amostra inicial
+            inicio += dados
+            if len(inicio) >= AMOSTRA_BYTES:
+                _abrir_leitor()
+        elif leitor is not None:
+            leitor.canal.escrever(dados)
+
+    try:
+        while True:
+            dados = stream.read(tamanho_bloco)
+            decoder.receive_data(dados or None)
+
+            evento = decoder.next_event()
+            while not isinstance(evento, (NeedData, Epilogue)):
+                if isinstance(evento, File) and evento.name == campo_arquivo and recebido.arquivo is None:
+                    parte = parte_arquivo = evento
+                    recebido.nome_arquivo = evento.filename
+                    recebido.arquivo = tempfile.SpooledTemporaryFile(max_size=MAX_SPOOL_MEMORIA)
+                elif isinstance(evento, (Field, File)):
+                    parte = evento
+                    valor.clear()
+                elif isinstance(evento, Data) and parte is not None:
+                    if parte is parte_arquivo:
+                        _bloco_arquivo(evento.data)
+                        if not evento.more_data and recebido.formato is None:
+                            _abrir_leitor()  # arquivo menor que a amostra
+                    elif isinstance(parte, Field):
+                        valor.extend(evento.data)
+                        if not evento.more_data:
+                            recebido.campos[parte.name] = valor.decode(_charset(parte.headers), "replace")
+                    if not evento.more_data:
+                        parte = None
+                evento = decoder.next_event()
+
+            if not dados or isinstance(evento, Epilogue):
+                break
+    except BaseException:
+        if leitor is not None:
+            leitor.canal.abandonado.set()
+        recebido.fechar()
+        raise
+
+    if recebido.arquivo is not None:
+        recebido.arquivo_hash = h.hexdigest()
+        recebido.arquivo.seek(0)
+    if leitor is not None:
+        recebido.df = leitor.terminar()
+        recebido.especulacao = leitor.especulacao
+        recebido.linhas_especulacao = leitor.linhas_especulacao
+    return recebido
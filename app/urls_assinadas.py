@@ -0,0 +1,132 @@
+"""
+URLS ASSINADAS (Xplors) - emitidas sob demanda, em lote e com cache
+
+O upload do PDF pedia uma URL assinada logo em seguida (2ª ida ao Storage
+em todo upload) e o histórico devolvia a URL gravada no banco, que podia já
+ter expirado. Aqui a assinatura é separada do upload:
+
+- o upload só grava o caminho do objeto (pdf_path)
+- a URL é emitida quando alguém lista ou baixa o relatório
+- fica em cache até URL_ASSINADA_MARGEM_S segundos antes de expirar
+- listas (histórico) assinam todos os caminhos sem cache numa única chamada
+  (create_signed_urls): 20 relatórios = 1 ida ao Storage, não 20
+
+Se o Storage não assinar (bucket público, erro), cai na URL pública, como
+antes.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+URL_ASSINADA_VALIDADE_S = int(os.getenv("URL_ASSINADA_VALIDADE_S", "3600"))
+# URL em cache não é entregue se faltar menos que isso para expirar
+URL_ASSINADA_MARGEM_S = int(os.getenv("URL_ASSINADA_MARGEM_S", "300"))
+URL_ASSINADA_MAX_ITENS = int(os.getenv("URL_ASSINADA_MAX_ITENS", "4096"))
+
+
+def _url_da_resposta(resposta) -> str | None:
+    if isinstance(resposta, dict):
+        return resposta.get("signedURL") or resposta.get("signedUrl") or resposta.get("signed_url")
+    return None
+
+
+class CacheUrlsAssinadas:
+    """
+    LRU de {caminho: (url, expira_em)} para um bucket.
+    `bucket`: função que devolve o bucket do Storage
+    (ex.: lambda: supabase.storage.from_("relatorios-pdf")).
+    """
+
+    def __init__(self, bucket: Callable, validade_s: int | None = None, margem_s: int | None = None,
+                 max_itens: int | None = None):
+        self._bucket = bucket
+        self.validade_s = URL_ASSINADA_VALIDADE_S if validade_s is None else validade_s
+        self.margem_s = URL_ASSINADA_MARGEM_S if margem_s is None else margem_s
+        self.max_itens = URL_ASSINADA_MAX_ITENS if max_itens is None else max_itens
+        self._itens: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.emitidas = 0
+        self.chamadas = 0
+
+    def _do_cache(self, caminho: str, agora: float) -> str | None:
+        item = self._itens.get(caminho)
+        if item is None:
+            return None
+        url, expira_em = item
+        if expira_em - agora <= self.margem_s:
+            del self._itens[caminho]
+            return None
+        self._itens.move_to_end(caminho)
+        return url
+
+    def _guardar(self, caminho: str, url: str, expira_em: float):
+        self._itens[caminho] = (url, expira_em)
+        self._itens.move_to_end(caminho)
+        while len(self._itens) > self.max_itens:
+            self._itens.popitem(last=False)
+
+    def _assinar(self, caminhos: list[str]) -> dict[str, str]:
+        bucket = self._bucket()
+        if len(caminhos) == 1 or not hasattr(bucket, "create_signed_urls"):
+            self.chamadas += len(caminhos)
+            return {c: _url_da_resposta(bucket.create_signed_url(c, self.validade_s)) for c in caminhos}
+
+        self.chamadas += 1
+        assinadas = {}
+        for item in bucket.create_signed_urls(caminhos, self.validade_s) or []:
+            if isinstance(item, dict) and item.get("path") and not item.get("error"):
+                assinadas[item["path"]] = _url_da_resposta(item)
+        return assinadas
+
+    def urls(self, caminhos: Iterable[str]) -> dict[str, str]:
+        """{caminho: url} para vários objetos; os que faltam no cache são assinados numa chamada só."""
+        caminhos = [c for c in dict.fromkeys(caminhos) if c]
+        agora = time.time()
+        with self._lock:
+            resultado = {c: u for c in caminhos if (u := self._do_cache(c, agora))}
+        faltando = [c for c in caminhos if c not in resultado]
+        if not faltando:
+            return resultado
+
+        try:
+            assinadas = self._assinar(faltando)
+        except Exception as e:
+            print(f"⚠️ Não foi possível assinar {len(faltando)} URL(s): {e}")
+            assinadas = {}
+
+        expira_em = agora + self.validade_s
+        with self._lock:
+            for caminho in faltando:
+                url = assinadas.get(caminho)
+                if url:
+                    self.emitidas += 1
+                    self._guardar(caminho, url, expira_em)
+                    resultado[caminho] = url
+
+        for caminho in faltando:
+            if caminho not in resultado:
+                # fallback (não ideal): URL pública
+                resultado[caminho] = self._bucket().get_public_url(caminho)
+        return resultado
+
+    def url(self, caminho: str) -> str | None:
+        return self.urls([caminho]).get(caminho)
+
+    def invalidar(self, caminho: str):
+        with self._lock:
+            self._itens.pop(caminho, None)
+
+
+def anexar_urls(registros: list[dict], cache: CacheUrlsAssinadas,
+                caminho: Callable[[dict], str | None], campo: str = "pdf_url") -> list[dict]:
+    """Preenche `campo` de cada registro com uma URL válida (um lote para a lista toda)."""
+    caminhos = {id(r): caminho(r) for r in registros}
+    urls = cache.urls(c for c in caminhos.values() if c)
+    for r in registros:
+        url = urls.get(caminhos[id(r)])
+        if url:
+            r[campo] = url
+    return registros
@@ -0,0 +1 @@
+# Benchmarks reprodutíveis do pipeline de relatórios Xplors
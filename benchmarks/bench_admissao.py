@@ -0,0 +1,180 @@
+"""
+BENCHMARK: admissão por memória - estimativa x pico real, e carga de planilhas grandes
+
+Cada medição é um processo Python novo (RSS limpo), com ARMAZENAMENTO=local
+em pasta temporária e o FakeOpenAI no lugar do modelo; as planilhas são
+geradas no processo pai (o to_excel não entra no pico):
+- calibracao: lê uma planilha sintética (.xlsx e CSV) pelo processar_planilha
+  e compara o pico de RSS da leitura com a estimativa de app/admissao.py
+  (dimensões sem ler as células)
+- carga: --concorrentes uploads .xlsx diferentes ao mesmo tempo pelo /upload,
+  sem admissão (ADMISSAO=0) e com teto = RSS após o import + --orcamento-mb;
+  reporta pico de RSS acima do ocioso, status e modo (completo/amostra) de cada um
+
+Uso:
+  python -m benchmarks.bench_admissao --escala 40 --concorrentes 3 --orcamento-mb 400 --saida bench/admissao.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _xlsx(df) -> bytes:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def _pico_mb() -> float:
+    """VmHWM do processo (o ru_maxrss de um filho herda o pico do pai no fork)."""
+    try:
+        with open("/proc/self/status") as f:
+            for linha in f:
+                if linha.startswith("VmHWM:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _zerar_pico() -> float:
+    """Pico de RSS volta ao RSS atual (Linux: clear_refs 5); devolve a base da medição."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    return _pico_mb()
+
+
+def _gerar_arquivos(pasta: str, escala: float, concorrentes: int):
+    """No processo pai: gerar a planilha (to_excel) não entra no pico de RSS do filho."""
+    from benchmarks.planilhas_sinteticas import gerar
+
+    df = gerar("merchandising", escala)
+    with open(os.path.join(pasta, "calibracao.xlsx"), "wb") as f:
+        f.write(_xlsx(df))
+    df.to_csv(os.path.join(pasta, "calibracao.csv"), index=False)
+    for i in range(concorrentes):
+        with open(os.path.join(pasta, f"carga{i}.xlsx"), "wb") as f:
+            f.write(_xlsx(gerar("merchandising", escala, seed=10 + i)))
+
+
+def _ler(caminho: str) -> bytes:
+    with open(caminho, "rb") as f:
+        return f.read()
+
+
+def _calibracao(formato: str, pasta: str) -> dict:
+    from app.admissao import estimar_arquivo
+    from app.excel_processor import processar_planilha
+
+    corpo = _ler(os.path.join(pasta, f"calibracao.{formato}"))
+    est = estimar_arquivo(io.BytesIO(corpo), f"p.{formato}")
+    base = _zerar_pico()
+    with contextlib.redirect_stdout(io.StringIO()):
+        processar_planilha(io.BytesIO(corpo), nome_arquivo=f"p.{formato}", usar_snapshot=False)
+    return {"formato": formato, "arquivo_mb": round(len(corpo) / 1024 / 1024, 2), "linhas": est.linhas,
+            "colunas": est.colunas, "estimativa_mb": round(est.mb, 1), "pico_real_mb": round(_pico_mb() - base, 1)}
+
+
+def _carga(modo: str, pasta: str, concorrentes: int, orcamento_mb: float, latencia_ia_s: float) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from app.admissao import ControleAdmissao
+        from benchmarks.fakes import FakeOpenAI
+
+    main.client = FakeOpenAI(latencia_s=latencia_ia_s)
+    corpos = [_ler(os.path.join(pasta, f"carga{i}.xlsx")) for i in range(concorrentes)]
+    base = _zerar_pico()
+    main.controle_admissao = ControleAdmissao(teto_mb=base + orcamento_mb if modo == "com_admissao" else 0.0)
+
+    def _uma(i):
+        t0 = time.perf_counter()
+        r = main.app.test_client().post(
+            "/upload", data={"user_id": f"bench-{i}", "file": (io.BytesIO(corpos[i]), f"p{i}.xlsx")},
+            content_type="multipart/form-data")
+        return r.status_code, (r.get_json() or {}).get("modo"), time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(concorrentes) as pool:
+        respostas = list(pool.map(_uma, range(concorrentes)))
+    return {"modo": modo, "total_s": round(time.perf_counter() - t0, 3),
+            "pico_acima_ocioso_mb": round(_pico_mb() - base, 1),
+            "teto_acima_ocioso_mb": orcamento_mb if modo == "com_admissao" else None,
+            "status": [s for s, _, _ in respostas], "modos": [m for _, m, _ in respostas],
+            "latencias_s": [round(t, 2) for _, _, t in respostas],
+            "admissao": main.controle_admissao.estatisticas()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Admissão por memória: estimativa x pico real e carga de planilhas grandes")
+    ap.add_argument("--escala", type=float, default=40.0)
+    ap.add_argument("--concorrentes", type=int, default=3)
+    ap.add_argument("--orcamento-mb", type=float, default=400.0)
+    ap.add_argument("--latencia-ia-ms", type=float, default=200.0)
+    ap.add_argument("--filho", nargs="+", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    if args.filho:
+        etapa, modo, pasta = args.filho
+        if etapa == "calibracao":
+            r = _calibracao(modo, pasta)
+        else:
+            r = _carga(modo, pasta, args.concorrentes, args.orcamento_mb, args.latencia_ia_ms / 1000)
+        print(json.dumps(r))
+        return None
+
+    from benchmarks.medicao import salvar_relatorio
+
+    arquivos = tempfile.mkdtemp(prefix="xplors_admissao_planilhas_")
+    _gerar_arquivos(arquivos, args.escala, args.concorrentes)
+
+    def _rodar(etapa: str, modo: str) -> dict:
+        pasta = tempfile.mkdtemp(prefix="xplors_admissao_")
+        try:
+            env = dict(os.environ, ARMAZENAMENTO="local", ARMAZENAMENTO_DIR=pasta, OPENAI_API_KEY="bench",
+                       COMPUTACAO_PROCESSOS="0", SNAPSHOT_DIR=os.path.join(pasta, "snapshots"),
+                       ESTADO_INCREMENTAL_DIR=os.path.join(pasta, "incremental"))
+            saida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_admissao", "--filho", etapa, modo, arquivos,
+                 "--escala", str(args.escala), "--concorrentes", str(args.concorrentes),
+                 "--orcamento-mb", str(args.orcamento_mb), "--latencia-ia-ms", str(args.latencia_ia_ms)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            return json.loads(saida.stdout.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    resultados = []
+    try:
+        for formato in ("xlsx", "csv"):
+            r = _rodar("calibracao", formato)
+            resultados.append({"etapa": "calibracao", **r})
+            print(f"📏 {formato:<4} {r['linhas']}x{r['colunas']} ({r['arquivo_mb']:.1f} MB) | "
+                  f"estimativa {r['estimativa_mb']:6.0f} MB | pico real {r['pico_real_mb']:6.0f} MB")
+
+        for modo in ("sem_admissao", "com_admissao"):
+            r = _rodar("carga", modo)
+            resultados.append({"etapa": "carga", **r})
+            print(f"⏱️ {modo:<12} pico +{r['pico_acima_ocioso_mb']:.0f} MB (teto +{r['teto_acima_ocioso_mb'] or '-'}) | "
+                  f"{r['total_s']:.1f}s | status {r['status']} | modos {r['modos']}")
+    finally:
+        shutil.rmtree(arquivos, ignore_errors=True)
+
+    return salvar_relatorio("admissao", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
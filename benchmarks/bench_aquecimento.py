@@ -0,0 +1,114 @@
+"""
+BENCHMARK: primeira requisição de um worker - frio x aquecido
+
+Cada medição é um processo Python novo (como um worker recém-criado pelo
+gunicorn), com ARMAZENAMENTO=local em pasta temporária e o FakeOpenAI
+(latência --latencia-ia-ms):
+- frio: importa main.py e atende o 1º e o 2º /upload (CSV sintético)
+- aquecido: importa main.py, roda app/aquecimento.aquecer() (o que o
+  post_worker_init do gunicorn.conf.py faz antes de aceitar conexões) e
+  atende os mesmos uploads
+
+Reporta a mediana de --repeticoes processos: import, aquecimento, 1ª e 2ª
+requisição. --sem-cache-fontes: MPLCONFIGDIR vazio em cada processo (contêiner
+novo sem o cache de fontes que o Dockerfile agora constrói no build).
+
+Uso:
+  python -m benchmarks.bench_aquecimento --repeticoes 3 --saida bench/aquecimento.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.medicao import salvar_relatorio
+
+
+def _filho(modo: str, latencia_ia_s: float, escala: float) -> dict:
+    """Um worker novo: mede import, aquecimento (se houver) e as duas primeiras requisições."""
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+        from benchmarks.fakes import FakeOpenAI
+        from benchmarks.planilhas_sinteticas import gerar
+    import_s = time.perf_counter() - t0
+
+    aquecimento_s = 0.0
+    if modo == "aquecido":
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            main.aquecer(main.client, main.supabase)
+        aquecimento_s = time.perf_counter() - t0
+
+    main.client = FakeOpenAI(latencia_s=latencia_ia_s)
+    corpos = [gerar("merchandising", escala, seed=s).to_csv(index=False).encode("utf-8") for s in (1, 2)]
+    cliente = main.app.test_client()
+    requisicoes = []
+    for i, corpo in enumerate(corpos):
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            r = cliente.post("/upload", data={"user_id": "usuario-bench", "file": (io.BytesIO(corpo), f"p{i}.csv")},
+                             content_type="multipart/form-data")
+        requisicoes.append(time.perf_counter() - t0)
+        assert r.status_code == 200, r.json
+
+    return {"import_s": import_s, "aquecimento_s": aquecimento_s,
+            "primeira_s": requisicoes[0], "segunda_s": requisicoes[1]}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Primeira requisição de um worker: frio x aquecido")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--escala", type=float, default=0.5)
+    ap.add_argument("--latencia-ia-ms", type=float, default=200.0)
+    ap.add_argument("--sem-cache-fontes", action="store_true", help="MPLCONFIGDIR vazio em cada processo")
+    ap.add_argument("--filho", choices=("frio", "aquecido"), default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    if args.filho:
+        print(json.dumps(_filho(args.filho, args.latencia_ia_ms / 1000, args.escala)))
+        return None
+
+    resultados = []
+    for modo in ("frio", "aquecido"):
+        medidas = []
+        for _ in range(args.repeticoes):
+            pasta = tempfile.mkdtemp(prefix="xplors_aquecimento_")
+            try:
+                env = dict(os.environ, ARMAZENAMENTO="local", ARMAZENAMENTO_DIR=pasta, OPENAI_API_KEY="bench",
+                           # sem rede: a etapa openai do aquecimento falha rápido e só é registrada
+                           OPENAI_BASE_URL="http://127.0.0.1:9/v1", CHART_CACHE_DIR="",
+                           SNAPSHOT_DIR=os.path.join(pasta, "snapshots"),
+                           ESTADO_INCREMENTAL_DIR=os.path.join(pasta, "incremental"))
+                if args.sem_cache_fontes:
+                    env["MPLCONFIGDIR"] = os.path.join(pasta, "matplotlib")
+                saida = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_aquecimento", "--filho", modo,
+                     "--escala", str(args.escala), "--latencia-ia-ms", str(args.latencia_ia_ms)],
+                    env=env, capture_output=True, text=True, check=True,
+                )
+                medidas.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+            finally:
+                shutil.rmtree(pasta, ignore_errors=True)
+
+        r = {"modo": modo, "repeticoes": args.repeticoes}
+        for chave in ("import_s", "aquecimento_s", "primeira_s", "segunda_s"):
+            r[chave] = round(statistics.median(m[chave] for m in medidas), 4)
+        resultados.append(r)
+        print(f"⏱️ {modo:<9} import {r['import_s'] * 1000:6.0f}ms | aquecimento {r['aquecimento_s'] * 1000:6.0f}ms | "
+              f"1ª req {r['primeira_s'] * 1000:6.0f}ms | 2ª req {r['segunda_s'] * 1000:6.0f}ms")
+
+    return salvar_relatorio("aquecimento", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+BENCHMARK: vazão do /upload inteiro, offline (ARMAZENAMENTO=local)
+
+Sobe o app de main.py com o armazenamento local (SQLite + disco em uma pasta
+temporária, app/armazenamento.py) e o FakeOpenAI (latência --latencia-ia-ms),
+e dispara --requisicoes uploads de CSV sintético pelo test client do Flask
+com 1..N threads (--concorrencias). Cada requisição passa pelo caminho real:
+streaming do multipart, cota, classificação, KPIs, PDF, Storage e insert.
+
+Reporta vazão (req/s), latência p50/p95 e erros por nível de concorrência.
+
+Uso:
+  python -m benchmarks.bench_carga_local --requisicoes 24 --concorrencias 1,2,4 --saida bench/carga_local.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeOpenAI
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _carregar_app(pasta: str, latencia_ia_s: float):
+    os.environ["ARMAZENAMENTO"] = "local"
+    os.environ["ARMAZENAMENTO_DIR"] = pasta
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    main.client = FakeOpenAI(latencia_s=latencia_ia_s)
+    return main
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def _rodada(main, corpos: list[bytes], requisicoes: int, concorrencia: int) -> dict:
+    def _uma(i: int):
+        cliente = main.app.test_client()
+        t0 = time.perf_counter()
+        r = cliente.post(
+            "/upload",
+            data={"user_id": f"usuario-{i % 8}", "file": (io.BytesIO(corpos[i % len(corpos)]), f"planilha_{i}.csv")},
+            content_type="multipart/form-data",
+        )
+        return time.perf_counter() - t0, r.status_code
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(concorrencia) as pool:
+        respostas = list(pool.map(_uma, range(requisicoes)))
+    total = time.perf_counter() - t0
+
+    latencias = [t for t, status in respostas if status == 200]
+    return {
+        "concorrencia": concorrencia,
+        "requisicoes": len(respostas),
+        "erros": sum(1 for _, status in respostas if status != 200),
+        "vazao_rps": round(len(latencias) / total, 3) if total else 0.0,
+        "p50_ms": round(statistics.median(latencias) * 1000, 1) if latencias else None,
+        "p95_ms": round(_percentil(latencias, 0.95) * 1000, 1) if latencias else None,
+        "total_s": round(total, 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Vazão do /upload com armazenamento local")
+    ap.add_argument("--requisicoes", type=int, default=24)
+    ap.add_argument("--concorrencias", default="1,2,4")
+    ap.add_argument("--tipos", default="preco,merchandising,concorrencia")
+    ap.add_argument("--escala", type=float, default=0.5)
+    ap.add_argument("--latencia-ia-ms", type=float, default=200.0, help="tempo de resposta simulado do modelo")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix="xplors_carga_")
+    try:
+        app_main = _carregar_app(pasta, args.latencia_ia_ms / 1000)
+        corpos = [
+            gerar(t.strip(), args.escala, seed=s).to_csv(index=False).encode("utf-8")
+            for t in args.tipos.split(",") if t.strip()
+            for s in (1, 2)
+        ]
+
+        resultados = []
+        for c in [int(x) for x in args.concorrencias.split(",") if x.strip()]:
+            r = _rodada(app_main, corpos, args.requisicoes, c)
+            resultados.append(r)
+            print(f"⏱️ {c:>2} threads | {r['vazao_rps']:6.2f} req/s | p50 {r['p50_ms']}ms | "
+                  f"p95 {r['p95_ms']}ms | erros {r['erros']}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("carga_local", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
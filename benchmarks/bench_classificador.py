@@ -0,0 +1,99 @@
+"""
+BENCHMARK: tipo por faixa de linhas (antigo) x assinatura do schema
+
+Para cada tipo gera planilhas sintéticas em várias escalas (o volume do
+cliente muda; o formato não) e mede:
+- acerto da regra antiga (faixas 50-80 / 1100-1600 / 1800-2500)
+- acerto e confiança do classificador por assinatura (sem histórico)
+- acerto depois de confirmar um upload do cliente (índice local)
+- latência da classificação (antes de qualquer chamada ao modelo)
+
+Uso:
+  python -m benchmarks.bench_classificador --escalas 0.1,0.5,1,3,10 --saida bench/classificador.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from app import classificador_tipo
+from app.excel_processor import _detectar_dimensoes
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar
+
+
+def _tipo_por_volume(df: pd.DataFrame) -> str:
+    """Regra anterior a este classificador (só o número de linhas)."""
+    n = len(df)
+    if 50 <= n <= 80:
+        return "concorrencia"
+    if 1100 <= n <= 1600:
+        return "merchandising"
+    if 1800 <= n <= 2500:
+        return "preco"
+    return "merchandising"
+
+
+def _medir(tipo: str, escala: float, repeticoes: int, indice) -> dict:
+    df = gerar(tipo, escala, seed=7)
+    dims = _detectar_dimensoes(df)
+
+    m = cronometrar(lambda: classificador_tipo.classificar_tipo(df, dims, "cliente", indice), repeticoes=repeticoes)
+    r = m["_resultado"]
+    return {
+        "tipo": tipo,
+        "escala": escala,
+        "linhas": len(df),
+        "volume_acertou": _tipo_por_volume(df) == tipo,
+        "assinatura_acertou": r.tipo == tipo,
+        "confianca": r.confianca,
+        "origem": r.origem,
+        "etapas": {"classificar": limpar_resultado(m)},
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tipo por volume x assinatura do schema")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS))
+    ap.add_argument("--escalas", default="0.1,0.5,1,3,10")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    tipos = [t.strip() for t in args.tipos.split(",") if t.strip()]
+    escalas = [float(e) for e in args.escalas.split(",") if e.strip()]
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="xplors_tipos_") as pasta:
+        indice = classificador_tipo.IndiceTipos(os.path.join(pasta, "tipos.json"))
+        for fase in ("sem_historico", "com_historico"):
+            if fase == "com_historico":
+                # um upload confirmado por tipo, no volume nominal
+                for tipo in tipos:
+                    df = gerar(tipo, 1.0)
+                    classificador_tipo.confirmar_tipo(df, _detectar_dimensoes(df), tipo, "cliente", indice)
+
+            for tipo in tipos:
+                for escala in escalas:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        r = _medir(tipo, escala, args.repeticoes, indice)
+                    r["fase"] = fase
+                    resultados.append(r)
+                    print(f"⏱️ {fase:<13} {tipo:<13} {r['linhas']:>6} linhas | volume "
+                          f"{'✅' if r['volume_acertou'] else '❌'} | assinatura "
+                          f"{'✅' if r['assinatura_acertou'] else '❌'} {r['confianca']:.0%} ({r['origem']}) | "
+                          f"{r['etapas']['classificar']['mediana_s'] * 1000:6.1f}ms")
+
+    for fase in ("sem_historico", "com_historico"):
+        da_fase = [r for r in resultados if r["fase"] == fase]
+        print(f"📊 {fase}: volume {sum(r['volume_acertou'] for r in da_fase)}/{len(da_fase)} | "
+              f"assinatura {sum(r['assinatura_acertou'] for r in da_fase)}/{len(da_fase)}")
+
+    return salvar_relatorio("classificador", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+BENCHMARK: carga mista (planilhas + imagens) num worker - etapas CPU na thread x no pool
+
+Simula um worker do gunicorn (--threads threads) atendendo ao mesmo tempo
+uploads de planilha (KPIs, gráficos, PDF: CPU) e de imagem (quase só espera
+pela OpenAI), pelo app de main.py com ARMAZENAMENTO=local e o FakeOpenAI
+(latência --latencia-ia-ms) no lugar do modelo e do ImageAnalyzer:
+- thread: COMPUTACAO_PROCESSOS=0 (como antes: tudo disputa o GIL)
+- pool: insumos e PDF no PoolComputacao (app/computacao.py), DataFrame via tabela compartilhada
+
+Cada planilha é diferente (sem sessão, snapshot ou incremental reaproveitados).
+Reporta vazão e latência p50/p95 por tipo de requisição.
+
+Uso:
+  python -m benchmarks.bench_computacao --planilhas 12 --imagens 24 --processos 2 --saida bench/computacao.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeOpenAI
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _carregar_app(pasta: str):
+    os.environ["ARMAZENAMENTO"] = "local"
+    os.environ["ARMAZENAMENTO_DIR"] = os.path.join(pasta, "armazenamento")
+    os.environ["SNAPSHOT_DIR"] = os.path.join(pasta, "snapshots")
+    os.environ["ESTADO_INCREMENTAL_DIR"] = os.path.join(pasta, "incremental")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    return main
+
+
+def _imagem_png(largura: int = 1280, altura: int = 960) -> bytes:
+    from PIL import Image
+    # gradiente (comprime como foto); ruído puro faria o preparar_imagem dominar a CPU
+    img = Image.linear_gradient("L").resize((largura, altura)).convert("RGB")
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p * (len(ordenados) - 1))))]
+
+
+def _resumo(latencias: list[float]) -> dict:
+    if not latencias:
+        return {"n": 0}
+    return {"n": len(latencias), "p50_ms": round(statistics.median(latencias) * 1000, 1),
+            "p95_ms": round(_percentil(latencias, 0.95) * 1000, 1)}
+
+
+def _rodada(main, tarefas: list[tuple], threads: int, prefixo: str) -> dict:
+    def _uma(tarefa):
+        tipo, i, corpo = tarefa
+        cliente = main.app.test_client()
+        if tipo == "planilha":
+            rota, data = "/upload", {"user_id": f"{prefixo}-planilha-{i}", "file": (io.BytesIO(corpo), f"p{i}.csv")}
+        else:
+            rota, data = "/upload-imagem", {"user_id": f"{prefixo}-imagem-{i}", "file": (io.BytesIO(corpo), f"i{i}.png")}
+        t0 = time.perf_counter()
+        r = cliente.post(rota, data=data, content_type="multipart/form-data")
+        return tipo, time.perf_counter() - t0, r.status_code
+
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(threads) as pool:
+        respostas = list(pool.map(_uma, tarefas))
+    total = time.perf_counter() - t0
+
+    return {
+        "total_s": round(total, 3),
+        "vazao_rps": round(sum(1 for _, _, s in respostas if s == 200) / total, 3),
+        "erros": sum(1 for _, _, s in respostas if s != 200),
+        "planilha": _resumo([t for tipo, t, s in respostas if tipo == "planilha" and s == 200]),
+        "imagem": _resumo([t for tipo, t, s in respostas if tipo == "imagem" and s == 200]),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Carga mista: etapas CPU na thread x no pool de processos")
+    ap.add_argument("--planilhas", type=int, default=12)
+    ap.add_argument("--imagens", type=int, default=24)
+    ap.add_argument("--escala", type=float, default=2.0)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--processos", type=int, default=2)
+    ap.add_argument("--latencia-ia-ms", type=float, default=300.0)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    import app.computacao as computacao
+
+    pasta = tempfile.mkdtemp(prefix="xplors_computacao_")
+    try:
+        app_main = _carregar_app(pasta)
+        planilhas = [gerar(("merchandising", "preco", "concorrencia")[i % 3], args.escala, seed=100 + i)
+                     .to_csv(index=False).encode("utf-8") for i in range(args.planilhas)]
+        imagem = _imagem_png()
+        tarefas = [("planilha", i, c) for i, c in enumerate(planilhas)] + [("imagem", i, imagem) for i in range(args.imagens)]
+        random.Random(7).shuffle(tarefas)
+
+        resultados = []
+        for modo, processos in (("thread", 0), ("pool", args.processos)):
+            app_main.client = FakeOpenAI(latencia_s=args.latencia_ia_ms / 1000)
+            app_main.image_analyzer.client = FakeOpenAI(latencia_s=args.latencia_ia_ms / 1000, tokens_saida=600)
+            computacao.computacao = computacao.PoolComputacao(processos=processos)
+            computacao.computacao.aquecer()
+            # cada modo com planilhas "novas": outros usuários (sessão/incremental) e sem snapshots
+            shutil.rmtree(os.environ["SNAPSHOT_DIR"], ignore_errors=True)
+            try:
+                r = _rodada(app_main, tarefas, args.threads, prefixo=modo)
+                r["pool"] = computacao.computacao.estatisticas()
+            finally:
+                computacao.computacao.encerrar()
+            r["modo"] = modo
+            resultados.append(r)
+            print(f"⏱️ {modo:<6} {r['vazao_rps']:5.2f} req/s | planilha p50 {r['planilha'].get('p50_ms')}ms "
+                  f"p95 {r['planilha'].get('p95_ms')}ms | imagem p50 {r['imagem'].get('p50_ms')}ms "
+                  f"p95 {r['imagem'].get('p95_ms')}ms | erros {r['erros']}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("computacao", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
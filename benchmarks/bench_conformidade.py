@@ -0,0 +1,118 @@
+"""
+BENCHMARK: conformidade SIM/NÃO - motor vetorizado x implementação antiga
+
+Mede, numa planilha de merchandising sintética (padrão 1M linhas x 50 itens):
+- referencia: o código anterior a app/conformidade.py (astype(str).lower().strip()
+  por coluna na detecção, de novo por item e no score por linha; df.copy()
+  por dimensão)
+- vetorizado: MatrizConformidade (detecta + codifica uma vez em int8,
+  scores por matriz + bincount)
+
+Cada modo calcula o mesmo conjunto: colunas SIM/NÃO, score por item (até 30),
+score por linha e média por Loja / Região / Promotor.
+
+Uso:
+  python -m benchmarks.bench_conformidade --linhas 1000000 --itens 50 --saida bench/conformidade.json
+"""
+
+import argparse
+
+import pandas as pd
+
+from app.conformidade import MatrizConformidade
+from benchmarks.medicao import cronometrar, limpar_resultado, pico_memoria, salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar_merchandising
+
+_DIMENSOES = ["Loja", "Região", "Promotor"]
+
+
+def _referencia(df: pd.DataFrame) -> dict:
+    yn_cols = []
+    for c in df.columns:
+        s = df[c].astype(str).str.lower().str.strip()
+        if s.isin(["sim", "não", "nao", "yes", "no", "ok", "nok"]).mean() > 0.6:
+            yn_cols.append(c)
+
+    itens = []
+    for c in yn_cols[:30]:
+        s = df[c].astype(str).str.lower().str.strip()
+        itens.append((c, s.isin(["sim", "yes", "ok"]).mean() * 100.0))
+
+    mat = [df[c].astype(str).str.lower().str.strip().isin({"sim", "yes", "ok"}).astype(float) for c in yn_cols]
+    row_score = pd.concat(mat, axis=1).mean(axis=1) * 100.0
+
+    por_dim = {}
+    for col in _DIMENSOES:
+        tmp = df.copy()
+        tmp["_score"] = row_score
+        por_dim[col] = tmp.groupby(col, dropna=True)["_score"].mean().dropna()
+    return {"colunas": yn_cols, "itens": itens, "linhas": row_score.to_numpy(), "por_dim": por_dim}
+
+
+def _vetorizado(df: pd.DataFrame) -> dict:
+    matriz = MatrizConformidade.codificar(df)
+    return {
+        "colunas": list(matriz.colunas),
+        "itens": matriz.score_itens(limite=30),
+        "linhas": matriz.score_linhas(),
+        "por_dim": {col: matriz.score_por_dimensao(df[col]) for col in _DIMENSOES},
+    }
+
+
+def _conferir(a: dict, b: dict) -> bool:
+    if a["colunas"] != b["colunas"]:
+        return False
+    if any(abs(x[1] - y[1]) > 1e-6 for x, y in zip(a["itens"], b["itens"])):
+        return False
+    if abs(a["linhas"] - b["linhas"]).max() > 1e-6:
+        return False
+    return all((a["por_dim"][c] - b["por_dim"][c]).abs().max() < 1e-6 for c in _DIMENSOES)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Conformidade SIM/NÃO: referência x motor vetorizado")
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--itens", type=int, default=50)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--sem-referencia", action="store_true", help="mede só o motor vetorizado")
+    ap.add_argument("--sem-memoria", action="store_true")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    print(f"🧮 Gerando planilha sintética: {args.linhas} linhas x {args.itens} itens...")
+    df = gerar_merchandising(args.linhas, itens=args.itens)
+
+    modos = [("vetorizado", _vetorizado)]
+    if not args.sem_referencia:
+        modos.insert(0, ("referencia", _referencia))
+
+    resultados = []
+    saidas = {}
+    for nome, fn in modos:
+        pico = None
+        if not args.sem_memoria:
+            pico, _ = pico_memoria(lambda: fn(df))
+        m = cronometrar(lambda: fn(df), repeticoes=args.repeticoes)
+        saidas[nome] = m["_resultado"]
+        resultados.append({
+            "modo": nome,
+            "linhas": args.linhas,
+            "itens": args.itens,
+            "tempo": limpar_resultado(m),
+            "pico_mem_mb": round(pico, 1) if pico is not None else None,
+        })
+        pico_txt = f" | pico {pico:8.1f} MB" if pico is not None else ""
+        print(f"⏱️ {nome:<11} {m['mediana_s']:8.3f}s{pico_txt}")
+
+    if len(saidas) == 2:
+        iguais = _conferir(saidas["referencia"], saidas["vetorizado"])
+        print("✅ Resultados idênticos" if iguais else "❌ Resultados divergentes")
+        for r in resultados:
+            r["confere_referencia"] = iguais
+
+    config = {k: v for k, v in vars(args).items() if k != "saida"}
+    return salvar_relatorio("conformidade", config, resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+BENCHMARK: verificar_limite (consulta por request) x cota local
+
+Contra o SupabaseMemoria com latência simulada (--latencia-ms por consulta):
+- latência da admissão: verificar_limite (soma de api_usage a cada request)
+  x CotaLocal.reservar (livro em memória, sincronização em segundo plano)
+- consultas ao banco feitas pela admissão
+- estouro do limite com várias instâncias gastando o mesmo orçamento:
+  quanto o total registrado em api_usage passou do limite
+
+Uso:
+  python -m benchmarks.bench_cota --requisicoes 300 --instancias 3 --saida bench/cota.json
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import statistics
+import time
+
+from app import cota_local
+from app.cost_tracker import CostTracker
+from benchmarks.fakes import SupabaseMemoria
+from benchmarks.medicao import salvar_relatorio
+
+USUARIO = "bench"
+
+
+class _Contador(SupabaseMemoria):
+    """SupabaseMemoria que conta as leituras de api_usage."""
+
+    def __init__(self, latencia_s: float):
+        super().__init__(latencia_s)
+        self.leituras = 0
+
+    def table(self, nome: str):
+        consulta = super().table(nome)
+        select = consulta.select
+
+        def _select(colunas: str = "*"):
+            self.leituras += 1
+            return select(colunas)
+
+        consulta.select = _select
+        return consulta
+
+
+def _custo_chamada(rng: random.Random) -> tuple[int, int]:
+    return rng.randint(2500, 6000), rng.randint(900, 1800)
+
+
+def _simular(modo: str, requisicoes: int, instancias: int, limite: float, latencia_s: float, sync_s: float) -> dict:
+    banco = _Contador(latencia_s)
+    tracker = CostTracker(banco)
+    cotas = [cota_local.CotaLocal(tracker, limite, intervalo_sync=sync_s) for _ in range(instancias)]
+    rng = random.Random(7)
+
+    admissao = []
+    recusadas = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(requisicoes):
+            cota = cotas[i % instancias]
+            t0 = time.perf_counter()
+            if modo == "verificar_limite":
+                reserva, pode = None, tracker.verificar_limite(USUARIO, limite)["pode_usar"]
+            else:
+                reserva, _ = cota.reservar(USUARIO, "analise")
+                pode = reserva is not None
+            admissao.append(time.perf_counter() - t0)
+
+            if not pode:
+                recusadas += 1
+                continue
+            tokens_input, tokens_output = _custo_chamada(rng)
+            custo = tracker.registrar_uso(USUARIO, "analise", tokens_input, tokens_output)
+            if reserva:
+                cota.confirmar(reserva, custo)
+
+    gasto = tracker.gasto_no_mes(USUARIO)
+    return {
+        "modo": modo,
+        "instancias": instancias,
+        "requisicoes": requisicoes,
+        "recusadas": recusadas,
+        "leituras_banco": banco.leituras - 1,  # a leitura final do gasto não conta
+        "admissao_mediana_ms": round(statistics.median(admissao) * 1000, 3),
+        "admissao_p95_ms": round(sorted(admissao)[int(0.95 * (len(admissao) - 1))] * 1000, 3),
+        "gasto_usd": round(gasto, 4),
+        "limite_usd": limite,
+        "estouro_usd": round(max(0.0, gasto - limite), 4),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Admissão por consulta ao banco x cota local")
+    ap.add_argument("--requisicoes", type=int, default=300)
+    ap.add_argument("--instancias", type=int, default=3)
+    ap.add_argument("--limite", type=float, default=6.0, help="limite mensal (USD) do usuário simulado")
+    ap.add_argument("--latencia-ms", type=float, default=20.0, help="ida e volta ao banco")
+    ap.add_argument("--sync-s", type=float, default=0.5, help="intervalo de sincronização da cota")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for modo in ("verificar_limite", "cota_local"):
+        r = _simular(modo, args.requisicoes, args.instancias, args.limite, args.latencia_ms / 1000, args.sync_s)
+        resultados.append(r)
+        print(f"⏱️ {modo:<17} admissão {r['admissao_mediana_ms']:8.3f}ms (p95 {r['admissao_p95_ms']:8.3f}ms) | "
+              f"{r['leituras_banco']:>4} leituras | recusadas {r['recusadas']:>4} | "
+              f"gasto ${r['gasto_usd']:.4f} / ${r['limite_usd']:.2f} (estouro ${r['estouro_usd']:.4f})")
+
+    return salvar_relatorio("cota", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+BENCHMARK: colunas de dimensão como texto x Categorical (codificar_dimensoes)
+
+Para planilhas sintéticas grandes mede:
+- memória das colunas de dimensão (memory_usage deep) antes/depois
+- custo da codificação na ingestão
+- top-10 (value_counts) + média por dimensão (groupby) em texto x nos códigos
+- gerar_insumos_pdf_excel com a planilha já codificada na ingestão
+
+Uso:
+  python -m benchmarks.bench_dimensoes --escalas 100,500 --saida bench/dimensoes.json
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from app.excel_processor import _detectar_dimensoes, _top_contagens, codificar_dimensoes, gerar_insumos_pdf_excel
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar
+
+
+def _mb(df: pd.DataFrame, colunas: list[str]) -> float:
+    return float(df[colunas].memory_usage(deep=True, index=False).sum()) / (1024 * 1024)
+
+
+def _agregacoes(df: pd.DataFrame, colunas: list[str], valores: np.ndarray):
+    serie = pd.Series(valores, index=df.index)
+    for col in colunas:
+        _top_contagens(df[col])
+        serie.groupby(df[col], observed=True).mean()
+
+
+def _medir(tipo: str, escala: float, repeticoes: int, pasta: str) -> dict:
+    df = gerar(tipo, escala)
+    dims = _detectar_dimensoes(df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        m_codificar = cronometrar(lambda: codificar_dimensoes(df, dims), repeticoes=repeticoes)
+    df_cat = m_codificar["_resultado"]
+    colunas = [c for c in dict.fromkeys(c for c in dims.values() if c)
+               if isinstance(df_cat[c].dtype, pd.CategoricalDtype)]
+    valores = np.random.default_rng(0).random(len(df))
+
+    m_texto = cronometrar(lambda: _agregacoes(df, colunas, valores), repeticoes=repeticoes)
+    m_codigos = cronometrar(lambda: _agregacoes(df_cat, colunas, valores), repeticoes=repeticoes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        m_insumos = cronometrar(
+            lambda: gerar_insumos_pdf_excel(df_cat, tipo, out_dir=pasta, backend="vetorial"),
+            repeticoes=repeticoes,
+        )
+
+    return {
+        "tipo": tipo,
+        "escala": escala,
+        "linhas": len(df),
+        "colunas_codificadas": colunas,
+        "memoria_texto_mb": round(_mb(df, colunas), 2),
+        "memoria_categorical_mb": round(_mb(df_cat, colunas), 2),
+        "etapas": {
+            "codificar": limpar_resultado(m_codificar),
+            "agregacoes_texto": limpar_resultado(m_texto),
+            "agregacoes_codigos": limpar_resultado(m_codigos),
+            "insumos_codificado": limpar_resultado(m_insumos),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Dimensões em texto x Categorical: memória e tempo")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS))
+    ap.add_argument("--escalas", default="100,500")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="xplors_dimensoes_") as pasta:
+        for tipo in [t.strip() for t in args.tipos.split(",") if t.strip()]:
+            for escala in [float(e) for e in args.escalas.split(",") if e.strip()]:
+                r = _medir(tipo, escala, args.repeticoes, pasta)
+                resultados.append(r)
+                e = r["etapas"]
+                print(f"⏱️ {tipo:<13} {r['linhas']:>9} linhas | mem {r['memoria_texto_mb']:8.1f} -> "
+                      f"{r['memoria_categorical_mb']:6.1f} MB | codificar {e['codificar']['mediana_s'] * 1000:7.1f}ms | "
+                      f"agregações {e['agregacoes_texto']['mediana_s'] * 1000:7.1f} -> "
+                      f"{e['agregacoes_codigos']['mediana_s'] * 1000:6.1f}ms")
+
+    return salvar_relatorio("dimensoes", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
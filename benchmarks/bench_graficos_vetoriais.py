@@ -0,0 +1,91 @@
+"""
+BENCHMARK: gráficos PNG (matplotlib, dpi 160) x vetoriais (ReportLab graphics)
+
+Para cada tipo de planilha sintética mede:
+- tempo de gerar_insumos_pdf_excel (KPIs + gráficos) em cada backend
+- tempo do build do PDF
+- tamanho final do PDF
+
+O cache de PNG é limpo antes de cada medição do backend "png" (pior caso,
+primeira renderização).
+
+Uso:
+  python -m benchmarks.bench_graficos_vetoriais --saida bench/graficos.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+from app.chart_cache import cache_graficos
+from app.excel_processor import gerar_insumos_pdf_excel
+from app.pdf_generator import gerar_pdf_xplors
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar
+
+_TEXTO = "RESUMO EXECUTIVO:\n\nExecução regular, com lojas críticas concentradas em duas regiões."
+
+
+def _medir(df, tipo: str, backend: str, pasta: str, repeticoes: int) -> dict:
+    os.environ["CHART_BACKEND"] = backend
+    charts_dir = os.path.join(pasta, f"{tipo}_{backend}")
+    pdf_path = os.path.join(pasta, f"{tipo}_{backend}.pdf")
+
+    def _insumos():
+        cache_graficos.limpar()
+        return gerar_insumos_pdf_excel(df, tipo, out_dir=charts_dir, backend=backend)
+
+    m_insumos = cronometrar(_insumos, repeticoes=repeticoes)
+    insumos = m_insumos["_resultado"]
+
+    dados = {"texto": _TEXTO, "total_linhas": len(df)}
+    m_pdf = cronometrar(lambda: gerar_pdf_xplors(pdf_path, tipo, dados, dados_excel=insumos), repeticoes=repeticoes)
+
+    return {
+        "tipo": tipo,
+        "backend": backend,
+        "graficos": len(insumos.get("chart_specs") or []),
+        "pdf_bytes": os.path.getsize(pdf_path),
+        "etapas": {
+            "insumos": limpar_resultado(m_insumos),
+            "pdf": limpar_resultado(m_pdf),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="PNG x vetorial: tempo de renderização e tamanho do PDF")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS))
+    ap.add_argument("--escala", type=float, default=1.0)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    backend_original = os.environ.get("CHART_BACKEND")
+    pasta = tempfile.mkdtemp(prefix="xplors_graficos_")
+    resultados = []
+    try:
+        for tipo in [t.strip() for t in args.tipos.split(",") if t.strip()]:
+            df = gerar(tipo, args.escala)
+            for backend in ("png", "vetorial"):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    r = _medir(df, tipo, backend, pasta, args.repeticoes)
+                r["escala"] = args.escala
+                resultados.append(r)
+                print(f"⏱️ {tipo:<13} {backend:<8} insumos {r['etapas']['insumos']['mediana_s'] * 1000:7.1f}ms | "
+                      f"pdf {r['etapas']['pdf']['mediana_s'] * 1000:7.1f}ms | {r['pdf_bytes'] / 1024:7.1f} KB")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+        if backend_original is None:
+            os.environ.pop("CHART_BACKEND", None)
+        else:
+            os.environ["CHART_BACKEND"] = backend_original
+
+    return salvar_relatorio("graficos_vetoriais", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
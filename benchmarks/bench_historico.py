@@ -0,0 +1,144 @@
+"""
+BENCHMARK: histórico - OFFSET + select('*') x cursor (keyset) + projeção
+
+Tabela `analises` em SQLite (mesmas colunas e índices de supabase-setup.sql,
+sem RLS), com --analises linhas para um usuário pesado e ruído de outros
+usuários. Para páginas cada vez mais fundas mede:
+- offset: ORDER BY created_at DESC LIMIT n OFFSET k, todas as colunas
+  (o que listar_analises precisaria para passar da 1ª página)
+- cursor: created_at <= c AND (created_at < c OR id < i) pelo índice
+  (user_id, created_at, id), só COLUNAS_LISTA - a consulta que
+  app/historico.listar_pagina monta
+
+Reporta tempo por página e bytes por página (JSON) em cada caso.
+
+Uso:
+  python -m benchmarks.bench_historico --analises 50000 --saida bench/historico.json
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+from app.historico import COLUNAS_LISTA, LIMITE_PADRAO
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+
+USUARIO = "usuario-pesado"
+
+_DDL = """
+CREATE TABLE analises (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    tipo_analise TEXT NOT NULL,
+    total_linhas INTEGER NOT NULL,
+    pdf_url TEXT NOT NULL,
+    pdf_filename TEXT NOT NULL,
+    pdf_path TEXT,
+    nome_arquivo_original TEXT,
+    arquivo_hash TEXT,
+    custo_usd REAL,
+    created_at TEXT,
+    updated_at TEXT
+);
+CREATE INDEX idx_analises_user_id ON analises(user_id);
+CREATE INDEX idx_analises_created_at ON analises(created_at DESC);
+CREATE INDEX idx_analises_user_created ON analises(user_id, created_at DESC, id DESC);
+"""
+
+
+def _popular(conn: sqlite3.Connection, analises: int, outros: int):
+    rng = random.Random(3)
+    inicio = datetime(2025, 1, 1)
+    linhas = []
+    for i in range(analises + outros):
+        user_id = USUARIO if i < analises else f"usuario-{rng.randrange(500)}"
+        nome = f"analise_{uuid.UUID(int=rng.getrandbits(128)).hex[:8]}.pdf"
+        criado = (inicio + timedelta(seconds=rng.randrange(365 * 24 * 3600))).isoformat() + "+00:00"
+        linhas.append((
+            str(uuid.UUID(int=rng.getrandbits(128))), user_id, "geral", rng.randrange(50, 5000),
+            f"https://exemplo.supabase.co/storage/v1/object/public/relatorios-pdf/analises/{user_id}/{nome}",
+            nome, f"analises/{user_id}/{nome}", f"planilha_{i}.xlsx", uuid.UUID(int=rng.getrandbits(128)).hex * 2,
+            round(rng.uniform(0.01, 0.05), 4), criado, criado,
+        ))
+    conn.executemany(f"INSERT INTO analises VALUES ({', '.join('?' * 12)})", linhas)
+    conn.execute("ANALYZE")
+
+
+def _pagina_offset(conn, pagina: int, limite: int) -> list[dict]:
+    cur = conn.execute(
+        "SELECT * FROM analises WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+        (USUARIO, limite, pagina * limite),
+    )
+    nomes = [d[0] for d in cur.description]
+    return [dict(zip(nomes, r)) for r in cur.fetchall()]
+
+
+def _pagina_cursor(conn, cursor: tuple | None, limite: int) -> list[dict]:
+    colunas = ", ".join(COLUNAS_LISTA)
+    if cursor:
+        cur = conn.execute(
+            f"SELECT {colunas} FROM analises WHERE user_id = ? AND "
+            "created_at <= ? AND (created_at < ? OR id < ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+            (USUARIO, cursor[0], cursor[0], cursor[1], limite + 1),
+        )
+    else:
+        cur = conn.execute(
+            f"SELECT {colunas} FROM analises WHERE user_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+            (USUARIO, limite + 1),
+        )
+    nomes = [d[0] for d in cur.description]
+    return [dict(zip(nomes, r)) for r in cur.fetchall()]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Histórico: OFFSET x cursor (keyset) com projeção")
+    ap.add_argument("--analises", type=int, default=50_000, help="análises do usuário pesado")
+    ap.add_argument("--outros", type=int, default=50_000, help="análises de outros usuários")
+    ap.add_argument("--paginas", default="0,10,100,1000,2400")
+    ap.add_argument("--repeticoes", type=int, default=5)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(_DDL)
+    _popular(conn, args.analises, args.outros)
+
+    # cursores de cada página (o cliente os recebe em proximo_cursor)
+    alvo = [int(p) for p in args.paginas.split(",") if p.strip()]
+    cursores, cursor = {}, None
+    for pagina in range(max(alvo) + 1):
+        cursores[pagina] = cursor
+        itens = _pagina_cursor(conn, cursor, LIMITE_PADRAO)[:LIMITE_PADRAO]
+        if not itens:
+            break
+        cursor = (itens[-1]["created_at"], itens[-1]["id"])
+
+    resultados = []
+    for pagina in alvo:
+        if pagina not in cursores:
+            continue
+        m_offset = cronometrar(lambda: _pagina_offset(conn, pagina, LIMITE_PADRAO), repeticoes=args.repeticoes)
+        m_cursor = cronometrar(lambda: _pagina_cursor(conn, cursores[pagina], LIMITE_PADRAO), repeticoes=args.repeticoes)
+        offset_itens = m_offset["_resultado"]
+        cursor_itens = m_cursor["_resultado"][:LIMITE_PADRAO]
+        assert [r["id"] for r in offset_itens] == [r["id"] for r in cursor_itens]
+
+        r = {
+            "pagina": pagina,
+            "bytes_offset": len(json.dumps(offset_itens)),
+            "bytes_cursor": len(json.dumps(cursor_itens)),
+            "etapas": {"offset": limpar_resultado(m_offset), "cursor": limpar_resultado(m_cursor)},
+        }
+        resultados.append(r)
+        e = r["etapas"]
+        print(f"⏱️ página {pagina:>5} | offset {e['offset']['mediana_s'] * 1000:8.2f}ms {r['bytes_offset']:>6} B | "
+              f"cursor {e['cursor']['mediana_s'] * 1000:8.2f}ms {r['bytes_cursor']:>6} B")
+
+    return salvar_relatorio("historico", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
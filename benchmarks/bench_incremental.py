@@ -0,0 +1,111 @@
+"""
+BENCHMARK: planilha acumulada semana a semana - relatório completo x incremental
+
+Uma planilha sintética é enviada acumulada: a 1ª semana traz a fração
+--primeira das linhas e cada uma das --semanas seguintes acrescenta uma parte
+igual do resto. Cada upload passa pelo /upload de main.py (ARMAZENAMENTO=local
+em pasta temporária) com o FakeOpenAI: latência fixa --latencia-ia-ms +
+--ms-por-token de saída.
+
+- completo: toda semana o relatório inteiro (amostra de 100 linhas, até 1600 tokens de saída)
+- incremental: a partir da 2ª semana, o "o que mudou" (app/incremental.py):
+  agregados somados, conclusões anteriores + amostra das linhas novas
+
+Reporta, por semana, tempo do upload, tokens de entrada/saída e custo.
+
+Uso:
+  python -m benchmarks.bench_incremental --semanas 4 --escala 2 --saida bench/incremental.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.fakes import FakeOpenAI
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _carregar_app(pasta: str):
+    os.environ["ARMAZENAMENTO"] = "local"
+    os.environ["ARMAZENAMENTO_DIR"] = pasta
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    return main
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Planilha acumulada: relatório completo x incremental")
+    ap.add_argument("--planilha", default="merchandising")
+    ap.add_argument("--escala", type=float, default=2.0)
+    ap.add_argument("--primeira", type=float, default=0.4, help="fração das linhas já na 1ª semana")
+    ap.add_argument("--semanas", type=int, default=4)
+    ap.add_argument("--latencia-ia-ms", type=float, default=400.0)
+    ap.add_argument("--ms-por-token", type=float, default=2.0, help="tempo de geração por token de saída")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    from app.incremental import EstadosIncrementais
+
+    pasta = tempfile.mkdtemp(prefix="xplors_incremental_")
+    try:
+        app_main = _carregar_app(os.path.join(pasta, "armazenamento"))
+        df = gerar(args.planilha, args.escala)
+        base = round(len(df) * args.primeira)
+        cortes = [base + round((len(df) - base) * k / (args.semanas - 1)) for k in range(args.semanas)]
+
+        resultados = []
+        for modo in ("completo", "incremental"):
+            app_main.client = FakeOpenAI(latencia_s=args.latencia_ia_ms / 1000,
+                                         latencia_token_s=args.ms_por_token / 1000)
+            app_main.estados_incrementais = EstadosIncrementais(os.path.join(pasta, modo),
+                                                                ativo=modo == "incremental")
+            cliente = app_main.app.test_client()
+            semanas = []
+            for k, corte in enumerate(cortes, start=1):
+                corpo = df.iloc[:corte].to_csv(index=False).encode("utf-8")
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    r = cliente.post(
+                        "/upload",
+                        data={"user_id": f"usuario-{modo}", "file": (io.BytesIO(corpo), f"semana_{k}.csv")},
+                        content_type="multipart/form-data",
+                    )
+                tempo = time.perf_counter() - t0
+                uso = app_main.supabase.table("api_usage").select("tokens_input,tokens_output") \
+                    .eq("user_id", f"usuario-{modo}").order("created_at", desc=True).limit(1).execute().data[0]
+                semanas.append({
+                    "semana": k,
+                    "linhas": corte,
+                    "status": r.status_code,
+                    "modo": r.json.get("modo"),
+                    "linhas_novas": r.json.get("linhas_novas"),
+                    "tempo_s": round(tempo, 4),
+                    "tokens_input": uso["tokens_input"],
+                    "tokens_output": uso["tokens_output"],
+                    "custo_usd": r.json.get("custo_usd"),
+                })
+            r = {
+                "modo": modo,
+                "semanas": semanas,
+                "tempo_total_s": round(sum(s["tempo_s"] for s in semanas), 4),
+                "tokens_total": sum(s["tokens_input"] + s["tokens_output"] for s in semanas),
+                "custo_total_usd": round(sum(s["custo_usd"] or 0 for s in semanas), 6),
+            }
+            resultados.append(r)
+            print(f"⏱️ {modo:<11} " + " | ".join(
+                f"s{s['semana']} {s['tempo_s'] * 1000:6.0f}ms {s['tokens_input']}+{s['tokens_output']}tk"
+                for s in semanas) + f" | ${r['custo_total_usd']:.4f}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("incremental", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
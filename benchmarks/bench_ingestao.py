@@ -0,0 +1,112 @@
+"""
+BENCHMARK: ingestão - CSV rápido e pastas de trabalho com várias abas
+
+CSV (mesma planilha de preço, escalada):
+- pandas: pd.read_csv com inferência no arquivo inteiro (o que um leitor
+  "ingênuo" faria; precisa saber sep/decimal de antemão)
+- ingestao: ler_planilha (detecção de sep/encoding + pyarrow ou engine C
+  com dtypes da amostra)
+
+Excel com uma aba por região:
+- sequencial: abas lidas uma a uma (INGESTAO_PROCESSOS=1)
+- paralelo: abas lidas no pool de processos
+
+Uso:
+  python -m benchmarks.bench_ingestao --escala 20 --saida bench/ingestao.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import pandas as pd
+
+from app import ingestao
+from benchmarks.medicao import cronometrar, limpar_resultado, metadados_ambiente, salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _medir_csv(df: pd.DataFrame, pasta: str, repeticoes: int) -> list[dict]:
+    resultados = []
+    variantes = [
+        ("virgula", {"sep": ",", "decimal": "."}, "utf-8"),
+        ("ponto_e_virgula", {"sep": ";", "decimal": ","}, "cp1252"),
+    ]
+    for nome, opcoes, encoding in variantes:
+        caminho = os.path.join(pasta, f"{nome}.csv")
+        df.to_csv(caminho, index=False, encoding=encoding, **opcoes)
+
+        m_pandas = cronometrar(lambda: pd.read_csv(caminho, encoding=encoding, **opcoes), repeticoes=repeticoes)
+        with contextlib.redirect_stdout(io.StringIO()):
+            m_ingestao = cronometrar(lambda: ingestao.ler_planilha(caminho), repeticoes=repeticoes)
+
+        resultados.append({
+            "caso": f"csv_{nome}",
+            "linhas": len(df),
+            "bytes": os.path.getsize(caminho),
+            "etapas": {"pandas": limpar_resultado(m_pandas), "ingestao": limpar_resultado(m_ingestao)},
+        })
+    return resultados
+
+
+def _medir_abas(df: pd.DataFrame, pasta: str, repeticoes: int) -> dict:
+    caminho = os.path.join(pasta, "por_regiao.xlsx")
+    with pd.ExcelWriter(caminho, engine="openpyxl") as w:
+        for regiao, grupo in df.groupby("Região", observed=True):
+            grupo.drop(columns="Região").to_excel(w, sheet_name=str(regiao)[:31], index=False)
+
+    processos = ingestao.INGESTAO_PROCESSOS
+    etapas = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingestao.INGESTAO_PROCESSOS = 1
+            etapas["sequencial"] = limpar_resultado(
+                cronometrar(lambda: ingestao.ler_planilha(caminho), repeticoes=repeticoes))
+
+            ingestao.INGESTAO_PROCESSOS = max(2, processos)
+            etapas["paralelo"] = limpar_resultado(
+                cronometrar(lambda: ingestao.ler_planilha(caminho), repeticoes=repeticoes, aquecimento=1))
+    finally:
+        ingestao.INGESTAO_PROCESSOS = processos
+
+    return {
+        "caso": "xlsx_abas",
+        "linhas": len(df),
+        "abas": int(df["Região"].nunique()),
+        "processos": max(2, processos),
+        "bytes": os.path.getsize(caminho),
+        "etapas": etapas,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Ingestão: CSV rápido e Excel com várias abas em paralelo")
+    ap.add_argument("--escala", type=float, default=20.0, help="x tamanho nominal da planilha de preço")
+    ap.add_argument("--escala-abas", type=float, default=2.0)
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    print(f"🖥️ CPUs: {metadados_ambiente().get('cpus')}")
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="xplors_ingestao_") as pasta:
+        for r in _medir_csv(gerar("preco", args.escala), pasta, args.repeticoes):
+            resultados.append(r)
+            e = r["etapas"]
+            print(f"⏱️ {r['caso']:<20} {r['linhas']:>8} linhas | pandas {e['pandas']['mediana_s'] * 1000:7.1f}ms | "
+                  f"ingestão {e['ingestao']['mediana_s'] * 1000:7.1f}ms")
+
+        r = _medir_abas(gerar("preco", args.escala_abas), pasta, args.repeticoes)
+        resultados.append(r)
+        e = r["etapas"]
+        print(f"⏱️ {r['caso']:<20} {r['linhas']:>8} linhas, {r['abas']} abas | sequencial "
+              f"{e['sequencial']['mediana_s'] * 1000:7.1f}ms | paralelo ({r['processos']} proc.) "
+              f"{e['paralelo']['mediana_s'] * 1000:7.1f}ms")
+
+    return salvar_relatorio("ingestao", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+BENCHMARK: PDF por UUID x PDF endereçado pelo conteúdo
+
+Uma sequência de --relatorios análises em que uma fração --repetidos repete
+um relatório já gerado (mesma planilha, mesmo texto, mesma data impressa -
+regerações e análises reaproveitadas). Os PDFs são renderizados de verdade
+(app.pdf_generator, backend vetorial) e sobem para o SupabaseMemoria com
+latência simulada no Storage/banco (--latencia-ms) e banda de upload
+(--banda-mbps):
+- uuid: como o upload fazia, um objeto novo por análise
+- conteudo: armazenar_pdf (chave = sha256; upload pulado se já referenciado)
+
+No fim, apaga todas as análises (liberar_pdf) e confere que o Storage fica
+vazio. Reporta uploads, bytes enviados/armazenados e tempo de armazenamento.
+
+Uso:
+  python -m benchmarks.bench_pdf_conteudo --relatorios 60 --repetidos 0.5 --saida bench/pdf_conteudo.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from app.excel_processor import gerar_insumos_pdf_excel
+from app.pdf_conteudo import armazenar_pdf, liberar_pdf
+from app.pdf_generator import gerar_pdf_xplors
+from benchmarks.fakes import SupabaseMemoria
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+BUCKET = "relatorios-pdf"
+USUARIO = "usuario-bench"
+
+
+def _renderizar(pasta: str, n: int, tipo: str) -> list[str]:
+    """n relatórios distintos (texto diferente); cada um renderizado duas vezes para conferir os bytes."""
+    df = gerar(tipo, 0.2)
+    with contextlib.redirect_stdout(io.StringIO()):
+        insumos = gerar_insumos_pdf_excel(df, tipo, out_dir=os.path.join(pasta, "graficos"), backend="vetorial")
+    caminhos = []
+    for i in range(n):
+        dados = {
+            "texto": f"RESUMO EXECUTIVO:\n\nRelatório {i}: execução regular, lojas críticas em duas regiões.",
+            "total_linhas": len(df),
+            "gerado_em": datetime(2025, 6, 1, 9, i % 60),
+        }
+        caminho = os.path.join(pasta, f"relatorio_{i}.pdf")
+        with contextlib.redirect_stdout(io.StringIO()):
+            gerar_pdf_xplors(caminho, tipo, dados, dados_excel=insumos)
+            gerar_pdf_xplors(caminho + ".2", tipo, dados, dados_excel=insumos)
+        with open(caminho, "rb") as a, open(caminho + ".2", "rb") as b:
+            assert a.read() == b.read(), "renderização não determinística"
+        caminhos.append(caminho)
+    return caminhos
+
+
+def _sequencia(distintos: list[str], relatorios: int, repetidos: float) -> list[str]:
+    rng = random.Random(7)
+    vistos, seq = [], []
+    for _ in range(relatorios):
+        if vistos and (rng.random() < repetidos or len(vistos) == len(distintos)):
+            seq.append(rng.choice(vistos))
+        else:
+            vistos.append(distintos[len(vistos)])
+            seq.append(vistos[-1])
+    return seq
+
+
+def _medir(modo: str, seq: list[str], latencia_s: float, banda_bps: float) -> dict:
+    supabase = SupabaseMemoria(latencia_s, banda_bps)
+    bucket = supabase.storage.from_(BUCKET)
+    tempos, uploads, bytes_enviados = [], 0, 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for caminho in seq:
+            t0 = time.perf_counter()
+            if modo == "uuid":
+                with open(caminho, "rb") as f:
+                    dados = f.read()
+                path = f"analises/{USUARIO}/analise_{uuid.uuid4().hex[:8]}.pdf"
+                bucket.upload(path, dados, file_options={"content-type": "application/pdf"})
+                registro = {"pdf_path": path}
+                uploads, bytes_enviados = uploads + 1, bytes_enviados + len(dados)
+            else:
+                armazenado = armazenar_pdf(supabase, BUCKET, caminho)
+                registro = {"pdf_path": armazenado["path"], "pdf_hash": armazenado["pdf_hash"]}
+                if not armazenado["reaproveitado"]:
+                    uploads, bytes_enviados = uploads + 1, bytes_enviados + armazenado["bytes"]
+            supabase.table("analises").insert({"user_id": USUARIO, **registro}).execute()
+            tempos.append(time.perf_counter() - t0)
+
+        armazenados = supabase.storage.bytes_armazenados
+        objetos = len(bucket.objetos)
+
+        # apagar tudo: cada objeto sai com a última referência
+        if modo == "conteudo":
+            for registro in list(supabase.tabelas["analises"]):
+                supabase.table("analises").delete().eq("id", registro["id"]).execute()
+                liberar_pdf(supabase, BUCKET, registro["pdf_hash"])
+            assert not bucket.objetos, "objeto órfão no Storage"
+
+    return {
+        "modo": modo,
+        "relatorios": len(seq),
+        "uploads": uploads,
+        "objetos": objetos,
+        "bytes_enviados": bytes_enviados,
+        "bytes_armazenados": armazenados,
+        "total_s": round(sum(tempos), 4),
+        "mediana_ms": round(statistics.median(tempos) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="PDF por UUID x endereçado pelo conteúdo")
+    ap.add_argument("--relatorios", type=int, default=60)
+    ap.add_argument("--repetidos", type=float, default=0.5, help="fração de relatórios repetidos")
+    ap.add_argument("--tipo", default="merchandising")
+    ap.add_argument("--latencia-ms", type=float, default=30.0, help="ida e volta ao Storage/banco")
+    ap.add_argument("--banda-mbps", type=float, default=50.0, help="banda de upload até o Storage (Mbit/s)")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix="xplors_pdf_conteudo_")
+    try:
+        distintos = _renderizar(pasta, args.relatorios, args.tipo)
+        seq = _sequencia(distintos, args.relatorios, args.repetidos)
+        resultados = []
+        for modo in ("uuid", "conteudo"):
+            r = _medir(modo, seq, args.latencia_ms / 1000, args.banda_mbps * 1e6 / 8)
+            resultados.append(r)
+            print(f"⏱️ {modo:<9} {r['uploads']:>4} uploads | {r['objetos']:>4} objetos | "
+                  f"{r['bytes_enviados'] / 1024:8.1f} KB enviados | total {r['total_s'] * 1000:8.1f}ms | "
+                  f"mediana {r['mediana_ms']:6.1f}ms")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("pdf_conteudo", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
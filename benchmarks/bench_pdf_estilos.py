@@ -0,0 +1,89 @@
+"""
+BENCHMARK: tempo de build por PDF (1 vs N relatórios no mesmo processo)
+
+Compara o registro de estilos em cache (padrão) com o comportamento antigo,
+simulado limpando os caches de `app.pdf_estilos` antes de cada PDF
+(getSampleStyleSheet + ParagraphStyles recriados a cada relatório).
+
+Uso:
+  python -m benchmarks.bench_pdf_estilos --quantidades 1,1000 --saida bench/pdf_estilos.json
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import time
+
+from app import pdf_estilos
+from app.pdf_generator import PDFXplors
+from benchmarks.medicao import salvar_relatorio
+
+_KPIS = [
+    {"label": "Registros", "value": "1357", "tone": "purple"},
+    {"label": "Conformidade média", "value": "72%", "tone": "warn"},
+    {"label": "Execução crítica", "value": "31%", "tone": "bad"},
+    {"label": "Variedade (Loja)", "value": "67", "tone": "purple"},
+    {"label": "Lojas OK", "value": "41", "tone": "good"},
+]
+
+_TEXTO = "\n\n".join(
+    ["RESUMO EXECUTIVO:", "A execução está Regular. " * 20, "RECOMENDAÇÕES:", "Priorizar lojas críticas. " * 15]
+)
+
+
+def _limpar_caches():
+    for fn in (pdf_estilos.estilos_xplors, pdf_estilos.estilos_graficos,
+               pdf_estilos.estilos_kpi_valor):
+        fn.cache_clear()
+
+
+def _um_pdf() -> int:
+    buf = io.BytesIO()
+    pdf = PDFXplors(buf, "merchandising", {"texto": _TEXTO, "total_linhas": 1357}, {"kpis": _KPIS})
+    pdf.gerar()
+    return buf.tell()
+
+
+def medir(quantidade: int, com_cache: bool) -> dict:
+    _limpar_caches()
+    tempos = []
+    for _ in range(quantidade):
+        if not com_cache:
+            _limpar_caches()
+        t0 = time.perf_counter()
+        _um_pdf()
+        tempos.append(time.perf_counter() - t0)
+
+    demais = tempos[1:] or tempos
+    return {
+        "quantidade": quantidade,
+        "com_cache": com_cache,
+        "primeiro_s": tempos[0],
+        "mediana_s": statistics.median(demais),
+        "media_s": statistics.fmean(demais),
+        "total_s": sum(tempos),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de estilos/modelos de PDF em cache")
+    ap.add_argument("--quantidades", default="1,1000")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for qtd in [int(q) for q in args.quantidades.split(",") if q.strip()]:
+        for com_cache in (False, True):
+            with contextlib.redirect_stdout(io.StringIO()):
+                r = medir(qtd, com_cache)
+            resultados.append(r)
+            rotulo = "cache" if com_cache else "sem cache"
+            print(f"⏱️ {qtd:>5} PDFs ({rotulo:<9}) primeiro {r['primeiro_s'] * 1000:7.1f}ms | "
+                  f"por PDF {r['mediana_s'] * 1000:6.1f}ms")
+
+    return salvar_relatorio("pdf_estilos", {"quantidades": args.quantidades}, resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+BENCHMARK DO PIPELINE COMPLETO DE RELATÓRIO
+
+Mede, etapa por etapa, com planilhas sintéticas (concorrência / merchandising / preço)
+em vários tamanhos:
+
+  parse    -> processar_planilha (.xlsx via openpyxl)
+  tipo     -> identificar_tipo
+  insumos  -> gerar_insumos_pdf_excel (KPIs + gráficos)
+  analise  -> analisar_com_ia (FakeOpenAI, sem rede; tokens/latência em "ia")
+  pdf      -> gerar_pdf_xplors (PDFXplors)
+  upload   -> storage.upload + insert em `analises` (SupabaseMemoria)
+
+Uso:
+  python -m benchmarks.bench_pipeline --escalas 1,5 --saida bench/pipeline.json
+  python -m benchmarks.bench_pipeline --comparar bench/base.json --saida bench/atual.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+
+from app.excel_processor import processar_planilha, identificar_tipo, gerar_insumos_pdf_excel
+from app.prompts import analisar_com_ia, obter_prompt_por_tipo
+from app.pdf_generator import gerar_pdf_xplors
+from benchmarks.fakes import FakeOpenAI, SupabaseMemoria
+from benchmarks.medicao import (
+    cronometrar, pico_memoria, rss_max_mb, limpar_resultado,
+    salvar_relatorio, comparar_relatorios,
+)
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar, salvar_xlsx
+
+ETAPAS = ["parse", "tipo", "insumos", "analise", "pdf", "upload"]
+
+
+def _medir_etapa(fn, repeticoes: int, medir_memoria: bool) -> dict:
+    m = cronometrar(fn, repeticoes=repeticoes)
+    if medir_memoria:
+        m["pico_mem_mb"], _ = pico_memoria(fn)
+    return m
+
+
+def executar_caso(tipo: str, escala: float, repeticoes: int, medir_memoria: bool, pasta: str) -> dict:
+    caso_dir = os.path.join(pasta, f"{tipo}_{escala:g}")
+    os.makedirs(caso_dir, exist_ok=True)
+
+    df_origem = gerar(tipo, escala)
+    xlsx = salvar_xlsx(df_origem, os.path.join(caso_dir, "entrada.xlsx"))
+
+    cliente = FakeOpenAI()
+    supabase = SupabaseMemoria()
+    etapas: dict[str, dict] = {}
+
+    # parse
+    m = _medir_etapa(lambda: processar_planilha(xlsx), repeticoes, medir_memoria)
+    df = m["_resultado"]
+    etapas["parse"] = m
+
+    # tipo
+    m = _medir_etapa(lambda: identificar_tipo(df), repeticoes, medir_memoria)
+    tipo_identificado = m["_resultado"]
+    etapas["tipo"] = m
+
+    # KPIs + gráficos (sempre com o tipo real do gerador, mesmo fora das faixas de volume)
+    charts_dir = os.path.join(caso_dir, "charts")
+    m = _medir_etapa(lambda: gerar_insumos_pdf_excel(df, tipo, out_dir=charts_dir), repeticoes, medir_memoria)
+    insumos = m["_resultado"]
+    etapas["insumos"] = m
+
+    # análise (modelo falso)
+    prompt = obter_prompt_por_tipo(tipo)
+    metricas_ia: dict = {}
+    m = _medir_etapa(lambda: analisar_com_ia(df, prompt, tipo, cliente=cliente, insumos=insumos, metricas=metricas_ia),
+                     repeticoes, medir_memoria)
+    texto = m["_resultado"]
+    etapas["analise"] = m
+
+    # PDF
+    pdf_path = os.path.join(caso_dir, "relatorio.pdf")
+    dados_analise = {"texto": texto, "total_linhas": len(df)}
+    m = _medir_etapa(
+        lambda: gerar_pdf_xplors(pdf_path, tipo, dados_analise, dados_excel=insumos),
+        repeticoes, medir_memoria
+    )
+    etapas["pdf"] = m
+
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+
+    # upload (storage + registro no banco)
+    def _upload():
+        storage_path = f"analises/bench/analise_{uuid.uuid4().hex[:8]}.pdf"
+        supabase.storage.from_("relatorios-pdf").upload(
+            storage_path, pdf_bytes, file_options={"content-type": "application/pdf"}
+        )
+        url = supabase.storage.from_("relatorios-pdf").get_public_url(storage_path)
+        return supabase.table("analises").insert({
+            "user_id": "bench",
+            "tipo_analise": tipo,
+            "total_linhas": len(df),
+            "pdf_filename": os.path.basename(storage_path),
+            "pdf_url": url,
+        }).execute()
+
+    etapas["upload"] = _medir_etapa(_upload, repeticoes, medir_memoria)
+
+    etapas = {k: limpar_resultado(v) for k, v in etapas.items()}
+    return {
+        "tipo": tipo,
+        "escala": escala,
+        "linhas": len(df),
+        "colunas": len(df.columns),
+        "tipo_identificado": tipo_identificado,
+        "xlsx_bytes": os.path.getsize(xlsx),
+        "pdf_bytes": len(pdf_bytes),
+        "graficos": len(insumos.get("charts") or []),
+        "fatos": len(insumos.get("fatos") or []),
+        "ia": metricas_ia,
+        "total_s": sum(v["mediana_s"] for v in etapas.values()),
+        "etapas": etapas,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark do pipeline de relatórios Xplors")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS), help="concorrencia,merchandising,preco")
+    ap.add_argument("--escalas", default="1,5", help="multiplicadores do tamanho nominal (ex.: 1,5,20)")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--sem-memoria", action="store_true", help="não mede pico de memória (tracemalloc)")
+    ap.add_argument("--saida", default=None, help="arquivo JSON do relatório")
+    ap.add_argument("--comparar", default=None, help="relatório JSON base para comparação")
+    ap.add_argument("--verboso", action="store_true", help="mostra os prints do pipeline")
+    args = ap.parse_args(argv)
+
+    tipos = [t.strip() for t in args.tipos.split(",") if t.strip()]
+    escalas = [float(e) for e in args.escalas.split(",") if e.strip()]
+
+    pasta = tempfile.mkdtemp(prefix="xplors_bench_")
+    resultados = []
+    try:
+        for tipo in tipos:
+            for escala in escalas:
+                print(f"⏱️ {tipo} x{escala:g} ...")
+                saida = contextlib.nullcontext() if args.verboso else contextlib.redirect_stdout(io.StringIO())
+                with saida:
+                    r = executar_caso(tipo, escala, args.repeticoes, not args.sem_memoria, pasta)
+                resultados.append(r)
+                resumo = " | ".join(f"{e} {r['etapas'][e]['mediana_s'] * 1000:.0f}ms" for e in ETAPAS)
+                print(f"   {r['linhas']} linhas -> {resumo}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    config = {
+        "tipos": tipos,
+        "escalas": escalas,
+        "repeticoes": args.repeticoes,
+        "mede_memoria": not args.sem_memoria,
+        "rss_max_mb": rss_max_mb(),
+    }
+    relatorio = salvar_relatorio("pipeline", config, resultados, args.saida)
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        print("\n📊 Comparação com a base (mediana):")
+        for linha in comparar_relatorios(base, relatorio):
+            tipo, escala = linha["caso"]
+            print(f"   {tipo} x{escala:g} {linha['etapa']:<8} {linha['base_s'] * 1000:8.1f}ms -> "
+                  f"{linha['atual_s'] * 1000:8.1f}ms ({linha['delta_pct']:+.1f}%)")
+
+    if not args.saida:
+        print(json.dumps(relatorio, ensure_ascii=False, indent=2, default=str))
+
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
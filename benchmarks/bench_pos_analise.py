@@ -0,0 +1,98 @@
+"""
+BENCHMARK: pós-análise do /upload - etapas em fila x grafo de etapas
+
+Sobe o app de main.py (ARMAZENAMENTO=local só para importar) e troca o
+cliente pelo SupabaseMemoria com --latencia-ms por ida ao banco/Storage; o
+modelo é o FakeOpenAI. Cada upload é uma planilha sintética diferente (o
+modelo é chamado: custo, estado incremental, PDF, upload, insert e limite):
+- sequencial: GrafoEtapas(threads=0), a mesma ordem de antes, uma etapa por vez
+- grafo: GrafoEtapas padrão (app/grafo_etapas.py), etapas independentes juntas
+
+Reporta a mediana do tempo da pós-análise e do /upload inteiro, a soma das
+etapas e o caminho crítico mais frequente.
+
+Uso:
+  python -m benchmarks.bench_pos_analise --uploads 6 --latencia-ms 80 --saida bench/pos_analise.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter
+from functools import partial
+
+from benchmarks.fakes import FakeOpenAI, SupabaseMemoria
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _carregar_app(pasta: str, latencia_s: float):
+    os.environ["ARMAZENAMENTO"] = "local"
+    os.environ["ARMAZENAMENTO_DIR"] = pasta
+    os.environ["ESTADO_INCREMENTAL_DIR"] = os.path.join(pasta, "incremental")
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    main.client = FakeOpenAI()
+    main.supabase = SupabaseMemoria(latencia_s)
+    main.cost_tracker = main.CostTracker(main.supabase)
+    main.cota = main.CotaLocal(main.cost_tracker, main.LIMITE_MENSAL_PADRAO)
+    return main
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Pós-análise do /upload: etapas em fila x grafo de etapas")
+    ap.add_argument("--uploads", type=int, default=6)
+    ap.add_argument("--escala", type=float, default=2.0)
+    ap.add_argument("--latencia-ms", type=float, default=80.0)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix="xplors_pos_analise_")
+    resultados = []
+    try:
+        app_main = _carregar_app(pasta, args.latencia_ms / 1000)
+        from app.grafo_etapas import GrafoEtapas
+
+        semente = 0
+        for modo, grafo in (("sequencial", partial(GrafoEtapas, threads=0)), ("grafo", GrafoEtapas)):
+            app_main.GrafoEtapas = grafo
+            pos, totais, somas, caminhos = [], [], [], Counter()
+            for _ in range(args.uploads):
+                semente += 1
+                corpo = gerar("merchandising", args.escala, seed=semente).to_csv(index=False).encode()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    r = app_main.app.test_client().post(
+                        "/upload", data={"user_id": "bench", "file": (io.BytesIO(corpo), f"p{semente}.csv")},
+                        content_type="multipart/form-data")
+                totais.append(time.perf_counter() - t0)
+                relatorio = r.get_json()["pos_analise"]
+                pos.append(relatorio["total_s"])
+                somas.append(relatorio["sequencial_s"])
+                caminhos[" → ".join(relatorio["caminho_critico"])] += 1
+
+            r = {
+                "modo": modo,
+                "pos_analise_mediana_s": round(statistics.median(pos), 3),
+                "soma_etapas_mediana_s": round(statistics.median(somas), 3),
+                "upload_mediana_s": round(statistics.median(totais), 3),
+                "caminho_critico": caminhos.most_common(1)[0][0],
+            }
+            resultados.append(r)
+            print(f"⏱️ {modo:<10} pós-análise {r['pos_analise_mediana_s'] * 1000:6.0f}ms "
+                  f"(etapas somadas {r['soma_etapas_mediana_s'] * 1000:6.0f}ms) | "
+                  f"/upload {r['upload_mediana_s'] * 1000:6.0f}ms | caminho crítico: {r['caminho_critico']}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("pos_analise", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+BENCHMARK: troca de tipo na mesma planilha - sem sessão x SessaoAnalise
+
+A mesma planilha (.xlsx sintética) é analisada na sequência --sequencia
+(ex.: merchandising, preco, merchandising), como um usuário trocando o tipo:
+- sem_sessao: cada pedido lê o arquivo (snapshot desligado: o pior caso de
+  antes), detecta dimensões, gera os insumos e chama o modelo (FakeOpenAI,
+  latência --latencia-ia-ms) com describe() no prompt
+- sessao: o 1º pedido abre a SessaoAnalise; os seguintes só calculam a parte
+  específica do tipo (insumos + modelo); tipo repetido sai todo da sessão
+
+Reporta tempo por pedido e chamadas ao modelo.
+
+Uso:
+  python -m benchmarks.bench_sessao --escala 5 --saida bench/sessao.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from app.excel_processor import processar_planilha, identificar_tipo_com_confianca, gerar_insumos_pdf_excel
+from app.prompts import analisar_com_ia, obter_prompt_por_tipo
+from app.sessao_analise import ArmazemSessoes, ResultadoIA, SessaoAnalise
+from benchmarks.fakes import FakeOpenAI
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar, salvar_xlsx
+
+USUARIO = "usuario-bench"
+
+
+def _sem_sessao(xlsx: str, tipo: str, cliente: FakeOpenAI, pasta: str):
+    df = processar_planilha(xlsx, usar_snapshot=False)
+    identificar_tipo_com_confianca(df, cliente=USUARIO)
+    insumos = gerar_insumos_pdf_excel(df, tipo, out_dir=pasta, backend="vetorial")
+    return analisar_com_ia(df, obter_prompt_por_tipo(tipo), tipo, cliente=cliente, insumos=insumos)
+
+
+def _com_sessao(xlsx: str, tipo: str, cliente: FakeOpenAI, pasta: str, armazem: ArmazemSessoes, arquivo_hash: str):
+    sessao = armazem.por_arquivo(USUARIO, arquivo_hash)
+    if sessao is None:
+        df = processar_planilha(xlsx, usar_snapshot=False, arquivo_hash=arquivo_hash)
+        df.attrs["arquivo_hash"] = arquivo_hash
+        sessao = armazem.guardar(SessaoAnalise.abrir(USUARIO, df, os.path.basename(xlsx)))
+        sessao.classificacao = identificar_tipo_com_confianca(sessao.df, cliente=USUARIO, dims=sessao.dims)
+    insumos = sessao.insumos(tipo, out_dir=pasta, backend="vetorial")
+    resultado = sessao.analise(tipo)
+    if resultado is None:
+        texto = analisar_com_ia(sessao.df, obter_prompt_por_tipo(tipo), tipo, cliente=cliente,
+                                insumos=insumos, perfil=sessao.perfil())
+        resultado = sessao.guardar_analise(tipo, ResultadoIA(texto, 0, 0, 0, 0.0, datetime.now()))
+    return resultado.texto
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Troca de tipo: sem sessão x SessaoAnalise")
+    ap.add_argument("--planilha", default="merchandising")
+    ap.add_argument("--escala", type=float, default=2.0)
+    ap.add_argument("--sequencia", default="merchandising,preco,concorrencia,merchandising")
+    ap.add_argument("--latencia-ia-ms", type=float, default=300.0)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    pasta = tempfile.mkdtemp(prefix="xplors_sessao_")
+    try:
+        xlsx = salvar_xlsx(gerar(args.planilha, args.escala), os.path.join(pasta, "entrada.xlsx"))
+        sequencia = [t.strip() for t in args.sequencia.split(",") if t.strip()]
+        resultados = []
+        for modo in ("sem_sessao", "sessao"):
+            cliente = FakeOpenAI(latencia_s=args.latencia_ia_ms / 1000)
+            armazem = ArmazemSessoes()
+            tempos = []
+            for tipo in sequencia:
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if modo == "sem_sessao":
+                        _sem_sessao(xlsx, tipo, cliente, pasta)
+                    else:
+                        _com_sessao(xlsx, tipo, cliente, pasta, armazem, "bench-" + args.planilha)
+                tempos.append(round(time.perf_counter() - t0, 4))
+            r = {"modo": modo, "sequencia": sequencia, "tempos_s": tempos,
+                 "total_s": round(sum(tempos), 4), "chamadas_modelo": cliente.chamadas}
+            resultados.append(r)
+            print(f"⏱️ {modo:<10} " + " | ".join(f"{t} {s * 1000:7.1f}ms" for t, s in zip(sequencia, tempos))
+                  + f" | modelo x{cliente.chamadas}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    return salvar_relatorio("sessao", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+BENCHMARK: reler a planilha (.xlsx via openpyxl) x snapshot Arrow (memory-map)
+
+Para cada tipo/escala grava a planilha sintética em .xlsx e mede:
+- excel: processar_planilha sem snapshot (o que toda reanálise fazia)
+- primeira: leitura do Excel + gravação do snapshot
+- snapshot: releitura pelo hash (memory-map)
+- projecao: só 2 colunas do snapshot (drill-down)
+
+Uso:
+  python -m benchmarks.bench_snapshot --escalas 1,10 --saida bench/snapshot.json
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+from app import snapshot_planilha
+from app.excel_processor import processar_planilha
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar, salvar_xlsx
+
+
+def _medir(tipo: str, escala: float, repeticoes: int, pasta: str) -> dict:
+    df = gerar(tipo, escala)
+    caminho = salvar_xlsx(df, os.path.join(pasta, f"{tipo}_{escala:g}.xlsx"))
+
+    def _primeira():
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(snapshot_planilha.caminho_snapshot(snapshot_planilha.hash_arquivo(caminho)))
+        return processar_planilha(caminho)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        m_excel = cronometrar(lambda: processar_planilha(caminho, usar_snapshot=False), repeticoes=repeticoes)
+        m_primeira = cronometrar(_primeira, repeticoes=repeticoes)
+        m_snapshot = cronometrar(lambda: processar_planilha(caminho), repeticoes=repeticoes)
+
+    arquivo_hash = m_snapshot["_resultado"].attrs["arquivo_hash"]
+    colunas = list(df.columns[:2])
+    m_projecao = cronometrar(lambda: snapshot_planilha.carregar_snapshot(arquivo_hash, colunas=colunas),
+                             repeticoes=repeticoes)
+
+    return {
+        "tipo": tipo,
+        "escala": escala,
+        "linhas": len(df),
+        "xlsx_bytes": os.path.getsize(caminho),
+        "snapshot_bytes": os.path.getsize(snapshot_planilha.caminho_snapshot(arquivo_hash)),
+        "etapas": {
+            "excel": limpar_resultado(m_excel),
+            "primeira": limpar_resultado(m_primeira),
+            "snapshot": limpar_resultado(m_snapshot),
+            "projecao": limpar_resultado(m_projecao),
+        },
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Excel (openpyxl) x snapshot Arrow por hash")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS))
+    ap.add_argument("--escalas", default="1,10")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    dir_original = snapshot_planilha.SNAPSHOT_DIR
+    with tempfile.TemporaryDirectory(prefix="xplors_snapshot_") as pasta:
+        snapshot_planilha.SNAPSHOT_DIR = os.path.join(pasta, "snapshots")
+        try:
+            for tipo in [t.strip() for t in args.tipos.split(",") if t.strip()]:
+                for escala in [float(e) for e in args.escalas.split(",") if e.strip()]:
+                    r = _medir(tipo, escala, args.repeticoes, pasta)
+                    resultados.append(r)
+                    e = r["etapas"]
+                    print(f"⏱️ {tipo:<13} {r['linhas']:>7} linhas | excel {e['excel']['mediana_s'] * 1000:8.1f}ms | "
+                          f"1ª (+snapshot) {e['primeira']['mediana_s'] * 1000:8.1f}ms | "
+                          f"snapshot {e['snapshot']['mediana_s'] * 1000:6.1f}ms | "
+                          f"projeção {e['projecao']['mediana_s'] * 1000:5.1f}ms")
+        finally:
+            snapshot_planilha.SNAPSHOT_DIR = dir_original
+
+    return salvar_relatorio("snapshot", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+BENCHMARK: DataFrame grande para o pool de computação - pickle x Arrow pelo pipe x tabela compartilhada
+
+Uma planilha sintética de --escala (~1360 linhas por unidade; 150 -> ~200 mil
+linhas) vai para um processo (forkserver, pandas pré-importado) em --etapas
+etapas seguidas, como KPIs de dois tipos + PDF da mesma sessão:
+- pickle: submit(df) padrão do ProcessPoolExecutor, a cada etapa
+- arrow_pipe: Arrow IPC em bytes pelo pipe, a cada etapa (transporte anterior)
+- compartilhada: TabelaCompartilhada gravada uma vez (app/tabela_compartilhada.py);
+  pelo pipe só a referência
+
+Reporta preparo no worker (serialização/gravação), tempo por etapa até o
+processo ter o DataFrame, bytes pelo pipe e o pico de RSS do processo.
+
+Uso:
+  python -m benchmarks.bench_tabela_compartilhada --escala 150 --saida bench/tabela_compartilhada.json
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+import pickle
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+
+from app.excel_processor import preparar_planilha
+from app.snapshot_planilha import _tabela_arrow
+from app.tabela_compartilhada import RegistroTabelas, TabelaCompartilhada, ler
+from benchmarks.medicao import salvar_relatorio
+from benchmarks.planilhas_sinteticas import gerar
+
+
+def _etapa(df) -> tuple[int, int]:
+    """O que toda etapa faz antes do trabalho de verdade: ter o DataFrame em mãos."""
+    return len(df), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _etapa_pickle(df):
+    return _etapa(df)
+
+
+def _etapa_arrow(dados):
+    return _etapa(pa.ipc.open_stream(pa.py_buffer(dados)).read_all().to_pandas())
+
+
+def _etapa_compartilhada(ref):
+    return _etapa(ler(ref))
+
+
+def _arrow_bytes(df) -> pa.Buffer:
+    tabela = _tabela_arrow(df)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as writer:
+        writer.write_table(tabela)
+    return saida.getvalue()
+
+
+def _pool() -> ProcessPoolExecutor:
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["pandas", "pyarrow", "app.tabela_compartilhada"])
+    pool = ProcessPoolExecutor(max_workers=1, mp_context=ctx)
+    pool.submit(int).result()  # processo no ar antes de medir
+    return pool
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="DataFrame grande para o pool: pickle x Arrow pelo pipe x compartilhada")
+    ap.add_argument("--planilha", default="merchandising")
+    ap.add_argument("--escala", type=float, default=150.0)
+    ap.add_argument("--etapas", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = preparar_planilha(gerar(args.planilha, args.escala))
+    print(f"📊 {len(df)} linhas, {df.memory_usage(deep=True).sum() / 1024 / 1024:.0f} MB em pandas")
+
+    registro = RegistroTabelas()
+    resultados = []
+    for modo in ("pickle", "arrow_pipe", "compartilhada"):
+        pool = _pool()
+        tabela = None
+        try:
+            t0 = time.perf_counter()
+            if modo == "compartilhada":
+                tabela = TabelaCompartilhada.criar(df, dono="bench", registro=registro)
+            preparo_s = time.perf_counter() - t0
+
+            tempos, bytes_pipe, rss = [], 0, 0
+            for _ in range(args.etapas):
+                t0 = time.perf_counter()
+                if modo == "pickle":
+                    arg, funcao = df, _etapa_pickle
+                elif modo == "arrow_pipe":
+                    arg, funcao = _arrow_bytes(df), _etapa_arrow
+                else:
+                    arg, funcao = tabela.tocar(), _etapa_compartilhada
+                linhas, rss = pool.submit(funcao, arg).result()
+                tempos.append(time.perf_counter() - t0)
+                bytes_pipe += len(pickle.dumps(arg, protocol=pickle.HIGHEST_PROTOCOL))
+                assert linhas == len(df)
+        finally:
+            if tabela is not None:
+                tabela.liberar()
+            pool.shutdown()
+
+        r = {
+            "modo": modo,
+            "linhas": len(df),
+            "preparo_s": round(preparo_s, 4),
+            "etapa_mediana_s": round(statistics.median(tempos), 4),
+            "total_s": round(preparo_s + sum(tempos), 4),
+            "mb_pelo_pipe": round(bytes_pipe / 1024 / 1024, 2),
+            "mb_compartilhados": round(tabela.ref.tamanho / 1024 / 1024, 2) if tabela else 0.0,
+            "pico_rss_processo_mb": round(rss / 1024, 1),
+        }
+        resultados.append(r)
+        print(f"⏱️ {modo:<13} preparo {r['preparo_s'] * 1000:7.1f}ms | etapa {r['etapa_mediana_s'] * 1000:7.1f}ms | "
+              f"total {r['total_s'] * 1000:7.1f}ms | pipe {r['mb_pelo_pipe']:7.2f} MB | "
+              f"pico RSS {r['pico_rss_processo_mb']:.0f} MB")
+
+    return salvar_relatorio("tabela_compartilhada", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
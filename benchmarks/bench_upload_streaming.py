@@ -0,0 +1,150 @@
+"""
+BENCHMARK: upload bufferizado x upload em streaming
+
+Simula o corpo multipart chegando pela rede a uma banda fixa (--mbps) e mede
+o tempo, desde o primeiro byte, até a planilha estar pronta para os KPIs
+(DataFrame preparado + tipo classificado):
+- bufferizado: espera o corpo inteiro (como request.files), depois lê a
+  planilha e classifica
+- streaming: app.upload_streaming lê o CSV enquanto os blocos chegam e
+  classifica o tipo com as primeiras linhas (pré-análise especulativa)
+
+Também reporta quando a pré-análise ficou pronta (antes do fim da
+transferência) e o tempo de transferência puro, que é o piso dos dois.
+
+Uso:
+  python -m benchmarks.bench_upload_streaming --escala 20 --mbps 20 --saida bench/upload_streaming.json
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from app import upload_streaming
+from app.excel_processor import identificar_tipo_com_confianca, preparar_planilha, processar_planilha
+from benchmarks.medicao import cronometrar, limpar_resultado, salvar_relatorio
+from benchmarks.planilhas_sinteticas import LINHAS_NOMINAIS, gerar
+
+BOUNDARY = "----xplorsbench"
+
+
+class _RedeLenta(io.RawIOBase):
+    """Entrega o corpo respeitando uma banda (bytes/s), como request.stream."""
+
+    def __init__(self, dados: bytes, bytes_por_s: float):
+        self._dados = memoryview(dados)
+        self._pos = 0
+        self._bytes_por_s = bytes_por_s
+        self._inicio = time.perf_counter()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, destino) -> int:
+        n = min(len(destino), len(self._dados) - self._pos)
+        if n <= 0:
+            return 0
+        pronto_em = self._inicio + (self._pos + n) / self._bytes_por_s
+        espera = pronto_em - time.perf_counter()
+        if espera > 0:
+            time.sleep(espera)
+        destino[:n] = self._dados[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+def _corpo(nome: str, dados: bytes, campos: dict) -> bytes:
+    partes = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+        for k, v in campos.items()
+    ]
+    partes.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{nome}"\r\n'
+        f'Content-Type: text/csv\r\n\r\n'.encode() + dados + b"\r\n"
+    )
+    partes.append(f"--{BOUNDARY}--\r\n".encode())
+    return b"".join(partes)
+
+
+def _bufferizado(corpo: bytes, bytes_por_s: float, nome: str):
+    rede = _RedeLenta(corpo, bytes_por_s)
+    recebido = rede.read()
+    inicio = recebido.index(b"\r\n\r\n", recebido.index(b'filename="')) + 4
+    arquivo = io.BytesIO(recebido[inicio:recebido.rindex(f"\r\n--{BOUNDARY}--".encode())])
+    df = processar_planilha(arquivo, nome_arquivo=nome, usar_snapshot=False)
+    return df, identificar_tipo_com_confianca(df, cliente="bench")
+
+
+def _streaming(corpo: bytes, bytes_por_s: float, nome: str):
+    inicio = time.perf_counter()
+    marcas = {}
+
+    def _pre_analise(parcial, campos):
+        parcial = preparar_planilha(parcial)
+        r = list(parcial.columns), identificar_tipo_com_confianca(parcial, cliente=campos.get("user_id"))
+        marcas["pre_analise_s"] = time.perf_counter() - inicio
+        return r
+
+    recebido = upload_streaming.receber_upload(_RedeLenta(corpo, bytes_por_s), BOUNDARY, ao_amostrar=_pre_analise)
+    try:
+        df = processar_planilha(recebido.arquivo, nome_arquivo=nome, usar_snapshot=False, df_lido=recebido.df)
+        colunas, classificacao = recebido.especulacao or (None, None)
+        if colunas != list(df.columns):
+            classificacao = identificar_tipo_com_confianca(df, cliente="bench")
+        return df, classificacao, marcas.get("pre_analise_s")
+    finally:
+        recebido.fechar()
+
+
+def _medir(tipo: str, escala: float, variante: str, mbps: float, repeticoes: int) -> dict:
+    df = gerar(tipo, escala)
+    opcoes = {"sep": ";", "decimal": ","} if variante == "ponto_e_virgula" else {}
+    dados = df.to_csv(index=False, **opcoes).encode("utf-8")
+    corpo = _corpo(f"{tipo}.csv", dados, {"user_id": "bench"})
+    bytes_por_s = mbps * 1_000_000 / 8
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        m_buffer = cronometrar(lambda: _bufferizado(corpo, bytes_por_s, f"{tipo}.csv"), repeticoes=repeticoes)
+        m_stream = cronometrar(lambda: _streaming(corpo, bytes_por_s, f"{tipo}.csv"), repeticoes=repeticoes)
+
+    _, c_buffer = m_buffer["_resultado"]
+    _, c_stream, pre_analise_s = m_stream["_resultado"]
+    return {
+        "tipo": tipo,
+        "csv": variante,
+        "linhas": len(df),
+        "bytes": len(corpo),
+        "transferencia_s": round(len(corpo) / bytes_por_s, 4),
+        "pre_analise_s": round(pre_analise_s, 4) if pre_analise_s is not None else None,
+        "mesmo_tipo": c_buffer.tipo == c_stream.tipo,
+        "etapas": {"bufferizado": limpar_resultado(m_buffer), "streaming": limpar_resultado(m_stream)},
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Upload bufferizado x streaming (parse durante a transferência)")
+    ap.add_argument("--tipos", default=",".join(LINHAS_NOMINAIS))
+    ap.add_argument("--escala", type=float, default=20.0)
+    ap.add_argument("--mbps", type=float, default=20.0, help="banda simulada do cliente")
+    ap.add_argument("--repeticoes", type=int, default=3)
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for tipo in [t.strip() for t in args.tipos.split(",") if t.strip()]:
+        for variante in ("virgula", "ponto_e_virgula"):
+            r = _medir(tipo, args.escala, variante, args.mbps, args.repeticoes)
+            resultados.append(r)
+            e = r["etapas"]
+            pre = f"{r['pre_analise_s'] * 1000:7.0f}ms" if r["pre_analise_s"] is not None else "      -"
+            print(f"⏱️ {tipo:<13} {variante:<15} {r['bytes'] / 1e6:6.1f} MB | rede {r['transferencia_s'] * 1000:7.0f}ms | "
+                  f"bufferizado {e['bufferizado']['mediana_s'] * 1000:7.0f}ms | streaming "
+                  f"{e['streaming']['mediana_s'] * 1000:7.0f}ms | pré-análise {pre} | "
+                  f"tipo {'✅' if r['mesmo_tipo'] else '❌'}")
+
+    return salvar_relatorio("upload_streaming", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+BENCHMARK: URL assinada por item x cache com assinatura em lote
+
+Um histórico de --pagina relatórios aberto --visitas vezes, contra o
+SupabaseMemoria com latência simulada no Storage (--latencia-ms):
+- por_item: como o upload fazia, uma create_signed_url por relatório
+  (a cada visita, porque a URL gravada pode ter expirado)
+- cache: CacheUrlsAssinadas + anexar_urls (uma create_signed_urls para os
+  que faltam; as visitas seguintes saem do cache)
+
+Reporta chamadas de assinatura ao Storage e o tempo por visita.
+
+Uso:
+  python -m benchmarks.bench_urls_assinadas --pagina 20 --visitas 10 --saida bench/urls_assinadas.json
+"""
+
+import argparse
+import statistics
+import time
+
+from app.urls_assinadas import CacheUrlsAssinadas, anexar_urls
+from benchmarks.fakes import SupabaseMemoria
+from benchmarks.medicao import salvar_relatorio
+
+BUCKET = "relatorios-pdf"
+
+
+def _registros(n: int) -> list[dict]:
+    return [{"id": i, "pdf_path": f"analises/bench/analise_{i:04d}.pdf"} for i in range(n)]
+
+
+def _medir(modo: str, pagina: int, visitas: int, latencia_s: float) -> dict:
+    supabase = SupabaseMemoria(latencia_s)
+    bucket = supabase.storage.from_(BUCKET)
+    cache = CacheUrlsAssinadas(lambda: supabase.storage.from_(BUCKET))
+
+    tempos = []
+    for _ in range(visitas):
+        registros = _registros(pagina)
+        t0 = time.perf_counter()
+        if modo == "por_item":
+            for r in registros:
+                r["pdf_url"] = bucket.create_signed_url(r["pdf_path"], 3600)["signedURL"]
+        else:
+            anexar_urls(registros, cache, lambda r: r["pdf_path"])
+        tempos.append(time.perf_counter() - t0)
+        assert all(r.get("pdf_url") for r in registros)
+
+    return {
+        "modo": modo,
+        "pagina": pagina,
+        "visitas": visitas,
+        "chamadas_assinatura": bucket.chamadas_assinatura,
+        "primeira_visita_ms": round(tempos[0] * 1000, 3),
+        "mediana_visita_ms": round(statistics.median(tempos) * 1000, 3),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="URL assinada por item x cache em lote")
+    ap.add_argument("--pagina", type=int, default=20)
+    ap.add_argument("--visitas", type=int, default=10)
+    ap.add_argument("--latencia-ms", type=float, default=30.0, help="ida e volta ao Storage")
+    ap.add_argument("--saida", default=None)
+    args = ap.parse_args(argv)
+
+    resultados = []
+    for modo in ("por_item", "cache"):
+        r = _medir(modo, args.pagina, args.visitas, args.latencia_ms / 1000)
+        resultados.append(r)
+        print(f"⏱️ {modo:<9} {r['chamadas_assinatura']:>4} assinaturas | 1ª visita {r['primeira_visita_ms']:8.1f}ms | "
+              f"mediana {r['mediana_visita_ms']:8.3f}ms")
+
+    return salvar_relatorio("urls_assinadas", vars(args), resultados, args.saida)
+
+
+if __name__ == "__main__":
+    main()
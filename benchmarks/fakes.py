@@ -0,0 +1,316 @@
+"""
+DUBLÊS PARA BENCHMARK (sem rede)
+
+- FakeOpenAI: responde chat.completions.create com texto determinístico
+  e um objeto `usage` no mesmo formato da API (inclusive
+  prompt_tokens_details.cached_tokens, simulando o cache de prefixo)
+- SupabaseMemoria: storage + tabelas em memória, com a mesma interface
+  encadeada usada pelo backend (storage.from_().upload, table().insert().execute())
+
+Assim o benchmark mede só o nosso código (parse, KPIs, gráficos, PDF, upload).
+"""
+
+import os
+import time
+import uuid
+from types import SimpleNamespace
+
+from app.cost_tracker import estimar_tokens_texto
+
+# cache de prompt do provedor: só a partir de 1024 tokens de prefixo igual,
+# em blocos de 128 tokens
+MIN_TOKENS_CACHE = 1024
+BLOCO_TOKENS_CACHE = 128
+
+
+# =========================
+# OPENAI
+# =========================
+_RESPOSTA_PADRAO = """RESUMO EXECUTIVO
+
+A execução geral está Regular, com conformidade média abaixo da meta em parte das lojas.
+
+ANÁLISE DETALHADA
+
+Os itens de material de PDV e ponta de gôndola concentram as maiores falhas. As regiões com pior execução precisam de visita em até 7 dias.
+
+RECOMENDAÇÕES
+
+1. Reforçar o checklist com os promotores.
+2. Priorizar lojas críticas.
+3. Acompanhar a conformidade semanalmente.
+"""
+
+
+class _FakeCompletions:
+    def __init__(self, dono: "FakeOpenAI"):
+        self._dono = dono
+
+    def create(self, model: str = "gpt-4o", messages: list | None = None, max_tokens: int = 2000, **kwargs):
+        dono = self._dono
+        dono.chamadas += 1
+
+        texto_entrada = ""
+        for m in messages or []:
+            conteudo = m.get("content")
+            if isinstance(conteudo, str):
+                texto_entrada += conteudo
+            elif isinstance(conteudo, list):
+                texto_entrada += "".join(p.get("text", "") for p in conteudo if isinstance(p, dict))
+
+        if dono.latencia_s:
+            time.sleep(dono.latencia_s)
+
+        cached = dono._tokens_em_cache(texto_entrada)
+
+        # repete a resposta até aproximar o tamanho pedido (tokens de saída)
+        saida = dono.resposta
+        alvo = min(max_tokens, dono.tokens_saida)
+        while estimar_tokens_texto(saida) < alvo:
+            saida += "\n\n" + dono.resposta
+        if dono.latencia_token_s:
+            time.sleep(dono.latencia_token_s * estimar_tokens_texto(saida))
+
+        usage = SimpleNamespace(
+            prompt_tokens=estimar_tokens_texto(texto_entrada),
+            completion_tokens=estimar_tokens_texto(saida),
+            prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+
+        return SimpleNamespace(
+            id=f"fake-{uuid.uuid4().hex[:8]}",
+            model=model,
+            choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=saida))],
+            usage=usage,
+        )
+
+
+class FakeOpenAI:
+    """
+    Substituto do cliente `openai.OpenAI` para benchmarks.
+    """
+
+    def __init__(self, resposta: str = _RESPOSTA_PADRAO, tokens_saida: int = 2000, latencia_s: float = 0.0,
+                 latencia_token_s: float = 0.0):
+        self.resposta = resposta
+        self.tokens_saida = tokens_saida
+        self.latencia_s = latencia_s
+        self.latencia_token_s = latencia_token_s  # geração: resposta maior demora mais
+        self.chamadas = 0
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+        self._entradas: list[str] = []
+
+    def _tokens_em_cache(self, texto: str) -> int:
+        """Maior prefixo em comum com as últimas chamadas, como o cache do provedor."""
+        comum = max((len(os.path.commonprefix([anterior, texto])) for anterior in self._entradas), default=0)
+        self._entradas = (self._entradas + [texto])[-20:]
+
+        tokens = estimar_tokens_texto(texto[:comum])
+        if tokens < MIN_TOKENS_CACHE:
+            return 0
+        return tokens - tokens % BLOCO_TOKENS_CACHE
+
+
+# =========================
+# SUPABASE (storage + tabelas)
+# =========================
+class _BucketMemoria:
+    def __init__(self, nome: str, latencia_s: float = 0.0, banda_bps: float | None = None):
+        self.nome = nome
+        self.objetos: dict[str, bytes] = {}
+        self.latencia_s = latencia_s
+        self.banda_bps = banda_bps
+        self.chamadas_assinatura = 0
+
+    def _ida_e_volta(self):
+        if self.latencia_s:
+            time.sleep(self.latencia_s)
+
+    def upload(self, path: str, data: bytes, file_options: dict | None = None):
+        self._ida_e_volta()
+        if self.banda_bps:
+            time.sleep(len(data) / self.banda_bps)
+        if path in self.objetos:
+            raise Exception(f"Objeto já existe: {path}")
+        self.objetos[path] = bytes(data)
+        return {"path": path}
+
+    def _assinar(self, path: str, expires_in: int) -> str:
+        return f"memoria://{self.nome}/{path}?expires={int(time.time()) + int(expires_in)}"
+
+    def create_signed_url(self, path: str, expires_in: int):
+        self._ida_e_volta()
+        self.chamadas_assinatura += 1
+        url = self._assinar(path, expires_in)
+        return {"signedURL": url, "signedUrl": url}
+
+    def create_signed_urls(self, paths: list[str], expires_in: int):
+        self._ida_e_volta()
+        self.chamadas_assinatura += 1
+        return [
+            {"error": None, "path": p, "signedURL": self._assinar(p, expires_in), "signedUrl": self._assinar(p, expires_in)}
+            for p in paths
+        ]
+
+    def remove(self, paths: list[str]):
+        self._ida_e_volta()
+        return [{"name": p} for p in paths if self.objetos.pop(p, None) is not None]
+
+    def exists(self, path: str) -> bool:
+        self._ida_e_volta()
+        return path in self.objetos
+
+    def get_public_url(self, path: str) -> str:
+        return f"memoria://{self.nome}/{path}"
+
+
+class _StorageMemoria:
+    def __init__(self, latencia_s: float = 0.0, banda_bps: float | None = None):
+        self.buckets: dict[str, _BucketMemoria] = {}
+        self.latencia_s = latencia_s
+        self.banda_bps = banda_bps
+
+    def from_(self, bucket: str) -> _BucketMemoria:
+        if bucket not in self.buckets:
+            self.buckets[bucket] = _BucketMemoria(bucket, self.latencia_s, self.banda_bps)
+        return self.buckets[bucket]
+
+    @property
+    def bytes_armazenados(self) -> int:
+        return sum(len(v) for b in self.buckets.values() for v in b.objetos.values())
+
+
+_OPERADORES = {
+    "eq": lambda a, b: a == b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+def _dividir_no_topo(expr: str) -> list[str]:
+    """Separa por vírgula fora de parênteses e aspas."""
+    partes, atual, nivel, aspas = [], [], 0, False
+    anterior = ""
+    for ch in expr:
+        if ch == '"' and anterior != "\\":
+            aspas = not aspas
+        elif not aspas and ch == "(":
+            nivel += 1
+        elif not aspas and ch == ")":
+            nivel -= 1
+        if ch == "," and nivel == 0 and not aspas:
+            partes.append("".join(atual))
+            atual = []
+        else:
+            atual.append(ch)
+        anterior = ch
+    partes.append("".join(atual))
+    return partes
+
+
+def _filtro_postgrest(expr: str):
+    """Filtro lógico do PostgREST (or=/and=): "a.lt.1,and(b.eq.2,c.lt.3)"."""
+    expr = expr.strip()
+    for logico, combina in (("and(", all), ("or(", any)):
+        if expr.startswith(logico) and expr.endswith(")"):
+            filhos = [_filtro_postgrest(p) for p in _dividir_no_topo(expr[len(logico):-1])]
+            return lambda r: combina(f(r) for f in filhos)
+    coluna, op, valor = expr.split(".", 2)
+    if valor.startswith('"') and valor.endswith('"'):
+        valor = valor[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return lambda r: r.get(coluna) is not None and _OPERADORES[op](str(r.get(coluna)), valor)
+
+
+class _ConsultaMemoria:
+    def __init__(self, linhas: list[dict], latencia_s: float = 0.0):
+        self._linhas = linhas
+        self._latencia_s = latencia_s
+        self._filtros = []
+        self._ordem = []
+        self._colunas = None
+        self._limite = None
+        self._insert = None
+        self._delete = False
+
+    def insert(self, registro: dict):
+        self._insert = dict(registro)
+        return self
+
+    def delete(self):
+        self._delete = True
+        return self
+
+    def select(self, colunas: str = "*"):
+        nomes = [c.strip() for c in colunas.split(",") if c.strip()]
+        self._colunas = None if "*" in nomes else nomes
+        return self
+
+    def eq(self, coluna: str, valor):
+        self._filtros.append(lambda r: r.get(coluna) == valor)
+        return self
+
+    def gte(self, coluna: str, valor):
+        self._filtros.append(lambda r: r.get(coluna) is not None and r.get(coluna) >= valor)
+        return self
+
+    def lte(self, coluna: str, valor):
+        self._filtros.append(lambda r: r.get(coluna) is not None and r.get(coluna) <= valor)
+        return self
+
+    def lt(self, coluna: str, valor):
+        self._filtros.append(lambda r: r.get(coluna) is not None and r.get(coluna) < valor)
+        return self
+
+    def or_(self, filtros: str):
+        self._filtros.append(_filtro_postgrest(f"or({filtros})"))
+        return self
+
+    def order(self, coluna: str, desc: bool = False):
+        self._ordem.append((coluna, desc))
+        return self
+
+    def limit(self, n: int):
+        self._limite = n
+        return self
+
+    def execute(self):
+        if self._latencia_s:
+            time.sleep(self._latencia_s)
+        if self._insert is not None:
+            registro = {"id": str(uuid.uuid4()), **self._insert}
+            self._linhas.append(registro)
+            return SimpleNamespace(data=[registro])
+
+        dados = [r for r in self._linhas if all(f(r) for f in self._filtros)]
+        if self._delete:
+            apagadas = {id(r) for r in dados}
+            self._linhas[:] = [r for r in self._linhas if id(r) not in apagadas]
+            return SimpleNamespace(data=dados)
+        # sort estável: da chave menos importante para a principal
+        for coluna, desc in reversed(self._ordem):
+            dados.sort(key=lambda r: r.get(coluna) or "", reverse=desc)
+        if self._limite is not None:
+            dados = dados[: self._limite]
+        if self._colunas is not None:
+            dados = [{c: r.get(c) for c in self._colunas} for r in dados]
+        return SimpleNamespace(data=dados)
+
+
+class SupabaseMemoria:
+    """
+    Substituto mínimo do `supabase.Client` (tabelas + storage em memória).
+    `latencia_s` simula a ida e volta ao banco/Storage em cada execute() de
+    tabela e em cada chamada ao Storage (upload, assinatura); `banda_bps`
+    (bytes/s) soma o tempo de transferência dos uploads.
+    """
+
+    def __init__(self, latencia_s: float = 0.0, banda_bps: float | None = None):
+        self.tabelas: dict[str, list[dict]] = {}
+        self.storage = _StorageMemoria(latencia_s, banda_bps)
+        self.latencia_s = latencia_s
+
+    def table(self, nome: str) -> _ConsultaMemoria:
+        return _ConsultaMemoria(self.tabelas.setdefault(nome, []), self.latencia_s)
@@ -0,0 +1,150 @@
+"""
+UTILITÁRIOS DE MEDIÇÃO (benchmarks)
+
+- cronometrar: repete uma função e devolve mediana/min/max em segundos
+- pico_memoria: pico de alocação (tracemalloc) de uma execução
+- metadados_ambiente: commit, versões das libs, máquina
+- salvar_relatorio / comparar_relatorios: JSON comparável entre commits
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib import metadata
+
+FORMATO_RELATORIO = 1
+
+_LIBS = ["pandas", "numpy", "openpyxl", "matplotlib", "reportlab", "pyarrow", "flask", "openai"]
+
+
+def cronometrar(fn, repeticoes: int = 3, aquecimento: int = 0) -> dict:
+    for _ in range(aquecimento):
+        fn()
+
+    tempos = []
+    resultado = None
+    for _ in range(max(1, repeticoes)):
+        t0 = time.perf_counter()
+        resultado = fn()
+        tempos.append(time.perf_counter() - t0)
+
+    return {
+        "mediana_s": statistics.median(tempos),
+        "min_s": min(tempos),
+        "max_s": max(tempos),
+        "repeticoes": len(tempos),
+        "_resultado": resultado,
+    }
+
+
+def pico_memoria(fn) -> tuple[float, object]:
+    """
+    Executa `fn` uma vez sob tracemalloc e devolve (pico em MB, resultado).
+    """
+    ja_ativo = tracemalloc.is_tracing()
+    if not ja_ativo:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    try:
+        resultado = fn()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        if not ja_ativo:
+            tracemalloc.stop()
+    return max(0.0, (pico - base) / (1024 * 1024)), resultado
+
+
+def rss_max_mb() -> float:
+    try:
+        import resource
+        kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return kb / 1024.0 if sys.platform != "darwin" else kb / (1024.0 * 1024.0)
+    except Exception:
+        return 0.0
+
+
+def _commit_atual() -> str | None:
+    try:
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=raiz, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def metadados_ambiente() -> dict:
+    versoes = {}
+    for lib in _LIBS:
+        try:
+            versoes[lib] = metadata.version(lib)
+        except Exception:
+            versoes[lib] = None
+
+    return {
+        "commit": _commit_atual(),
+        "gerado_em": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "libs": versoes,
+    }
+
+
+def limpar_resultado(d: dict) -> dict:
+    return {k: v for k, v in d.items() if not k.startswith("_")}
+
+
+def salvar_relatorio(nome: str, config: dict, resultados: list[dict], caminho: str | None = None) -> dict:
+    relatorio = {
+        "formato": FORMATO_RELATORIO,
+        "benchmark": nome,
+        "ambiente": metadados_ambiente(),
+        "config": config,
+        "resultados": resultados,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=2, default=str)
+    if caminho:
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(texto)
+        print(f"💾 Relatório salvo em {caminho}")
+    return relatorio
+
+
+def comparar_relatorios(base: dict, atual: dict, chave_caso=("tipo", "escala")) -> list[dict]:
+    """
+    Compara dois relatórios do mesmo benchmark etapa por etapa
+    (delta % da mediana; negativo = ficou mais rápido).
+    """
+    def _indexar(rel):
+        return {tuple(r.get(k) for k in chave_caso): r for r in rel.get("resultados", [])}
+
+    idx_base = _indexar(base)
+    linhas = []
+    for caso, r_atual in _indexar(atual).items():
+        r_base = idx_base.get(caso)
+        if not r_base:
+            continue
+        for etapa, m_atual in (r_atual.get("etapas") or {}).items():
+            m_base = (r_base.get("etapas") or {}).get(etapa)
+            if not m_base or not m_base.get("mediana_s"):
+                continue
+            delta = (m_atual["mediana_s"] - m_base["mediana_s"]) / m_base["mediana_s"] * 100.0
+            linhas.append({
+                "caso": caso,
+                "etapa": etapa,
+                "base_s": m_base["mediana_s"],
+                "atual_s": m_atual["mediana_s"],
+                "delta_pct": delta,
+            })
+    return linhas
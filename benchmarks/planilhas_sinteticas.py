@@ -0,0 +1,133 @@
+"""
+GERADORES DE PLANILHAS SINTÉTICAS (benchmarks)
+
+Cria DataFrames no mesmo formato das planilhas reais (os três tipos que
+`identificar_tipo` reconhece):
+- Concorrência: ~65 respostas (ações de concorrentes por cliente)
+- Merchandising: ~1357 respostas (checklist SIM/NÃO por loja/promotor)
+- Preço: ~2166 respostas (preço nosso x concorrente por produto)
+
+Tudo é determinístico (seed fixa) para que os números sejam comparáveis
+entre commits.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+# Tamanho "nominal" de cada tipo (volume típico das planilhas reais)
+LINHAS_NOMINAIS = {
+    "concorrencia": 65,
+    "merchandising": 1357,
+    "preco": 2166,
+}
+
+_REGIOES = ["Zona Sul", "Zona Norte", "Zona Oeste", "Centro", "Baixada", "Niterói", "São Gonçalo", "Barra"]
+_REDES = ["GUANABARA", "PREZUNIC", "ASSAÍ", "ATACADÃO", "MUNDIAL", "SUPERMARKET", "INTER", "ZONA SUL"]
+_PROMOTORES = ["VICTOR", "CELSO", "ANA", "BRUNO", "CARLA", "DIEGO", "FERNANDA", "GABRIEL", "HELENA", "IGOR"]
+_CONCORRENTES = ["FLOR DE YPÊ", "SABONETE NIVEA", "DOVE", "PROTEX", "LUX", "PALMOLIVE", "GRANADO", "REXONA"]
+_ACOES = ["BAIXA DE PREÇO", "PONTA DE GÔNDOLA", "DEGUSTAÇÃO", "ENCARTE", "LEVE 3 PAGUE 2", "BRINDE", "ILHA PROMOCIONAL"]
+_CATEGORIAS = ["Sabonete", "Shampoo", "Condicionador", "Desodorante", "Creme dental", "Hidratante"]
+_ITENS_CHECKLIST = [
+    "Produto na gôndola", "Preço visível", "Planograma respeitado", "Material de PDV",
+    "Ponta de gôndola", "Estoque abastecido", "Limpeza da área", "Etiqueta correta",
+    "Ruptura evitada", "Share de prateleira", "Exposição na altura dos olhos", "Cartaz promocional",
+]
+
+
+def _rng(seed: int) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def _lojas(n_lojas: int) -> list[str]:
+    return [f"{_REDES[i % len(_REDES)]} LOJA {i + 1:03d}" for i in range(n_lojas)]
+
+
+def gerar_concorrencia(linhas: int | None = None, seed: int = 42) -> pd.DataFrame:
+    linhas = linhas or LINHAS_NOMINAIS["concorrencia"]
+    rng = _rng(seed)
+    clientes = _lojas(max(8, linhas // 8))
+
+    datas = pd.Timestamp("2025-03-01") + pd.to_timedelta(rng.integers(0, 60, linhas), unit="D")
+    concorrente = rng.choice(_CONCORRENTES, linhas)
+    cliente = rng.choice(clientes, linhas)
+
+    return pd.DataFrame({
+        "Linha": np.arange(1, linhas + 1),
+        "Ident": [f"{c} - {l}" for c, l in zip(concorrente, cliente)],
+        "Nome": rng.choice(_PROMOTORES, linhas),
+        "Data": datas.strftime("%d/%m/%Y"),
+        "Nome do cliente": cliente,
+        "Região": rng.choice(_REGIOES, linhas),
+        "Nome do concorrente": concorrente,
+        "Tipo de ação": rng.choice(_ACOES, linhas),
+        "Comentários": rng.choice(["Baixa de preço", "Ação agressiva", "Sem impacto aparente", "Ação no fim de semana"], linhas),
+    })
+
+
+def gerar_merchandising(linhas: int | None = None, seed: int = 42, itens: int | None = None) -> pd.DataFrame:
+    linhas = linhas or LINHAS_NOMINAIS["merchandising"]
+    rng = _rng(seed)
+    lojas = _lojas(max(10, linhas // 20))
+
+    itens_nomes = list(_ITENS_CHECKLIST)
+    if itens and itens > len(itens_nomes):
+        itens_nomes += [f"Item checklist {i + 1:02d}" for i in range(len(itens_nomes), itens)]
+    itens_nomes = itens_nomes[:itens] if itens else itens_nomes
+
+    dados = {
+        "Loja": rng.choice(lojas, linhas),
+        "Região": rng.choice(_REGIOES, linhas),
+        "Promotor": rng.choice(_PROMOTORES, linhas),
+        "Categoria": rng.choice(_CATEGORIAS, linhas),
+    }
+    # cada item tem uma taxa de conformidade própria (itens "ruins" e "bons")
+    taxas = rng.uniform(0.35, 0.95, len(itens_nomes))
+    for nome, taxa in zip(itens_nomes, taxas):
+        ok = rng.random(linhas) < taxa
+        dados[nome] = np.where(ok, "Sim", "Não")
+
+    return pd.DataFrame(dados)
+
+
+def gerar_preco(linhas: int | None = None, seed: int = 42) -> pd.DataFrame:
+    linhas = linhas or LINHAS_NOMINAIS["preco"]
+    rng = _rng(seed)
+    catalogo = [(cat, f"{cat} {marca} {tam}") for cat in _CATEGORIAS for marca in ("Xplors", "Premium", "Eco") for tam in ("90g", "200ml", "400ml")]
+
+    escolha = rng.integers(0, len(catalogo), linhas)
+    categoria = [catalogo[i][0] for i in escolha]
+    produto = [catalogo[i][1] for i in escolha]
+    base = 5.0 + np.array([zlib.crc32(p.encode()) % 2000 for p in produto]) / 100.0
+    nosso = np.round(base * rng.normal(1.0, 0.08, linhas), 2)
+    conc = np.round(base * rng.normal(1.0, 0.10, linhas), 2)
+
+    return pd.DataFrame({
+        "Loja": rng.choice(_lojas(max(10, linhas // 30)), linhas),
+        "Região": rng.choice(_REGIOES, linhas),
+        "Categoria": categoria,
+        "Produto": produto,
+        "Preço nosso": nosso,
+        "Preço concorrente": conc,
+    })
+
+
+GERADORES = {
+    "concorrencia": gerar_concorrencia,
+    "merchandising": gerar_merchandising,
+    "preco": gerar_preco,
+}
+
+
+def gerar(tipo: str, escala: float = 1.0, seed: int = 42) -> pd.DataFrame:
+    """
+    Gera a planilha sintética de um tipo, com `escala` x o tamanho nominal.
+    """
+    linhas = max(1, int(round(LINHAS_NOMINAIS[tipo] * escala)))
+    return GERADORES[tipo](linhas, seed=seed)
+
+
+def salvar_xlsx(df: pd.DataFrame, caminho: str) -> str:
+    df.to_excel(caminho, index=False, engine="openpyxl")
+    return caminho
@@ -0,0 +1,30 @@
+"""
+GUNICORN (Xplors) - configuração de produção (Cloud Run)
+
+- preload_app: o master importa main.py (pandas, matplotlib, reportlab...)
+  uma vez; os workers herdam as páginas no fork (copy-on-write)
+- post_worker_init: cada worker roda app/aquecimento.aquecer() antes de
+  aceitar conexões - gráfico e PDF descartáveis, pools da OpenAI/Supabase
+  abertos no próprio processo (conexões não atravessam o fork)
+
+Uso (Dockerfile):
+  gunicorn -c gunicorn.conf.py main:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").strip().lower() not in ("0", "false", "nao", "não")
+accesslog = "-"
+
+
+def post_worker_init(worker):
+    import main
+    from app.aquecimento import aquecer
+
+    estado = aquecer(main.client, main.supabase)
+    worker.log.info("Worker %s pronto (aquecimento %.2fs, falhas: %s)",
+                    worker.pid, estado["total_s"] or 0.0, ", ".join(estado["erros"]) or "nenhuma")
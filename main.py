@@ -1,19 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, redirect, url_for
 from flask_cors import CORS
 from openai import OpenAI
 from dotenv import load_dotenv
 import os
 import pandas as pd
-from supabase import create_client, Client
-from app.pdf_generator_com_graficos import gerar_pdf_xplors
-from app.cost_tracker import CostTracker, estimar_tokens_texto, estimar_tokens_imagem
+from app.armazenamento import ArmazenamentoLocal, criar_cliente
+from app.cost_tracker import CostTracker, estimar_tokens_texto, estimar_tokens_imagem, tokens_em_cache
 from app.image_analyzer import ImageAnalyzer
+from app.excel_processor import processar_planilha, preparar_planilha, identificar_tipo_com_confianca, confirmar_tipo_planilha
+from app.ingestao import ler_planilha_amostrada
+from app.prompts import formatar_fatos, REGRAS_INTERPRETACAO
+from app.classificador_tipo import TIPOS
+from app.upload_streaming import UPLOAD_STREAMING, receber_upload
+from app.cota_local import CotaIndisponivel, CotaLocal
+from app.urls_assinadas import CacheUrlsAssinadas, anexar_urls
+from app.pdf_conteudo import armazenar_pdf
+from app.sessao_analise import ResultadoIA, SessaoAnalise, sessoes
+from app.snapshot_planilha import hash_arquivo
+from app.incremental import estados_incrementais, insumos_incrementais
+from app.computacao import FilaCheia, computacao, gerar_pdf
+from app.tabela_compartilhada import tabelas
+from app.admissao import MemoriaInsuficiente, controle_admissao, estimar, estimar_arquivo
+from app.grafo_etapas import GrafoEtapas
+from app.aquecimento import aquecer, instrumentar, status as status_aquecimento
+from app.historico import CursorInvalido, colunas_projecao, listar_pagina, LIMITE_PADRAO
+from werkzeug.middleware.proxy_fix import ProxyFix
+import time
 import uuid
+import hashlib
+import json
 from datetime import datetime
 
 load_dotenv()
 
 app = Flask(__name__)
+# Cloud Run termina o TLS: url_for(..., _external=True) precisa do esquema/host originais
+app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# latência da primeira requisição de cada worker (aquecido ou não) -> /health
+instrumentar(app)
 
 # =========================
 # CORS (para o Frontend)
@@ -43,16 +67,19 @@ client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 # =========================
 # Configuração Supabase
 # =========================
-supabase_url = os.getenv('SUPABASE_URL')
-supabase_key = os.getenv('SUPABASE_KEY')
+# ARMAZENAMENTO=local: SQLite + disco no lugar do Supabase (teste de carga sem projeto no ar)
+supabase = criar_cliente()
 
-if not supabase_url or not supabase_key:
+if supabase is None:
     print("⚠️ AVISO: Variáveis SUPABASE não configuradas")
-    supabase = None
-else:
-    supabase: Client = create_client(supabase_url, supabase_key)
+elif not isinstance(supabase, ArmazenamentoLocal):
     print("✅ Supabase conectado!")
 
+BUCKET_PDF = 'relatorios-pdf'
+
+# URLs assinadas dos PDFs: emitidas ao abrir/listar, não no upload
+urls_pdf = CacheUrlsAssinadas(lambda: supabase.storage.from_(BUCKET_PDF)) if supabase else None
+
 # =========================
 # Inicializar trackers
 # =========================
@@ -66,9 +93,31 @@ else:
 # Limite padrão
 LIMITE_MENSAL_PADRAO = float(os.getenv('LIMITE_MENSAL', '100.0'))
 
+# Admissão pelo livro local (pré-cobrança + sincronização periódica com api_usage)
+cota = CotaLocal(cost_tracker, LIMITE_MENSAL_PADRAO) if cost_tracker else None
+
 
-def analisar_com_openai(dados_excel):
-    """Analisa dados com GPT-4o"""
+# Prefixo estático (cacheável pelo provedor): sempre o mesmo texto, primeiro.
+# Colunas, fatos e amostra - que mudam a cada upload - vão depois, na mensagem do usuário.
+PROMPT_SISTEMA_GERAL = f"""Você é um analista de dados especializado.
+
+Analise os dados fornecidos na mensagem do usuário (colunas, total de linhas,
+fatos já calculados e amostra) e escreva a parte analítica do relatório:
+
+1. RESUMO EXECUTIVO
+2. INTERPRETAÇÃO DOS RESULTADOS
+3. INSIGHTS E DESCOBERTAS
+4. RECOMENDAÇÕES
+{REGRAS_INTERPRETACAO}"""
+
+
+def analisar_com_openai(dados_excel, insumos=None):
+    """
+    Analisa dados com GPT-4o.
+    Os KPIs/rankings (insumos) já vão para o PDF como tabelas: o prompt pede
+    só interpretação e recomendações.
+    Retorna (texto, tokens_in, tokens_out, tokens_cache, latência_s).
+    """
     try:
         if len(dados_excel) > 100:
             dados_amostra = dados_excel.head(100)
@@ -76,51 +125,104 @@ def analisar_com_openai(dados_excel):
         else:
             dados_amostra = dados_excel
             info_adicional = ""
+        amostra = dados_excel.attrs.get('amostra')
+        if amostra:
+            # planilha lida por amostragem (app/admissao.py): fatos e totais são da amostra
+            info_adicional += (f"\n\nNOTA: A planilha tem cerca de {amostra['linhas_estimadas']} linhas; "
+                               f"os dados e fatos acima são de uma amostra aleatória de {amostra['linhas']} linhas.")
 
         dados_texto = dados_amostra.to_string()
         colunas = ", ".join(dados_excel.columns.tolist())
 
-        prompt = f"""
-Analise os dados fornecidos e crie um relatório COMPLETO e DETALHADO.
-
-Colunas: {colunas}
+        dados_usuario = f"""Colunas: {colunas}
 Total de linhas: {len(dados_excel)}
 
+FATOS CALCULADOS (já estão no relatório):
+{formatar_fatos(insumos)}
+
 Dados:
 {dados_texto}
-{info_adicional}
-
-Crie um relatório profissional com:
-
-1. RESUMO EXECUTIVO
-2. ANÁLISE DETALHADA
-3. INSIGHTS E DESCOBERTAS
-4. RECOMENDAÇÕES
-
-Seja direto, claro e profissional.
-"""
+{info_adicional}"""
 
+        inicio = time.perf_counter()
         response = client.chat.completions.create(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": "Você é um analista de dados especializado."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": PROMPT_SISTEMA_GERAL},
+                {"role": "user", "content": dados_usuario}
             ],
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=1600
         )
+        latencia = time.perf_counter() - inicio
 
         analise = response.choices[0].message.content
         tokens_input = response.usage.prompt_tokens
         tokens_output = response.usage.completion_tokens
+        tokens_cache = tokens_em_cache(response.usage)
 
-        return analise, tokens_input, tokens_output
+        return analise, tokens_input, tokens_output, tokens_cache, latencia
 
     except Exception as e:
         print(f"Erro ao analisar com OpenAI: {e}")
         raise
 
 
+PROMPT_SISTEMA_INCREMENTAL = f"""Você é um analista de dados especializado.
+
+A planilha do usuário é acumulada: o relatório anterior já analisou as linhas
+antigas. A mensagem do usuário traz as conclusões desse relatório, as
+variações já calculadas (antes → agora) e uma amostra só das linhas novas.
+Escreva o relatório do que mudou:
+
+1. O QUE MUDOU (resumo executivo)
+2. CONCLUSÕES ANTERIORES: O QUE SE CONFIRMA E O QUE MUDA
+3. PONTOS DE ATENÇÃO NOS NOVOS REGISTROS
+4. RECOMENDAÇÕES
+{REGRAS_INTERPRETACAO}"""
+
+
+def analisar_incremento_com_openai(incremento, insumos):
+    """
+    Relatório "o que mudou" de uma planilha acumulada (app/incremental.py):
+    o modelo recebe as conclusões anteriores, as variações e uma amostra das
+    linhas novas - não a planilha inteira.
+    Retorna (texto, tokens_in, tokens_out, tokens_cache, latência_s).
+    """
+    try:
+        novas = incremento.novas
+        dados_usuario = f"""Colunas: {", ".join(map(str, novas.columns))}
+Total de linhas: {incremento.agregados.linhas} ({len(novas)} novas desde {incremento.anterior.gerado_em or "o último relatório"})
+
+CONCLUSÕES DO RELATÓRIO ANTERIOR:
+{incremento.anterior.conclusoes or "(indisponíveis)"}
+
+VARIAÇÕES CALCULADAS (já estão no relatório):
+{formatar_fatos(insumos)}
+
+Amostra das linhas novas:
+{novas.head(30).to_string()}"""
+
+        inicio = time.perf_counter()
+        response = client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": PROMPT_SISTEMA_INCREMENTAL},
+                {"role": "user", "content": dados_usuario}
+            ],
+            temperature=0.7,
+            max_tokens=900
+        )
+        latencia = time.perf_counter() - inicio
+
+        return (response.choices[0].message.content, response.usage.prompt_tokens,
+                response.usage.completion_tokens, tokens_em_cache(response.usage), latencia)
+
+    except Exception as e:
+        print(f"Erro ao analisar incremento com OpenAI: {e}")
+        raise
+
+
 # =========================
 # Rotas básicas
 # =========================
@@ -131,7 +233,7 @@ def home():
         "msg": "API do Xplors Backend está online ✅",
         "rotas": {
             "health": "GET /health",
-            "upload_excel": "POST /upload (form-data: file, user_id)",
+            "upload_excel": "POST /upload (form-data: file ou sessao_id, user_id, tipo(opcional: confirma o tipo))",
             "upload_imagem": "POST /upload-imagem (form-data: file, user_id, tipo(opcional), contexto(opcional))",
             "custos": "GET /custos/<user_id>?dias=30"
         }
@@ -145,6 +247,10 @@ def health():
         'openai': 'configured' if os.getenv('OPENAI_API_KEY') else 'not configured',
         'supabase': 'connected' if supabase else 'not configured',
         'versao': 'GCP-MERCHANDISING',
+        'aquecimento': status_aquecimento(),
+        'computacao': computacao.estatisticas(),
+        'tabelas_compartilhadas': tabelas.estatisticas(),
+        'admissao': controle_admissao.estatisticas(),
         'features': [
             'Análise de planilhas',
             'PDFs com gráficos',
@@ -158,24 +264,66 @@ def health():
 # =========================
 # Upload e análise Excel
 # =========================
+def _pre_analise_upload(parcial: pd.DataFrame, campos: dict):
+    """
+    Roda com as primeiras linhas do CSV, enquanto o resto do upload chega.
+    O tipo só depende dos nomes das colunas e das primeiras linhas, então
+    vale para a planilha inteira se as colunas baterem. O cliente usado vai
+    junto: se o arquivo chegou antes do user_id, a especulação não viu o
+    índice de tipos confirmados do cliente.
+    """
+    parcial = preparar_planilha(parcial)
+    cliente = campos.get('user_id')
+    return list(parcial.columns), cliente, identificar_tipo_com_confianca(parcial, cliente=cliente)
+
+
+def _classificacao_especulativa(recebido, df: pd.DataFrame, cliente):
+    if not recebido or not recebido.especulacao:
+        return None
+    colunas, cliente_especulacao, classificacao = recebido.especulacao
+    if colunas != list(df.columns) or cliente_especulacao != cliente:
+        return None
+    print(f"⚡ Tipo pré-classificado durante o upload ({recebido.linhas_especulacao} linhas)")
+    return classificacao
+
+
 @app.route('/upload', methods=['POST'])
 def upload_arquivo():
     """Endpoint de upload e análise de planilhas"""
+    recebido = None
+    reserva = None
+    sessao = None
+    admissao = None
     try:
-        if 'file' not in request.files:
-            return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+        boundary = request.mimetype_params.get('boundary')
+        if UPLOAD_STREAMING and request.mimetype == 'multipart/form-data' and boundary:
+            # corpo lido em blocos: CSV já é lido (e o tipo pré-classificado) enquanto chega,
+            # se o corpo inteiro lido como CSV cabe agora na memória (senão só spool, admissão depois)
+            admissao = controle_admissao.tentar(estimar(request.content_length or 0, 'csv'))
+            recebido = receber_upload(request.stream, boundary, ao_amostrar=_pre_analise_upload,
+                                      ler_csv=admissao is not None)
+            campos = recebido.campos
+            nome_arquivo = recebido.nome_arquivo
+            if recebido.arquivo is None and not campos.get('sessao_id'):
+                return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+            if recebido.arquivo is not None:
+                print(f"📥 Upload recebido em streaming: {recebido.bytes_recebidos / 1024:.0f} KB ({recebido.formato})")
+        else:
+            campos = request.form
+            if 'file' not in request.files and not campos.get('sessao_id'):
+                return jsonify({'error': 'Nenhum arquivo enviado'}), 400
+            nome_arquivo = request.files['file'].filename if 'file' in request.files else None
 
-        arquivo = request.files['file']
-        user_id = request.form.get('user_id')
+        user_id = campos.get('user_id')
 
         if not user_id:
             return jsonify({'error': 'user_id é obrigatório'}), 400
 
-        # VERIFICAR LIMITE
-        if cost_tracker:
-            status_limite = cost_tracker.verificar_limite(user_id, LIMITE_MENSAL_PADRAO)
+        # VERIFICAR LIMITE (pré-cobra o custo estimado da análise)
+        if cota:
+            reserva, status_limite = cota.reservar(user_id, 'analise')
 
-            if not status_limite['pode_usar']:
+            if not reserva:
                 return jsonify({
                     'error': 'Limite mensal atingido',
                     'limite_info': status_limite
@@ -184,32 +332,105 @@ def upload_arquivo():
             if status_limite.get('alerta'):
                 print(f"⚠️ Usuário {user_id} está em {status_limite['percentual']:.1f}% do limite")
 
-        if arquivo.filename == '':
-            return jsonify({'error': 'Nome de arquivo vazio'}), 400
-
-        # Ler Excel
-        print(f"📄 Lendo arquivo: {arquivo.filename}")
-        df = pd.read_excel(arquivo)
-        print(f"✅ Excel lido! {len(df)} linhas")
-
-        # Analisar
-        print(f"🤖 Analisando com IA...")
-        analise_texto, tokens_input, tokens_output = analisar_com_openai(df)
-        print("✅ Análise concluída!")
+        # Sessão da planilha: a mesma planilha (ou sessao_id) analisada de novo,
+        # com outro tipo, reaproveita leitura, dimensões, Top 10 e análises já feitas
+        if campos.get('sessao_id') and not nome_arquivo:
+            sessao = sessoes.obter(campos['sessao_id'], user_id, reter=True)
+            if sessao is None:
+                return jsonify({'error': 'Sessão expirada; envie o arquivo novamente'}), 404
+        else:
+            if not nome_arquivo:
+                return jsonify({'error': 'Nome de arquivo vazio'}), 400
+            if recebido:
+                arquivo_hash = recebido.arquivo_hash
+            else:
+                arquivo_hash = hash_arquivo(request.files['file'].stream)
+            sessao = sessoes.por_arquivo(user_id, arquivo_hash, reter=True)
+
+        if sessao:
+            print(f"♻️ Sessão da planilha reaproveitada: {sessao.nome_arquivo} ({len(sessao.df)} linhas)")
+        else:
+            # Ler Excel (ou snapshot Arrow da mesma planilha, pelo hash)
+            print(f"📄 Lendo arquivo: {nome_arquivo}")
+            arquivo = recebido.arquivo if recebido else request.files['file'].stream
+            df_lido = recebido.df if recebido else None
+            if df_lido is None:
+                # pico da leitura pelas dimensões da planilha: lê, espera na fila, amostra ou 503/413
+                if admissao:
+                    admissao.liberar()
+                admissao = controle_admissao.admitir(estimar_arquivo(arquivo, nome_arquivo, arquivo_hash))
+            if admissao.amostra:
+                # sem snapshot nem índice por hash: a sessão/snapshot da planilha inteira não é esta
+                df_lido = ler_planilha_amostrada(arquivo, admissao.linhas_max, admissao.estimativa.linhas,
+                                                 nome_arquivo, semente=int(arquivo_hash[:8], 16))
+                df = processar_planilha(arquivo, nome_arquivo=nome_arquivo, usar_snapshot=False, df_lido=df_lido)
+                df.attrs['amostra'] = {'linhas': len(df), 'linhas_estimadas': admissao.estimativa.linhas}
+            else:
+                df = processar_planilha(arquivo, nome_arquivo=nome_arquivo,
+                                        arquivo_hash=arquivo_hash, df_lido=df_lido)
+            print(f"✅ Excel lido! {len(df)} linhas")
+            sessao = sessoes.guardar(SessaoAnalise.abrir(user_id, df, nome_arquivo), reter=True)
+
+        df = sessao.df
+        nome_arquivo = sessao.nome_arquivo
+        arquivo_hash = sessao.arquivo_hash
+        amostra = df.attrs.get('amostra')
+
+        # Tipo pela assinatura do schema (antes de qualquer chamada ao modelo).
+        # Se o usuário informou o tipo, ele vira confirmação para o classificador
+        # e é o tipo da análise.
+        if sessao.classificacao is None:
+            classificacao = _classificacao_especulativa(recebido, df, user_id)
+            if classificacao is None:
+                classificacao = identificar_tipo_com_confianca(df, cliente=user_id, dims=sessao.dims)
+            sessao.classificacao = classificacao
+        classificacao = sessao.classificacao
+        tipo = classificacao.tipo
+        tipo_confirmado = (campos.get('tipo') or '').strip().lower()
+        if tipo_confirmado in TIPOS:
+            confirmar_tipo_planilha(df, tipo_confirmado, cliente=user_id, dims=sessao.dims)
+            tipo = tipo_confirmado
+
+        # Analisar (o mesmo tipo já analisado nesta sessão não chama o modelo de novo)
+        resultado_ia = sessao.analise(tipo)
+        chamou_modelo = resultado_ia is None
+        # Planilha acumulada: só as linhas novas desde o último relatório do usuário
+        # (amostra não: as linhas "novas" seriam só as que a amostragem sorteou)
+        incremento = estados_incrementais.detectar(user_id, df, sessao.dims, tipo) \
+            if chamou_modelo and not amostra else None
+
+        # KPIs + rankings determinísticos (sem gráficos PNG: só os números)
+        if incremento:
+            insumos = insumos_incrementais(incremento, tipo, out_dir='/tmp/xplors_charts', backend='vetorial')
+        elif resultado_ia and resultado_ia.insumos is not None:
+            insumos = resultado_ia.insumos
+        else:
+            insumos = sessao.insumos(tipo, out_dir='/tmp/xplors_charts', backend='vetorial')
 
-        # Registrar custo
-        custo = 0
-        if cost_tracker:
-            custo = cost_tracker.registrar_uso(
-                user_id=user_id,
-                tipo='analise',
-                tokens_input=tokens_input,
-                tokens_output=tokens_output,
-                metadata={'arquivo': arquivo.filename, 'linhas': len(df)}
-            )
+        if not chamou_modelo:
+            print(f"♻️ Análise de '{tipo}' reaproveitada da sessão (sem chamada ao modelo)")
+        else:
+            print(f"🤖 Analisando com IA{' (o que mudou)' if incremento else ''}...")
+            if incremento:
+                analise_texto, tokens_input, tokens_output, tokens_cache, latencia_ia = \
+                    analisar_incremento_com_openai(incremento, insumos)
+            else:
+                analise_texto, tokens_input, tokens_output, tokens_cache, latencia_ia = analisar_com_openai(df, insumos)
+            print(f"✅ Análise concluída! ({tokens_output} tokens de saída em {latencia_ia:.1f}s)")
+            resultado_ia = ResultadoIA(analise_texto, tokens_input, tokens_output, tokens_cache, latencia_ia,
+                                       gerado_em=datetime.now().replace(second=0, microsecond=0))
+            if incremento:
+                resultado_ia.modo = 'incremental'
+                resultado_ia.insumos = insumos
+                resultado_ia.novas = incremento.novas
+            elif amostra:
+                resultado_ia.modo = 'amostra'
+        analise_texto = resultado_ia.texto
+        incremental = resultado_ia.modo == 'incremental'
+
+        if chamou_modelo:
+            resultado_ia = sessao.guardar_analise(tipo, resultado_ia)
 
-        # Gerar PDF com gráficos
-        print("📄 Gerando PDF com gráficos...")
         nome_arquivo_pdf = f"analise_{uuid.uuid4().hex[:8]}.pdf"
 
         # Cloud Run usa /tmp
@@ -217,75 +438,168 @@ def upload_arquivo():
 
         dados_analise = {
             'texto': analise_texto,
-            'total_linhas': len(df)
+            'total_linhas': len(df),
+            'kpis': insumos.get('kpis'),
+            'fatos': insumos.get('fatos'),
+            'amostra': amostra,
+            # data impressa no PDF: a da análise (repetir o tipo gera o mesmo PDF/hash)
+            'gerado_em': resultado_ia.gerado_em
         }
 
-        gerar_pdf_xplors(
-            arquivo_saida=caminho_pdf,
-            tipo_analise='geral',
-            dados_analise=dados_analise,
-            dados_excel=df
-        )
-        print("✅ PDF gerado!")
-
-        # Upload para Supabase
-        if supabase:
-            print("☁️ Salvando no Supabase...")
-            with open(caminho_pdf, 'rb') as f:
-                pdf_data = f.read()
-
-            storage_path = f"analises/{user_id}/{nome_arquivo_pdf}"
+        # Pós-análise: custo e estado incremental não esperam o PDF; o banco espera o upload e o custo
+        def _custo():
+            nonlocal reserva
+            # Registrar custo (só quando o modelo foi chamado)
+            if not (cost_tracker and chamou_modelo):
+                return 0
+            custo = cost_tracker.registrar_uso(
+                user_id=user_id,
+                tipo='analise',
+                tokens_input=resultado_ia.tokens_input,
+                tokens_output=resultado_ia.tokens_output,
+                tokens_cache=resultado_ia.tokens_cache,
+                metadata={
+                    'arquivo': nome_arquivo,
+                    'linhas': len(df),
+                    'arquivo_hash': arquivo_hash,
+                    'tipo_detectado': classificacao.tipo,
+                    'tipo_analise': tipo,
+                    'confianca_tipo': classificacao.confianca,
+                    'latencia_ia_s': round(resultado_ia.latencia_s, 3),
+                    'prompt': 'incremental' if incremental else 'interpretacao',  # fatos fora do texto da IA
+                    'linhas_novas': len(resultado_ia.novas) if incremental else None,
+                    'amostra_de': amostra['linhas_estimadas'] if amostra else None
+                }
+            )
+            cota.confirmar(reserva, custo)
+            reserva = None
+            return custo
+
+        def _incremental():
+            # base do próximo upload acumulado (agregados somados, sem reler as linhas antigas)
+            estados_incrementais.registrar(
+                user_id, df, sessao.dims, tipo, analise_texto,
+                hashes=incremento.hashes if incremento else None,
+                agregados=incremento.agregados if incremento else None,
+                arquivo_hash=arquivo_hash,
+            )
 
-            supabase.storage.from_('relatorios-pdf').upload(
-                storage_path,
-                pdf_data,
-                file_options={"content-type": "application/pdf"}
+        def _pdf():
+            # Gerar PDF com gráficos: doc.build + gráficos no pool de computação
+            print("📄 Gerando PDF com gráficos...")
+            gerar_pdf(
+                caminho_pdf,
+                dados_analise,
+                # relatório "o que mudou": gráficos só das linhas novas
+                dados_excel=resultado_ia.novas if incremental else sessao.dados_computacao(),
+                tipo_analise=tipo
             )
+            print("✅ PDF gerado!")
 
-            pdf_url = supabase.storage.from_('relatorios-pdf').get_public_url(storage_path)
+        def _upload(pdf):
+            print("☁️ Salvando no Supabase...")
+            # chave = sha256 do PDF; se outra análise já tem os mesmos bytes, não sobe de novo
+            armazenado = armazenar_pdf(supabase, BUCKET_PDF, caminho_pdf)
+            # só monta a string (sem ida ao Storage); quem abre o PDF usa /analises/<id>/pdf
+            armazenado['url'] = supabase.storage.from_(BUCKET_PDF).get_public_url(armazenado['path'])
             print("✅ PDF salvo no Supabase!")
+            return armazenado
 
-            # Salvar no banco
+        def _banco(upload, custo):
             print("💾 Salvando no banco...")
-            resultado_db = supabase.table('analises').insert({
+            resultado = supabase.table('analises').insert({
                 'user_id': user_id,
-                'nome_arquivo_original': arquivo.filename,
-                'tipo_analise': 'geral',
+                'nome_arquivo_original': nome_arquivo,
+                'tipo_analise': tipo,
                 'total_linhas': len(df),
                 'pdf_filename': nome_arquivo_pdf,
-                'pdf_url': pdf_url,
+                'pdf_url': upload['url'],
+                'pdf_path': upload['path'],
+                'pdf_hash': upload['pdf_hash'],
                 'custo_usd': custo,
+                'arquivo_hash': arquivo_hash,
                 'created_at': datetime.utcnow().isoformat()
             }).execute()
-
             print("✅ Salvo no banco!")
-        else:
-            pdf_url = f"/tmp/{nome_arquivo_pdf}"
-            resultado_db = None
+            return resultado
 
-        # Limpar
-        if os.path.exists(caminho_pdf):
-            os.remove(caminho_pdf)
+        def _limpar(**_):
+            if os.path.exists(caminho_pdf):
+                os.remove(caminho_pdf)
 
-        # Status atualizado
-        status_limite_atualizado = cost_tracker.verificar_limite(user_id, LIMITE_MENSAL_PADRAO) if cost_tracker else None
+        def _limite(custo):
+            # Status atualizado (depois de confirmar o custo desta análise)
+            return cota.status(user_id) if cota else None
+
+        grafo = GrafoEtapas('Pós-análise')
+        grafo.etapa('custo', _custo)
+        if chamou_modelo and not amostra:
+            grafo.etapa('incremental', _incremental)
+        grafo.etapa('pdf', _pdf)
+        if supabase:
+            grafo.etapa('upload', _upload, depende=('pdf',))
+            grafo.etapa('banco', _banco, depende=('upload', 'custo'))
+        grafo.etapa('limpar', _limpar, depende=('upload',) if supabase else ('pdf',))
+        grafo.etapa('limite', _limite, depende=('custo',))
+        etapas = grafo.executar()
+        print(f"🧭 {grafo.resumo()}")
+
+        custo = etapas['custo']
+        resultado_db = etapas.get('banco')
+        if resultado_db:
+            pdf_url = url_for('baixar_pdf', analise_id=resultado_db.data[0]['id'], user_id=user_id, _external=True)
+        else:
+            pdf_url = f"/tmp/{nome_arquivo_pdf}"
+        status_limite_atualizado = etapas['limite']
 
         return jsonify({
             'success': True,
             'message': 'Análise concluída com sucesso!',
             'analise_id': resultado_db.data[0]['id'] if resultado_db else None,
             'pdf_url': pdf_url,
-            'tipo_analise': 'geral',
+            'tipo_analise': tipo,
+            'tipo_detectado': classificacao.tipo,
+            'confianca_tipo': classificacao.confianca,
+            'origem_tipo': classificacao.origem,
+            'tipo_relatorio': tipo,
+            'sessao_id': sessao.id,
+            'modo': resultado_ia.modo,
+            'linhas_novas': len(resultado_ia.novas) if incremental else None,
+            'linhas_estimadas': amostra['linhas_estimadas'] if amostra else None,
             'total_linhas': len(df),
             'custo_usd': custo,
-            'limite_status': status_limite_atualizado
+            'limite_status': status_limite_atualizado,
+            'pos_analise': grafo.relatorio()
         })
 
+    except FilaCheia as e:
+        print(f"⏳ {e}")
+        return jsonify({'error': 'Servidor ocupado; tente novamente em instantes'}), 503, {'Retry-After': '5'}
+    except CotaIndisponivel as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': 'Limite mensal indisponível no momento; tente novamente em instantes'}), 503, {'Retry-After': '5'}
+    except MemoriaInsuficiente as e:
+        print(f"🧠 {e}")
+        if e.definitivo:
+            return jsonify({'error': 'Planilha grande demais para ser analisada; divida o arquivo'}), 413
+        return jsonify({'error': 'Servidor ocupado; tente novamente em instantes'}), 503, {'Retry-After': '10'}
     except Exception as e:
         print(f"❌ Erro: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+    finally:
+        if reserva:
+            cota.cancelar(reserva)
+        if admissao:
+            admissao.liberar()
+        if recebido:
+            recebido.fechar()
+        if sessao is not None:
+            # sessão segura durante a requisição: expulsa no meio, a tabela só é apagada aqui
+            if sessao.efemera:
+                sessao.liberar()
+            sessao.soltar()
 
 
 # =========================
@@ -294,6 +608,7 @@ def upload_arquivo():
 @app.route('/upload-imagem', methods=['POST'])
 def upload_imagem():
     """Endpoint de upload e análise de imagens - MERCHANDISING"""
+    reserva = None
     try:
         if not image_analyzer:
             return jsonify({'error': 'Image analyzer não configurado'}), 500
@@ -309,11 +624,11 @@ def upload_imagem():
         if not user_id:
             return jsonify({'error': 'user_id é obrigatório'}), 400
 
-        # VERIFICAR LIMITE
-        if cost_tracker:
-            status_limite = cost_tracker.verificar_limite(user_id, LIMITE_MENSAL_PADRAO)
+        # VERIFICAR LIMITE (pré-cobra o custo estimado da análise da imagem)
+        if cota:
+            reserva, status_limite = cota.reservar(user_id, 'imagem')
 
-            if not status_limite['pode_usar']:
+            if not reserva:
                 return jsonify({
                     'error': 'Limite mensal atingido',
                     'limite_info': status_limite
@@ -337,12 +652,15 @@ def upload_imagem():
                 tokens_input=resultado['tokens_input'],
                 tokens_output=resultado['tokens_output'],
                 tokens_imagem=tokens_imagem,
+                tokens_cache=resultado.get('tokens_cache', 0),
                 metadata={
                     'arquivo': arquivo.filename,
                     'tipo': resultado['tipo'],
                     'contexto': contexto
                 }
             )
+            cota.confirmar(reserva, custo)
+            reserva = None
 
         # Salvar análise no banco
         if supabase:
@@ -360,7 +678,7 @@ def upload_imagem():
         print("✅ Análise de merchandising concluída!")
 
         # Status atualizado
-        status_limite_atualizado = cost_tracker.verificar_limite(user_id, LIMITE_MENSAL_PADRAO) if cost_tracker else None
+        status_limite_atualizado = cota.status(user_id) if cota else None
 
         return jsonify({
             'success': True,
@@ -371,11 +689,112 @@ def upload_imagem():
             'limite_status': status_limite_atualizado
         })
 
+    except FilaCheia as e:
+        print(f"⏳ {e}")
+        return jsonify({'error': 'Servidor ocupado; tente novamente em instantes'}), 503, {'Retry-After': '5'}
+    except CotaIndisponivel as e:
+        print(f"⚠️ {e}")
+        return jsonify({'error': 'Limite mensal indisponível no momento; tente novamente em instantes'}), 503, {'Retry-After': '5'}
     except Exception as e:
         print(f"❌ Erro: {str(e)}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+    finally:
+        if reserva:
+            cota.cancelar(reserva)
+
+
+# =========================
+# PDF (URL assinada sob demanda)
+# =========================
+def caminho_pdf(registro: dict) -> str | None:
+    """Caminho do PDF no Storage (registros antigos não têm pdf_path)."""
+    if registro.get('pdf_path'):
+        return registro['pdf_path']
+    if registro.get('pdf_filename') and registro.get('user_id'):
+        return f"analises/{registro['user_id']}/{registro['pdf_filename']}"
+    return None
+
+
+@app.route('/analises/<analise_id>/pdf', methods=['GET'])
+def baixar_pdf(analise_id):
+    """Redireciona para uma URL assinada válida do PDF (do cache ou emitida agora)"""
+    try:
+        if not supabase:
+            return jsonify({'error': 'Supabase não configurado'}), 500
+
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id é obrigatório'}), 400
+
+        res = supabase.table('analises')\
+            .select('user_id, pdf_path, pdf_filename')\
+            .eq('id', analise_id)\
+            .eq('user_id', user_id)\
+            .limit(1)\
+            .execute()
+
+        caminho = caminho_pdf(res.data[0]) if res.data else None
+        if not caminho:
+            return jsonify({'error': 'Análise não encontrada'}), 404
+
+        return redirect(urls_pdf.url(caminho), code=302)
+
+    except Exception as e:
+        print(f"❌ Erro: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# =========================
+# Histórico (paginação por cursor)
+# =========================
+@app.route('/analises', methods=['GET'])
+def listar_historico():
+    """
+    Histórico do usuário, mais recentes primeiro.
+    ?user_id=&limite=20&cursor=<proximo_cursor>&campos=id,tipo_analise,...
+    Responde 304 se o If-None-Match bater com o ETag da página.
+    """
+    try:
+        if not supabase:
+            return jsonify({'error': 'Supabase não configurado'}), 500
+
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id é obrigatório'}), 400
+
+        campos = request.args.get('campos')
+        try:
+            limite = int(request.args.get('limite', LIMITE_PADRAO))
+            colunas = colunas_projecao(campos)
+            # pdf_url sai de uma URL assinada; precisa do caminho do PDF
+            com_pdf = not campos or 'pdf_url' in colunas
+            if com_pdf:
+                colunas = [c for c in colunas if c != 'pdf_url']
+                colunas += [c for c in ('pdf_path', 'pdf_filename') if c not in colunas]
+            pagina = listar_pagina(supabase, user_id, limite, request.args.get('cursor'), colunas)
+        except (CursorInvalido, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+
+        if com_pdf:
+            # uma assinatura em lote para a página toda (URLs em cache não custam nada)
+            anexar_urls(pagina['itens'], urls_pdf, lambda r: caminho_pdf({'user_id': user_id, **r}))
+
+        if campos:
+            # colunas lidas só para assinar a URL e montar o cursor ficam fora: a resposta é a projeção pedida
+            pedidas = set(c.strip() for c in campos.split(','))
+            pagina['itens'] = [{c: v for c, v in item.items() if c in pedidas} for item in pagina['itens']]
+
+        corpo = json.dumps(pagina, sort_keys=True, default=str, ensure_ascii=False)
+        resposta = app.response_class(corpo, mimetype='application/json')
+        resposta.set_etag(hashlib.sha1(corpo.encode('utf-8')).hexdigest())
+        resposta.headers['Cache-Control'] = 'private, no-cache'
+        return resposta.make_conditional(request)
+
+    except Exception as e:
+        print(f"❌ Erro: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
 
 # =========================
@@ -411,4 +830,5 @@ if __name__ == '__main__':
     print(f"🚀 Servidor MERCHANDISING rodando em http://0.0.0.0:{port}")
     print(f"🏪 Especializado em análise de stands/displays")
     print(f"☁️ Pronto para Google Cloud Run")
+    aquecer(client, supabase)
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -15,7 +15,10 @@ CREATE TABLE IF NOT EXISTS analises (
     total_linhas INTEGER NOT NULL,
     pdf_url TEXT NOT NULL,
     pdf_filename VARCHAR(255) NOT NULL,
+    pdf_path TEXT,  -- caminho no Storage (URL assinada emitida sob demanda)
+    pdf_hash VARCHAR(64),  -- sha256 do PDF (chave do objeto no Storage; conta referências)
     nome_arquivo_original VARCHAR(255),
+    arquivo_hash VARCHAR(64),  -- sha256 da planilha (chave do snapshot Arrow)
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -23,6 +26,22 @@ CREATE TABLE IF NOT EXISTS analises (
 -- 2. Criar índices para performance
 CREATE INDEX idx_analises_user_id ON analises(user_id);
 CREATE INDEX idx_analises_created_at ON analises(created_at DESC);
+-- Histórico por usuário com cursor (keyset): WHERE user_id = ? AND (created_at, id) < (?, ?)
+-- ORDER BY created_at DESC, id DESC anda direto por este índice, em qualquer página
+CREATE INDEX IF NOT EXISTS idx_analises_user_created ON analises(user_id, created_at DESC, id DESC);
+
+-- Bancos já criados: adiciona a coluna do hash da planilha
+ALTER TABLE analises ADD COLUMN IF NOT EXISTS arquivo_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS idx_analises_arquivo_hash ON analises(user_id, arquivo_hash);
+
+-- Caminho do PDF no Storage (a URL assinada é emitida sob demanda, não gravada)
+ALTER TABLE analises ADD COLUMN IF NOT EXISTS pdf_path TEXT;
+
+-- PDF endereçado pelo conteúdo (conteudo/<h[:2]>/<h>.pdf): as análises com o mesmo
+-- pdf_hash compartilham o objeto; o backend (service role, fora do RLS) só sobe o
+-- PDF se nenhuma linha tem o hash e só remove o objeto quando a última é apagada
+ALTER TABLE analises ADD COLUMN IF NOT EXISTS pdf_hash VARCHAR(64);
+CREATE INDEX IF NOT EXISTS idx_analises_pdf_hash ON analises(pdf_hash);
 
 -- 3. Habilitar Row Level Security (RLS)
 ALTER TABLE analises ENABLE ROW LEVEL SECURITY;